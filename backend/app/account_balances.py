@@ -0,0 +1,67 @@
+import argparse
+import logging
+import uuid
+
+from sqlmodel import Session, select
+
+from app.core.db import engine
+from app.models.organization import Organization
+from app.services.account_balance import AccountBalanceService
+from app.services.account_period_balance import AccountPeriodBalanceService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def verify(session: Session, organization_id: uuid.UUID, year: int | None) -> int:
+    discrepancies = AccountPeriodBalanceService(session, organization_id).verify(year)
+    for d in discrepancies:
+        logger.warning(
+            "Organization %s, account %s, %s/%02d: stored %s/%s, ledger %s/%s",
+            organization_id, d.account_id, d.period_year, d.period_month,
+            d.stored_debit, d.stored_credit, d.ledger_debit, d.ledger_credit,
+        )
+    mismatches = AccountBalanceService(session, organization_id).verify()
+    for m in mismatches:
+        logger.warning(
+            "Organization %s, account %s (%s): balance %s, ledger %s",
+            organization_id, m.account_id, m.code, m.stored_balance, m.ledger_balance,
+        )
+    return len(discrepancies) + len(mismatches)
+
+
+def rebuild(session: Session, organization_id: uuid.UUID, year: int | None) -> None:
+    rows = AccountPeriodBalanceService(session, organization_id).rebuild(year)
+    accounts = AccountBalanceService(session, organization_id).rebuild()
+    session.commit()
+    logger.info(
+        "Organization %s: rebuilt %s monthly account turnovers and %s account balances",
+        organization_id, rows, accounts,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Verify or rebuild the monthly account turnovers and account balances from the ledger")
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    parser.add_argument("--organization-id", type=uuid.UUID, help="Default: all organizations")
+    parser.add_argument("--year", type=int, help="Default: all years")
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        if args.organization_id:
+            organization_ids = [args.organization_id]
+        else:
+            organization_ids = list(session.exec(select(Organization.id)))
+        failed = 0
+        for organization_id in organization_ids:
+            if args.command == "verify":
+                failed += verify(session, organization_id, args.year) > 0
+            else:
+                rebuild(session, organization_id, args.year)
+    if args.command == "verify":
+        logger.info("%s of %s organizations have differences", failed, len(organization_ids))
+        raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Create account_period_balance table
+
+Revision ID: add_account_period_balance
+Revises: partition_vat_registers
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "add_account_period_balance"
+down_revision: Union[str, None] = "partition_vat_registers"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "account_period_balance",
+        sa.Column("organization_id", sa.UUID(), nullable=False),
+        sa.Column("account_id", sa.UUID(), nullable=False),
+        sa.Column("period_year", sa.Integer(), nullable=False),
+        sa.Column("period_month", sa.Integer(), nullable=False),
+
+        # Turnover
+        sa.Column("debit", sa.Numeric(precision=18, scale=2), nullable=False, server_default="0"),
+        sa.Column("credit", sa.Numeric(precision=18, scale=2), nullable=False, server_default="0"),
+        sa.Column("line_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("date_updated", sa.DateTime(timezone=True), nullable=False),
+
+        # Constraints
+        sa.ForeignKeyConstraint(["organization_id"], ["organization.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["account_id"], ["account.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("organization_id", "account_id", "period_year", "period_month"),
+    )
+
+    # Turnovers of the existing ledger
+    op.execute(
+        """
+        INSERT INTO account_period_balance
+            (organization_id, account_id, period_year, period_month, debit, credit, line_count, date_updated)
+        SELECT
+            entry_line.organization_id,
+            entry_line.account_id,
+            CAST(EXTRACT(YEAR FROM journal_entry.entry_date) AS INTEGER),
+            CAST(EXTRACT(MONTH FROM journal_entry.entry_date) AS INTEGER),
+            CAST(COALESCE(SUM(entry_line.debit), 0) AS NUMERIC(18, 2)),
+            CAST(COALESCE(SUM(entry_line.credit), 0) AS NUMERIC(18, 2)),
+            COUNT(*),
+            now()
+        FROM entry_line
+        JOIN journal_entry ON journal_entry.id = entry_line.journal_entry_id
+        GROUP BY 1, 2, 3, 4
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("account_period_balance")
@@ -0,0 +1,37 @@
+"""Index entry_line by account for the account card
+
+Revision ID: add_entry_line_account_index
+Revises: add_account_period_balance
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "add_entry_line_account_index"
+down_revision: Union[str, None] = "add_account_period_balance"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            op.f("ix_entry_line_account_id"),
+            "entry_line",
+            ["account_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            op.f("ix_entry_line_account_id"),
+            table_name="entry_line",
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,51 @@
+"""Indexes for keyset pagination of the list endpoints
+
+Revision ID: add_list_pagination_indexes
+Revises: add_entry_line_account_index
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "add_list_pagination_indexes"
+down_revision: Union[str, None] = "add_entry_line_account_index"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table -> (organization_id, sort key, id)
+LIST_INDEXES = {
+    "sale": ["organization_id", "date_sale", "id"],
+    "purchase": ["organization_id", "date_purchase", "id"],
+    "payment": ["organization_id", "date_payment", "id"],
+    "bank_transaction": ["organization_id", "booking_date", "id"],
+    "contraagent": ["organization_id", "name", "id"],
+    "recipe": ["organization_id", "name", "id"],
+    "stock_levels": ["organization_id", "id"],
+}
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table, columns in LIST_INDEXES.items():
+            op.create_index(
+                f"ix_{table}_organization_list",
+                table,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table in LIST_INDEXES:
+            op.drop_index(
+                f"ix_{table}_organization_list",
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
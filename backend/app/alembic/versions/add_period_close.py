@@ -0,0 +1,190 @@
+"""Period close: snapshot tables and write protection of closed months
+
+Revision ID: add_period_close
+Revises: add_list_pagination_indexes
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "add_period_close"
+down_revision: Union[str, None] = "add_list_pagination_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONEY = sa.Numeric(precision=18, scale=2)
+
+PROTECTED_TABLES = ["journal_entry", "entry_line"]
+TRIGGER_EVENTS = {
+    "INSERT": "NEW TABLE AS new_rows",
+    "UPDATE": "OLD TABLE AS old_rows NEW TABLE AS new_rows",
+    "DELETE": "OLD TABLE AS old_rows",
+}
+
+
+def _money(name: str) -> sa.Column:
+    return sa.Column(name, MONEY, nullable=False, server_default="0")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "period_close",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("organization_id", sa.UUID(), nullable=False),
+        sa.Column("period_year", sa.Integer(), nullable=False),
+        sa.Column("period_month", sa.Integer(), nullable=False),
+        sa.Column("closed_by_id", sa.UUID(), nullable=True),
+        sa.Column("closed_at", sa.DateTime(timezone=True), nullable=False),
+
+        # VAT register totals
+        _money("sales_taxable_base"),
+        _money("sales_vat"),
+        sa.Column("sales_documents", sa.Integer(), nullable=False, server_default="0"),
+        _money("purchases_taxable_base"),
+        _money("purchases_vat"),
+        sa.Column("purchases_documents", sa.Integer(), nullable=False, server_default="0"),
+
+        # Ledger totals
+        _money("turnover_debit"),
+        _money("turnover_credit"),
+
+        # Constraints
+        sa.ForeignKeyConstraint(["organization_id"], ["organization.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["closed_by_id"], ["user.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("organization_id", "period_year", "period_month", name="ux_period_close_month"),
+    )
+
+    op.create_table(
+        "period_account_balance",
+        sa.Column("organization_id", sa.UUID(), nullable=False),
+        sa.Column("account_id", sa.UUID(), nullable=False),
+        sa.Column("period_year", sa.Integer(), nullable=False),
+        sa.Column("period_month", sa.Integer(), nullable=False),
+        _money("opening_balance"),
+        _money("debit"),
+        _money("credit"),
+        _money("closing_balance"),
+        _money("account_opening_balance"),
+        _money("year_debit_before"),
+        _money("year_credit_before"),
+        sa.ForeignKeyConstraint(["organization_id"], ["organization.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["account_id"], ["account.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("organization_id", "account_id", "period_year", "period_month"),
+    )
+
+    create_write_protection()
+
+
+def create_write_protection() -> None:
+    # Write protection, checked once per statement for the distinct months it
+    # touches. The shared advisory lock pairs with the exclusive one taken by
+    # PeriodCloseService, see app/services/period_close.py.
+    op.execute(
+        """
+        CREATE FUNCTION check_period_open(org_id uuid, year integer, month integer) RETURNS void
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            PERFORM pg_advisory_xact_lock_shared(hashtextextended('period_close:' || org_id::text, 0));
+            IF EXISTS (
+                SELECT 1 FROM period_close
+                WHERE organization_id = org_id
+                  AND period_year = year
+                  AND period_month = month
+            ) AND EXISTS (
+                -- Not while the organization itself is deleted
+                SELECT 1 FROM organization WHERE id = org_id
+            ) THEN
+                RAISE EXCEPTION 'Period %-% is closed', year, lpad(month::text, 2, '0')
+                    USING ERRCODE = 'check_violation';
+            END IF;
+        END
+        $$
+        """
+    )
+    # Transition tables are old_rows for UPDATE and DELETE, new_rows for
+    # INSERT and UPDATE.
+    op.execute(
+        """
+        CREATE FUNCTION journal_entry_period_open() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                PERFORM check_period_open(organization_id, year, month) FROM (
+                    SELECT DISTINCT organization_id,
+                        EXTRACT(YEAR FROM entry_date)::integer AS year,
+                        EXTRACT(MONTH FROM entry_date)::integer AS month
+                    FROM old_rows
+                ) periods;
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                PERFORM check_period_open(organization_id, year, month) FROM (
+                    SELECT DISTINCT organization_id,
+                        EXTRACT(YEAR FROM entry_date)::integer AS year,
+                        EXTRACT(MONTH FROM entry_date)::integer AS month
+                    FROM new_rows
+                ) periods;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        CREATE FUNCTION entry_line_period_open() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            -- Lines whose entry is deleted in the same statement are
+            -- checked by journal_entry_period_open
+            IF TG_OP <> 'INSERT' THEN
+                PERFORM check_period_open(organization_id, year, month) FROM (
+                    SELECT DISTINCT entry.organization_id,
+                        EXTRACT(YEAR FROM entry.entry_date)::integer AS year,
+                        EXTRACT(MONTH FROM entry.entry_date)::integer AS month
+                    FROM old_rows JOIN journal_entry entry ON entry.id = old_rows.journal_entry_id
+                ) periods;
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                PERFORM check_period_open(organization_id, year, month) FROM (
+                    SELECT DISTINCT entry.organization_id,
+                        EXTRACT(YEAR FROM entry.entry_date)::integer AS year,
+                        EXTRACT(MONTH FROM entry.entry_date)::integer AS month
+                    FROM new_rows JOIN journal_entry entry ON entry.id = new_rows.journal_entry_id
+                ) periods;
+            END IF;
+            RETURN NULL;
+        END
+        $$
+        """
+    )
+    # A trigger with transition tables fires for one event only
+    for table in PROTECTED_TABLES:
+        for event, referencing in TRIGGER_EVENTS.items():
+            op.execute(
+                f"""
+                CREATE TRIGGER {table}_period_open_{event.lower()}
+                AFTER {event} ON {table}
+                REFERENCING {referencing}
+                FOR EACH STATEMENT EXECUTE FUNCTION {table}_period_open()
+                """
+            )
+
+
+def downgrade() -> None:
+    drop_write_protection()
+    op.drop_table("period_account_balance")
+    op.drop_table("period_close")
+
+
+def drop_write_protection() -> None:
+    for table in PROTECTED_TABLES:
+        for event in TRIGGER_EVENTS:
+            op.execute(f"DROP TRIGGER IF EXISTS {table}_period_open_{event.lower()} ON {table}")
+        op.execute(f"DROP FUNCTION IF EXISTS {table}_period_open()")
+    op.execute("DROP FUNCTION IF EXISTS check_period_open(uuid, integer, integer)")
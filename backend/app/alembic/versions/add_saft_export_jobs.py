@@ -0,0 +1,75 @@
+"""Create saft_export_job table
+
+Revision ID: add_saft_export_jobs
+Revises: add_organization_settings
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "add_saft_export_jobs"
+down_revision: Union[str, None] = "add_organization_settings"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "saft_export_job",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("organization_id", sa.UUID(), nullable=False),
+        sa.Column("created_by_id", sa.UUID(), nullable=False),
+
+        # Parameters
+        sa.Column("report_type", sa.String(length=20), nullable=False),
+        sa.Column("period_year", sa.Integer(), nullable=False),
+        sa.Column("period_month", sa.Integer(), nullable=True),
+        sa.Column("start_date", sa.Date(), nullable=True),
+        sa.Column("end_date", sa.Date(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("fingerprint", sa.String(length=64), nullable=False),
+
+        # Progress
+        sa.Column("sections_total", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("sections_done", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("rows_written", sa.Integer(), nullable=False, server_default="0"),
+
+        # Artifact
+        sa.Column("artifact_path", sa.String(length=1024), nullable=True),
+        sa.Column("artifact_size", sa.BigInteger(), nullable=True),
+        sa.Column("error_message", sa.Text(), nullable=True),
+
+        # Timestamps
+        sa.Column("date_started", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("date_finished", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("date_created", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("date_updated", sa.DateTime(timezone=True), nullable=False),
+
+        # Constraints
+        sa.ForeignKeyConstraint(["organization_id"], ["organization.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["created_by_id"], ["user.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_saft_export_job_organization_id"),
+        "saft_export_job",
+        ["organization_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_saft_export_job_fingerprint"),
+        "saft_export_job",
+        ["fingerprint"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_saft_export_job_fingerprint"), table_name="saft_export_job")
+    op.drop_index(op.f("ix_saft_export_job_organization_id"), table_name="saft_export_job")
+    op.drop_table("saft_export_job")
@@ -0,0 +1,33 @@
+"""Add XSD validation fields to saft_export_job
+
+Revision ID: add_saft_job_validation
+Revises: add_saft_export_jobs
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "add_saft_job_validation"
+down_revision: Union[str, None] = "add_saft_export_jobs"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "saft_export_job",
+        sa.Column("validate_xsd", sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+    op.add_column("saft_export_job", sa.Column("is_valid", sa.Boolean(), nullable=True))
+    op.add_column("saft_export_job", sa.Column("validation_errors", sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("saft_export_job", "validation_errors")
+    op.drop_column("saft_export_job", "is_valid")
+    op.drop_column("saft_export_job", "validate_xsd")
@@ -0,0 +1,116 @@
+"""Covering period indexes on the VAT registers
+
+Revision ID: add_vat_register_period_indexes
+Revises: add_vat_register_sources
+Create Date: 2026-10-16 16:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "add_vat_register_period_indexes"
+down_revision: Union[str, None] = "add_vat_register_sources"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SALES_INCLUDE = [
+    "document_type", "document_number", "recipient_vat_number", "recipient_name",
+    "taxable_base", "vat_amount", "vat_rate", "column_code", "vat_operation_code",
+]
+PURCHASES_INCLUDE = [
+    "document_type", "document_number", "supplier_vat_number", "supplier_name",
+    "taxable_base", "vat_amount",
+]
+PERIOD_COLUMNS = ["organization_id", "period_year", "period_month", "document_date", "id"]
+
+
+def upgrade() -> None:
+    # Built without locking out writes to the registers
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_vat_sales_register_period",
+            "vat_sales_register",
+            PERIOD_COLUMNS,
+            postgresql_include=SALES_INCLUDE,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_vat_purchase_registers_period",
+            "vat_purchase_registers",
+            PERIOD_COLUMNS,
+            postgresql_include=PURCHASES_INCLUDE,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            op.f("ix_vat_purchase_registers_period_year"),
+            table_name="vat_purchase_registers",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            op.f("ix_vat_purchase_registers_period_month"),
+            table_name="vat_purchase_registers",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+        # Document keys including the period, as required on a partitioned table
+        op.create_index(
+            "ux_vat_sales_register_invoice",
+            "vat_sales_register",
+            ["invoice_id", "period_year", "period_month"],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+        _replace_index("vat_sales_register", "invoice_id", unique=False)
+        op.create_index(
+            "ux_vat_purchase_registers_purchase",
+            "vat_purchase_registers",
+            ["purchase_id", "period_year", "period_month"],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+        _replace_index("vat_purchase_registers", "purchase_id", unique=False)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        _replace_index("vat_purchase_registers", "purchase_id", unique=True)
+        op.drop_index(
+            "ux_vat_purchase_registers_purchase",
+            table_name="vat_purchase_registers",
+            postgresql_concurrently=True,
+        )
+        _replace_index("vat_sales_register", "invoice_id", unique=True)
+        op.drop_index(
+            "ux_vat_sales_register_invoice",
+            table_name="vat_sales_register",
+            postgresql_concurrently=True,
+        )
+
+        for column in ("period_year", "period_month"):
+            op.create_index(
+                op.f(f"ix_vat_purchase_registers_{column}"),
+                "vat_purchase_registers",
+                [column],
+                postgresql_concurrently=True,
+            )
+        op.drop_index(
+            "ix_vat_purchase_registers_period",
+            table_name="vat_purchase_registers",
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            "ix_vat_sales_register_period",
+            table_name="vat_sales_register",
+            postgresql_concurrently=True,
+        )
+
+
+def _replace_index(table: str, column: str, unique: bool) -> None:
+    name = op.f(f"ix_{table}_{column}")
+    op.drop_index(name, table_name=table, postgresql_concurrently=True)
+    op.create_index(name, table, [column], unique=unique, postgresql_concurrently=True)
@@ -0,0 +1,69 @@
+"""Link VAT register rows to their source documents
+
+Revision ID: add_vat_register_sources
+Revises: add_saft_job_validation
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "add_vat_register_sources"
+down_revision: Union[str, None] = "add_saft_job_validation"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # One sales register row per invoice
+    op.drop_index(
+        op.f("ix_vat_sales_register_invoice_id"),
+        table_name="vat_sales_register",
+        if_exists=True,
+    )
+    op.create_index(
+        op.f("ix_vat_sales_register_invoice_id"),
+        "vat_sales_register",
+        ["invoice_id"],
+        unique=True,
+    )
+
+    # One purchase register row per purchase
+    op.add_column(
+        "vat_purchase_registers",
+        sa.Column("purchase_id", sa.UUID(), nullable=True),
+    )
+    op.create_foreign_key(
+        "vat_purchase_registers_purchase_id_fkey",
+        "vat_purchase_registers",
+        "purchase",
+        ["purchase_id"],
+        ["id"],
+        ondelete="CASCADE",
+    )
+    op.create_index(
+        op.f("ix_vat_purchase_registers_purchase_id"),
+        "vat_purchase_registers",
+        ["purchase_id"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_vat_purchase_registers_purchase_id"), table_name="vat_purchase_registers")
+    op.drop_constraint(
+        "vat_purchase_registers_purchase_id_fkey", "vat_purchase_registers", type_="foreignkey"
+    )
+    op.drop_column("vat_purchase_registers", "purchase_id")
+
+    op.drop_index(op.f("ix_vat_sales_register_invoice_id"), table_name="vat_sales_register")
+    op.create_index(
+        op.f("ix_vat_sales_register_invoice_id"),
+        "vat_sales_register",
+        ["invoice_id"],
+        unique=False,
+    )
@@ -0,0 +1,38 @@
+"""Backfill account.balance from the ledger
+
+Revision ID: backfill_account_balance
+Revises: add_period_close
+Create Date: 2026-10-17 15:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "backfill_account_balance"
+down_revision: Union[str, None] = "add_period_close"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # From here on posting keeps it current, see app/services/account_balance.py
+    op.execute(
+        """
+        UPDATE account
+        SET balance = account.opening_balance + COALESCE(ledger.movement, 0)
+        FROM account AS a
+        LEFT JOIN (
+            SELECT account_id, SUM(debit - credit) AS movement
+            FROM entry_line
+            GROUP BY account_id
+        ) AS ledger ON ledger.account_id = a.id
+        WHERE a.id = account.id
+        """
+    )
+
+
+def downgrade() -> None:
+    pass
@@ -0,0 +1,32 @@
+"""Partition the VAT registers by period (optional)
+
+Revision ID: partition_vat_registers
+Revises: add_vat_register_period_indexes
+Create Date: 2026-10-16 16:30:00.000000
+
+Only converts the tables when VAT_REGISTER_PARTITIONING is set. Otherwise
+the registers stay plain tables and can be partitioned later with
+`python -m app.services.vat_partitions partition`.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.core.config import settings
+from app.services.vat_partitions import partition_registers, unpartition_registers
+
+# revision identifiers, used by Alembic.
+revision: str = "partition_vat_registers"
+down_revision: Union[str, None] = "add_vat_register_period_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if settings.VAT_REGISTER_PARTITIONING:
+        partition_registers(op.get_bind())
+
+
+def downgrade() -> None:
+    unpartition_registers(op.get_bind())
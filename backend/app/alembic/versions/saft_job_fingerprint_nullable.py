@@ -0,0 +1,30 @@
+"""Make saft_export_job.fingerprint nullable
+
+The data fingerprint is now computed by the worker when the job runs, so a
+pending job has none yet.
+
+Revision ID: saft_job_fingerprint_nullable
+Revises: backfill_account_balance
+Create Date: 2026-10-17 18:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "saft_job_fingerprint_nullable"
+down_revision: Union[str, None] = "backfill_account_balance"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column("saft_export_job", "fingerprint", existing_type=sa.String(length=64), nullable=True)
+
+
+def downgrade() -> None:
+    op.execute("UPDATE saft_export_job SET fingerprint = '' WHERE fingerprint IS NULL")
+    op.alter_column("saft_export_job", "fingerprint", existing_type=sa.String(length=64), nullable=False)
@@ -2,7 +2,7 @@ from collections.abc import Generator
 from typing import Annotated
 
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
@@ -22,6 +22,7 @@ from app.models import (
     UserRole,
     has_role_or_higher,
 )
+from app.core.pagination import CountMode, InvalidCursor, PageParams, decode_cursor
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
@@ -37,6 +38,24 @@ SessionDep = Annotated[Session, Depends(get_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
+def get_page_params(
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=100, ge=1),
+    after: str | None = Query(default=None, description="next_cursor of the previous page"),
+    count: CountMode = Query(default=CountMode.EXACT, description="exact, estimated or none"),
+) -> PageParams:
+    if after is not None:
+        try:
+            if len(decode_cursor(after)) != 2:
+                raise InvalidCursor("Invalid cursor")
+        except InvalidCursor as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return PageParams(skip=skip, limit=limit, after=after, count=count)
+
+
+PageDep = Annotated[PageParams, Depends(get_page_params)]
+
+
 def get_current_user(session: SessionDep, token: TokenDep) -> User:
     try:
         payload = jwt.decode(
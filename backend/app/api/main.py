@@ -24,8 +24,10 @@ from app.api.routes import (
     utils,
     saft,
     payments,
+    periods,
     vat,
     journal_entries,
+    ledger,
 )
 from app.core.config import settings
 from app.sales.api import invoices_router
@@ -44,6 +46,7 @@ api_router.include_router(organizations.router)
 api_router.include_router(organization_settings.router)
 api_router.include_router(login.router)
 api_router.include_router(payments.router)
+api_router.include_router(periods.router)
 api_router.include_router(permissions.router)
 api_router.include_router(purchases.router)
 api_router.include_router(purchase_orders.router)
@@ -58,6 +61,7 @@ api_router.include_router(utils.router)
 api_router.include_router(invoices_router, prefix="/invoices", tags=["invoices"])
 api_router.include_router(vat.router, prefix="/vat", tags=["vat"])
 api_router.include_router(journal_entries.router, prefix="/journal-entries", tags=["journal-entries"])
+api_router.include_router(ledger.router)
 
 
 if settings.ENVIRONMENT == "local":
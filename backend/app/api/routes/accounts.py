@@ -89,6 +89,8 @@ def create_account(
         update={
             "organization_id": current_org.id,
             "created_by_id": current_user.id,
+            # Maintained by posting, see app.services.account_balance
+            "balance": account_in.opening_balance,
         },
     )
     session.add(account)
@@ -120,6 +122,11 @@ def update_account(
 
     update_dict = account_in.model_dump(exclude_unset=True)
     update_dict.update(BaseModelUpdate().model_dump())
+    # The balance follows the ledger; a new opening balance shifts it
+    update_dict.pop("balance", None)
+    opening_balance = update_dict.get("opening_balance")
+    if opening_balance is not None and opening_balance != account.opening_balance:
+        update_dict["balance"] = Account.balance + (opening_balance - account.opening_balance)
     account.sqlmodel_update(update_dict)
     session.add(account)
     session.commit()
@@ -5,9 +5,10 @@ import uuid
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select, func
+from sqlmodel import Session, select
 
-from app.api.deps import get_current_organization, get_db
+from app.api.deps import PageDep, get_current_organization, get_db
+from app.core.pagination import SortKey, paginate
 from app.models import (
     BankTransaction,
     BankTransactionCreate,
@@ -27,8 +28,7 @@ def list_bank_transactions(
     *,
     session: Session = Depends(get_db),
     current_organization: Organization = Depends(get_current_organization),
-    skip: int = 0,
-    limit: int = 100,
+    page_params: PageDep,
     bank_account_id: uuid.UUID | None = None,
     is_processed: bool | None = None,
     is_credit: bool | None = None,
@@ -45,14 +45,13 @@ def list_bank_transactions(
     if is_credit is not None:
         query = query.where(BankTransaction.is_credit == is_credit)
 
-    query = query.order_by(BankTransaction.booking_date.desc())
-
-    count_query = select(func.count()).select_from(query.subquery())
-    count = session.exec(count_query).one()
-
-    transactions = session.exec(query.offset(skip).limit(limit)).all()
-
-    return BankTransactionsPublic(data=transactions, count=count)
+    page = paginate(
+        session,
+        query,
+        SortKey(BankTransaction.booking_date, BankTransaction.id, descending=True),
+        page_params,
+    )
+    return BankTransactionsPublic(data=page.items, count=page.count, next_cursor=page.next_cursor)
 
 
 @router.get("/{transaction_id}", response_model=BankTransactionPublic)
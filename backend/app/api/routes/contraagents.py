@@ -10,6 +10,7 @@ from app.api.deps import (
     CurrentMembership,
     CurrentOrganization,
     CurrentUser,
+    PageDep,
     RequireManager,
     SessionDep,
 )
@@ -36,12 +37,11 @@ router = APIRouter(prefix="/contraagents", tags=["contraagents"])
 
 # Contraagent endpoints
 @router.get("/", response_model=ContraagentsPublic)
-async def read_contraagents(
+def read_contraagents(
     session: SessionDep,
     current_org: CurrentOrganization,
     membership: CurrentMembership,
-    skip: int = 0,
-    limit: int = 100,
+    page_params: PageDep,
     search: Optional[str] = None,
     is_customer: Optional[bool] = Query(None, description="Filter by customer status"),
     is_supplier: Optional[bool] = Query(None, description="Filter by supplier status"),
@@ -50,11 +50,10 @@ async def read_contraagents(
     """
     Retrieve contraagents for the current organization.
     """
-    contraagents, count = await ContraagentService.get_contraagents(
+    page = ContraagentService.get_contraagents(
         session=session,
         organization_id=current_org.id,
-        skip=skip,
-        limit=limit,
+        params=page_params,
         search=search,
         is_customer=is_customer,
         is_supplier=is_supplier,
@@ -63,10 +62,7 @@ async def read_contraagents(
 
     # Load related data for public response
     contraagents_public = []
-    for contraagent in contraagents:
-        # Load related data
-        await session.refresh(contraagent, ["accounting_account"])
-
+    for contraagent in page.items:
         accounting_account_name = None
         if contraagent.accounting_account:
             accounting_account_name = contraagent.accounting_account.name
@@ -78,7 +74,9 @@ async def read_contraagents(
             )
         )
 
-    return ContraagentsPublic(data=contraagents_public, count=count)
+    return ContraagentsPublic(
+        data=contraagents_public, count=page.count, next_cursor=page.next_cursor
+    )
 
 
 @router.get("/{id}", response_model=ContraagentPublic)
@@ -1,10 +1,13 @@
-from typing import Any, List
+import io
+from typing import Any, List, Literal
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
 from sqlalchemy.orm import Session
 
-from app import crud, models
+from app import models
 from app.api import deps
+from app.crud.journal_entry import journal_entry as journal_entry_crud
+from app.services.journal_import import JournalImportService
 
 router = APIRouter()
 
@@ -18,18 +21,58 @@ def read_journal_entries(
     """
     Retrieve journal entries.
     """
-    journal_entries = crud.journal_entry.get_multi(db, skip=skip, limit=limit)
+    journal_entries = journal_entry_crud.get_multi(db, skip=skip, limit=limit)
     return journal_entries
 
 
 @router.post("/", response_model=models.JournalEntryPublic)
 def create_journal_entry(
     *,
-    db: Session = Depends(deps.get_db),
+    session: deps.SessionDep,
+    current_user: deps.CurrentUser,
+    current_org: deps.CurrentOrganization,
+    membership: deps.RequireManager,
     journal_entry_in: models.JournalEntryCreate,
 ) -> Any:
     """
-    Create new journal entry.
+    Post a journal entry. It is rejected if it does not balance or is dated
+    in a closed period.
+    """
+    try:
+        return journal_entry_crud.create(
+            session, obj_in=journal_entry_in, current_user=current_user, current_organization=current_org
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/import", response_model=models.JournalImportResult)
+def import_journal_entries(
+    *,
+    session: deps.SessionDep,
+    current_user: deps.CurrentUser,
+    current_org: deps.CurrentOrganization,
+    membership: deps.RequireManager,
+    file: UploadFile = File(...),
+    file_format: Literal["csv", "jsonl"] | None = Query(default=None, alias="format"),
+) -> Any:
+    """
+    Import journal entries from a CSV (one row per line) or JSONL (one entry
+    per line) file. Entries that fail validation are rejected as a whole and
+    reported; the others are imported.
     """
-    journal_entry = crud.journal_entry.create(db, obj_in=journal_entry_in)
-    return journal_entry
+    if file_format is None:
+        suffix = (file.filename or "").rsplit(".", 1)[-1].lower()
+        if suffix not in ("csv", "jsonl"):
+            raise HTTPException(status_code=400, detail="Pass format=csv or format=jsonl")
+        file_format = suffix
+    source = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        result = JournalImportService(session, current_org.id, current_user.id).import_file(
+            source, file_format
+        )
+    except UnicodeDecodeError:
+        session.rollback()
+        raise HTTPException(status_code=400, detail="The file must be UTF-8 encoded")
+    session.commit()
+    return result
@@ -0,0 +1,60 @@
+import uuid
+from datetime import date
+from typing import Any
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.api.deps import CurrentMembership, CurrentOrganization, SessionDep
+from app.models import Account, AccountCardPublic, TrialBalancePublic
+from app.services.ledger_reports import LedgerReportService
+
+router = APIRouter(prefix="/ledger", tags=["ledger"])
+
+
+@router.get("/trial-balance", response_model=TrialBalancePublic)
+def read_trial_balance(
+    session: SessionDep,
+    current_org: CurrentOrganization,
+    membership: CurrentMembership,
+    year: int,
+    first_month: int = Query(default=1, ge=1, le=12),
+    last_month: int = Query(default=12, ge=1, le=12),
+    prefix_length: int | None = Query(default=None, ge=1, le=20),
+) -> Any:
+    """
+    Trial balance (оборотна ведомост): opening balance, turnover and closing
+    balance per account, or per account-code prefix of prefix_length characters.
+    """
+    if first_month > last_month:
+        raise HTTPException(status_code=400, detail="first_month must not be after last_month")
+    return LedgerReportService(session, current_org.id).trial_balance(
+        year, first_month, last_month, prefix_length
+    )
+
+
+@router.get("/accounts/{id}/card", response_model=AccountCardPublic)
+def read_account_card(
+    session: SessionDep,
+    current_org: CurrentOrganization,
+    membership: CurrentMembership,
+    id: uuid.UUID,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    after: str | None = None,
+    limit: int = Query(default=500, ge=1, le=5000),
+) -> Any:
+    """
+    Account card (аналитична карта): the account's entry lines with a running
+    balance. Pass next_cursor from a page as `after` to read the next one.
+    """
+    account = session.get(Account, id)
+    if not account:
+        raise HTTPException(status_code=404, detail="Account not found")
+    if account.organization_id != current_org.id:
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    try:
+        return LedgerReportService(session, current_org.id).account_card(
+            account, date_from, date_to, after, limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
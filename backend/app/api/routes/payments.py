@@ -4,15 +4,17 @@ from typing import Any
 
 from fastapi import APIRouter, HTTPException
 from sqlalchemy.orm import selectinload
-from sqlmodel import func, select
+from sqlmodel import select
 
 from app.api.deps import (
     CurrentMembership,
     CurrentOrganization,
     CurrentUser,
+    PageDep,
     RequireManager,
     SessionDep,
 )
+from app.core.pagination import SortKey, paginate
 from app.models import (
     BaseModelUpdate,
     Message,
@@ -36,27 +38,22 @@ def read_payments(
     session: SessionDep,
     current_org: CurrentOrganization,
     membership: CurrentMembership,
-    skip: int = 0,
-    limit: int = 100,
+    page_params: PageDep,
 ) -> Any:
     """
-    Retrieve payments for the current organization.
+    Retrieve payments for the current organization, newest first.
     """
-    count_statement = (
-        select(func.count())
-        .select_from(Payment)
-        .where(Payment.organization_id == current_org.id)
-    )
-    count = session.exec(count_statement).one()
     statement = (
         select(Payment)
         .options(selectinload(Payment.account))
         .where(Payment.organization_id == current_org.id)
-        .offset(skip)
-        .limit(limit)
     )
-    payments = session.exec(statement).all()
-    return PaymentsPublic(data=to_public(payments, PaymentPublic), count=count)
+    page = paginate(
+        session, statement, SortKey(Payment.date_payment, Payment.id, descending=True), page_params
+    )
+    return PaymentsPublic(
+        data=to_public(page.items, PaymentPublic), count=page.count, next_cursor=page.next_cursor
+    )
 
 
 @router.post("/", response_model=PaymentPublic)
@@ -85,10 +82,15 @@ def create_payment(
         },
     )
     session.add(payment)
-    session.commit()
-    session.refresh(payment)
+    session.flush()
 
+    # Commits the payment together with its journal entry
     journal_service = JournalService(session, current_user, current_org)
-    journal_service.create_journal_entry_for_payment(payment)
+    try:
+        journal_service.create_journal_entry_for_payment(payment)
+    except ValueError as e:
+        session.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    session.refresh(payment)
 
     return to_public(payment, PaymentPublic)
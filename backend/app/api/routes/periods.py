@@ -0,0 +1,93 @@
+from typing import Any
+
+from fastapi import APIRouter, HTTPException, Path
+
+from app.api.deps import (
+    CurrentMembership,
+    CurrentOrganization,
+    CurrentUser,
+    RequireAdmin,
+    SessionDep,
+)
+from app.models import Message, PeriodClosePublic, PeriodClosesPublic
+from app.services.period_close import PeriodCloseError, PeriodCloseService
+
+router = APIRouter(prefix="/periods", tags=["periods"])
+
+Year = Path(ge=1900, le=9999)
+Month = Path(ge=1, le=12)
+
+
+@router.get("/", response_model=PeriodClosesPublic)
+def read_closed_periods(
+    session: SessionDep,
+    current_org: CurrentOrganization,
+    membership: CurrentMembership,
+    year: int | None = None,
+) -> Any:
+    """
+    Closed periods of the organization, oldest first.
+    """
+    periods = PeriodCloseService(session, current_org.id).list(year)
+    return PeriodClosesPublic(data=periods, count=len(periods))
+
+
+@router.get("/{year}/{month}", response_model=PeriodClosePublic)
+def read_closed_period(
+    session: SessionDep,
+    current_org: CurrentOrganization,
+    membership: CurrentMembership,
+    year: int = Year,
+    month: int = Month,
+) -> Any:
+    """
+    A closed period with its frozen VAT and turnover totals.
+    """
+    period_close = PeriodCloseService(session, current_org.id).get(year, month)
+    if not period_close:
+        raise HTTPException(status_code=404, detail="Period is not closed")
+    return period_close
+
+
+@router.post("/{year}/{month}/close", response_model=PeriodClosePublic)
+def close_period(
+    session: SessionDep,
+    current_user: CurrentUser,
+    current_org: CurrentOrganization,
+    _: RequireAdmin,
+    year: int = Year,
+    month: int = Month,
+) -> Any:
+    """
+    Close a month: check that its ledger balances and freeze the account
+    balances and VAT totals. Journal entries dated in it are rejected
+    afterwards. Requires admin role.
+    """
+    try:
+        period_close = PeriodCloseService(session, current_org.id).close(year, month, current_user.id)
+    except PeriodCloseError as e:
+        session.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    session.commit()
+    session.refresh(period_close)
+    return period_close
+
+
+@router.post("/{year}/{month}/reopen", response_model=Message)
+def reopen_period(
+    session: SessionDep,
+    current_org: CurrentOrganization,
+    _: RequireAdmin,
+    year: int = Year,
+    month: int = Month,
+) -> Any:
+    """
+    Reopen the latest closed month and drop its snapshot. Requires admin role.
+    """
+    try:
+        PeriodCloseService(session, current_org.id).reopen(year, month)
+    except PeriodCloseError as e:
+        session.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    session.commit()
+    return Message(message=f"Period {year}-{month:02d} reopened")
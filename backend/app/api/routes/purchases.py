@@ -3,15 +3,17 @@ from typing import Any
 
 from fastapi import APIRouter, HTTPException
 from sqlalchemy.orm import selectinload
-from sqlmodel import func, select
+from sqlmodel import select
 
 from app.api.deps import (
     CurrentMembership,
     CurrentOrganization,
     CurrentUser,
+    PageDep,
     RequireManager,
     SessionDep,
 )
+from app.core.pagination import SortKey, paginate
 from app.models import (
     BaseModelUpdate,
     Message,
@@ -26,6 +28,7 @@ from app.models import (
     has_role_or_higher,
 )
 from app.services.journal import JournalService
+from app.services.vat_register import VatRegisterService
 from app.utils import to_public
 
 router = APIRouter(prefix="/purchases", tags=["purchases"])
@@ -36,35 +39,28 @@ def read_purchases(
     session: SessionDep,
     current_org: CurrentOrganization,
     membership: CurrentMembership,
-    skip: int = 0,
-    limit: int = 100,
+    page_params: PageDep,
 ) -> Any:
     """
-    Retrieve purchases for the current organization.
+    Retrieve purchases for the current organization, newest first.
     """
-    count_statement = (
-        select(func.count())
-        .select_from(Purchase)
-        .where(Purchase.organization_id == current_org.id)
-    )
-    count = session.exec(count_statement).one()
     statement = (
         select(Purchase)
         .options(selectinload(Purchase.contraagent), selectinload(Purchase.store)) # Changed from Purchase.supplier
         .where(Purchase.organization_id == current_org.id)
-        .offset(skip)
-        .limit(limit)
     )
-    purchases = session.exec(statement).all()
+    page = paginate(
+        session, statement, SortKey(Purchase.date_purchase, Purchase.id, descending=True), page_params
+    )
     purchases = to_public(
-        purchases,
+        page.items,
         schema=PurchasePublic,
         extra_fields={
             "contraagent_name": lambda p: p.contraagent.name, # Changed from supplier_name
             "store_name": lambda p: p.store.name,
         },
     )
-    return PurchasesPublic(data=purchases, count=count)
+    return PurchasesPublic(data=purchases, count=page.count, next_cursor=page.next_cursor)
 
 
 @router.get("/{id}", response_model=PurchasePublic)
@@ -119,11 +115,17 @@ def create_purchase(
         },
     )
     session.add(purchase)
-    session.commit()
-    session.refresh(purchase)
+    session.flush()
+    VatRegisterService(session).sync_purchase(purchase)
 
+    # Commits the purchase together with its journal entry
     journal_service = JournalService(session, current_user, current_org)
-    journal_service.create_journal_entry_for_purchase(purchase)
+    try:
+        journal_service.create_journal_entry_for_purchase(purchase)
+    except ValueError as e:
+        session.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    session.refresh(purchase)
 
     return to_public(
         purchase,
@@ -176,6 +178,8 @@ def update_purchase(
     update_dict.update(BaseModelUpdate().model_dump())
     purchase.sqlmodel_update(update_dict)
     session.add(purchase)
+    session.flush()
+    VatRegisterService(session).sync_purchase(purchase)
     session.commit()
     session.refresh(purchase)
     return to_public(
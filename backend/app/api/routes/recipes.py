@@ -6,14 +6,16 @@ from typing import Any
 
 from fastapi import APIRouter, HTTPException
 from sqlalchemy.orm import selectinload
-from sqlmodel import func, select
+from sqlmodel import select
 
 from app.api.deps import (
     CurrentMembership,
     CurrentOrganization,
     CurrentUser,
+    PageDep,
     SessionDep,
 )
+from app.core.pagination import SortKey, paginate
 from app.crud.recipe import (
     create_recipe,
     create_recipe_item,
@@ -59,33 +61,18 @@ def read_recipes(
     session: SessionDep,
     current_org: CurrentOrganization,
     membership: CurrentMembership,
-    skip: int = 0,
-    limit: int = 100,
+    page_params: PageDep,
     is_active: bool | None = None,
 ) -> Any:
     """
-    Retrieve recipes for the current organization.
+    Retrieve recipes for the current organization, by name.
     """
-    count_statement = (
-        select(func.count())
-        .select_from(Recipe)
-        .where(Recipe.organization_id == current_org.id)
-    )
-    if is_active is not None:
-        count_statement = count_statement.where(Recipe.is_active == is_active)
-    count = session.exec(count_statement).one()
-
-    statement = (
-        select(Recipe)
-        .where(Recipe.organization_id == current_org.id)
-        .offset(skip)
-        .limit(limit)
-    )
+    statement = select(Recipe).where(Recipe.organization_id == current_org.id)
     if is_active is not None:
         statement = statement.where(Recipe.is_active == is_active)
-    recipes = session.exec(statement).all()
+    page = paginate(session, statement, SortKey(Recipe.name, Recipe.id), page_params)
 
-    return RecipesPublic(data=recipes, count=count)
+    return RecipesPublic(data=page.items, count=page.count, next_cursor=page.next_cursor)
 
 
 @router.get("/{recipe_id}", response_model=RecipePublicWithItems)
@@ -1,17 +1,89 @@
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session
+import os
+import tempfile
+import uuid
+from dataclasses import asdict
+from typing import Iterable, Iterator
 
-from app.api.deps import get_current_organization, get_db
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import Session, col, select
+
+from app.api.deps import RequireManager, get_current_organization, get_current_user, get_db
+from app.core.db import reporting_exports
 from app.models.organization import Organization
+from app.models.organization_member import OrganizationMember
+from app.models.saft_export_job import (
+    SaftExportJobCreate,
+    SaftExportJobPublic,
+    SaftExportJobStatus,
+)
+from app.models.user import User
+from app.models.vat_bulk_export import VatBulkExportCreate
+from app.services.compression import Compression, iter_gzip, iter_zip
+from app.services.saft.jobs import saft_job_service
+from app.services.saft.validation import SAFTValidator
 from app.services.saft_service import SAFT
-from app.services.vat_service import VatService
-from starlette.responses import StreamingResponse
-import io
+from app.services.vat_bulk import VatBulkExport
+from app.services.vat_register import VatRegisterService
+from app.services.vat_service import VatService, iter_encoded
+from starlette.responses import FileResponse, StreamingResponse
 
 router = APIRouter(prefix="/saft", tags=["saft"])
 
 
+def _iter_spilled(path: str) -> Iterator[bytes]:
+    """Stream a temporary file and remove it afterwards."""
+    try:
+        with open(path, "rb") as f:
+            while block := f.read(64 * 1024):
+                yield block
+    finally:
+        os.unlink(path)
+
+
+def _acquire_export_slot() -> None:
+    """Admit an export on the reporting pool or refuse it with 503."""
+    if not reporting_exports.acquire():
+        raise HTTPException(
+            status_code=503,
+            detail="Too many exports in progress, try again later",
+            headers={"Retry-After": "30"},
+        )
+
+
+def _vat_export(lines: Iterable[str]) -> Iterator[bytes]:
+    """
+    Admit a VAT file export on the reporting pool and encode its lines to
+    CP-1251 while streaming; the slot is released when the stream ends.
+    """
+    _acquire_export_slot()
+    return reporting_exports.release_after(iter_encoded(lines))
+
+
+def _download(
+    chunks: Iterable[bytes],
+    filename: str,
+    media_type: str,
+    compression: Compression | None,
+) -> StreamingResponse:
+    """
+    Stream a file download, optionally compressed on the fly.
+
+    gzip is applied as Content-Encoding, so clients still save the original
+    file; zip produces a .zip attachment (accepted by NRA uploads).
+    """
+    headers = {}
+    if compression == Compression.GZIP:
+        chunks = iter_gzip(chunks)
+        headers["Content-Encoding"] = "gzip"
+    elif compression == Compression.ZIP:
+        chunks = iter_zip(chunks, filename)
+        media_type = "application/zip"
+        filename = f"{filename.rsplit('.', 1)[0]}.zip"
+    headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+
 @router.get("/")
 def generate_saft(
     *,
@@ -20,9 +92,18 @@ def generate_saft(
     report_type: str,
     year: int,
     month: int | None = None,
+    parallel: bool = False,
+    compression: Compression | None = None,
+    validate: bool = False,
 ):
     """
     Generate a SAF-T file.
+
+    With parallel=true the sections are rendered concurrently and streamed
+    in schema order once each is ready. compression=gzip|zip compresses
+    the file while it is streamed. validate=true renders the file to disk
+    first and returns 422 with the first XSD errors instead of an invalid
+    file.
     """
     if report_type not in ["monthly", "annual", "on_demand"]:
         raise HTTPException(status_code=400, detail="Invalid report type")
@@ -30,15 +111,115 @@ def generate_saft(
     if report_type == "monthly" and not month:
         raise HTTPException(status_code=400, detail="Month is required for monthly reports")
 
+    validator = None
+    if validate:
+        try:
+            validator = SAFTValidator()
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    _acquire_export_slot()
     saft = SAFT(organization=current_organization, year=year, month=month)
-    output = io.StringIO()
-    saft.generate(report_type=report_type, output=output)
-    output.seek(0)
+    chunks = saft.iter_generate_parallel(report_type=report_type) if parallel else saft.iter_generate(report_type=report_type)
+    encoded: Iterable[bytes] = reporting_exports.release_after(chunk.encode("utf-8") for chunk in chunks)
 
-    return StreamingResponse(
-        iter([output.read()]),
-        media_type="application/xml",
-        headers={"Content-Disposition": f"attachment; filename=saft_{report_type}.xml"},
+    if validator is not None:
+        with tempfile.NamedTemporaryFile(suffix=".xml", delete=False) as spill:
+            try:
+                for block in encoded:
+                    spill.write(block)
+            except BaseException:
+                os.unlink(spill.name)
+                raise
+        report = validator.validate_file(spill.name)
+        if not report.is_valid:
+            os.unlink(spill.name)
+            raise HTTPException(
+                status_code=422,
+                detail={
+                    "message": "SAF-T file failed XSD validation",
+                    "errors": [asdict(error) for error in report.errors],
+                    "truncated": report.truncated,
+                },
+            )
+        encoded = _iter_spilled(spill.name)
+
+    return _download(
+        encoded,
+        f"saft_{report_type}.xml",
+        "application/xml",
+        compression,
+    )
+
+
+@router.post("/jobs", response_model=SaftExportJobPublic)
+def create_saft_job(
+    *,
+    session: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    current_organization: Organization = Depends(get_current_organization),
+    job_in: SaftExportJobCreate,
+):
+    """
+    Enqueue background generation of a SAF-T file.
+
+    Returns the existing job when the same report is already pending or
+    running. A job over data unchanged since an earlier one completes by
+    reusing that job's file.
+    """
+    try:
+        job = saft_job_service.enqueue(
+            session,
+            organization_id=current_organization.id,
+            created_by_id=current_user.id,
+            job_in=job_in,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return job
+
+
+@router.get("/jobs/{job_id}", response_model=SaftExportJobPublic)
+def read_saft_job(
+    *,
+    session: Session = Depends(get_db),
+    current_organization: Organization = Depends(get_current_organization),
+    job_id: uuid.UUID,
+):
+    """
+    Get status and progress of a SAF-T job.
+    """
+    job = saft_job_service.get_job(session, current_organization.id, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="SAF-T job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}/download")
+def download_saft_job(
+    *,
+    session: Session = Depends(get_db),
+    current_organization: Organization = Depends(get_current_organization),
+    job_id: uuid.UUID,
+    force: bool = False,
+):
+    """
+    Download the gzip-compressed SAF-T file produced by a completed job.
+
+    Files that failed XSD validation are only returned with force=true.
+    """
+    job = saft_job_service.get_job(session, current_organization.id, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="SAF-T job not found")
+    if job.status != SaftExportJobStatus.COMPLETED or not saft_job_service.artifact_exists(job):
+        raise HTTPException(status_code=409, detail="SAF-T file is not ready")
+    if job.is_valid is False and not force:
+        raise HTTPException(status_code=409, detail="SAF-T file failed XSD validation")
+
+    return FileResponse(
+        job.artifact_path,
+        media_type="application/gzip",
+        filename=saft_job_service.download_filename(job),
     )
 
 
@@ -49,24 +230,18 @@ def generate_vat_sales_register(
     current_organization: Organization = Depends(get_current_organization),
     year: int,
     month: int,
+    compression: Compression | None = None,
 ):
     """
     Generate VAT sales register (PRODAGBI.TXT).
     """
     vat_service = VatService(organization=current_organization, year=year, month=month)
-    output = io.StringIO()
-    vat_service.generate_sales_register(output)
-    output.seek(0)
 
-    # Encode to CP-1251
-    encoded_output = output.read().encode("cp1251")
-
-    return StreamingResponse(
-        iter([encoded_output]),
-        media_type="text/plain",
-        headers={
-            "Content-Disposition": f"attachment; filename=PRODAGBI_{year}_{month:02d}.txt"
-        },
+    return _download(
+        _vat_export(vat_service.iter_sales_register()),
+        f"PRODAGBI_{year}_{month:02d}.txt",
+        "text/plain",
+        compression,
     )
 
 
@@ -77,24 +252,18 @@ def generate_vat_purchase_register(
     current_organization: Organization = Depends(get_current_organization),
     year: int,
     month: int,
+    compression: Compression | None = None,
 ):
     """
     Generate VAT purchase register (POKUPKI.TXT).
     """
     vat_service = VatService(organization=current_organization, year=year, month=month)
-    output = io.StringIO()
-    vat_service.generate_purchase_register(output)
-    output.seek(0)
-
-    # Encode to CP-1251
-    encoded_output = output.read().encode("cp1251")
 
-    return StreamingResponse(
-        iter([encoded_output]),
-        media_type="text/plain",
-        headers={
-            "Content-Disposition": f"attachment; filename=POKUPKI_{year}_{month:02d}.txt"
-        },
+    return _download(
+        _vat_export(vat_service.iter_purchase_register()),
+        f"POKUPKI_{year}_{month:02d}.txt",
+        "text/plain",
+        compression,
     )
 
 
@@ -105,22 +274,99 @@ def generate_vat_declaration(
     current_organization: Organization = Depends(get_current_organization),
     year: int,
     month: int,
+    compression: Compression | None = None,
 ):
     """
     Generate VAT declaration (DEKLAR.TXT).
     """
     vat_service = VatService(organization=current_organization, year=year, month=month)
-    output = io.StringIO()
-    vat_service.generate_vat_declaration(output)
-    output.seek(0)
 
-    # Encode to CP-1251
-    encoded_output = output.read().encode("cp1251")
+    return _download(
+        _vat_export(vat_service.iter_vat_declaration()),
+        f"DEKLAR_{year}_{month:02d}.txt",
+        "text/plain",
+        compression,
+    )
+
+
+@router.get("/vat/vies")
+def generate_vies_declaration(
+    *,
+    session: Session = Depends(get_db),
+    current_organization: Organization = Depends(get_current_organization),
+    year: int,
+    month: int,
+    compression: Compression | None = None,
+):
+    """
+    Generate VIES declaration (VIES.TXT).
+    """
+    vat_service = VatService(organization=current_organization, year=year, month=month)
+
+    return _download(
+        _vat_export(vat_service.iter_vies_declaration()),
+        f"VIES_{year}_{month:02d}.txt",
+        "text/plain",
+        compression,
+    )
+
+
+@router.post("/vat/bulk")
+def generate_vat_bulk_export(
+    *,
+    session: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    export_in: VatBulkExportCreate,
+):
+    """
+    Generate PRODAGBI, POKUPKI and DEKLAR of several organizations as one ZIP,
+    one folder per organization. Failed organizations are listed in REPORT.TXT.
+    """
+    organization_ids = list(dict.fromkeys(export_in.organization_ids))
+    organizations = session.exec(
+        select(Organization)
+        .join(OrganizationMember, OrganizationMember.organization_id == Organization.id)
+        .where(
+            col(Organization.id).in_(organization_ids),
+            Organization.is_active == True,  # noqa: E712
+            OrganizationMember.user_id == current_user.id,
+            OrganizationMember.is_active == True,  # noqa: E712
+        )
+    ).all()
+    by_id = {organization.id: organization for organization in organizations}
+    missing = [str(organization_id) for organization_id in organization_ids if organization_id not in by_id]
+    if missing:
+        raise HTTPException(
+            status_code=403,
+            detail=f"You are not a member of these organizations: {', '.join(missing)}",
+        )
 
+    bulk_export = VatBulkExport(
+        [by_id[organization_id] for organization_id in organization_ids],
+        export_in.period_year,
+        export_in.period_month,
+    )
+    filename = f"VAT_{export_in.period_year}_{export_in.period_month:02d}.zip"
+    _acquire_export_slot()
     return StreamingResponse(
-        iter([encoded_output]),
-        media_type="text/plain",
-        headers={
-            "Content-Disposition": f"attachment; filename=DEKLAR_{year}_{month:02d}.txt"
-        },
+        reporting_exports.release_after(bulk_export.iter_zip()),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
+
+
+@router.post("/vat/registers/rebuild")
+def rebuild_vat_registers(
+    *,
+    session: Session = Depends(get_db),
+    current_organization: Organization = Depends(get_current_organization),
+    membership: RequireManager,
+    year: int,
+    month: int = Query(ge=1, le=12),
+):
+    """
+    Rebuild the sales and purchase registers of a period from invoices and purchases.
+    """
+    sales, purchases = VatRegisterService(session).rebuild_period(current_organization.id, year, month)
+    session.commit()
+    return {"sales": sales, "purchases": purchases}
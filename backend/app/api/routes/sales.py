@@ -3,15 +3,17 @@ from typing import Any
 
 from fastapi import APIRouter, HTTPException
 from sqlalchemy.orm import selectinload
-from sqlmodel import func, select
+from sqlmodel import select
 
 from app.api.deps import (
     CurrentMembership,
     CurrentOrganization,
     CurrentUser,
+    PageDep,
     RequireManager,
     SessionDep,
 )
+from app.core.pagination import SortKey, paginate
 from app.models import (
     BaseModelUpdate,
     Message,
@@ -36,35 +38,26 @@ def read_sales(
     session: SessionDep,
     current_org: CurrentOrganization,
     membership: CurrentMembership,
-    skip: int = 0,
-    limit: int = 100,
+    page_params: PageDep,
 ) -> Any:
     """
-    Retrieve sales for the current organization.
+    Retrieve sales for the current organization, newest first.
     """
-    count_statement = (
-        select(func.count())
-        .select_from(Sale)
-        .where(Sale.organization_id == current_org.id)
-    )
-    count = session.exec(count_statement).one()
     statement = (
         select(Sale)
         .options(selectinload(Sale.contraagent), selectinload(Sale.store))
         .where(Sale.organization_id == current_org.id)
-        .offset(skip)
-        .limit(limit)
     )
-    sales = session.exec(statement).all()
+    page = paginate(session, statement, SortKey(Sale.date_sale, Sale.id, descending=True), page_params)
     sales = to_public(
-        sales,
+        page.items,
         schema=SalePublic,
         extra_fields={
             "contraagent_name": lambda p: p.contraagent.name,
             "store_name": lambda p: p.store.name,
         },
     )
-    return SalesPublic(data=sales, count=count)
+    return SalesPublic(data=sales, count=page.count, next_cursor=page.next_cursor)
 
 
 @router.get("/{id}", response_model=SalePublic)
@@ -119,11 +112,16 @@ def create_sale(
         },
     )
     session.add(sale)
-    session.commit()
-    session.refresh(sale)
+    session.flush()
 
+    # Commits the sale together with its journal entry
     journal_service = JournalService(session, current_user, current_org)
-    journal_service.create_journal_entry_for_sale(sale)
+    try:
+        journal_service.create_journal_entry_for_sale(sale)
+    except ValueError as e:
+        session.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    session.refresh(sale)
 
     return to_public(
         sale,
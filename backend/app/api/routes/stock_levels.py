@@ -2,15 +2,17 @@ import uuid
 from typing import Any
 
 from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
+from sqlmodel import select
 
 from app.api.deps import (
     CurrentMembership,
     CurrentOrganization,
     CurrentUser,
+    PageDep,
     RequireManager,
     SessionDep,
 )
+from app.core.pagination import SortKey, paginate
 from app.models import (
     BaseModelUpdate,
     Message,
@@ -31,26 +33,14 @@ def read_stock_levels(
     session: SessionDep,
     current_org: CurrentOrganization,
     membership: CurrentMembership,
-    skip: int = 0,
-    limit: int = 100,
+    page_params: PageDep,
 ) -> Any:
     """
     Retrieve stock levels for the current organization.
     """
-    count_statement = (
-        select(func.count())
-        .select_from(StockLevel)
-        .where(StockLevel.organization_id == current_org.id)
-    )
-    count = session.exec(count_statement).one()
-    statement = (
-        select(StockLevel)
-        .where(StockLevel.organization_id == current_org.id)
-        .offset(skip)
-        .limit(limit)
-    )
-    stock_levels = session.exec(statement).all()
-    return StockLevelsPublic(data=stock_levels, count=count)
+    statement = select(StockLevel).where(StockLevel.organization_id == current_org.id)
+    page = paginate(session, statement, SortKey(StockLevel.id, StockLevel.id), page_params)
+    return StockLevelsPublic(data=page.items, count=page.count, next_cursor=page.next_cursor)
 
 
 @router.get("/{id}", response_model=StockLevelPublic)
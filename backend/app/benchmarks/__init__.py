@@ -0,0 +1,13 @@
+"""
+Benchmarks for reporting and export code paths.
+
+Run against a configured database, e.g.:
+
+    python -m app.benchmarks.saft_sections --organization-id <uuid> --year 2025 --month 1
+    python -m app.benchmarks.exports --preset medium --month 1
+    python -m app.benchmarks.nra_layout --lines 200000
+    python -m app.benchmarks.posting --preset small --documents 1000 10000
+
+app.benchmarks.tenant generates a deterministic synthetic organization to run
+them against.
+"""
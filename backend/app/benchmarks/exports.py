@@ -0,0 +1,140 @@
+"""
+SAF-T and VAT export benchmarks against a synthetic tenant.
+
+Generates (or reuses) the tenant described by --preset/--seed and runs every
+selected export in a fresh process, recording wall time, peak RSS, the
+number of SQL statements and the size of the output. Failures are reported
+per case, so one broken export does not hide the others.
+
+    python -m app.benchmarks.exports --preset medium --month 3 --output bench.json
+"""
+import argparse
+import io
+import json
+import multiprocessing
+import resource
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, replace
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from app.benchmarks.tenant import PRESETS, SyntheticTenant
+from app.core.db import engine
+from app.models.organization import Organization
+from app.services.saft_service import SAFT
+from app.services.vat_service import VatService
+
+
+@dataclass
+class CaseResult:
+    case: str
+    seconds: Optional[float] = None
+    peak_rss_mb: Optional[float] = None
+    queries: Optional[int] = None
+    output_bytes: Optional[int] = None
+    error: Optional[str] = None
+
+
+class QueryCounter:
+    """Counts statements executed by any engine in this process."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        event.listen(Engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *args: Any) -> None:
+        self.count += 1
+
+
+def _drain(chunks: Iterable[str]) -> int:
+    return sum(len(chunk.encode("utf-8")) for chunk in chunks)
+
+
+def _saft(report_type: str) -> Callable[[Session, Organization, int, int], int]:
+    def run(session: Session, organization: Organization, year: int, month: int) -> int:
+        saft = SAFT(organization, year, month if report_type == "monthly" else None, use_cache=False)
+        kwargs: Dict[str, Any] = {}
+        if report_type == "on_demand":
+            kwargs = {"start_date": date(year, month, 1), "end_date": date(year, month, 28)}
+        return _drain(saft.iter_generate(report_type, **kwargs))
+    return run
+
+
+def _vat(method: str, encoding: str) -> Callable[[Session, Organization, int, int], int]:
+    def run(session: Session, organization: Organization, year: int, month: int) -> int:
+        output = io.StringIO()
+        getattr(VatService(organization, year, month, session=session), method)(output)
+        return len(output.getvalue().encode(encoding, errors="replace"))
+    return run
+
+
+CASES: Dict[str, Callable[[Session, Organization, int, int], int]] = {
+    "saft-monthly": _saft("monthly"),
+    "saft-annual": _saft("annual"),
+    "saft-on-demand": _saft("on_demand"),
+    "vat-sales": _vat("generate_sales_register", "cp1251"),
+    "vat-purchases": _vat("generate_purchase_register", "cp1251"),
+    "vat-declaration": _vat("generate_vat_declaration", "cp1251"),
+}
+
+
+def run_case(case: str, organization_id: uuid.UUID, year: int, month: int) -> CaseResult:
+    """Run one export. Executed in a fresh process so peak RSS is per case."""
+    result = CaseResult(case=case)
+    with Session(engine) as session:
+        organization = session.get(Organization, organization_id)
+        counter = QueryCounter()
+        started = time.perf_counter()
+        try:
+            result.output_bytes = CASES[case](session, organization, year, month)
+            result.seconds = round(time.perf_counter() - started, 3)
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {(str(e).splitlines() or [''])[0]}"
+        result.queries = counter.count
+    # ru_maxrss is reported in kilobytes on Linux
+    result.peak_rss_mb = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return result
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--preset", default="medium", choices=sorted(PRESETS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--month", type=int, default=1)
+    parser.add_argument("--cases", nargs="+", default=list(CASES), choices=list(CASES))
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    spec = replace(PRESETS[args.preset], seed=args.seed)
+    with Session(engine) as session:
+        organization_id = SyntheticTenant(session, spec).get_or_create().id
+
+    results: List[CaseResult] = []
+    context = multiprocessing.get_context("spawn")
+    for case in args.cases:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            result = pool.submit(run_case, case, organization_id, spec.year, args.month).result()
+        results.append(result)
+        print(
+            f"{result.case:<16} {result.seconds if result.seconds is not None else '-':>9}s "
+            f"{result.peak_rss_mb:>8} MB {result.queries:>8} queries "
+            f"{result.output_bytes or 0:>12} bytes {result.error or ''}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(
+                {"spec": asdict(spec), "month": args.month, "results": [asdict(r) for r in results]},
+                f,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Lines per second of the NRA fixed-width formatters and parser.
+
+Formats synthetic PRODAGBI records with the compiled layout and with a
+per-field baseline (str + ljust/rjust and a quantize per value, the way
+VatService used to format lines), then parses the output back.
+
+    python -m app.benchmarks.nra_layout --lines 200000
+"""
+import argparse
+import random
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Callable, List, Tuple
+
+from app.services.nra_layout import PRODAGBI, RecordLayout
+
+
+def _records(count: int, seed: int) -> List[Tuple[Any, ...]]:
+    rng = random.Random(seed)
+    start = date(2025, 1, 1)
+    records = []
+    for i in range(count):
+        base = Decimal(rng.randrange(100, 10_000_000)) / 100
+        records.append((
+            i + 1,
+            "01",
+            f"{i + 1:010d}",
+            start + timedelta(days=rng.randrange(28)),
+            f"BG{rng.randrange(100000000, 999999999)}",
+            f"Контрагент {rng.randrange(10_000)} ООД",
+            base,
+            (base / 5).quantize(Decimal("0.01")),
+        ))
+    return records
+
+
+def _format_baseline(layout: RecordLayout) -> Callable[..., str]:
+    def field(value: Any, length: int, align: str = "left") -> str:
+        s_value = "" if value is None else str(value)
+        s_value = s_value[:length]
+        return s_value.rjust(length) if align == "right" else s_value.ljust(length)
+
+    def numeric(value: Any, length: int, decimals: int) -> str:
+        value = Decimal(0) if value is None else Decimal(str(value))
+        quantized = value.quantize(Decimal("0." + "0" * decimals)) if decimals else value.quantize(Decimal("0"))
+        return field(str(quantized), length, "right")
+
+    fields = [f for f in layout.fields if f.kind != "literal"]
+
+    def format_record(*values: Any) -> str:
+        line = []
+        for f, value in zip(fields, values):
+            if f.kind == "number":
+                line.append(numeric(value, f.length, f.decimals))
+            elif f.kind == "integer":
+                line.append(field(value, f.length, "right"))
+            elif f.kind == "date":
+                line.append(value.strftime("%d/%m/%Y") if value else " " * 10)
+            else:
+                line.append(field(value, f.length, f.align))
+        return "".join(line) + "\n"
+
+    return format_record
+
+
+def _rate(run: Callable[[], Any], count: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - started)
+    return count / best
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    records = _records(args.lines, args.seed)
+    baseline = _format_baseline(PRODAGBI)
+    compiled = PRODAGBI.format
+    lines = [compiled(*record) for record in records]
+    assert lines == [baseline(*record) for record in records]
+
+    results = {
+        "format (baseline)": _rate(lambda: [baseline(*r) for r in records], args.lines, args.repeat),
+        "format (compiled)": _rate(lambda: [compiled(*r) for r in records], args.lines, args.repeat),
+        "parse": _rate(lambda: [PRODAGBI.parse(line) for line in lines], args.lines, args.repeat),
+    }
+    for name, rate in results.items():
+        print(f"{name:<20} {rate:>12,.0f} lines/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Per-document vs batch journal posting.
+
+Posts the same synthetic payments-like documents into the synthetic tenant
+once with a commit per document, as JournalService.create_journal_entry_for_*
+does, and once with JournalService.post_batch in one transaction, and
+reports documents per second. The posted entries are deleted afterwards.
+
+    python -m app.benchmarks.posting --preset small --documents 1000 10000
+"""
+import argparse
+import random
+import time
+from dataclasses import replace
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Callable, List
+
+from sqlalchemy import delete, select
+from sqlmodel import Session
+
+from app.benchmarks.tenant import PRESETS, SyntheticTenant
+from app.core.db import engine
+from app.models.account import Account
+from app.models.entry_line import EntryLine
+from app.models.journal_entry import JournalEntry
+from app.models.user import User
+from app.services.account_period_balance import AccountPeriodBalanceService
+from app.services.journal import JournalService, Posting, PostingLine
+
+SOURCE_PREFIX = "Bench:"
+
+
+def _postings(accounts: List, count: int, year: int, seed: int) -> List[Posting]:
+    rng = random.Random(seed)
+    postings = []
+    for n in range(count):
+        amount = Decimal(rng.randint(100, 1_000_000)) / 100
+        debit, credit = rng.sample(accounts, 2)
+        postings.append(
+            Posting(
+                source=f"{SOURCE_PREFIX}{n}",
+                entry_date=date(year, 1, 1) + timedelta(days=rng.randrange(365)),
+                description=f"Benchmark document {n}",
+                lines=[PostingLine(debit, debit=amount), PostingLine(credit, credit=amount)],
+            )
+        )
+    return postings
+
+
+def _per_document(service: JournalService, postings: List[Posting]) -> None:
+    for posting in postings:
+        service.post_batch([posting])
+
+
+def _batch(service: JournalService, postings: List[Posting]) -> None:
+    service.post_batch(postings)
+
+
+def _cleanup(session: Session, service: JournalService) -> None:
+    entries = select(JournalEntry.id).where(
+        JournalEntry.organization_id == service.current_organization.id,
+        JournalEntry.reference.like(f"{SOURCE_PREFIX}%"),
+    )
+    # Reverse the turnovers before the lines they were built from are removed
+    AccountPeriodBalanceService(session, service.current_organization.id).unpost_entries(entries)
+    session.execute(delete(EntryLine).where(EntryLine.journal_entry_id.in_(entries)))
+    session.execute(delete(JournalEntry).where(JournalEntry.id.in_(entries)))
+    session.commit()
+
+
+def _rate(run: Callable[[JournalService, List[Posting]], None], session: Session, service: JournalService, postings: List[Posting]) -> float:
+    started = time.perf_counter()
+    run(service, postings)
+    elapsed = time.perf_counter() - started
+    _cleanup(session, service)
+    return len(postings) / elapsed
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--preset", default="small", choices=sorted(PRESETS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--documents", type=int, nargs="+", default=[1_000, 10_000])
+    args = parser.parse_args(argv)
+
+    spec = replace(PRESETS[args.preset], seed=args.seed)
+    with Session(engine) as session:
+        tenant = SyntheticTenant(session, spec)
+        organization = tenant.get_or_create()
+        user = session.get(User, tenant.user_id)
+        accounts = list(session.scalars(select(Account.id).where(Account.organization_id == organization.id)))
+        service = JournalService(session, user, organization)
+
+        print(f"{'documents':>10}{'per document (doc/s)':>24}{'batch (doc/s)':>18}")
+        for count in args.documents:
+            postings = _postings(accounts, count, spec.year, args.seed)
+            per_document = _rate(_per_document, session, service, postings)
+            batch = _rate(_batch, session, service, postings)
+            print(f"{count:>10}{per_document:>24.0f}{batch:>18.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Serial vs parallel SAF-T section rendering.
+
+Renders the same SAF-T file with SAFT.iter_generate and
+SAFT.iter_generate_parallel and reports wall-clock times. Serial runs
+also report the time spent in each section, so the parallel time can be
+compared against the slowest one.
+"""
+import argparse
+import statistics
+import time
+import uuid
+from typing import Dict, Iterable, List
+
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.models.organization import Organization
+from app.services.saft_service import SAFT
+
+
+def _drain(chunks: Iterable[str]) -> int:
+    size = 0
+    for chunk in chunks:
+        size += len(chunk)
+    return size
+
+
+def run_serial(saft: SAFT, report_type: str) -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+    for name, chunks in saft.iter_sections(report_type):
+        section_started = time.perf_counter()
+        _drain(chunks)
+        timings[name] = time.perf_counter() - section_started
+    timings["total"] = time.perf_counter() - started
+    return timings
+
+
+def run_parallel(saft: SAFT, report_type: str, workers: int | None) -> float:
+    started = time.perf_counter()
+    _drain(saft.iter_generate_parallel(report_type, max_workers=workers))
+    return time.perf_counter() - started
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--organization-id", type=uuid.UUID, required=True)
+    parser.add_argument("--year", type=int, required=True)
+    parser.add_argument("--month", type=int)
+    parser.add_argument("--report-type", default="monthly", choices=sorted(SAFT.SECTIONS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args(argv)
+
+    with Session(engine) as session:
+        organization = session.get(Organization, args.organization_id)
+        if organization is None:
+            parser.error(f"Organization {args.organization_id} not found")
+        session.expunge(organization)
+
+    # Measure rendering, not replaying cached fragments from the first run
+    saft = SAFT(organization, args.year, args.month, use_cache=False)
+    serial: List[Dict[str, float]] = []
+    parallel: List[float] = []
+    for _ in range(args.repeat):
+        serial.append(run_serial(saft, args.report_type))
+        parallel.append(run_parallel(saft, args.report_type, args.workers))
+
+    print(f"{'section':<24}{'serial (median s)':>20}")
+    for name in serial[0]:
+        print(f"{name:<24}{statistics.median(run[name] for run in serial):>20.3f}")
+    print(f"{'parallel total':<24}{statistics.median(parallel):>20.3f}")
+
+
+if __name__ == "__main__":
+    main()
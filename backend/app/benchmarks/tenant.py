@@ -0,0 +1,372 @@
+"""
+Deterministic synthetic tenant for export benchmarks.
+
+Creates one organization with a configurable number of accounts,
+contraagents, products, sales, purchases, payments, journal entry lines and
+VAT register rows, spread over one year. All ids derive from the seed, so
+the same spec always produces the same tenant and a tenant that already
+exists is reused instead of being generated again.
+
+    python -m app.benchmarks.tenant --preset medium --seed 42
+"""
+import argparse
+import random
+import uuid
+from dataclasses import asdict, dataclass, replace
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, Iterator, List
+
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.models.account import Account
+from app.models.contraagent import Contraagent
+from app.models.entry_line import EntryLine
+from app.models.item import Item
+from app.models.journal_entry import JournalEntry
+from app.models.organization import Organization
+from app.models.payment import Payment
+from app.models.product import Product
+from app.models.purchase import Purchase
+from app.models.purchase_item import PurchaseItem
+from app.models.sale import Sale
+from app.models.sale_item import SaleItem
+from app.models.store import Store
+from app.models.user import User
+from app.models.vat_purchase_register import VatPurchaseRegister
+from app.models.vat_sales_register import VatSalesRegister
+from app.services.account_balance import AccountBalanceService
+from app.services.account_period_balance import AccountPeriodBalanceService
+
+# Namespace of all generated ids.
+TENANT_NAMESPACE = uuid.UUID("6f1c1f6e-6a55-4c3e-9a51-3f0d8b5a7c21")
+
+VAT_RATE = Decimal("20.00")
+CENT = Decimal("0.01")
+
+
+@dataclass(frozen=True)
+class TenantSpec:
+    accounts: int = 200
+    contraagents: int = 500
+    products: int = 500
+    sales: int = 5_000
+    purchases: int = 2_500
+    payments: int = 2_500
+    entry_lines: int = 50_000
+    year: int = 2025
+    seed: int = 42
+
+
+PRESETS: Dict[str, TenantSpec] = {
+    "small": TenantSpec(
+        accounts=100, contraagents=100, products=100,
+        sales=1_000, purchases=500, payments=500, entry_lines=10_000,
+    ),
+    "medium": TenantSpec(),
+    "large": TenantSpec(
+        accounts=500, contraagents=5_000, products=5_000,
+        sales=100_000, purchases=50_000, payments=50_000, entry_lines=2_000_000,
+    ),
+}
+
+
+class SyntheticTenant:
+    """Generates a tenant described by a TenantSpec with bulk inserts."""
+
+    BATCH_SIZE = 5_000
+
+    def __init__(self, session: Session, spec: TenantSpec):
+        self.session = session
+        self.spec = spec
+        self.rng = random.Random(spec.seed)
+        self.organization_id = self._id("organization", 0)
+        self.user_id = self._id("user", 0)
+        self.store_id = self._id("store", 0)
+        self.now = datetime(spec.year, 12, 31, tzinfo=timezone.utc)
+
+    def get_or_create(self) -> Organization:
+        organization = self.session.get(Organization, self.organization_id)
+        if organization is None:
+            self.create()
+            organization = self.session.get(Organization, self.organization_id)
+        return organization
+
+    def create(self) -> None:
+        self._insert(User, [self._user()])
+        self._insert(Organization, [self._organization()])
+        self._insert(Store, [self._row(Store, id=self.store_id, name="Склад")])
+        self._insert(Account, self._accounts())
+        self._insert(Contraagent, self._contraagents())
+        self._insert(Product, self._products())
+        self._insert(Item, self._items())
+        self._insert_sales()
+        self._insert_purchases()
+        self._insert(Payment, self._payments())
+        self._insert_journal()
+        # Monthly turnovers and balances, as posting would have maintained them
+        AccountPeriodBalanceService(self.session, self.organization_id).rebuild()
+        AccountBalanceService(self.session, self.organization_id).rebuild()
+        self.session.commit()
+
+    # Helpers
+
+    def _id(self, kind: str, index: int) -> uuid.UUID:
+        return uuid.uuid5(TENANT_NAMESPACE, f"{self.spec.seed}:{kind}:{index}")
+
+    def _row(self, model: Any, **values: Any) -> Dict[str, Any]:
+        values.setdefault("organization_id", self.organization_id)
+        if "created_by_id" in model.__table__.c:
+            values.setdefault("created_by_id", self.user_id)
+        for column in ("date_created", "date_updated"):
+            if column in model.__table__.c:
+                values.setdefault(column, self.now)
+        return model(**values).model_dump()
+
+    def _insert(self, model: Any, rows: Iterator[Dict[str, Any]] | List[Dict[str, Any]]) -> None:
+        batch: List[Dict[str, Any]] = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == self.BATCH_SIZE:
+                self.session.execute(model.__table__.insert(), batch)
+                batch = []
+        if batch:
+            self.session.execute(model.__table__.insert(), batch)
+
+    def _date(self) -> date:
+        return date(self.spec.year, 1, 1) + timedelta(days=self.rng.randrange(365))
+
+    def _datetime(self) -> datetime:
+        return datetime.combine(self._date(), time(12), tzinfo=timezone.utc)
+
+    def _amount(self, low: int = 10, high: int = 10_000) -> Decimal:
+        return (Decimal(self.rng.randrange(low * 100, high * 100)) * CENT).quantize(CENT)
+
+    def _vat(self, base: Decimal) -> Decimal:
+        return (base * VAT_RATE / 100).quantize(CENT)
+
+    def _contraagent_id(self) -> uuid.UUID:
+        return self._id("contraagent", self.rng.randrange(self.spec.contraagents))
+
+    def _account_id(self) -> uuid.UUID:
+        return self._id("account", self.rng.randrange(self.spec.accounts))
+
+    # Master data
+
+    def _user(self) -> Dict[str, Any]:
+        return User(
+            id=self.user_id,
+            email=f"bench-{self.spec.seed}@example.com",
+            hashed_password="!",
+            full_name="Benchmark",
+            date_created=self.now,
+            date_updated=self.now,
+        ).model_dump()
+
+    def _organization(self) -> Dict[str, Any]:
+        return Organization(
+            id=self.organization_id,
+            name=f"Бенчмарк {self.spec.seed} ЕООД",
+            registration_number=f"{200000000 + self.spec.seed}",
+            vat_number=f"BG{200000000 + self.spec.seed}",
+            city="София",
+            is_vat_registered=True,
+            legal_representative_name="Иван Иванов",
+            date_created=self.now,
+            date_updated=self.now,
+        ).model_dump()
+
+    def _accounts(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self.spec.accounts):
+            code = f"{100 + i % 800}" if i < 800 else f"{100 + i % 800}{i // 800}"
+            yield self._row(
+                Account,
+                id=self._id("account", i),
+                code=code,
+                name=f"Сметка {code}",
+                account_type=self.rng.choice(["asset", "liability", "equity", "revenue", "expense"]),
+                opening_balance=float(self._amount(0, 50_000)),
+                is_debit_account=self.rng.random() < 0.6,
+            )
+
+    def _contraagents(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self.spec.contraagents):
+            eik = f"{100000000 + i}"
+            yield self._row(
+                Contraagent,
+                id=self._id("contraagent", i),
+                name=f"Контрагент {i} ООД",
+                registration_number=eik,
+                vat_number=f"BG{eik}",
+                city=self.rng.choice(["София", "Пловдив", "Варна", "Бургас"]),
+                is_customer=i % 2 == 0,
+                is_supplier=i % 2 == 1 or i % 5 == 0,
+            )
+
+    def _products(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self.spec.products):
+            price = self._amount(1, 1_000)
+            yield self._row(
+                Product,
+                id=self._id("product", i),
+                name=f"Продукт {i}",
+                sku=f"SKU-{i:06d}",
+                price=price,
+                cost=(price * Decimal("0.7")).quantize(CENT),
+            )
+
+    def _items(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self.spec.products):
+            yield self._row(Item, id=self._id("item", i), name=f"Артикул {i}", unit="бр.", sku=f"SKU-{i:06d}", price=Decimal(0))
+
+    # Documents
+
+    def _insert_sales(self) -> None:
+        sales: List[Dict[str, Any]] = []
+        items: List[Dict[str, Any]] = []
+        register: List[Dict[str, Any]] = []
+        for i in range(self.spec.sales):
+            sale_id = self._id("sale", i)
+            when = self._datetime()
+            contraagent = self.rng.randrange(self.spec.contraagents)
+            lines = [
+                (self._id("item", self.rng.randrange(self.spec.products)), self.rng.randint(1, 10), self._amount(1, 500))
+                for _ in range(self.rng.randint(1, 3))
+            ]
+            base = sum((price * quantity for _, quantity, price in lines), Decimal(0))
+            sales.append(self._row(
+                Sale, id=sale_id, date_sale=when, amount=float(base),
+                contraagent_id=self._id("contraagent", contraagent), store_id=self.store_id,
+            ))
+            for item_id, quantity, price in lines:
+                items.append(SaleItem(
+                    sale_id=sale_id, item_id=item_id, quantity=quantity, price=float(price),
+                    date_created=self.now, date_updated=self.now,
+                ).model_dump())
+            register.append(self._row(
+                VatSalesRegister,
+                period_year=when.year,
+                period_month=when.month,
+                document_date=when.date(),
+                tax_event_date=when.date(),
+                document_type="01",
+                document_number=f"{i + 1:010d}",
+                recipient_name=f"Контрагент {contraagent} ООД",
+                recipient_vat_number=f"BG{100000000 + contraagent}",
+                recipient_eik=f"{100000000 + contraagent}",
+                taxable_base=base,
+                vat_rate=VAT_RATE,
+                vat_amount=self._vat(base),
+                total_amount=base + self._vat(base),
+            ))
+            if len(sales) >= self.BATCH_SIZE:
+                self._flush_documents(Sale, sales, SaleItem, items, VatSalesRegister, register)
+        self._flush_documents(Sale, sales, SaleItem, items, VatSalesRegister, register)
+
+    def _insert_purchases(self) -> None:
+        purchases: List[Dict[str, Any]] = []
+        items: List[Dict[str, Any]] = []
+        register: List[Dict[str, Any]] = []
+        for i in range(self.spec.purchases):
+            purchase_id = self._id("purchase", i)
+            when = self._datetime()
+            contraagent = self.rng.randrange(self.spec.contraagents)
+            lines = [(self.rng.randint(1, 10), self._amount(1, 500)) for _ in range(self.rng.randint(1, 3))]
+            base = sum((price * quantity for quantity, price in lines), Decimal(0))
+            purchases.append(self._row(
+                Purchase, id=purchase_id, date_purchase=when, amount=float(base),
+                contraagent_id=self._id("contraagent", contraagent), store_id=self.store_id,
+            ))
+            for quantity, price in lines:
+                items.append(PurchaseItem(
+                    purchase_id=purchase_id, quantity=quantity, price=float(price),
+                    date_created=self.now, date_updated=self.now,
+                ).model_dump())
+            register.append(self._row(
+                VatPurchaseRegister,
+                period_year=when.year,
+                period_month=when.month,
+                document_type="01",
+                document_number=f"P{i + 1:09d}",
+                document_date=when.date(),
+                supplier_name=f"Контрагент {contraagent} ООД",
+                supplier_vat_number=f"BG{100000000 + contraagent}",
+                taxable_base=base,
+                vat_amount=self._vat(base),
+            ))
+            if len(purchases) >= self.BATCH_SIZE:
+                self._flush_documents(Purchase, purchases, PurchaseItem, items, VatPurchaseRegister, register)
+        self._flush_documents(Purchase, purchases, PurchaseItem, items, VatPurchaseRegister, register)
+
+    def _flush_documents(self, *batches: Any) -> None:
+        for model, rows in zip(batches[::2], batches[1::2]):
+            self._insert(model, rows)
+            rows.clear()
+
+    def _payments(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self.spec.payments):
+            yield self._row(
+                Payment,
+                id=self._id("payment", i),
+                date_payment=self._datetime(),
+                amount=float(self._amount()),
+                method=self.rng.choice(["cash", "bank"]),
+                account_id=self._account_id(),
+            )
+
+    def _insert_journal(self) -> None:
+        """Balanced journal entries of 2-4 lines until entry_lines are created."""
+        entries: List[Dict[str, Any]] = []
+        lines: List[Dict[str, Any]] = []
+        created = 0
+        index = 0
+        while created < self.spec.entry_lines:
+            entry_id = self._id("journal_entry", index)
+            entries.append(self._row(
+                JournalEntry, id=entry_id, entry_date=self._date(),
+                description=f"Операция {index}", reference=f"JE-{index:08d}",
+            ))
+            count = min(self.rng.randint(2, 4), max(self.spec.entry_lines - created, 2))
+            amounts = [self._amount() for _ in range(count - 1)]
+            total = sum(amounts, Decimal(0))
+            for n, amount in enumerate(amounts):
+                lines.append(self._line(entry_id, index, n, debit=amount))
+            lines.append(self._line(entry_id, index, count - 1, credit=total))
+            created += count
+            index += 1
+            if len(lines) >= self.BATCH_SIZE:
+                self._flush_documents(JournalEntry, entries, EntryLine, lines)
+        self._flush_documents(JournalEntry, entries, EntryLine, lines)
+
+    def _line(
+        self, entry_id: uuid.UUID, entry: int, n: int, debit: Decimal = Decimal(0), credit: Decimal = Decimal(0)
+    ) -> Dict[str, Any]:
+        return self._row(
+            EntryLine,
+            id=self._id(f"entry_line:{entry}", n),
+            journal_entry_id=entry_id,
+            account_id=self._account_id(),
+            debit=float(debit),
+            credit=float(credit),
+        )
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--preset", default="medium", choices=sorted(PRESETS))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--entry-lines", type=int, help="Override the preset's number of journal entry lines")
+    args = parser.parse_args(argv)
+
+    spec = replace(PRESETS[args.preset], seed=args.seed)
+    if args.entry_lines is not None:
+        spec = replace(spec, entry_lines=args.entry_lines)
+
+    with Session(engine) as session:
+        organization = SyntheticTenant(session, spec).get_or_create()
+        print(f"Organization {organization.id} ({asdict(spec)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -70,6 +70,27 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    # Reporting (SAF-T, VAT exports) runs on its own connection pool and
+    # can be pointed at a read replica.
+    REPORTING_POSTGRES_SERVER: str | None = None
+    # Exports streamed at the same time; further requests get 503.
+    REPORTING_MAX_EXPORTS: int = 2
+    # Derived from the worker counts below when unset, see
+    # _set_default_reporting_pool_size.
+    REPORTING_POOL_SIZE: int | None = None
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def REPORTING_DATABASE_URI(self) -> PostgresDsn:
+        return MultiHostUrl.build(
+            scheme="postgresql+psycopg",
+            username=self.POSTGRES_USER,
+            password=self.POSTGRES_PASSWORD,
+            host=self.REPORTING_POSTGRES_SERVER or self.POSTGRES_SERVER,
+            port=self.POSTGRES_PORT,
+            path=self.POSTGRES_DB,
+        )
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
@@ -108,6 +129,41 @@ class Settings(BaseSettings):
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
     UPLOAD_DIR: str = "uploads"
 
+    # SAF-T background export jobs
+    SAFT_JOB_WORKERS: int = 2
+    # A pending or running job whose progress has not been saved for this long
+    # is considered dead (its worker was restarted or hung) and is failed.
+    SAFT_JOB_TIMEOUT_SECONDS: int = 3600
+    # Threads used to render the sections of one SAF-T file in parallel.
+    # Each holds a reporting connection, next to the one of the export.
+    SAFT_RENDER_WORKERS: int = 4
+    # Cache rendered SAF-T fragments under UPLOAD_DIR/saft/fragments.
+    SAFT_FRAGMENT_CACHE: bool = True
+    # NRA SAF-T XSD used to validate generated files (not shipped with the app).
+    SAFT_XSD_PATH: str | None = None
+
+    # Organizations rendered in parallel by the bulk VAT export. Each holds
+    # a reporting connection; the derived REPORTING_POOL_SIZE accounts for them.
+    VAT_BULK_WORKERS: int = 4
+
+    # Range-partition the VAT registers by period (one partition per year)
+    # when migrating, see app.services.vat_partitions.
+    VAT_REGISTER_PARTITIONING: bool = False
+
+    @model_validator(mode="after")
+    def _set_default_reporting_pool_size(self) -> Self:
+        # Every background job holds one reporting connection, every admitted
+        # export at most the leading snapshot plus one per SAF-T render
+        # worker, or one per bulk VAT worker.
+        if self.REPORTING_POOL_SIZE is None:
+            per_export = max(1 + self.SAFT_RENDER_WORKERS, self.VAT_BULK_WORKERS)
+            self.REPORTING_POOL_SIZE = self.SAFT_JOB_WORKERS + self.REPORTING_MAX_EXPORTS * per_export
+        return self
+
+    # Lifetime of the cached default posting accounts of an organization.
+    # Changes made in this process invalidate them at once.
+    POSTING_ACCOUNTS_CACHE_SECONDS: int = 60
+
     def _check_default_secret(self, var_name: str, value: str | None) -> None:
         if value == "changethis":
             message = (
@@ -1,3 +1,11 @@
+import re
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Iterable, Iterator, TypeVar
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
 from sqlmodel import Session, create_engine, select
 
 from app import crud
@@ -7,6 +15,116 @@ from app.crud import currency as crud_currency
 
 engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
 
+# Separate pool for long-running report exports, so they never hold
+# connections the request handlers need.
+reporting_engine = create_engine(
+    str(settings.REPORTING_DATABASE_URI),
+    pool_size=settings.REPORTING_POOL_SIZE,
+    max_overflow=0,
+)
+
+T = TypeVar("T")
+
+
+class ExportLimiter:
+    """
+    Admission control for exports on the reporting pool.
+
+    The pool is sized for max_exports concurrent exports. An export takes a
+    slot with acquire() before it starts and gives it back when its stream
+    ends; when no slot is free the request is refused instead of waiting
+    for a pool connection.
+    """
+
+    def __init__(self, max_exports: int):
+        self.max_exports = max_exports
+        self._slots = threading.BoundedSemaphore(max_exports) if max_exports > 0 else None
+
+    def acquire(self) -> bool:
+        """Take a slot without waiting. False when all slots are in use."""
+        return self._slots is not None and self._slots.acquire(blocking=False)
+
+    def release_after(self, chunks: Iterable[T]) -> Iterator[T]:
+        """
+        Iterate chunks, then release the slot taken by acquire(): when they
+        are exhausted, when the stream is closed, or when it is dropped
+        without being started.
+        """
+        release = _once(self._slots.release)
+
+        def _iter() -> Iterator[T]:
+            try:
+                yield from chunks
+            finally:
+                release()
+
+        iterator = _iter()
+        weakref.finalize(iterator, release)
+        return iterator
+
+
+def _once(function):
+    lock = threading.Lock()
+    done = False
+
+    def call() -> None:
+        nonlocal done
+        with lock:
+            if done:
+                return
+            done = True
+        function()
+
+    return call
+
+
+reporting_exports = ExportLimiter(settings.REPORTING_MAX_EXPORTS)
+
+# Format of ids returned by pg_export_snapshot().
+_SNAPSHOT_ID = re.compile(r"[0-9A-F]+-[0-9A-F]+(-[0-9]+)?")
+
+
+@contextmanager
+def snapshot_session(
+    bind: Engine | None = None, snapshot_id: str | None = None
+) -> Iterator[Session]:
+    """
+    Read-only session over a single REPEATABLE READ transaction.
+
+    Every query issued through the session sees the same snapshot of the
+    database, so totals and detail rows of a report always agree even if
+    entries are posted while it is being generated. Pass the id returned by
+    export_snapshot() to read the exact snapshot of another transaction,
+    e.g. from a worker thread rendering part of the same report.
+    """
+    bind = bind or reporting_engine
+    with bind.connect() as connection:
+        postgresql = connection.dialect.name == "postgresql"
+        if postgresql:
+            connection = connection.execution_options(
+                isolation_level="REPEATABLE READ", postgresql_readonly=True
+            )
+        with connection.begin():
+            if postgresql and snapshot_id:
+                if not _SNAPSHOT_ID.fullmatch(snapshot_id):
+                    raise ValueError(f"Invalid snapshot id: {snapshot_id}")
+                # SET TRANSACTION does not accept bind parameters.
+                connection.exec_driver_sql(f"SET TRANSACTION SNAPSHOT '{snapshot_id}'")
+            with Session(bind=connection) as session:
+                yield session
+
+
+def export_snapshot(session: Session) -> str | None:
+    """
+    Export the snapshot of the session's transaction for snapshot_session().
+
+    Returns None on databases without snapshot export; readers then fall
+    back to snapshots of their own.
+    """
+    if session.get_bind().dialect.name != "postgresql":
+        return None
+    return session.execute(text("SELECT pg_export_snapshot()")).scalar_one()
+
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
 # otherwise, SQLModel might fail to initialize relationships properly
@@ -0,0 +1,176 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+A page is read in (sort key, id) order. Its next_cursor encodes the sort key
+and id of its last row, and the next page continues after that pair with a
+row-value comparison, so with an index on (organization_id, sort key, id)
+every page is a bounded index range read however deep it is. A nullable sort
+key orders its NULLs last and continues into them after the last non-null
+value. skip/limit is still accepted for the first page and for old clients.
+
+Counting is chosen per request: "exact" runs count(*) over the filtered
+query, "estimated" takes the planner's row estimate (falling back to an
+exact count when the estimate is small or the database is not PostgreSQL),
+and "none" skips the count.
+"""
+import base64
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+
+from sqlalchemy import Select, and_, func, or_, select, tuple_
+from sqlalchemy.orm import Session
+
+T = TypeVar("T")
+
+# Below this many estimated rows an exact count is cheap enough.
+EXACT_COUNT_BELOW = 10_000
+
+
+class CountMode(str, Enum):
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    NONE = "none"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+@dataclass
+class PageParams:
+    skip: int = 0
+    limit: int = 100
+    after: Optional[str] = None
+    count: CountMode = CountMode.EXACT
+
+
+@dataclass
+class Page(Generic[T]):
+    items: List[T]
+    count: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class SortKey:
+    """Column a list is ordered by; the primary key breaks ties."""
+
+    column: Any
+    id_column: Any
+    descending: bool = False
+    # Defaults to the column's own nullability
+    nullable: Optional[bool] = None
+
+    def values(self, item: Any) -> Tuple[Any, Any]:
+        return getattr(item, self.column.key), getattr(item, self.id_column.key)
+
+    @property
+    def has_nulls(self) -> bool:
+        if self.nullable is not None:
+            return self.nullable
+        return bool(getattr(getattr(self.column, "expression", self.column), "nullable", True))
+
+    def order_by(self) -> Tuple[Any, Any]:
+        column, id_column = self.column, self.id_column
+        if self.descending:
+            column, id_column = column.desc(), id_column.desc()
+        if self.has_nulls:
+            column = column.nulls_last()
+        return column, id_column
+
+    def after(self, value: Any, last_id: Any):
+        """Rows after (value, last_id) in order_by() order."""
+        if value is None:
+            after_id = self.id_column < last_id if self.descending else self.id_column > last_id
+            return and_(self.column.is_(None), after_id)
+        order = tuple_(self.column, self.id_column)
+        after = order < tuple_(value, last_id) if self.descending else order > tuple_(value, last_id)
+        if self.has_nulls:
+            after = or_(after, self.column.is_(None))
+        return after
+
+
+def paginate(session: Session, statement: Select, key: SortKey, params: PageParams) -> Page:
+    """Run one page of `statement` (a select of one entity) in key order."""
+    count = _count(session, statement, params.count)
+
+    if params.after:
+        value, last_id = decode_cursor(params.after)
+        statement = statement.where(key.after(value, last_id))
+    elif params.skip:
+        statement = statement.offset(params.skip)
+    statement = statement.order_by(*key.order_by())
+
+    items = list(session.scalars(statement.limit(params.limit + 1)))
+    next_cursor = None
+    if len(items) > params.limit:
+        items = items[: params.limit]
+        next_cursor = encode_cursor(*key.values(items[-1]))
+    return Page(items=items, count=count, next_cursor=next_cursor)
+
+
+def _count(session: Session, statement: Select, mode: CountMode) -> Optional[int]:
+    if mode == CountMode.NONE:
+        return None
+    filtered = statement.order_by(None).subquery()
+    if mode == CountMode.ESTIMATED and session.get_bind().dialect.name == "postgresql":
+        estimate = _estimate(session, select(filtered))
+        if estimate >= EXACT_COUNT_BELOW:
+            return estimate
+    return session.scalar(select(func.count()).select_from(filtered))
+
+
+def _estimate(session: Session, statement: Select) -> int:
+    connection = session.connection()
+    compiled = statement.compile(dialect=connection.dialect)
+    plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+# Cursors
+
+_ENCODERS: Dict[type, Tuple[str, Callable[[Any], Optional[str]]]] = {
+    type(None): ("z", lambda value: None),
+    datetime: ("dt", datetime.isoformat),
+    date: ("d", date.isoformat),
+    Decimal: ("n", str),
+    float: ("f", repr),
+    int: ("i", str),
+    str: ("s", str),
+    uuid.UUID: ("u", str),
+}
+
+_DECODERS: Dict[str, Callable[[Optional[str]], Any]] = {
+    "z": lambda value: None,
+    "dt": datetime.fromisoformat,
+    "d": date.fromisoformat,
+    "n": Decimal,
+    "f": float,
+    "i": int,
+    "s": str,
+    "u": uuid.UUID,
+}
+
+
+def encode_cursor(*values: Any) -> str:
+    encoded = []
+    for value in values:
+        tag, encode = _ENCODERS[type(value)]
+        encoded.append([tag, encode(value)])
+    return base64.urlsafe_b64encode(json.dumps(encoded, separators=(",", ":")).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Raises InvalidCursor for a malformed cursor."""
+    try:
+        encoded = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return [_DECODERS[tag](value) for tag, value in encoded]
+    except (ValueError, TypeError, KeyError, ArithmeticError) as e:
+        raise InvalidCursor("Invalid cursor") from e
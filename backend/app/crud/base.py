@@ -2,9 +2,10 @@ from typing import Any, Generic, TypeVar
 from uuid import UUID
 
 from pydantic import BaseModel
-from sqlalchemy import func
 from sqlmodel import Session, SQLModel, select
 
+from app.core.pagination import Page, PageParams, SortKey, paginate
+
 ModelType = TypeVar("ModelType", bound=SQLModel)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
@@ -28,12 +29,12 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         self, db: Session, *, skip: int = 0, limit: int = 100
     ) -> tuple[int, list[ModelType]]:
         """Get multiple records with pagination"""
-        count_statement = select(func.count()).select_from(self.model)
-        count = db.exec(count_statement).one()
+        page = self.get_page(db, PageParams(skip=skip, limit=limit))
+        return page.count, page.items
 
-        statement = select(self.model).offset(skip).limit(limit)
-        items = db.exec(statement).all()
-        return count, list(items)
+    def get_page(self, db: Session, params: PageParams) -> Page[ModelType]:
+        """Get one page of records in ID order; see app.core.pagination"""
+        return paginate(db, select(self.model), SortKey(self.model.id, self.model.id), params)
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         """Create a new record"""
@@ -12,6 +12,7 @@ from app.models import (
     User,
     Organization,
 )
+from app.services.vat_register import VatRegisterService
 
 
 def create_invoice(
@@ -69,11 +70,14 @@ def create_invoice(
     db_invoice = Invoice.model_validate(invoice_data)
 
     db_invoice_lines = [
-        InvoiceLine.model_validate(line_data) for line_data in invoice_lines_data
+        InvoiceLine.model_validate({**line_data, "invoice_id": db_invoice.id})
+        for line_data in invoice_lines_data
     ]
     db_invoice.invoice_lines = db_invoice_lines
 
     session.add(db_invoice)
+    session.flush()
+    VatRegisterService(session).sync_invoice(db_invoice)
     session.commit()
     session.refresh(db_invoice)
 
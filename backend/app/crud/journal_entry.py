@@ -1,28 +1,94 @@
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from sqlmodel import Session, delete
+
 from app.crud.base import CRUDBase
-from app.models.journal_entry import JournalEntry, JournalEntryLine
-from app.schemas.journal_entry import JournalEntryCreate, JournalEntryUpdate
-from sqlalchemy.orm import Session
+from app.models.entry_line import EntryLine
+from app.models.journal_entry import JournalEntry, JournalEntryCreate, JournalEntryUpdate
+from app.models.organization import Organization
+from app.models.user import User
+from app.services.account_period_balance import AccountPeriodBalanceService
+from app.services.journal import JournalService, Posting, PostingLine
+from app.services.period_close import PeriodCloseService
+
 
 class CRUDJournalEntry(CRUDBase[JournalEntry, JournalEntryCreate, JournalEntryUpdate]):
-    def create(self, db: Session, *, obj_in: JournalEntryCreate) -> JournalEntry:
-        db_obj = JournalEntry(
-            date=obj_in.date,
+    """
+    Journal entries change the monthly turnovers and Account.balance, so
+    every write goes through the posting hooks of
+    app.services.account_period_balance instead of plain CRUD.
+    """
+
+    def create(  # type: ignore[override]
+        self,
+        db: Session,
+        *,
+        obj_in: JournalEntryCreate,
+        current_user: User,
+        current_organization: Organization,
+    ) -> JournalEntry:
+        """Post a manual journal entry. Raises ValueError if it is rejected."""
+        posting = Posting(
+            source=obj_in.reference or "Manual",
+            entry_date=obj_in.entry_date,
             description=obj_in.description,
+            lines=[
+                PostingLine(
+                    line.account_id,
+                    debit=Decimal(str(line.debit)),
+                    credit=Decimal(str(line.credit)),
+                    description=line.description,
+                )
+                for line in obj_in.lines
+            ],
             currency_code=obj_in.currency_code,
             exchange_rate=obj_in.exchange_rate,
         )
-        db.add(db_obj)
-        db.flush()
+        result = JournalService(db, current_user, current_organization).post_batch([posting])[0]
+        if not result.ok:
+            raise ValueError(result.error)
+        return db.get(JournalEntry, result.journal_entry_id)
 
-        for line in obj_in.lines:
-            db_line = JournalEntryLine(
-                journal_entry_id=db_obj.id,
-                **line.dict()
-            )
-            db.add(db_line)
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: JournalEntry,
+        obj_in: JournalEntryUpdate | dict[str, Any],
+    ) -> JournalEntry:
+        """
+        Change an entry's header. Its lines are taken out of the turnovers
+        of the old date and added to those of the new one.
+        """
+        update_data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
+        balances = AccountPeriodBalanceService(db, db_obj.organization_id)
+        periods = PeriodCloseService(db, db_obj.organization_id)
+        periods.assert_open(db_obj.entry_date)
+        if "entry_date" in update_data:
+            periods.assert_open(update_data["entry_date"])
 
+        balances.unpost_entries([db_obj.id])
+        for field, value in update_data.items():
+            setattr(db_obj, field, value)
+        db.add(db_obj)
+        db.flush()
+        balances.post_entries([db_obj.id])
         db.commit()
         db.refresh(db_obj)
         return db_obj
 
+    def remove(self, db: Session, *, id: UUID) -> JournalEntry | None:
+        """Delete an entry and its lines, taking them out of the turnovers."""
+        db_obj = db.get(JournalEntry, id)
+        if db_obj:
+            PeriodCloseService(db, db_obj.organization_id).assert_open(db_obj.entry_date)
+            AccountPeriodBalanceService(db, db_obj.organization_id).unpost_entries([id])
+            db.exec(delete(EntryLine).where(EntryLine.journal_entry_id == id))
+            db.exec(delete(JournalEntry).where(JournalEntry.id == id))
+            db.commit()
+        return db_obj
+
+
 journal_entry = CRUDJournalEntry(JournalEntry)
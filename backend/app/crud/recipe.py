@@ -4,7 +4,7 @@ CRUD операции за производствени рецепти.
 import uuid
 from typing import Sequence
 
-from sqlmodel import Session, select
+from sqlmodel import Session, func, select
 
 from app.models.recipe import Recipe, RecipeCreate, RecipeUpdate
 from app.models.recipe_item import RecipeItem, RecipeItemCreate, RecipeItemUpdate
@@ -55,7 +55,7 @@ def get_recipes(
     statement = select(Recipe).where(Recipe.organization_id == organization_id)
     if is_active is not None:
         statement = statement.where(Recipe.is_active == is_active)
-    statement = statement.offset(skip).limit(limit)
+    statement = statement.order_by(Recipe.name, Recipe.id).offset(skip).limit(limit)
     return session.exec(statement).all()
 
 
@@ -63,10 +63,10 @@ def get_recipes_count(
     *, session: Session, organization_id: uuid.UUID, is_active: bool | None = None
 ) -> int:
     """Връща броя рецепти за организацията."""
-    statement = select(Recipe).where(Recipe.organization_id == organization_id)
+    statement = select(func.count()).select_from(Recipe).where(Recipe.organization_id == organization_id)
     if is_active is not None:
         statement = statement.where(Recipe.is_active == is_active)
-    return len(session.exec(statement).all())
+    return session.exec(statement).one()
 
 
 def update_recipe(
@@ -0,0 +1,50 @@
+import argparse
+import logging
+import uuid
+from pathlib import Path
+
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models import User
+from app.services.journal_import import JournalImportService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def import_journal(organization_id: uuid.UUID, user_email: str, path: Path, file_format: str) -> None:
+    with Session(engine) as session:
+        user = session.exec(select(User).where(User.email == user_email)).first()
+        if user is None:
+            raise SystemExit(f"No user {user_email}")
+        with path.open(encoding="utf-8-sig", newline="") as source:
+            result = JournalImportService(session, organization_id, user.id).import_file(source, file_format)
+        session.commit()
+    logger.info(
+        "Imported %s entries (%s lines), rejected %s entries (%s lines)",
+        result.entries_imported,
+        result.lines_imported,
+        result.entries_rejected,
+        result.lines_rejected,
+    )
+    for reject in result.rejects:
+        logger.warning("Line %s, entry %s: %s", reject.line, reject.entry_ref, reject.error)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import journal entries from a CSV or JSONL file")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--organization-id", type=uuid.UUID, required=True)
+    parser.add_argument("--user-email", default=settings.FIRST_SUPERUSER)
+    parser.add_argument("--format", dest="file_format", choices=["csv", "jsonl"])
+    args = parser.parse_args()
+    file_format = args.file_format or args.path.suffix.lstrip(".").lower()
+    if file_format not in ("csv", "jsonl"):
+        parser.error("--format is required for files without a .csv or .jsonl suffix")
+    import_journal(args.organization_id, args.user_email, args.path, file_format)
+
+
+if __name__ == "__main__":
+    main()
@@ -271,6 +271,20 @@ from app.models.entry_line import (
     EntryLinePublic,
     EntryLinesPublic,
 )
+from app.models.account_period_balance import AccountPeriodBalance
+from app.models.journal_import import JournalImportReject, JournalImportResult
+from app.models.ledger_report import (
+    AccountCardLine,
+    AccountCardPublic,
+    TrialBalancePublic,
+    TrialBalanceRow,
+)
+from app.models.period_close import (
+    PeriodAccountBalance,
+    PeriodClose,
+    PeriodClosePublic,
+    PeriodClosesPublic,
+)
 from app.models.vat_return import (
     VatReturn,
     VatReturnCreate,
@@ -348,6 +362,13 @@ from app.models.extracted_invoice import (
     ExtractedInvoiceStatus,
     ExtractedInvoiceType,
 )
+from app.models.saft_export_job import (
+    SaftExportJob,
+    SaftExportJobCreate,
+    SaftExportJobPublic,
+    SaftExportJobStatus,
+)
+from app.models.vat_bulk_export import VatBulkExportCreate
 
 from app.models.item import (
     Item,
@@ -619,6 +640,19 @@ __all__ = [
     "EntryLineUpdate",
     "EntryLinePublic",
     "EntryLinesPublic",
+    "AccountPeriodBalance",
+    "JournalImportReject",
+    "JournalImportResult",
+    # Ledger reports
+    "TrialBalanceRow",
+    "TrialBalancePublic",
+    "AccountCardLine",
+    "AccountCardPublic",
+    # Period close
+    "PeriodClose",
+    "PeriodAccountBalance",
+    "PeriodClosePublic",
+    "PeriodClosesPublic",
     # VAT module
     "VatReturn",
     "VatReturnCreate",
@@ -681,6 +715,13 @@ __all__ = [
     "ExtractedInvoicesPublic",
     "ExtractedInvoiceStatus",
     "ExtractedInvoiceType",
+    # SAF-T export jobs
+    "SaftExportJob",
+    "SaftExportJobCreate",
+    "SaftExportJobPublic",
+    "SaftExportJobStatus",
+    # Bulk VAT export
+    "VatBulkExportCreate",
     # Manufacturing module
     "Recipe",
     "RecipeCreate",
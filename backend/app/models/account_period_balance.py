@@ -0,0 +1,34 @@
+"""
+Обороти по сметки за месец (account_period_balance).
+
+Debit and credit turnover of every account per calendar month, maintained
+by AccountPeriodBalanceService as journal entries are posted and removed.
+Opening and closing balances of a month are sums over the months of its
+year instead of scans of entry_line.
+"""
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from sqlmodel import Field
+
+from app.models.base import BaseModel
+from app.utils import utcnow
+
+
+class AccountPeriodBalance(BaseModel, table=True):
+    __tablename__ = "account_period_balance"
+
+    organization_id: uuid.UUID = Field(
+        foreign_key="organization.id", primary_key=True, ondelete="CASCADE"
+    )
+    account_id: uuid.UUID = Field(foreign_key="account.id", primary_key=True, ondelete="CASCADE")
+    period_year: int = Field(primary_key=True)
+    period_month: int = Field(primary_key=True, ge=1, le=12)
+
+    debit: Decimal = Field(default=0, max_digits=18, decimal_places=2, description="Дебитен оборот")
+    credit: Decimal = Field(default=0, max_digits=18, decimal_places=2, description="Кредитен оборот")
+    # Entry lines counted in the turnover; the row is deleted when it reaches zero
+    line_count: int = Field(default=0)
+
+    date_updated: datetime = Field(default_factory=utcnow)
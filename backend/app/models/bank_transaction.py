@@ -6,7 +6,7 @@ from datetime import date, datetime
 from decimal import Decimal
 from typing import TYPE_CHECKING, Any
 
-from sqlalchemy import Column, JSON
+from sqlalchemy import Column, Index, JSON
 from sqlmodel import Field, Relationship
 
 from app.models import BaseModel
@@ -65,6 +65,8 @@ class BankTransactionUpdate(BaseModel):
 class BankTransaction(BankTransactionBase, table=True):
     """Банкова транзакция."""
     __tablename__ = "bank_transaction"
+    # Keyset pagination of the list endpoint, see app.core.pagination
+    __table_args__ = (Index("ix_bank_transaction_organization_list", "organization_id", "booking_date", "id"),)
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     organization_id: uuid.UUID = Field(foreign_key="organization.id", index=True)
@@ -102,4 +104,5 @@ class BankTransactionPublic(BankTransactionBase):
 class BankTransactionsPublic(BaseModel):
     """Списък банкови транзакции."""
     data: list[BankTransactionPublic]
-    count: int
+    count: int | None = None
+    next_cursor: str | None = None
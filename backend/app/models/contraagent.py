@@ -3,6 +3,7 @@ from datetime import datetime
 from decimal import Decimal
 from typing import TYPE_CHECKING, List, Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship
 
 from app.models.base import BaseModel
@@ -152,6 +153,8 @@ class ContraagentUpdate(BaseModel):
 
 
 class Contraagent(ContraagentBase, table=True):
+    # Keyset pagination of the list endpoint, see app.core.pagination
+    __table_args__ = (Index("ix_contraagent_organization_list", "organization_id", "name", "id"),)
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     date_created: datetime = Field(default_factory=utcnow)
     date_updated: datetime = Field(default_factory=utcnow)
@@ -214,4 +217,5 @@ class ContraagentPublic(ContraagentBase):
 
 class ContraagentsPublic(BaseModel):
     data: list[ContraagentPublic]
-    count: int
+    count: int | None = None
+    next_cursor: str | None = None
@@ -41,8 +41,9 @@ class EntryLine(EntryLineBase, table=True):
     journal_entry_id: uuid.UUID = Field(
         foreign_key="journal_entry.id", nullable=False, ondelete="CASCADE"
     )
+    # Indexed for the account card, which reads one account's lines
     account_id: uuid.UUID = Field(
-        foreign_key="account.id", nullable=False, ondelete="CASCADE"
+        foreign_key="account.id", nullable=False, ondelete="CASCADE", index=True
     )
 
     organization: "Organization" = Relationship()
@@ -4,6 +4,7 @@ from typing import TYPE_CHECKING
 
 from sqlmodel import Field, Relationship, SQLModel
 
+from app.models.entry_line import EntryLineCreate
 from app.utils import utcnow
 
 if TYPE_CHECKING:
@@ -22,7 +23,7 @@ class JournalEntryBase(SQLModel):
 
 
 class JournalEntryCreate(JournalEntryBase):
-    pass
+    lines: list[EntryLineCreate]
 
 
 class JournalEntryUpdate(SQLModel):
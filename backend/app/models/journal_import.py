@@ -0,0 +1,22 @@
+"""
+Масов импорт на счетоводни записвания (миграция от друг софтуер).
+
+Result schemas of JournalImportService; the import itself only uses
+temporary staging tables.
+"""
+from app.models.base import BaseModel
+
+
+class JournalImportReject(BaseModel):
+    line: int  # line of the source file
+    entry_ref: str | None = None
+    error: str
+
+
+class JournalImportResult(BaseModel):
+    entries_imported: int
+    lines_imported: int
+    entries_rejected: int
+    lines_rejected: int
+    # The first rejected lines, in file order
+    rejects: list[JournalImportReject]
@@ -0,0 +1,54 @@
+"""
+Оборотна ведомост и аналитична карта на сметка.
+
+Response schemas of the ledger reports; the figures are computed by
+LedgerReportService.
+"""
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from app.models.base import BaseModel
+
+
+class TrialBalanceRow(BaseModel):
+    """Opening balance, turnover and closing balance of an account or account group."""
+
+    account_id: uuid.UUID | None = None  # None for a group of accounts
+    code: str
+    name: str | None = None
+    opening_debit: Decimal
+    opening_credit: Decimal
+    turnover_debit: Decimal
+    turnover_credit: Decimal
+    closing_debit: Decimal
+    closing_credit: Decimal
+
+
+class TrialBalancePublic(BaseModel):
+    period_year: int
+    first_month: int
+    last_month: int
+    data: list[TrialBalanceRow]
+    totals: TrialBalanceRow
+
+
+class AccountCardLine(BaseModel):
+    entry_line_id: uuid.UUID
+    journal_entry_id: uuid.UUID
+    entry_date: date
+    reference: str | None = None
+    description: str | None = None
+    debit: Decimal
+    credit: Decimal
+    # Debit-positive balance after this line
+    balance: Decimal
+
+
+class AccountCardPublic(BaseModel):
+    account_id: uuid.UUID
+    # Debit-positive balance before the first line of this page
+    opening_balance: Decimal
+    data: list[AccountCardLine]
+    # Pass as `after` to read the next page; None on the last page
+    next_cursor: str | None = None
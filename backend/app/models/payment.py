@@ -2,6 +2,7 @@ import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship
 
 from app.models import BaseModel
@@ -38,6 +39,8 @@ class PaymentUpdate(PaymentBase):
 
 
 class Payment(PaymentBase, table=True):
+    # Keyset pagination of the list endpoint, see app.core.pagination
+    __table_args__ = (Index("ix_payment_organization_list", "organization_id", "date_payment", "id"),)
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     date_created: datetime = Field(default_factory=utcnow)
     organization_id: uuid.UUID = Field(
@@ -65,4 +68,5 @@ class PaymentPublic(PaymentBase):
 
 class PaymentsPublic(BaseModel):
     data: list[PaymentPublic]
-    count: int
+    count: int | None = None
+    next_cursor: str | None = None
@@ -0,0 +1,84 @@
+"""
+Приключване на счетоводен период (месец).
+
+Closing a month freezes its figures: PeriodClose holds the month's VAT
+register totals and PeriodAccountBalance each account's opening balance,
+turnover and closing balance as they were at the close. Journal entries
+dated inside a closed month can no longer be written, so reports for it
+read the snapshot instead of entry_line.
+"""
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import UniqueConstraint
+from sqlmodel import Field
+
+from app.models.base import BaseModel
+from app.utils import utcnow
+
+
+class PeriodCloseBase(BaseModel):
+    period_year: int
+    period_month: int = Field(ge=1, le=12)
+
+    # ДДС за периода, от дневниците за продажби и покупки
+    sales_taxable_base: Decimal = Field(default=0, max_digits=18, decimal_places=2, description="Данъчна основа продажби")
+    sales_vat: Decimal = Field(default=0, max_digits=18, decimal_places=2, description="ДДС продажби")
+    sales_documents: int = Field(default=0)
+    purchases_taxable_base: Decimal = Field(default=0, max_digits=18, decimal_places=2, description="Данъчна основа покупки")
+    purchases_vat: Decimal = Field(default=0, max_digits=18, decimal_places=2, description="ДДС покупки")
+    purchases_documents: int = Field(default=0)
+
+    # Totals of the month's entry lines at the close
+    turnover_debit: Decimal = Field(default=0, max_digits=18, decimal_places=2)
+    turnover_credit: Decimal = Field(default=0, max_digits=18, decimal_places=2)
+
+
+class PeriodClose(PeriodCloseBase, table=True):
+    __tablename__ = "period_close"
+    __table_args__ = (
+        UniqueConstraint("organization_id", "period_year", "period_month", name="ux_period_close_month"),
+    )
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    organization_id: uuid.UUID = Field(foreign_key="organization.id", nullable=False, ondelete="CASCADE")
+    closed_by_id: uuid.UUID | None = Field(default=None, foreign_key="user.id", ondelete="SET NULL")
+    closed_at: datetime = Field(default_factory=utcnow)
+
+
+class PeriodAccountBalance(BaseModel, table=True):
+    """An account's figures for a closed month, frozen at the close."""
+
+    __tablename__ = "period_account_balance"
+
+    organization_id: uuid.UUID = Field(
+        foreign_key="organization.id", primary_key=True, ondelete="CASCADE"
+    )
+    account_id: uuid.UUID = Field(foreign_key="account.id", primary_key=True, ondelete="CASCADE")
+    period_year: int = Field(primary_key=True)
+    period_month: int = Field(primary_key=True, ge=1, le=12)
+
+    # Debit-positive balances, including all earlier years
+    opening_balance: Decimal = Field(default=0, max_digits=18, decimal_places=2, description="Начално салдо")
+    debit: Decimal = Field(default=0, max_digits=18, decimal_places=2, description="Дебитен оборот")
+    credit: Decimal = Field(default=0, max_digits=18, decimal_places=2, description="Кредитен оборот")
+    closing_balance: Decimal = Field(default=0, max_digits=18, decimal_places=2, description="Крайно салдо")
+
+    # SAF-T figures: the account's opening_balance and the turnover of the
+    # year's earlier months
+    account_opening_balance: Decimal = Field(default=0, max_digits=18, decimal_places=2)
+    year_debit_before: Decimal = Field(default=0, max_digits=18, decimal_places=2)
+    year_credit_before: Decimal = Field(default=0, max_digits=18, decimal_places=2)
+
+
+class PeriodClosePublic(PeriodCloseBase):
+    id: uuid.UUID
+    organization_id: uuid.UUID
+    closed_by_id: uuid.UUID | None = None
+    closed_at: datetime
+
+
+class PeriodClosesPublic(BaseModel):
+    data: list[PeriodClosePublic]
+    count: int
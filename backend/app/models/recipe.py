@@ -7,6 +7,7 @@ from datetime import datetime
 from decimal import Decimal
 from typing import TYPE_CHECKING, List
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 from app.models import BaseModel
@@ -52,6 +53,8 @@ class RecipeUpdate(SQLModel):
 
 class Recipe(RecipeBase, table=True):
     """Производствена рецепта."""
+    # Keyset pagination of the list endpoint, see app.core.pagination
+    __table_args__ = (Index("ix_recipe_organization_list", "organization_id", "name", "id"),)
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     date_created: datetime = Field(default_factory=utcnow)
     date_updated: datetime = Field(default_factory=utcnow)
@@ -89,7 +92,8 @@ class RecipePublicWithItems(RecipePublic):
 class RecipesPublic(SQLModel):
     """Списък с рецепти."""
     data: List[RecipePublic]
-    count: int
+    count: int | None = None
+    next_cursor: str | None = None
 
 
 # Forward reference for RecipeItemPublic
@@ -0,0 +1,94 @@
+"""
+SAF-T export job - фоново генериране на SAF-T файл.
+
+The generated file is stored gzip-compressed under UPLOAD_DIR and can be
+downloaded by job id once the job has completed.
+"""
+import enum
+import uuid
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Optional
+
+from sqlmodel import JSON, Field, Relationship
+
+from app.models.base import BaseModel
+from app.utils import utcnow
+
+if TYPE_CHECKING:
+    from app.models.organization import Organization
+    from app.models.user import User
+
+
+class SaftExportJobStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class SaftExportJobBase(BaseModel):
+    report_type: str = Field(max_length=20, description="monthly, annual или on_demand")
+    period_year: int = Field(description="Година на периода")
+    period_month: Optional[int] = Field(default=None, ge=1, le=12, description="Месец на периода")
+    start_date: Optional[date] = Field(default=None, description="Начална дата (on_demand)")
+    end_date: Optional[date] = Field(default=None, description="Крайна дата (on_demand)")
+    validate_xsd: bool = Field(default=False, description="Валидиране на файла спрямо XSD на НАП")
+
+
+class SaftExportJobCreate(SaftExportJobBase):
+    pass
+
+
+class SaftExportJob(SaftExportJobBase, table=True):
+    __tablename__ = "saft_export_job"
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    organization_id: uuid.UUID = Field(
+        foreign_key="organization.id", nullable=False, ondelete="CASCADE", index=True
+    )
+    created_by_id: uuid.UUID = Field(
+        foreign_key="user.id", nullable=False, ondelete="CASCADE"
+    )
+
+    status: SaftExportJobStatus = Field(default=SaftExportJobStatus.PENDING, nullable=False)
+    # Hash of the job parameters and of the source data, set by the worker
+    # when the job runs; equal fingerprints mean the stored artifact can be
+    # reused.
+    fingerprint: Optional[str] = Field(default=None, max_length=64, index=True)
+
+    # Progress
+    sections_total: int = Field(default=0)
+    sections_done: int = Field(default=0)
+    rows_written: int = Field(default=0)
+
+    # Artifact
+    artifact_path: Optional[str] = Field(default=None, max_length=1024)
+    artifact_size: Optional[int] = None
+    error_message: Optional[str] = None
+
+    # XSD validation (validate_xsd): first errors with line numbers
+    is_valid: Optional[bool] = None
+    validation_errors: Optional[list] = Field(default=None, sa_type=JSON)
+
+    date_started: Optional[datetime] = None
+    date_finished: Optional[datetime] = None
+    date_created: datetime = Field(default_factory=utcnow)
+    date_updated: datetime = Field(default_factory=utcnow)
+
+    organization: "Organization" = Relationship()
+    created_by: "User" = Relationship()
+
+
+class SaftExportJobPublic(SaftExportJobBase):
+    id: uuid.UUID
+    organization_id: uuid.UUID
+    status: SaftExportJobStatus
+    sections_total: int
+    sections_done: int
+    rows_written: int
+    artifact_size: Optional[int] = None
+    error_message: Optional[str] = None
+    is_valid: Optional[bool] = None
+    validation_errors: Optional[list] = None
+    date_started: Optional[datetime] = None
+    date_finished: Optional[datetime] = None
+    date_created: datetime
@@ -2,6 +2,7 @@ import uuid
 from datetime import datetime
 from typing import TYPE_CHECKING
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship
 
 from app.models import BaseModel
@@ -36,6 +37,8 @@ class SaleUpdate(SaleBase):
 
 
 class Sale(SaleBase, table=True):
+    # Keyset pagination of the list endpoint, see app.core.pagination
+    __table_args__ = (Index("ix_sale_organization_list", "organization_id", "date_sale", "id"),)
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     date_created: datetime = Field(default_factory=utcnow)
     date_updated: datetime = Field(default_factory=utcnow)
@@ -81,4 +84,5 @@ class SalePublic(SaleBase):
 
 class SalesPublic(BaseModel):
     data: list[SalePublic]
-    count: int
+    count: int | None = None
+    next_cursor: str | None = None
@@ -5,6 +5,7 @@ from decimal import Decimal
 from typing import TYPE_CHECKING, List, Optional
 from uuid import UUID, uuid4
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 from app.models.base import BaseModel
@@ -56,6 +57,8 @@ class StockLevelBase(BaseModel):
 class StockLevel(StockLevelBase, table=True):
     """StockLevel database model."""
     __tablename__ = "stock_levels"
+    # Keyset pagination of the list endpoint, see app.core.pagination
+    __table_args__ = (Index("ix_stock_levels_organization_list", "organization_id", "id"),)
 
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     organization_id: UUID = Field(foreign_key="organization.id", index=True)
@@ -113,4 +116,5 @@ class StockLevelPublic(StockLevelBase):
 class StockLevelsPublic(SQLModel):
     """List of stock levels with count."""
     data: List[StockLevelPublic]
-    count: int
+    count: int | None = None
+    next_cursor: str | None = None
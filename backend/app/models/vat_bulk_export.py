@@ -0,0 +1,17 @@
+"""
+Групов експорт на файловете по ДДС на няколко организации.
+
+Used by accounting firms to download PRODAGBI, POKUPKI and DEKLAR of all
+their client organizations for one period as a single ZIP.
+"""
+import uuid
+
+from sqlmodel import Field
+
+from app.models.base import BaseModel
+
+
+class VatBulkExportCreate(BaseModel):
+    organization_ids: list[uuid.UUID] = Field(min_length=1, max_length=1000, description="Организации")
+    period_year: int = Field(description="Година на периода")
+    period_month: int = Field(ge=1, le=12, description="Месец на периода")
@@ -2,6 +2,7 @@ import uuid
 from datetime import date
 from decimal import Decimal
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 
 from app.models.base import BaseModel
@@ -28,13 +29,29 @@ class VatPurchaseRegisterBase(BaseModel):
 
 class VatPurchaseRegister(VatPurchaseRegisterBase, table=True):
     __tablename__ = "vat_purchase_registers"
+    __table_args__ = (
+        # Covers POKUPKI and the declaration, see ix_vat_sales_register_period
+        Index(
+            "ix_vat_purchase_registers_period",
+            "organization_id", "period_year", "period_month", "document_date", "id",
+            postgresql_include=[
+                "document_type", "document_number", "supplier_vat_number", "supplier_name",
+                "taxable_base", "vat_amount",
+            ],
+        ),
+        Index("ux_vat_purchase_registers_purchase", "purchase_id", "period_year", "period_month", unique=True),
+    )
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     organization_id: uuid.UUID = Field(
         foreign_key="organization.id", nullable=False, index=True
     )
-    period_year: int = Field(nullable=False, index=True)
-    period_month: int = Field(nullable=False, index=True)
+    period_year: int = Field(nullable=False)
+    period_month: int = Field(nullable=False)
+    # Set for rows maintained by VatRegisterService: one row per purchase
+    purchase_id: uuid.UUID | None = Field(
+        default=None, foreign_key="purchase.id", ondelete="CASCADE", index=True
+    )
 
 
 class VatPurchaseRegisterCreate(VatPurchaseRegisterBase):
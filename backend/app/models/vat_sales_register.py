@@ -9,6 +9,7 @@ from datetime import date, datetime
 from decimal import Decimal
 from typing import TYPE_CHECKING
 
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship
 
 from app.models import BaseModel
@@ -79,9 +80,25 @@ class VatSalesRegisterUpdate(BaseModel):
 class VatSalesRegister(VatSalesRegisterBase, table=True):
     """Запис в дневник продажби."""
     __tablename__ = "vat_sales_register"
+    __table_args__ = (
+        # Covers PRODAGBI and the declaration: one period of one organization
+        # in document order, read from the index alone
+        Index(
+            "ix_vat_sales_register_period",
+            "organization_id", "period_year", "period_month", "document_date", "id",
+            postgresql_include=[
+                "document_type", "document_number", "recipient_vat_number", "recipient_name",
+                "taxable_base", "vat_amount", "vat_rate", "column_code", "vat_operation_code",
+            ],
+        ),
+        # One row per invoice. Unique keys of a partitioned table must contain
+        # the partition key, hence the period columns.
+        Index("ux_vat_sales_register_invoice", "invoice_id", "period_year", "period_month", unique=True),
+    )
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     organization_id: uuid.UUID = Field(foreign_key="organization.id", index=True)
+    # Set for rows maintained by VatRegisterService: one row per invoice
     invoice_id: uuid.UUID | None = Field(default=None, foreign_key="invoices.id", index=True)
 
     date_created: datetime = Field(default_factory=utcnow)
@@ -0,0 +1,31 @@
+import argparse
+import logging
+import uuid
+
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.services.vat_register import VatRegisterService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def rebuild(organization_id: uuid.UUID, year: int, month: int) -> None:
+    with Session(engine) as session:
+        sales, purchases = VatRegisterService(session).rebuild_period(organization_id, year, month)
+        session.commit()
+    logger.info("Rebuilt %s/%02d: %s sales and %s purchase register rows", year, month, sales, purchases)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild the VAT registers of one period from invoices and purchases")
+    parser.add_argument("--organization-id", type=uuid.UUID, required=True)
+    parser.add_argument("--year", type=int, required=True)
+    parser.add_argument("--month", type=int, required=True, choices=range(1, 13))
+    args = parser.parse_args()
+    rebuild(args.organization_id, args.year, args.month)
+
+
+if __name__ == "__main__":
+    main()
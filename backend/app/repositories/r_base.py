@@ -3,6 +3,7 @@ from typing import Generic, TypeVar
 from sqlmodel import func, select
 
 from app.api.deps import SessionDep
+from app.core.pagination import CountMode, Page, PageParams, SortKey, paginate
 from app.interfaces import IBase
 
 T = TypeVar("T")  # Entity
@@ -17,9 +18,14 @@ class RBase(IBase[T, ID], Generic[T, ID]):
     def get(self, id: ID) -> T:
         return self.session.get(self.model, id)
 
-    def list(self, skip=0, limit=0) -> list[T]:
-        stmt = select(self.model).offset(skip).limit(limit)
-        return self.session.exec(stmt).all()
+    def list(self, skip=0, limit=0, after: str | None = None) -> list[T]:
+        if not limit:
+            stmt = select(self.model).offset(skip).limit(limit)
+            return self.session.exec(stmt).all()
+        return self.page(PageParams(skip=skip, limit=limit, after=after, count=CountMode.NONE)).items
+
+    def page(self, params: PageParams) -> Page[T]:
+        return paginate(self.session, select(self.model), SortKey(self.model.id, self.model.id), params)
 
     def count(self) -> int:
         stmt = select(func.count()).select_from(self.model)
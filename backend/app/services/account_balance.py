@@ -0,0 +1,114 @@
+"""
+Текущо салдо по сметка (Account.balance).
+
+Account.balance is the debit-positive balance of the account: its
+opening_balance plus the debit minus the credit of all its entry lines.
+It is kept current in the transaction that posts or removes entries: one
+UPDATE account SET balance = balance + delta per touched account, in
+account id order, so concurrent postings lock accounts in the same order
+and a balance read is a primary-key lookup. AccountPeriodBalanceService
+applies it together with the monthly turnovers. verify() and rebuild()
+recompute the balances from entry_line for consistency checks and repairs.
+"""
+import uuid
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Iterable, List
+
+from sqlalchemy import Numeric, Select, bindparam, cast, func, update
+from sqlmodel import Session, select
+
+from app.models.account import Account
+from app.models.entry_line import EntryLine
+
+MONEY = Numeric(18, 2)
+
+
+@dataclass
+class AccountBalanceMismatch:
+    """An account whose stored balance differs from the ledger."""
+
+    account_id: uuid.UUID
+    code: str
+    stored_balance: Decimal
+    ledger_balance: Decimal
+
+
+class AccountBalanceService:
+    def __init__(self, session: Session, organization_id: uuid.UUID):
+        self.session = session
+        self.organization_id = organization_id
+
+    def post_entries(self, journal_entry_ids: Iterable[uuid.UUID] | Select) -> None:
+        """Add the lines of flushed journal entries to the balances. Does not commit."""
+        self.apply(journal_entry_ids, 1)
+
+    def unpost_entries(self, journal_entry_ids: Iterable[uuid.UUID] | Select) -> None:
+        """Subtract the lines of journal entries about to be deleted. Does not commit."""
+        self.apply(journal_entry_ids, -1)
+
+    def apply(self, journal_entry_ids: Iterable[uuid.UUID] | Select, sign: int) -> None:
+        """Add (sign 1) or subtract (sign -1) the lines of journal entries."""
+        if not isinstance(journal_entry_ids, Select):
+            journal_entry_ids = list(journal_entry_ids)
+            if not journal_entry_ids:
+                return
+        deltas = self.session.execute(
+            select(EntryLine.account_id, func.sum(EntryLine.debit - EntryLine.credit))
+            .where(
+                EntryLine.organization_id == self.organization_id,
+                EntryLine.journal_entry_id.in_(journal_entry_ids),
+            )
+            .group_by(EntryLine.account_id)
+            # Lock order
+            .order_by(EntryLine.account_id)
+        ).all()
+        rows = [
+            {"account_id": account_id, "delta": sign * delta}
+            for account_id, delta in deltas
+            if delta
+        ]
+        if not rows:
+            return
+        account = Account.__table__
+        self.session.execute(
+            update(account)
+            .where(account.c.id == bindparam("account_id"))
+            .values(balance=account.c.balance + cast(bindparam("delta"), MONEY)),
+            rows,
+        )
+
+    def verify(self) -> List[AccountBalanceMismatch]:
+        """Compare the stored balances with opening_balance plus entry_line."""
+        ledger = self._ledger_balance()
+        stored = cast(Account.balance, MONEY)
+        statement = (
+            select(Account.id, Account.code, stored, ledger)
+            .where(Account.organization_id == self.organization_id, stored != ledger)
+            .order_by(Account.code)
+        )
+        return [
+            AccountBalanceMismatch(account_id, code, Decimal(stored_balance), Decimal(ledger_balance))
+            for account_id, code, stored_balance, ledger_balance in self.session.execute(statement)
+        ]
+
+    def rebuild(self) -> int:
+        """
+        Recompute the organization's balances from entry_line. Returns the
+        number of accounts updated. Does not commit.
+        """
+        result = self.session.execute(
+            update(Account)
+            .where(Account.organization_id == self.organization_id)
+            .values(balance=self._ledger_balance())
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    def _ledger_balance(self):
+        movement = (
+            select(func.coalesce(func.sum(EntryLine.debit - EntryLine.credit), 0))
+            .where(EntryLine.account_id == Account.id)
+            .scalar_subquery()
+        )
+        return cast(cast(Account.opening_balance, MONEY) + movement, MONEY)
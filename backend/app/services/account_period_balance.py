@@ -0,0 +1,191 @@
+"""
+Поддръжка на месечните обороти по сметки (account_period_balance).
+
+Posting a journal entry adds its lines to the turnover of their account and
+month, removing it subtracts them again: one grouped INSERT ... SELECT ...
+ON CONFLICT DO UPDATE per batch of entries, in the transaction that writes
+the entries. Months whose last line is removed are deleted. Rows are upserted in key order, so concurrent postings to the
+same accounts lock them in the same order. Account.balance is updated
+alongside (app.services.account_balance). rebuild() and verify() recompute
+the turnovers from entry_line for repairs and consistency checks.
+"""
+import uuid
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Any, Iterable, List, Optional
+
+from sqlalchemy import Integer, Numeric, Select, and_, cast, delete, extract, func, insert, literal, or_, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import Session, select
+
+from app.models.account_period_balance import AccountPeriodBalance
+from app.models.entry_line import EntryLine
+from app.models.journal_entry import JournalEntry
+from app.services.account_balance import AccountBalanceService
+from app.utils import utcnow
+
+MONEY = Numeric(18, 2)
+ZERO = Decimal("0.00")
+
+BALANCE_KEY = ["organization_id", "account_id", "period_year", "period_month"]
+BALANCE_COLUMNS = BALANCE_KEY + ["debit", "credit", "line_count", "date_updated"]
+
+
+@dataclass
+class BalanceDiscrepancy:
+    """A month whose stored turnover differs from the ledger."""
+
+    account_id: uuid.UUID
+    period_year: int
+    period_month: int
+    stored_debit: Decimal
+    stored_credit: Decimal
+    ledger_debit: Decimal
+    ledger_credit: Decimal
+
+
+class AccountPeriodBalanceService:
+    def __init__(self, session: Session, organization_id: uuid.UUID):
+        self.session = session
+        self.organization_id = organization_id
+
+    def post_entries(self, journal_entry_ids: Iterable[uuid.UUID] | Select) -> None:
+        """
+        Add the lines of flushed journal entries to the turnovers and to
+        Account.balance. Takes ids or a select of ids, e.g. from a staging
+        table. Does not commit.
+        """
+        self._apply(journal_entry_ids, 1)
+
+    def unpost_entries(self, journal_entry_ids: Iterable[uuid.UUID] | Select) -> None:
+        """Subtract the lines of journal entries about to be deleted. Does not commit."""
+        self._apply(journal_entry_ids, -1)
+
+    def _apply(self, journal_entry_ids: Iterable[uuid.UUID] | Select, sign: int) -> None:
+        if not isinstance(journal_entry_ids, Select):
+            journal_entry_ids = list(journal_entry_ids)
+            if not journal_entry_ids:
+                return
+        source = self._ledger(sign).where(JournalEntry.id.in_(journal_entry_ids))
+        # Lock order: account, then month
+        source = source.order_by(*list(source.selected_columns)[1:4])
+        statement = pg_insert(AccountPeriodBalance).from_select(BALANCE_COLUMNS, source)
+        rows = self.session.execute(
+            statement.on_conflict_do_update(
+                index_elements=BALANCE_KEY,
+                set_={
+                    "debit": AccountPeriodBalance.debit + statement.excluded.debit,
+                    "credit": AccountPeriodBalance.credit + statement.excluded.credit,
+                    "line_count": AccountPeriodBalance.line_count + statement.excluded.line_count,
+                    "date_updated": statement.excluded.date_updated,
+                },
+            ).returning(
+                AccountPeriodBalance.account_id,
+                AccountPeriodBalance.period_year,
+                AccountPeriodBalance.period_month,
+                AccountPeriodBalance.line_count,
+            )
+        ).all()
+        # Months left without lines are dropped, as rebuild() would not write them
+        emptied = [(account_id, year, month) for account_id, year, month, line_count in rows if line_count <= 0]
+        if emptied:
+            self.session.execute(
+                delete(AccountPeriodBalance).where(
+                    AccountPeriodBalance.organization_id == self.organization_id,
+                    tuple_(
+                        AccountPeriodBalance.account_id,
+                        AccountPeriodBalance.period_year,
+                        AccountPeriodBalance.period_month,
+                    ).in_(emptied),
+                    AccountPeriodBalance.line_count <= 0,
+                )
+            )
+        # Accounts are locked after the turnover rows, in the same order
+        AccountBalanceService(self.session, self.organization_id).apply(journal_entry_ids, sign)
+
+    def rebuild(self, year: Optional[int] = None) -> int:
+        """
+        Recompute the organization's turnovers from entry_line, for one year
+        or for all of them. Returns the number of rows written. Does not commit.
+        """
+        remove = delete(AccountPeriodBalance).where(AccountPeriodBalance.organization_id == self.organization_id)
+        source = self._ledger()
+        if year is not None:
+            remove = remove.where(AccountPeriodBalance.period_year == year)
+            source = source.where(*_in_year(year))
+        self.session.execute(remove)
+        result = self.session.execute(
+            insert(AccountPeriodBalance).from_select(BALANCE_COLUMNS, source),
+            execution_options={"preserve_rowcount": True},
+        )
+        return result.rowcount
+
+    def verify(self, year: Optional[int] = None) -> List[BalanceDiscrepancy]:
+        """Compare the stored turnovers with entry_line, month by month."""
+        ledger_source = self._ledger()
+        if year is not None:
+            ledger_source = ledger_source.where(*_in_year(year))
+        ledger = ledger_source.subquery()
+        stored_source = select(AccountPeriodBalance).where(
+            AccountPeriodBalance.organization_id == self.organization_id
+        )
+        if year is not None:
+            stored_source = stored_source.where(AccountPeriodBalance.period_year == year)
+        stored = stored_source.subquery()
+
+        stored_debit = func.coalesce(stored.c.debit, ZERO)
+        stored_credit = func.coalesce(stored.c.credit, ZERO)
+        ledger_debit = func.coalesce(ledger.c.debit, ZERO)
+        ledger_credit = func.coalesce(ledger.c.credit, ZERO)
+        key = (
+            func.coalesce(stored.c.account_id, ledger.c.account_id),
+            func.coalesce(stored.c.period_year, ledger.c.period_year),
+            func.coalesce(stored.c.period_month, ledger.c.period_month),
+        )
+        statement = (
+            select(
+                *key,
+                stored_debit,
+                stored_credit,
+                ledger_debit,
+                ledger_credit,
+            )
+            .select_from(stored)
+            .join(
+                ledger,
+                and_(
+                    stored.c.account_id == ledger.c.account_id,
+                    stored.c.period_year == ledger.c.period_year,
+                    stored.c.period_month == ledger.c.period_month,
+                ),
+                full=True,
+            )
+            .where(or_(stored_debit != ledger_debit, stored_credit != ledger_credit))
+            .order_by(*key)
+        )
+        return [BalanceDiscrepancy(*row) for row in self.session.execute(statement)]
+
+    def _ledger(self, sign: int = 1) -> Any:
+        """Turnover per account and month from entry_line, in BALANCE_COLUMNS order."""
+        period_year = cast(extract("year", JournalEntry.entry_date), Integer)
+        period_month = cast(extract("month", JournalEntry.entry_date), Integer)
+        return (
+            select(
+                EntryLine.organization_id,
+                EntryLine.account_id,
+                period_year.label("period_year"),
+                period_month.label("period_month"),
+                (sign * cast(func.coalesce(func.sum(EntryLine.debit), 0), MONEY)).label("debit"),
+                (sign * cast(func.coalesce(func.sum(EntryLine.credit), 0), MONEY)).label("credit"),
+                (sign * func.count()).label("line_count"),
+                literal(utcnow()).label("date_updated"),
+            )
+            .join(JournalEntry, JournalEntry.id == EntryLine.journal_entry_id)
+            .where(EntryLine.organization_id == self.organization_id)
+            .group_by(EntryLine.organization_id, EntryLine.account_id, period_year, period_month)
+        )
+
+
+def _in_year(year: int) -> tuple:
+    return JournalEntry.entry_date >= date(year, 1, 1), JournalEntry.entry_date < date(year + 1, 1, 1)
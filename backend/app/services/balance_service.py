@@ -0,0 +1,144 @@
+"""
+Balance service - салда и обороти по сметки, изчислени с една агрегатна заявка.
+
+Used by SAF-T (GeneralLedgerAccounts) and by balance-dependent reports such
+as the trial balance. Whole-month periods are read from the monthly
+turnovers in account_period_balance, arbitrary date ranges from entry_line.
+"""
+
+import uuid
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import Numeric, case, cast
+from sqlmodel import Session, func, select
+
+from app.models.account_period_balance import AccountPeriodBalance
+from app.models.entry_line import EntryLine
+from app.models.journal_entry import JournalEntry
+
+ZERO = Decimal("0.00")
+
+
+@dataclass
+class AccountTurnover:
+    """Debit/credit turnover of one account before and within a period."""
+
+    account_id: uuid.UUID
+    debit_before: Decimal = ZERO
+    credit_before: Decimal = ZERO
+    debit_period: Decimal = ZERO
+    credit_period: Decimal = ZERO
+
+    def opening_balance(self, base: Decimal = ZERO) -> Decimal:
+        """Debit-positive balance at the start of the period."""
+        return base + self.debit_before - self.credit_before
+
+    def closing_balance(self, base: Decimal = ZERO) -> Decimal:
+        """Debit-positive balance at the end of the period."""
+        return self.opening_balance(base) + self.debit_period - self.credit_period
+
+
+class BalanceService:
+    """Computes account turnovers for an organization with set-based SQL."""
+
+    def __init__(self, session: Session, organization_id: uuid.UUID):
+        self.session = session
+        self.organization_id = organization_id
+
+    def get_turnovers(
+        self,
+        period_start: date,
+        period_end: date,
+        opening_from: date | None = None,
+    ) -> dict[uuid.UUID, AccountTurnover]:
+        """
+        Return turnovers for all accounts with movements, keyed by account id.
+
+        Lines dated in [opening_from, period_start) count towards the opening
+        turnover, lines in [period_start, period_end] towards the period
+        turnover. When opening_from is None the whole history before the
+        period is included. Accounts without movements are absent from the
+        result; callers should treat them as all zeros.
+        """
+        entry_date = JournalEntry.entry_date
+        in_period = (entry_date >= period_start) & (entry_date <= period_end)
+        before = entry_date < period_start
+
+        def _sum(column, condition):
+            return cast(
+                func.coalesce(func.sum(case((condition, column), else_=0)), 0),
+                Numeric(18, 2),
+            )
+
+        statement = (
+            select(
+                EntryLine.account_id,
+                _sum(EntryLine.debit, before).label("debit_before"),
+                _sum(EntryLine.credit, before).label("credit_before"),
+                _sum(EntryLine.debit, in_period).label("debit_period"),
+                _sum(EntryLine.credit, in_period).label("credit_period"),
+            )
+            .join(JournalEntry, JournalEntry.id == EntryLine.journal_entry_id)
+            .where(EntryLine.organization_id == self.organization_id)
+            .where(entry_date <= period_end)
+            .group_by(EntryLine.account_id)
+        )
+        if opening_from is not None:
+            statement = statement.where(entry_date >= opening_from)
+
+        return {
+            row.account_id: AccountTurnover(
+                account_id=row.account_id,
+                debit_before=row.debit_before,
+                credit_before=row.credit_before,
+                debit_period=row.debit_period,
+                credit_period=row.credit_period,
+            )
+            for row in self.session.exec(statement)
+        }
+
+    def get_month_turnovers(
+        self,
+        year: int,
+        first_month: int,
+        last_month: int,
+    ) -> dict[uuid.UUID, AccountTurnover]:
+        """
+        Return turnovers for the months first_month..last_month of a year,
+        with the earlier months of the same year as opening turnover, the
+        same as get_turnovers() with opening_from at the start of the year.
+        Reads at most twelve account_period_balance rows per account.
+        """
+        month = AccountPeriodBalance.period_month
+        in_period = (month >= first_month) & (month <= last_month)
+        before = month < first_month
+
+        def _sum(column, condition):
+            return func.coalesce(func.sum(case((condition, column), else_=0)), 0)
+
+        statement = (
+            select(
+                AccountPeriodBalance.account_id,
+                _sum(AccountPeriodBalance.debit, before).label("debit_before"),
+                _sum(AccountPeriodBalance.credit, before).label("credit_before"),
+                _sum(AccountPeriodBalance.debit, in_period).label("debit_period"),
+                _sum(AccountPeriodBalance.credit, in_period).label("credit_period"),
+            )
+            .where(AccountPeriodBalance.organization_id == self.organization_id)
+            .where(AccountPeriodBalance.period_year == year)
+            .where(month <= last_month)
+            .group_by(AccountPeriodBalance.account_id)
+        )
+
+        return {
+            row.account_id: AccountTurnover(
+                account_id=row.account_id,
+                debit_before=Decimal(row.debit_before),
+                credit_before=Decimal(row.credit_before),
+                debit_period=Decimal(row.debit_period),
+                credit_period=Decimal(row.credit_period),
+            )
+            for row in self.session.exec(statement)
+        }
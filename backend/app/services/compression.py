@@ -0,0 +1,66 @@
+"""
+Incremental compression of streamed downloads (SAF-T, VAT files).
+
+Chunks are compressed as they are produced, so a download never holds
+more than the compressor's window and the pending output in memory.
+"""
+import enum
+import zipfile
+import zlib
+from typing import Iterable, Iterator, List, Tuple
+
+
+class Compression(str, enum.Enum):
+    GZIP = "gzip"
+    ZIP = "zip"
+
+
+def iter_gzip(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compress a byte stream into a single gzip member."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class _ZipSink:
+    """Write-only, non-seekable file object that hands written bytes back out."""
+
+    def __init__(self) -> None:
+        self._pending: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._pending.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> Iterator[bytes]:
+        pending, self._pending = self._pending, []
+        yield from pending
+
+
+def iter_zip(chunks: Iterable[bytes], arcname: str) -> Iterator[bytes]:
+    """Compress a byte stream into a zip archive with a single member."""
+    return iter_zip_members([(arcname, chunks)])
+
+
+def iter_zip_members(members: Iterable[Tuple[str, Iterable[bytes]]]) -> Iterator[bytes]:
+    """
+    Compress (arcname, byte stream) pairs into one zip archive, member by member.
+
+    The archive is written to a non-seekable sink, so sizes and CRC go to a
+    data descriptor after each member's data, as for any streamed zip file.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:  # type: ignore[arg-type]
+        for arcname, chunks in members:
+            with archive.open(arcname, "w") as member:
+                for chunk in chunks:
+                    member.write(chunk)
+                    yield from sink.drain()
+            yield from sink.drain()
+    yield from sink.drain()
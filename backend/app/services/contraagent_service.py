@@ -5,9 +5,12 @@ from typing import Any, Dict, Optional
 from uuid import UUID
 
 from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core.config import settings
+from app.core.pagination import Page, PageParams, SortKey, paginate
 from app.models.contraagent import Contraagent, ContraagentCreate, ContraagentUpdate
 from app.models.contraagent_bank_account import (
     ContraagentBankAccount,
@@ -121,20 +124,21 @@ class ContraagentService:
     """Service for managing contraagents with VAT VIES validation"""
 
     @staticmethod
-    async def get_contraagents(
-        session: AsyncSession,
+    def get_contraagents(
+        session: Session,
         organization_id: UUID,
-        skip: int = 0,
-        limit: int = 100,
+        params: PageParams,
         search: Optional[str] = None,
         is_customer: Optional[bool] = None,
         is_supplier: Optional[bool] = None,
         is_active: Optional[bool] = None,
-    ) -> tuple[list[Contraagent], int]:
-        """Get contraagents with filtering and pagination"""
+    ) -> Page[Contraagent]:
+        """Get contraagents with filtering and keyset pagination by name"""
 
-        query = select(Contraagent).where(
-            Contraagent.organization_id == organization_id
+        query = (
+            select(Contraagent)
+            .where(Contraagent.organization_id == organization_id)
+            .options(selectinload(Contraagent.accounting_account))
         )
 
         if search:
@@ -155,34 +159,8 @@ class ContraagentService:
         if is_active is not None:
             query = query.where(Contraagent.is_active == is_active)
 
-        # Get total count
-        count_query = select(Contraagent).where(
-            Contraagent.organization_id == organization_id
-        )
-        if search:
-            search_term = f"%{search}%"
-            count_query = count_query.where(
-                (Contraagent.name.ilike(search_term))
-                | (Contraagent.vat_number.ilike(search_term))
-                | (Contraagent.registration_number.ilike(search_term))
-                | (Contraagent.email.ilike(search_term))
-            )
-        if is_customer is not None:
-            count_query = count_query.where(Contraagent.is_customer == is_customer)
-        if is_supplier is not None:
-            count_query = count_query.where(Contraagent.is_supplier == is_supplier)
-        if is_active is not None:
-            count_query = count_query.where(Contraagent.is_active == is_active)
-
-        count_result = await session.exec(count_query)
-        total = len(count_result.all())
-
-        # Get paginated results
-        query = query.order_by(Contraagent.name).offset(skip).limit(limit)
-        result = await session.exec(query)
-        contraagents = result.all()
-
-        return contraagents, total
+        key = SortKey(Contraagent.name, Contraagent.id)
+        return paginate(session, query, key, params)
 
     @staticmethod
     async def get_contraagent_by_id(
@@ -13,6 +13,7 @@ from sqlalchemy import select, update
 from app.models.invoice import Invoice, InvoiceStatus
 from app.models.purchase_order import PurchaseOrder, PurchaseOrderStatus
 from app.models.quotation import Quotation, QuotationStatus
+from app.services.vat_register import VatRegisterService
 from app.utils import utcnow
 
 
@@ -393,6 +394,8 @@ class DocumentWorkflowService:
             .values(**update_data)
         )
         await db.execute(stmt)
+        if model_class is Invoice:
+            await db.run_sync(_sync_invoice_vat_register, document_id)
         await db.commit()
 
         return {
@@ -447,3 +450,9 @@ def validate_quotation_valid_until(
     if not document.valid_until:
         return True
     return document.valid_until >= datetime.now().date()
+
+
+def _sync_invoice_vat_register(session: Any, invoice_id: uuid.UUID) -> None:
+    """Update the sales register row of an invoice after a status change."""
+    invoice = session.get(Invoice, invoice_id, populate_existing=True)
+    VatRegisterService(session).sync_invoice(invoice)
@@ -1,12 +1,78 @@
+"""
+Осчетоводяване на документи (плащания, продажби, покупки).
 
-from typing import Any
+Every document is first turned into a Posting: the journal entry and its
+lines as plain values. post_batch() validates a batch of postings and, if
+all of them are valid, writes them with one executemany INSERT for the
+entries and one for the lines, adds them to the monthly turnovers and
+commits once, so bulk runs such as bank imports and month-end postings do
+not pay a commit and a refresh per document. A batch with an invalid
+posting writes nothing. The create_journal_entry_for_* methods post a single
+document through the same path. Accounts come from the organization's
+posting accounts (app.services.posting_accounts).
+"""
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import insert
 from sqlmodel import Session
-from app.models.journal_entry import JournalEntry, JournalEntryCreate
-from app.models.entry_line import EntryLine, EntryLineCreate
+
+from app.models.entry_line import EntryLine
+from app.models.journal_entry import JournalEntry
 from app.models.organization import Organization
+from app.models.payment import Payment
+from app.models.purchase import Purchase
+from app.models.sale import Sale
 from app.models.user import User
-import uuid
-from datetime import date
+from app.services.account_period_balance import AccountPeriodBalanceService
+from app.services.period_close import PeriodCloseService
+from app.services.posting_accounts import PostingAccounts, posting_accounts
+from app.utils import utcnow
+
+CENT = Decimal("0.01")
+
+# Error of the valid postings of a batch that is not written
+BATCH_REJECTED = "Another posting of the batch was rejected"
+
+
+@dataclass
+class PostingLine:
+    account_id: uuid.UUID
+    debit: Decimal = Decimal("0.00")
+    credit: Decimal = Decimal("0.00")
+    description: Optional[str] = None
+
+
+@dataclass
+class Posting:
+    """A journal entry to be written, with the document it comes from."""
+
+    source: str  # e.g. "Payment:<id>", also stored as the entry's reference
+    entry_date: date
+    description: Optional[str]
+    lines: List[PostingLine]
+    currency_code: str = "BGN"
+    exchange_rate: float = 1.0
+
+
+@dataclass
+class PostingResult:
+    source: str
+    journal_entry_id: Optional[uuid.UUID] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass
+class _Rows:
+    entries: List[Dict[str, Any]] = field(default_factory=list)
+    lines: List[Dict[str, Any]] = field(default_factory=list)
 
 
 class JournalService:
@@ -14,63 +80,176 @@ class JournalService:
         self.session = session
         self.current_user = current_user
         self.current_organization = current_organization
+        self._accounts: Optional[PostingAccounts] = None
+
+    # Single documents
+
+    def create_journal_entry_for_payment(self, payment: Payment) -> JournalEntry:
+        return self._post_one(self.payment_posting(payment))
+
+    def create_journal_entry_for_sale(self, sale: Sale) -> JournalEntry:
+        return self._post_one(self.sale_posting(sale))
+
+    def create_journal_entry_for_purchase(self, purchase: Purchase) -> JournalEntry:
+        return self._post_one(self.purchase_posting(purchase))
 
-    def create_journal_entry_for_payment(self, payment: Any) -> JournalEntry:
-        journal_entry = JournalEntry.model_validate(
-            JournalEntryCreate(
-                date=payment.date_payment,
-                description=f"Payment {payment.id}",
-                document_date=payment.date_payment,
-                document_reference=f"Payment:{payment.id}",
-            ),
-            update={
-                "organization_id": self.current_organization.id,
-                "created_by_id": self.current_user.id,
-            },
+    # Batches
+
+    def post_documents(self, documents: Iterable[Payment | Sale | Purchase], commit: bool = True) -> List[PostingResult]:
+        """
+        Post payments, sales and purchases in one transaction. Results are in
+        document order. Raises MissingPostingAccount if a default account the
+        documents need is not configured.
+        """
+        builders = {Payment: self.payment_posting, Sale: self.sale_posting, Purchase: self.purchase_posting}
+        return self.post_batch([builders[type(document)](document) for document in documents], commit=commit)
+
+    def post_batch(self, postings: Iterable[Posting], commit: bool = True) -> List[PostingResult]:
+        """
+        Write the postings and report every posting's outcome, in order.
+        The batch is all or nothing: if a posting does not balance or is
+        dated in a closed period, nothing is written or committed, the
+        posting is reported with its error and the others as rejected along
+        with it. A database error rolls back the whole batch and is raised.
+        """
+        results: List[PostingResult] = []
+        rows = _Rows()
+        now = utcnow()
+        postings = list(postings)
+        closed = PeriodCloseService(self.session, self.current_organization.id).closed_months(
+            (posting.entry_date.year, posting.entry_date.month) for posting in postings
         )
+        errors = [_validate(posting, closed) for posting in postings]
+        if any(errors):
+            return [
+                PostingResult(posting.source, error=error or BATCH_REJECTED)
+                for posting, error in zip(postings, errors)
+            ]
+
+        for posting in postings:
+            journal_entry_id = uuid.uuid4()
+            rows.entries.append(self._entry_row(posting, journal_entry_id, now))
+            rows.lines.extend(self._line_row(line, journal_entry_id, now) for line in posting.lines)
+            results.append(PostingResult(posting.source, journal_entry_id=journal_entry_id))
 
-        # TODO: Get accounts from organization settings
-        cash_account_id = self.current_organization.cash_account_id or uuid.uuid4()
-        accounts_payable_account_id = self.current_organization.accounts_payable_account_id or uuid.uuid4()
+        if rows.entries:
+            try:
+                # Ids are generated here, so no RETURNING is needed to link the lines
+                self.session.execute(insert(JournalEntry), rows.entries)
+                self.session.execute(insert(EntryLine), rows.lines)
+                AccountPeriodBalanceService(self.session, self.current_organization.id).post_entries(
+                    [row["id"] for row in rows.entries]
+                )
+            except Exception:
+                self.session.rollback()
+                raise
+        if commit:
+            self.session.commit()
+        return results
 
-        debit_account_id = accounts_payable_account_id
-        credit_account_id = cash_account_id
+    # Postings of documents
+
+    def payment_posting(self, payment: Payment) -> Posting:
+        accounts = self.accounts
+        debit_account_id = accounts.require("suppliers")
         debit_description = "Accounts Payable"
-        credit_description = "Cash"
 
         # if payment is for something else, change the debit account
         if payment.subject_type == "expense":
-            # TODO: Get expense account id
-            debit_account_id = uuid.uuid4()
+            debit_account_id = accounts.require("expense")
             debit_description = "Expense"
 
-        lines = [
-            EntryLineCreate(
-                account_id=debit_account_id,
-                debit=payment.amount,
-                credit=0,
-                description=debit_description,
-            ),
-            EntryLineCreate(
-                account_id=credit_account_id,
-                debit=0,
-                credit=payment.amount,
-                description=credit_description,
-            ),
-        ]
-
-        journal_entry.lines = [
-            EntryLine.model_validate(
-                line,
-                update={
-                    "organization_id": self.current_organization.id,
-                    "created_by_id": self.current_user.id,
-                },
-            )
-            for line in lines
-        ]
-
-        self.session.add(journal_entry)
-        self.session.commit()
-        self.session.refresh(journal_entry)
-        return journal_entry
+        amount = _money(payment.amount)
+        return Posting(
+            source=f"Payment:{payment.id}",
+            entry_date=_day(payment.date_payment),
+            description=f"Payment {payment.id}",
+            lines=[
+                PostingLine(debit_account_id, debit=amount, description=debit_description),
+                PostingLine(accounts.require("cash"), credit=amount, description="Cash"),
+            ],
+        )
+
+    def sale_posting(self, sale: Sale) -> Posting:
+        amount = _money(sale.amount)
+        return Posting(
+            source=f"Sale:{sale.id}",
+            entry_date=_day(sale.date_sale),
+            description=sale.description or f"Sale {sale.id}",
+            lines=[
+                PostingLine(self.accounts.require("clients"), debit=amount, description="Accounts Receivable"),
+                PostingLine(self.accounts.require("revenue"), credit=amount, description="Revenue"),
+            ],
+        )
+
+    def purchase_posting(self, purchase: Purchase) -> Posting:
+        amount = _money(purchase.amount)
+        return Posting(
+            source=f"Purchase:{purchase.id}",
+            entry_date=_day(purchase.date_purchase),
+            description=purchase.description or f"Purchase {purchase.id}",
+            lines=[
+                PostingLine(self.accounts.require("expense"), debit=amount, description="Expense"),
+                PostingLine(self.accounts.require("suppliers"), credit=amount, description="Accounts Payable"),
+            ],
+        )
+
+    @property
+    def accounts(self) -> PostingAccounts:
+        """Default accounts of the organization, resolved once per service."""
+        if self._accounts is None:
+            self._accounts = posting_accounts(self.session, self.current_organization.id)
+        return self._accounts
+
+    def _post_one(self, posting: Posting) -> JournalEntry:
+        result = self.post_batch([posting])[0]
+        if not result.ok:
+            raise ValueError(f"{posting.source}: {result.error}")
+        return self.session.get(JournalEntry, result.journal_entry_id)
+
+    def _entry_row(self, posting: Posting, journal_entry_id: uuid.UUID, now: datetime) -> Dict[str, Any]:
+        return {
+            "id": journal_entry_id,
+            "entry_date": posting.entry_date,
+            "description": posting.description,
+            "reference": posting.source[:100],
+            "currency_code": posting.currency_code,
+            "exchange_rate": posting.exchange_rate,
+            "organization_id": self.current_organization.id,
+            "created_by_id": self.current_user.id,
+            "date_created": now,
+            "date_updated": now,
+        }
+
+    def _line_row(self, line: PostingLine, journal_entry_id: uuid.UUID, now: datetime) -> Dict[str, Any]:
+        return {
+            "id": uuid.uuid4(),
+            "journal_entry_id": journal_entry_id,
+            "account_id": line.account_id,
+            "debit": line.debit,
+            "credit": line.credit,
+            "description": line.description,
+            "organization_id": self.current_organization.id,
+            "created_by_id": self.current_user.id,
+            "date_created": now,
+        }
+
+
+def _validate(posting: Posting, closed: Set[Tuple[int, int]]) -> Optional[str]:
+    if (posting.entry_date.year, posting.entry_date.month) in closed:
+        return f"Period {posting.entry_date.year}-{posting.entry_date.month:02d} is closed"
+    if not posting.lines:
+        return "Entry has no lines"
+    debit = sum((line.debit for line in posting.lines), Decimal(0))
+    credit = sum((line.credit for line in posting.lines), Decimal(0))
+    if debit != credit:
+        return f"Entry does not balance: debit {debit}, credit {credit}"
+    return None
+
+
+def _money(value: Any) -> Decimal:
+    return Decimal(str(value or 0)).quantize(CENT)
+
+
+def _day(value: date | datetime) -> date:
+    return value.date() if isinstance(value, datetime) else value
@@ -0,0 +1,369 @@
+"""
+Bulk import of journal entries, e.g. when migrating a client from other
+accounting software.
+
+The source is CSV with one row per entry line, or JSONL with one entry per
+line and its lines in a "lines" array. Rows are parsed and streamed with
+COPY into a temporary staging table, without building ORM objects. The
+checks run as a few set-based statements over the whole staging table:
+unknown accounts, malformed amounts, entries that do not balance and
+entries dated in a closed period. An entry with any rejected line is
+rejected as a whole. The accepted entries and lines are then inserted with
+one INSERT ... SELECT each and posted to account_period_balance, all in
+the caller's transaction.
+
+CSV columns (header row required):
+    entry_ref, entry_date, description, reference, currency_code,
+    account_code, debit, credit, line_description
+"""
+import csv
+import json
+import uuid
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import (
+    Column,
+    Date,
+    Integer,
+    MetaData,
+    Numeric,
+    String,
+    Table,
+    Uuid,
+    cast,
+    distinct,
+    extract,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    update,
+)
+from sqlmodel import Session
+
+from app.models.account import Account
+from app.models.entry_line import EntryLine
+from app.models.journal_entry import JournalEntry
+from app.models.journal_import import JournalImportReject, JournalImportResult
+from app.models.period_close import PeriodClose
+from app.services.account_period_balance import AccountPeriodBalanceService
+from app.utils import utcnow
+
+CENT = Decimal("0.01")
+
+# Rejected lines listed in the result; the counts cover all of them.
+MAX_REJECTS = 1000
+
+STAGING = Table(
+    "journal_import_line",
+    MetaData(),
+    Column("line_no", Integer, nullable=False),
+    Column("entry_ref", String),
+    Column("entry_id", Uuid),
+    Column("line_id", Uuid),
+    Column("entry_date", Date),
+    Column("description", String),
+    Column("reference", String),
+    Column("currency_code", String),
+    Column("account_code", String),
+    Column("account_id", Uuid),
+    Column("debit", Numeric(18, 2)),
+    Column("credit", Numeric(18, 2)),
+    Column("line_description", String),
+    Column("error", String),
+    prefixes=["TEMPORARY"],
+)
+
+# psycopg 3 reports the rowcount of an INSERT ... SELECT only while the cursor is open
+ROWCOUNT = {"preserve_rowcount": True}
+
+# Staged columns in COPY order; account_id is resolved in SQL
+COPY_COLUMNS = [column.name for column in STAGING.columns if column.name != "account_id"]
+
+
+class JournalImportService:
+    def __init__(self, session: Session, organization_id: uuid.UUID, created_by_id: uuid.UUID):
+        self.session = session
+        self.organization_id = organization_id
+        self.created_by_id = created_by_id
+        # Entry ids derive from the entry_ref, so lines need no lookup of their entry
+        self.batch_id = uuid.uuid4()
+
+    def import_file(self, source: IO[str], file_format: str) -> JournalImportResult:
+        """Import a CSV or JSONL text stream. Does not commit."""
+        if file_format == "csv":
+            rows = self._parse_csv(source)
+        elif file_format == "jsonl":
+            rows = self._parse_jsonl(source)
+        else:
+            raise ValueError(f"Unsupported format: {file_format}")
+
+        connection = self.session.connection()
+        STAGING.drop(connection, checkfirst=True)
+        STAGING.create(connection)
+        try:
+            self._stage(rows)
+            self._validate()
+            return self._insert()
+        finally:
+            STAGING.drop(connection, checkfirst=True)
+
+    # Parsing
+
+    def _parse_csv(self, source: IO[str]) -> Iterator[Tuple[Any, ...]]:
+        reader = csv.DictReader(source)
+        for row in reader:
+            yield self._row(reader.line_num, row, row)
+
+    def _parse_jsonl(self, source: IO[str]) -> Iterator[Tuple[Any, ...]]:
+        for line_no, text in enumerate(source, start=1):
+            if not text.strip():
+                continue
+            try:
+                entry = json.loads(text)
+                lines = entry["lines"]
+                if not isinstance(lines, list) or not lines:
+                    raise ValueError
+            except (ValueError, KeyError, TypeError):
+                yield self._reject(line_no, None, "Not a JSON entry with a list of lines")
+                continue
+            for line in lines:
+                yield self._row(line_no, entry, line if isinstance(line, dict) else {})
+
+    def _row(self, line_no: int, entry: Dict[str, Any], line: Dict[str, Any]) -> Tuple[Any, ...]:
+        entry_ref = _text(entry.get("entry_ref"))
+        if not entry_ref:
+            return self._reject(line_no, None, "entry_ref is required")
+        try:
+            entry_date = date.fromisoformat(_text(entry.get("entry_date")) or "")
+        except ValueError:
+            return self._reject(line_no, entry_ref, "entry_date must be YYYY-MM-DD")
+        try:
+            debit = _amount(line.get("debit"))
+            credit = _amount(line.get("credit"))
+        except (InvalidOperation, ValueError):
+            return self._reject(line_no, entry_ref, "debit and credit must be numbers")
+        account_code = _text(line.get("account_code"))
+        if not account_code:
+            return self._reject(line_no, entry_ref, "account_code is required")
+        line_description = line.get("line_description")
+        if line is not entry:
+            # JSONL lines have their own description
+            line_description = line_description or line.get("description")
+        return (
+            line_no,
+            entry_ref,
+            self._entry_id(entry_ref),
+            uuid.uuid4(),
+            entry_date,
+            _text(entry.get("description")),
+            _text(entry.get("reference")),
+            (_text(entry.get("currency_code")) or "BGN")[:3],
+            account_code,
+            debit,
+            credit,
+            _text(line_description),
+            None,
+        )
+
+    def _reject(self, line_no: int, entry_ref: Optional[str], error: str) -> Tuple[Any, ...]:
+        # Staged with the entry_ref, so the rest of the entry is rejected too
+        entry_id = self._entry_id(entry_ref) if entry_ref else None
+        return (line_no, entry_ref, entry_id, None, None, None, None, None, None, None, None, None, error)
+
+    def _entry_id(self, entry_ref: str) -> uuid.UUID:
+        return uuid.uuid5(self.batch_id, entry_ref)
+
+    # Staging
+
+    def _stage(self, rows: Iterator[Tuple[Any, ...]]) -> None:
+        connection = self.session.connection()
+        if connection.dialect.name != "postgresql":
+            batch: List[Dict[str, Any]] = []
+            for row in rows:
+                batch.append(dict(zip(COPY_COLUMNS, row)))
+                if len(batch) >= 5000:
+                    connection.execute(insert(STAGING), batch)
+                    batch = []
+            if batch:
+                connection.execute(insert(STAGING), batch)
+            return
+
+        statement = f"COPY {STAGING.name} ({', '.join(COPY_COLUMNS)}) FROM STDIN"
+        with connection.connection.cursor() as cursor:
+            with cursor.copy(statement) as copy:
+                for row in rows:
+                    copy.write_row(row)
+
+    # Validation
+
+    def _validate(self) -> None:
+        staging = STAGING.c
+        pending = staging.error.is_(None)
+        execute = self.session.execute
+
+        execute(
+            update(STAGING)
+            .values(account_id=Account.id)
+            .where(
+                Account.organization_id == self.organization_id,
+                Account.code == staging.account_code,
+                pending,
+            )
+        )
+        execute(
+            update(STAGING)
+            .values(error=literal("Unknown account ") + staging.account_code)
+            .where(staging.account_id.is_(None), pending)
+        )
+        execute(
+            update(STAGING)
+            .values(error="A line is either a debit or a credit, not negative")
+            .where(
+                or_(
+                    staging.debit < 0,
+                    staging.credit < 0,
+                    (staging.debit != 0) == (staging.credit != 0),
+                ),
+                pending,
+            )
+        )
+
+        # Whole-entry checks over all staged lines of each entry
+        entries = select(staging.entry_id).group_by(staging.entry_id)
+        header_mismatch = entries.having(
+            or_(
+                func.count(distinct(staging.entry_date)) > 1,
+                func.count(distinct(staging.currency_code)) > 1,
+            )
+        )
+        execute(
+            update(STAGING)
+            .values(error="Lines of the entry disagree on its date or currency")
+            .where(staging.entry_id.in_(header_mismatch), pending)
+        )
+        unbalanced = entries.having(
+            func.coalesce(func.sum(staging.debit), 0) != func.coalesce(func.sum(staging.credit), 0)
+        )
+        execute(
+            update(STAGING)
+            .values(error="Entry does not balance")
+            .where(staging.entry_id.in_(unbalanced), pending)
+        )
+        closed = select(PeriodClose.id).where(
+            PeriodClose.organization_id == self.organization_id,
+            PeriodClose.period_year == cast(extract("year", staging.entry_date), Integer),
+            PeriodClose.period_month == cast(extract("month", staging.entry_date), Integer),
+        )
+        execute(
+            update(STAGING)
+            .values(error="The period of the entry date is closed")
+            .where(closed.exists(), pending)
+        )
+        rejected = select(staging.entry_id).where(staging.error.is_not(None))
+        execute(
+            update(STAGING)
+            .values(error="Another line of the entry was rejected")
+            .where(staging.entry_id.in_(rejected), pending)
+        )
+
+    # Insert
+
+    def _insert(self) -> JournalImportResult:
+        staging = STAGING.c
+        accepted = staging.error.is_(None)
+        now = literal(utcnow())
+        execute = self.session.execute
+
+        entries = (
+            select(
+                staging.entry_id,
+                func.min(staging.entry_date),
+                func.min(staging.description),
+                func.min(staging.reference),
+                func.min(staging.currency_code),
+                literal(1.0),
+                literal(self.organization_id),
+                literal(self.created_by_id),
+                now,
+                now,
+            )
+            .where(accepted)
+            .group_by(staging.entry_id)
+        )
+        entries_imported = execute(
+            insert(JournalEntry).from_select(
+                [
+                    "id", "entry_date", "description", "reference", "currency_code", "exchange_rate",
+                    "organization_id", "created_by_id", "date_created", "date_updated",
+                ],
+                entries,
+            ),
+            execution_options=ROWCOUNT,
+        ).rowcount
+
+        lines = select(
+            staging.line_id,
+            staging.entry_id,
+            staging.account_id,
+            staging.debit,
+            staging.credit,
+            func.substr(staging.line_description, 1, 255),
+            literal(self.organization_id),
+            literal(self.created_by_id),
+            now,
+        ).where(accepted)
+        lines_imported = execute(
+            insert(EntryLine).from_select(
+                [
+                    "id", "journal_entry_id", "account_id", "debit", "credit", "description",
+                    "organization_id", "created_by_id", "date_created",
+                ],
+                lines,
+            ),
+            execution_options=ROWCOUNT,
+        ).rowcount
+
+        AccountPeriodBalanceService(self.session, self.organization_id).post_entries(
+            select(staging.entry_id).where(accepted).distinct()
+        )
+
+        lines_rejected, entries_rejected = execute(
+            select(func.count(), func.count(distinct(staging.entry_ref))).where(staging.error.is_not(None))
+        ).one()
+        rejects = [
+            JournalImportReject(line=line_no, entry_ref=entry_ref, error=error)
+            for line_no, entry_ref, error in execute(
+                select(staging.line_no, staging.entry_ref, staging.error)
+                .where(staging.error.is_not(None))
+                .order_by(staging.line_no)
+                .limit(MAX_REJECTS)
+            )
+        ]
+        return JournalImportResult(
+            entries_imported=entries_imported,
+            lines_imported=lines_imported,
+            entries_rejected=entries_rejected,
+            lines_rejected=lines_rejected,
+            rejects=rejects,
+        )
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _amount(value: Any) -> Decimal:
+    text = _text(value)
+    if text is None:
+        return Decimal("0.00")
+    amount = Decimal(text.replace(",", "."))
+    if not amount.is_finite() or amount != amount.quantize(CENT):
+        raise ValueError(f"Not an amount in cents: {text}")
+    return amount.quantize(CENT)
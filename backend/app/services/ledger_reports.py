@@ -0,0 +1,316 @@
+"""
+Ledger reports - оборотна ведомост и аналитична карта на сметка.
+
+The trial balance is aggregated from the monthly turnovers in
+account_period_balance, or from the period_account_balance snapshot when
+all its months are closed. The account card reads one account's entry
+lines page by page: the running balance is a window sum within the page,
+started from the balance up to the keyset cursor, which is recomputed from
+the monthly turnovers and the lines of the cursor's month, so every page
+is a bounded read however deep into the card it is.
+"""
+import base64
+import uuid
+from datetime import date
+from decimal import Decimal
+from typing import Optional, Tuple
+
+from sqlalchemy import Numeric, and_, case, cast, func, literal, or_, tuple_
+from sqlmodel import Session, select
+
+from app.models.account import Account
+from app.models.account_period_balance import AccountPeriodBalance
+from app.models.entry_line import EntryLine
+from app.models.journal_entry import JournalEntry
+from app.models.ledger_report import (
+    AccountCardLine,
+    AccountCardPublic,
+    TrialBalancePublic,
+    TrialBalanceRow,
+)
+from app.models.period_close import PeriodAccountBalance
+from app.services.period_close import PeriodCloseService
+
+MONEY = Numeric(18, 2)
+ZERO = Decimal("0.00")
+
+TOTAL_COLUMNS = (
+    "opening_debit",
+    "opening_credit",
+    "turnover_debit",
+    "turnover_credit",
+    "closing_debit",
+    "closing_credit",
+)
+
+
+class LedgerReportService:
+    def __init__(self, session: Session, organization_id: uuid.UUID):
+        self.session = session
+        self.organization_id = organization_id
+
+    # Trial balance
+
+    def trial_balance(
+        self,
+        year: int,
+        first_month: int = 1,
+        last_month: int = 12,
+        prefix_length: Optional[int] = None,
+    ) -> TrialBalancePublic:
+        """
+        Opening balance, turnover and closing balance per account for the
+        months first_month..last_month of a year, or per group of accounts
+        sharing the first prefix_length characters of their code. Accounts
+        with no balance and no turnover are left out.
+        """
+        if PeriodCloseService(self.session, self.organization_id).is_closed(year, first_month, last_month):
+            turnovers = self._closed_turnovers(year, first_month, last_month)
+            # Accounts created after the close have no snapshot rows
+            opening = func.coalesce(turnovers.c.opening, cast(Account.opening_balance, MONEY))
+        else:
+            turnovers = self._turnovers(year, first_month, last_month)
+            opening = cast(Account.opening_balance, MONEY) + func.coalesce(turnovers.c.movement_before, 0)
+        columns = [
+            func.sum(opening),
+            func.sum(func.coalesce(turnovers.c.debit, 0)),
+            func.sum(func.coalesce(turnovers.c.credit, 0)),
+        ]
+        if prefix_length:
+            code = func.substr(Account.code, 1, prefix_length)
+            statement = select(literal(None), code, literal(None), *columns).group_by(code)
+        else:
+            code = Account.code
+            statement = select(Account.id, Account.code, Account.name, *columns).group_by(
+                Account.id, Account.code, Account.name
+            )
+        statement = (
+            statement.select_from(Account)
+            .outerjoin(turnovers, turnovers.c.account_id == Account.id)
+            .where(Account.organization_id == self.organization_id)
+            .order_by(code)
+        )
+
+        rows = []
+        for account_id, code_value, name, opening_balance, debit, credit in self.session.execute(statement):
+            opening_balance, debit, credit = _money(opening_balance), _money(debit), _money(credit)
+            if not (opening_balance or debit or credit):
+                continue
+            rows.append(_trial_balance_row(account_id, code_value, name, opening_balance, debit, credit))
+
+        # Debit and credit columns are totalled separately, not netted
+        totals = TrialBalanceRow(
+            code="",
+            **{
+                column: sum((getattr(row, column) for row in rows), ZERO)
+                for column in TOTAL_COLUMNS
+            },
+        )
+        return TrialBalancePublic(
+            period_year=year, first_month=first_month, last_month=last_month, data=rows, totals=totals
+        )
+
+    def _turnovers(self, year: int, first_month: int, last_month: int):
+        """Movement before the period and turnover within it, per account."""
+        period = AccountPeriodBalance
+        before = or_(
+            period.period_year < year,
+            and_(period.period_year == year, period.period_month < first_month),
+        )
+        in_period = and_(
+            period.period_year == year,
+            period.period_month >= first_month,
+            period.period_month <= last_month,
+        )
+        return (
+            select(
+                period.account_id,
+                func.sum(case((before, period.debit - period.credit), else_=0)).label("movement_before"),
+                func.sum(case((in_period, period.debit), else_=0)).label("debit"),
+                func.sum(case((in_period, period.credit), else_=0)).label("credit"),
+            )
+            .where(
+                period.organization_id == self.organization_id,
+                or_(before, in_period),
+            )
+            .group_by(period.account_id)
+            .subquery()
+        )
+
+    def _closed_turnovers(self, year: int, first_month: int, last_month: int):
+        """The same figures frozen when the months were closed."""
+        snapshot = PeriodAccountBalance
+        return (
+            select(
+                snapshot.account_id,
+                func.sum(case((snapshot.period_month == first_month, snapshot.opening_balance), else_=0)).label(
+                    "opening"
+                ),
+                func.sum(snapshot.debit).label("debit"),
+                func.sum(snapshot.credit).label("credit"),
+            )
+            .where(
+                snapshot.organization_id == self.organization_id,
+                snapshot.period_year == year,
+                snapshot.period_month >= first_month,
+                snapshot.period_month <= last_month,
+            )
+            .group_by(snapshot.account_id)
+            .subquery()
+        )
+
+    # Account card
+
+    def account_card(
+        self,
+        account: Account,
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        after: Optional[str] = None,
+        limit: int = 500,
+    ) -> AccountCardPublic:
+        """
+        One page of the account's lines in (entry_date, line id) order with
+        the running balance after each line. `after` is the next_cursor of
+        the previous page.
+        """
+        if after:
+            cursor_date, cursor_id = decode_cursor(after)
+            opening_balance = self._balance_through(account, cursor_date, cursor_id)
+        else:
+            opening_balance = self._balance_before(account, date_from)
+
+        entry_date = JournalEntry.entry_date
+        order = (entry_date, EntryLine.id)
+        debit = cast(EntryLine.debit, MONEY)
+        credit = cast(EntryLine.credit, MONEY)
+        running = func.sum(debit - credit).over(order_by=order, rows=(None, 0))
+        statement = (
+            select(
+                EntryLine.id,
+                EntryLine.journal_entry_id,
+                entry_date,
+                JournalEntry.reference,
+                func.coalesce(EntryLine.description, JournalEntry.description),
+                debit,
+                credit,
+                literal(opening_balance, MONEY) + running,
+            )
+            .join(JournalEntry, JournalEntry.id == EntryLine.journal_entry_id)
+            .where(
+                EntryLine.organization_id == self.organization_id,
+                EntryLine.account_id == account.id,
+            )
+            .order_by(*order)
+            .limit(limit + 1)
+        )
+        if date_from is not None:
+            statement = statement.where(entry_date >= date_from)
+        if date_to is not None:
+            statement = statement.where(entry_date <= date_to)
+        if after:
+            statement = statement.where(tuple_(*order) > tuple_(cursor_date, cursor_id))
+
+        lines = [
+            AccountCardLine(
+                entry_line_id=row[0],
+                journal_entry_id=row[1],
+                entry_date=row[2],
+                reference=row[3],
+                description=row[4],
+                debit=_money(row[5]),
+                credit=_money(row[6]),
+                balance=_money(row[7]),
+            )
+            for row in self.session.execute(statement)
+        ]
+        next_cursor = None
+        if len(lines) > limit:
+            lines = lines[:limit]
+            last = lines[-1]
+            next_cursor = encode_cursor(last.entry_date, last.entry_line_id)
+        return AccountCardPublic(
+            account_id=account.id, opening_balance=opening_balance, data=lines, next_cursor=next_cursor
+        )
+
+    def _balance_before(self, account: Account, day: Optional[date]) -> Decimal:
+        """Debit-positive balance of the account before a day: whole months, then the days of its month."""
+        balance = _money(account.opening_balance)
+        if day is None:
+            return balance
+        period = AccountPeriodBalance
+        months = self.session.execute(
+            select(func.sum(period.debit - period.credit)).where(
+                period.organization_id == self.organization_id,
+                period.account_id == account.id,
+                or_(
+                    period.period_year < day.year,
+                    and_(period.period_year == day.year, period.period_month < day.month),
+                ),
+            )
+        ).scalar()
+        days = self.session.execute(
+            select(func.sum(cast(EntryLine.debit, MONEY) - cast(EntryLine.credit, MONEY)))
+            .join(JournalEntry, JournalEntry.id == EntryLine.journal_entry_id)
+            .where(
+                EntryLine.organization_id == self.organization_id,
+                EntryLine.account_id == account.id,
+                JournalEntry.entry_date >= day.replace(day=1),
+                JournalEntry.entry_date < day,
+            )
+        ).scalar()
+        return balance + _money(months) + _money(days)
+
+    def _balance_through(self, account: Account, day: date, entry_line_id: uuid.UUID) -> Decimal:
+        """Balance after the line entry_line_id of the day, in card order."""
+        same_day = self.session.execute(
+            select(func.sum(cast(EntryLine.debit, MONEY) - cast(EntryLine.credit, MONEY)))
+            .join(JournalEntry, JournalEntry.id == EntryLine.journal_entry_id)
+            .where(
+                EntryLine.organization_id == self.organization_id,
+                EntryLine.account_id == account.id,
+                JournalEntry.entry_date == day,
+                EntryLine.id <= entry_line_id,
+            )
+        ).scalar()
+        return self._balance_before(account, day) + _money(same_day)
+
+
+def encode_cursor(entry_date: date, entry_line_id: uuid.UUID) -> str:
+    raw = f"{entry_date.isoformat()}|{entry_line_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[date, uuid.UUID]:
+    """Raises ValueError for a malformed cursor."""
+    try:
+        entry_date, entry_line_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return date.fromisoformat(entry_date), uuid.UUID(entry_line_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def _money(value) -> Decimal:
+    return Decimal(str(value or 0)).quantize(ZERO)
+
+
+def _trial_balance_row(
+    account_id: Optional[uuid.UUID],
+    code: str,
+    name: Optional[str],
+    opening: Decimal,
+    debit: Decimal,
+    credit: Decimal,
+) -> TrialBalanceRow:
+    closing = opening + debit - credit
+    return TrialBalanceRow(
+        account_id=account_id,
+        code=code,
+        name=name,
+        opening_debit=max(opening, ZERO),
+        opening_credit=max(-opening, ZERO),
+        turnover_debit=debit,
+        turnover_credit=credit,
+        closing_debit=max(closing, ZERO),
+        closing_credit=max(-closing, ZERO),
+    )
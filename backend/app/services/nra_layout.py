@@ -0,0 +1,228 @@
+"""
+Record layouts of the NRA (НАП) fixed-width VAT files.
+
+Each layout lists its fields in file order and compiles once into a single
+str.format template, so formatting a record is one format call, and into
+slice offsets for the matching parser used by round-trip tests and register
+imports. The layouts follow the simplified files produced by VatService.
+"""
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+ZERO = Decimal(0)
+
+
+@dataclass(frozen=True)
+class Field:
+    """One fixed-width field. kind is text, number, integer, date or literal."""
+
+    name: str
+    length: int
+    kind: str = "text"
+    decimals: int = 2
+    align: str = "left"
+    value: str = ""  # literal fields only
+    title: str = ""
+
+    @property
+    def template(self) -> str:
+        if self.kind == "literal":
+            return self.value.ljust(self.length)[:self.length].replace("{", "{{").replace("}", "}}")
+        if self.kind == "number":
+            return f"{{:>{self.length}.{self.decimals}f}}"
+        if self.kind == "integer":
+            return f"{{:>{self.length}d}}"
+        align = ">" if self.align == "right" else "<"
+        return f"{{!s:{align}{self.length}.{self.length}}}"
+
+    @property
+    def prepare(self) -> Callable[[Any], Any]:
+        if self.kind == "number":
+            return _prepare_number
+        if self.kind == "integer":
+            return _prepare_integer
+        if self.kind == "date":
+            return _prepare_date
+        return _prepare_text
+
+    @property
+    def parse(self) -> Callable[[str], Any]:
+        if self.kind == "number":
+            return _parse_number
+        if self.kind == "integer":
+            return _parse_integer
+        if self.kind == "date":
+            return _parse_date
+        return str.strip if self.align == "right" else str.rstrip
+
+
+def Text(name: str, length: int, title: str = "", align: str = "left") -> Field:
+    return Field(name, length, "text", align=align, title=title)
+
+
+def Number(name: str, length: int = 15, decimals: int = 2, title: str = "") -> Field:
+    return Field(name, length, "number", decimals=decimals, title=title)
+
+
+def Integer(name: str, length: int = 15, title: str = "") -> Field:
+    return Field(name, length, "integer", title=title)
+
+
+def Date(name: str, title: str = "") -> Field:
+    return Field(name, 10, "date", title=title)
+
+
+def Literal(value: str, length: Optional[int] = None) -> Field:
+    return Field("", length or len(value), "literal", value=value)
+
+
+def _prepare_text(value: Any) -> Any:
+    return "" if value is None else value
+
+
+def _prepare_number(value: Any) -> Any:
+    return ZERO if value is None else value
+
+
+def _prepare_integer(value: Any) -> int:
+    return 0 if value is None else int(value)
+
+
+def _prepare_date(value: Optional[date]) -> str:
+    # DD/MM/YYYY without strftime, which dominates the cost of a line
+    return "" if value is None else "%02d/%02d/%04d" % (value.day, value.month, value.year)
+
+
+def _parse_number(text: str) -> Optional[Decimal]:
+    text = text.strip()
+    return Decimal(text) if text else None
+
+
+def _parse_integer(text: str) -> Optional[int]:
+    text = text.strip()
+    return int(text) if text else None
+
+
+def _parse_date(text: str) -> Optional[date]:
+    text = text.strip()
+    if not text:
+        return None
+    if len(text) != 10 or text[2] != "/" or text[5] != "/":
+        raise ValueError(f"Date {text!r} does not match DD/MM/YYYY")
+    return date(int(text[6:]), int(text[3:5]), int(text[:2]))
+
+
+@dataclass
+class RecordLayout:
+    """A fixed-width record: an ordered list of fields ending in a newline."""
+
+    name: str
+    fields: Tuple[Field, ...]
+    width: int = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.width = sum(f.length for f in self.fields)
+        values = [f for f in self.fields if f.kind != "literal"]
+        self.names = tuple(f.name for f in values)
+        self._template = ("".join(f.template for f in self.fields) + "\n").format
+        self._prepare = tuple(f.prepare for f in values)
+
+        self._slices = []
+        self._literals = []
+        start = 0
+        for f in self.fields:
+            if f.kind == "literal":
+                self._literals.append((slice(start, start + f.length), f.value.ljust(f.length)))
+            else:
+                self._slices.append((f.name, slice(start, start + f.length), f.parse))
+            start += f.length
+
+    def format(self, *values: Any) -> str:
+        """Format one record from its field values in layout order (literals excluded)."""
+        line = self._template(*[prepare(value) for prepare, value in zip(self._prepare, values)])
+        if len(line) != self.width + 1:
+            raise ValueError(f"{self.name}: value does not fit its field in {line!r}")
+        return line
+
+    def format_dict(self, values: Dict[str, Any]) -> str:
+        return self.format(*[values.get(name) for name in self.names])
+
+    def matches(self, line: str) -> bool:
+        return all(line[s] == value for s, value in self._literals)
+
+    def parse(self, line: str) -> Dict[str, Any]:
+        """Parse one record back into a dict of field values."""
+        line = line.rstrip("\r\n")
+        if len(line) != self.width or not self.matches(line):
+            raise ValueError(f"Line is not a {self.name} record: {line!r}")
+        return {name: parse(line[s]) for name, s, parse in self._slices}
+
+
+def iter_parse(lines: Iterable[str], *layouts: RecordLayout) -> Iterator[Tuple[RecordLayout, Dict[str, Any]]]:
+    """Parse a file's lines, picking for each line the first layout whose literals match."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        stripped = line.rstrip("\r\n")
+        for layout in layouts:
+            if len(stripped) == layout.width and layout.matches(stripped):
+                yield layout, layout.parse(stripped)
+                break
+        else:
+            raise ValueError(f"Line {number} matches none of {[layout.name for layout in layouts]}")
+
+
+PRODAGBI = RecordLayout("PRODAGBI", (
+    Integer("row_number", 15, "Номер по ред на документа в дневника"),
+    Text("document_type", 2, "Вид на документа"),
+    Text("document_number", 20, "Номер на документа"),
+    Date("document_date", "Дата на издаване на документа"),
+    Text("recipient_vat_number", 15, "ДДС номер на контрагента"),
+    Text("recipient_name", 70, "Име на контрагента"),
+    Number("taxable_base", 15, title="Данъчна основа на облагаемите доставки"),
+    Number("vat_amount", 15, title="Начислен ДДС"),
+))
+
+POKUPKI = RecordLayout("POKUPKI", (
+    Integer("row_number", 15, "Номер по ред на документа в дневника"),
+    Text("document_type", 2, "Вид на документа"),
+    Text("document_number", 20, "Номер на документа"),
+    Date("document_date", "Дата на издаване на документа"),
+    Text("supplier_vat_number", 15, "ДДС номер на контрагента"),
+    Text("supplier_name", 70, "Име на контрагента"),
+    Number("taxable_base", 15, title="Данъчна основа на получените доставки"),
+    Number("vat_amount", 15, title="ДДС с право на данъчен кредит"),
+))
+
+DEKLAR = RecordLayout("DEKLAR", (
+    Text("vat_number", 15, "00-01 Идентификационен номер по ДДС на лицето"),
+    Text("name", 50, "00-02 Наименование на лицето"),
+    Text("period", 6, "00-03 Данъчен период ГГГГММ"),
+    Text("submitter", 50, "00-04 Лице, подаващо данните"),
+    Integer("sales_count", 15, "00-05 Брой документи в дневника за продажби"),
+    Integer("purchases_count", 15, "00-06 Брой документи в дневника за покупки"),
+    Number("sales_taxable_base", 15, title="01-01 Общ размер на данъчните основи за облагане с ДДС"),
+    Number("sales_vat_amount", 15, title="01-20 Всичко начислен ДДС"),
+    Number("purchases_taxable_base", 15, title="01-30 Данъчна основа на получените доставки"),
+    Number("purchases_vat_amount", 15, title="01-41 ДДС с право на пълен данъчен кредит"),
+))
+
+# VIES.TXT: a header record followed by one record per counterparty and
+# VIES indicator (к3 доставки на стоки, к4 триъгълни операции, к5 услуги).
+VIES_HEADER = RecordLayout("VIES header", (
+    Literal("VHR"),
+    Text("vat_number", 15, "ДДС номер на декларатора"),
+    Text("name", 50, "Наименование на декларатора"),
+    Text("period", 6, "Данъчен период ГГГГММ"),
+    Integer("line_count", 5, "Брой редове"),
+))
+
+VIES_LINE = RecordLayout("VIES line", (
+    Literal("VIR"),
+    Integer("row_number", 5, "Номер по ред"),
+    Text("counterparty_vat_number", 15, "ДДС номер на контрагента"),
+    Number("taxable_base", 15, decimals=0, title="Обща стойност на доставките"),
+    Text("vies_indicator", 2, "Код на операцията (к3, к4, к5)"),
+))
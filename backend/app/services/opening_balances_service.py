@@ -9,7 +9,9 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.contraagent import Contraagent
 from app.models.journal_entry import JournalEntry, JournalEntryCreate
 from app.models.entry_line import EntryLine, EntryLineCreate
-from app.models.account import Account
+from app.services.account_period_balance import AccountPeriodBalanceService
+from app.services.period_close import PeriodCloseService
+from app.services.posting_accounts import posting_accounts
 
 
 class OpeningBalancesService:
@@ -76,44 +78,30 @@ class OpeningBalancesService:
     ) -> JournalEntry:
         """Create journal entry for contraagent opening balance"""
 
-        # Get or create appropriate accounts based on contraagent type
+        # Accounts from the organization settings, else from the chart by code
+        accounts = await session.run_sync(
+            lambda sync_session: posting_accounts(sync_session, organization_id)
+        )
         if contraagent.is_customer:
             # Customer - use Accounts Receivable
-            receivable_account = await OpeningBalancesService._get_account_by_code(
-                session,
-                organization_id,
-                "1210",  # Typical AR account code
-            )
-            if not receivable_account:
-                raise ValueError("Accounts Receivable account not found")
-
-            contraact_account = receivable_account
+            contraact_account_id = accounts.require("clients")
         elif contraagent.is_supplier:
             # Supplier - use Accounts Payable
-            payable_account = await OpeningBalancesService._get_account_by_code(
-                session,
-                organization_id,
-                "4010",  # Typical AP account code
-            )
-            if not payable_account:
-                raise ValueError("Accounts Payable account not found")
-
-            contraact_account = payable_account
+            contraact_account_id = accounts.require("suppliers")
         else:
             raise ValueError("Contraagent must be either customer or supplier")
 
-        # Get opening balance equity account
-        opening_balance_account = await OpeningBalancesService._get_account_by_code(
-            session,
-            organization_id,
-            "3010",  # Typical opening balance equity account
+        # Opening balance equity account
+        opening_balance_account_id = accounts.require("opening_balance_equity")
+
+        entry_date = datetime.utcnow().date()
+        await session.run_sync(
+            lambda sync_session: PeriodCloseService(sync_session, organization_id).assert_open(entry_date)
         )
-        if not opening_balance_account:
-            raise ValueError("Opening Balance equity account not found")
 
         # Create journal entry
         journal_entry = JournalEntry(
-            date=datetime.utcnow().date(),
+            date=entry_date,
             description=description,
             reference=f"OB-{contraagent.id.hex[:8].upper()}",
             organization_id=organization_id,
@@ -129,7 +117,7 @@ class OpeningBalancesService:
             # Contraagent debit (asset increase or liability decrease)
             debit_line = EntryLine(
                 journal_entry_id=journal_entry.id,
-                account_id=contraact_account.id,
+                account_id=contraact_account_id,
                 debit_amount=debit_balance,
                 credit_amount=Decimal("0"),
                 description=f"{contraagent.name} - Opening Debit Balance",
@@ -139,7 +127,7 @@ class OpeningBalancesService:
             # Opening balance equity credit
             credit_line = EntryLine(
                 journal_entry_id=journal_entry.id,
-                account_id=opening_balance_account.id,
+                account_id=opening_balance_account_id,
                 debit_amount=Decimal("0"),
                 credit_amount=debit_balance,
                 description="Opening Balance Equity",
@@ -150,7 +138,7 @@ class OpeningBalancesService:
             # Opening balance equity debit
             debit_line = EntryLine(
                 journal_entry_id=journal_entry.id,
-                account_id=opening_balance_account.id,
+                account_id=opening_balance_account_id,
                 debit_amount=credit_balance,
                 credit_amount=Decimal("0"),
                 description="Opening Balance Equity",
@@ -160,27 +148,22 @@ class OpeningBalancesService:
             # Contraagent credit (liability increase or asset decrease)
             credit_line = EntryLine(
                 journal_entry_id=journal_entry.id,
-                account_id=contraact_account.id,
+                account_id=contraact_account_id,
                 debit_amount=Decimal("0"),
                 credit_amount=credit_balance,
                 description=f"{contraagent.name} - Opening Credit Balance",
             )
             session.add(credit_line)
 
+        await session.flush()
+        await session.run_sync(
+            lambda sync_session: AccountPeriodBalanceService(sync_session, organization_id).post_entries(
+                [journal_entry.id]
+            )
+        )
         await session.refresh(journal_entry)
         return journal_entry
 
-    @staticmethod
-    async def _get_account_by_code(
-        session: AsyncSession, organization_id: UUID, account_code: str
-    ) -> Optional[Account]:
-        """Get account by code within organization"""
-        query = select(Account).where(
-            Account.code == account_code, Account.organization_id == organization_id
-        )
-        result = await session.exec(query)
-        return result.first()
-
     @staticmethod
     async def get_contraagents_with_opening_balances(
         session: AsyncSession, organization_id: UUID, skip: int = 0, limit: int = 100
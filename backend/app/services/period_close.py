@@ -0,0 +1,266 @@
+"""
+Приключване на счетоводен период (месец).
+
+close() checks that the month's ledger balances: every entry balances and
+the monthly turnovers in account_period_balance agree with entry_line.
+It then freezes every account's opening balance, turnover and closing
+balance into period_account_balance and the VAT register totals into
+period_close, with two set-based statements. From then on journal
+entries dated in the month are rejected: by the posting services up
+front, and on PostgreSQL by triggers on journal_entry and entry_line for
+any other writer.
+
+Closing and writing entries are serialized per organization by an
+advisory lock: the triggers take it shared, close() and reopen() take it
+exclusive, so a close waits for in-flight postings and no posting slips
+in between the checks and the snapshot.
+"""
+import uuid
+from datetime import date
+from typing import Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import Numeric, and_, case, cast, delete, func, insert, literal, or_, tuple_
+from sqlmodel import Session, select
+
+from app.models.account import Account
+from app.models.account_period_balance import AccountPeriodBalance
+from app.models.entry_line import EntryLine
+from app.models.journal_entry import JournalEntry
+from app.models.period_close import PeriodAccountBalance, PeriodClose
+from app.services.account_period_balance import AccountPeriodBalanceService
+from app.services.vat_declaration import VatDeclarationEngine
+from app.utils import utcnow
+
+MONEY = Numeric(18, 2)
+
+# Unbalanced entries named in the error of a refused close
+MAX_REPORTED = 10
+
+Month = Tuple[int, int]
+
+
+class PeriodCloseError(ValueError):
+    """The month cannot be closed or reopened."""
+
+
+class ClosedPeriodError(ValueError):
+    def __init__(self, year: int, month: int):
+        super().__init__(f"Period {year}-{month:02d} is closed")
+        self.year = year
+        self.month = month
+
+
+class PeriodCloseService:
+    def __init__(self, session: Session, organization_id: uuid.UUID):
+        self.session = session
+        self.organization_id = organization_id
+
+    # Closing
+
+    def close(self, year: int, month: int, closed_by_id: Optional[uuid.UUID] = None) -> PeriodClose:
+        """Validate and freeze the month. Does not commit."""
+        self._lock()
+        if self.get(year, month) is not None:
+            raise PeriodCloseError(f"Period {year}-{month:02d} is already closed")
+        self._check_ledger(year, month)
+
+        turnover_debit, turnover_credit = self.session.execute(
+            select(
+                func.coalesce(func.sum(AccountPeriodBalance.debit), 0),
+                func.coalesce(func.sum(AccountPeriodBalance.credit), 0),
+            ).where(
+                AccountPeriodBalance.organization_id == self.organization_id,
+                AccountPeriodBalance.period_year == year,
+                AccountPeriodBalance.period_month == month,
+            )
+        ).one()
+        if turnover_debit != turnover_credit:
+            raise PeriodCloseError(
+                f"Debit turnover {turnover_debit} differs from credit turnover {turnover_credit}"
+            )
+
+        self.session.execute(
+            insert(PeriodAccountBalance).from_select(
+                [
+                    "organization_id", "account_id", "period_year", "period_month",
+                    "opening_balance", "debit", "credit", "closing_balance",
+                    "account_opening_balance", "year_debit_before", "year_credit_before",
+                ],
+                self._snapshot(year, month),
+            )
+        )
+
+        vat = VatDeclarationEngine(self.session, self.organization_id, year, month).compute()
+        period_close = PeriodClose(
+            organization_id=self.organization_id,
+            period_year=year,
+            period_month=month,
+            closed_by_id=closed_by_id,
+            closed_at=utcnow(),
+            sales_taxable_base=vat.sales.taxable_base,
+            sales_vat=vat.sales.vat_amount,
+            sales_documents=vat.sales.count,
+            purchases_taxable_base=vat.purchases.taxable_base,
+            purchases_vat=vat.purchases.vat_amount,
+            purchases_documents=vat.purchases.count,
+            turnover_debit=turnover_debit,
+            turnover_credit=turnover_credit,
+        )
+        self.session.add(period_close)
+        self.session.flush()
+        return period_close
+
+    def reopen(self, year: int, month: int) -> None:
+        """Drop the month's snapshot so entries can be written again. Does not commit."""
+        self._lock()
+        if self.get(year, month) is None:
+            raise PeriodCloseError(f"Period {year}-{month:02d} is not closed")
+        later = self.session.exec(
+            select(func.count()).select_from(PeriodClose).where(
+                PeriodClose.organization_id == self.organization_id,
+                tuple_(PeriodClose.period_year, PeriodClose.period_month) > tuple_(year, month),
+            )
+        ).one()
+        if later:
+            # Their opening balances were frozen from this month's figures
+            raise PeriodCloseError("Reopen the later closed periods first")
+
+        for model in (PeriodAccountBalance, PeriodClose):
+            self.session.execute(
+                delete(model).where(
+                    model.organization_id == self.organization_id,
+                    model.period_year == year,
+                    model.period_month == month,
+                )
+            )
+
+    # Queries
+
+    def get(self, year: int, month: int) -> Optional[PeriodClose]:
+        return self.session.exec(
+            select(PeriodClose).where(
+                PeriodClose.organization_id == self.organization_id,
+                PeriodClose.period_year == year,
+                PeriodClose.period_month == month,
+            )
+        ).first()
+
+    def list(self, year: Optional[int] = None) -> List[PeriodClose]:
+        statement = select(PeriodClose).where(PeriodClose.organization_id == self.organization_id)
+        if year is not None:
+            statement = statement.where(PeriodClose.period_year == year)
+        return list(self.session.exec(statement.order_by(PeriodClose.period_year, PeriodClose.period_month)))
+
+    def closed_months(self, months: Iterable[Month]) -> Set[Month]:
+        """The given (year, month) pairs that are closed, with one query."""
+        months = set(months)
+        if not months:
+            return set()
+        rows = self.session.exec(
+            select(PeriodClose.period_year, PeriodClose.period_month).where(
+                PeriodClose.organization_id == self.organization_id,
+                tuple_(PeriodClose.period_year, PeriodClose.period_month).in_(list(months)),
+            )
+        )
+        return {(year, month) for year, month in rows}
+
+    def is_closed(self, year: int, first_month: int, last_month: Optional[int] = None) -> bool:
+        """Whether every month of first_month..last_month is closed."""
+        months = {(year, month) for month in range(first_month, (last_month or first_month) + 1)}
+        return self.closed_months(months) == months
+
+    def assert_open(self, entry_date: date) -> None:
+        if self.closed_months([(entry_date.year, entry_date.month)]):
+            raise ClosedPeriodError(entry_date.year, entry_date.month)
+
+    # Internals
+
+    def _lock(self) -> None:
+        """Exclusive per-organization lock against postings; see the module docstring."""
+        if self.session.get_bind().dialect.name != "postgresql":
+            return
+        self.session.execute(
+            select(func.pg_advisory_xact_lock(func.hashtextextended(f"period_close:{self.organization_id}", 0)))
+        )
+
+    def _check_ledger(self, year: int, month: int) -> None:
+        start, end = _month_bounds(year, month)
+        unbalanced = list(
+            self.session.exec(
+                select(JournalEntry.id)
+                .join(EntryLine, EntryLine.journal_entry_id == JournalEntry.id)
+                .where(
+                    JournalEntry.organization_id == self.organization_id,
+                    JournalEntry.entry_date >= start,
+                    JournalEntry.entry_date < end,
+                )
+                .group_by(JournalEntry.id)
+                .having(func.sum(EntryLine.debit) != func.sum(EntryLine.credit))
+                .limit(MAX_REPORTED)
+            )
+        )
+        if unbalanced:
+            raise PeriodCloseError(
+                "Unbalanced journal entries: " + ", ".join(str(entry_id) for entry_id in unbalanced)
+            )
+
+        discrepancies = [
+            discrepancy
+            for discrepancy in AccountPeriodBalanceService(self.session, self.organization_id).verify(year)
+            if discrepancy.period_month == month
+        ]
+        if discrepancies:
+            raise PeriodCloseError(
+                f"The turnovers of {len(discrepancies)} accounts differ from the ledger; "
+                "rebuild account_period_balance first"
+            )
+
+    def _snapshot(self, year: int, month: int):
+        """Every account's figures for the month, in the column order of close()."""
+        period = AccountPeriodBalance
+        before = or_(
+            period.period_year < year,
+            and_(period.period_year == year, period.period_month < month),
+        )
+        year_before = and_(period.period_year == year, period.period_month < month)
+        in_month = and_(period.period_year == year, period.period_month == month)
+
+        def _sum(column, condition):
+            return cast(func.coalesce(func.sum(case((condition, column), else_=0)), 0), MONEY)
+
+        account_opening = cast(Account.opening_balance, MONEY)
+        opening = account_opening + _sum(period.debit - period.credit, before)
+        debit = _sum(period.debit, in_month)
+        credit = _sum(period.credit, in_month)
+        return (
+            select(
+                literal(self.organization_id),
+                Account.id,
+                literal(year),
+                literal(month),
+                opening,
+                debit,
+                credit,
+                opening + debit - credit,
+                account_opening,
+                _sum(period.debit, year_before),
+                _sum(period.credit, year_before),
+            )
+            .select_from(Account)
+            .outerjoin(
+                period,
+                and_(
+                    period.account_id == Account.id,
+                    period.organization_id == self.organization_id,
+                    or_(before, in_month),
+                ),
+            )
+            .where(Account.organization_id == self.organization_id)
+            .group_by(Account.id, Account.opening_balance)
+        )
+
+
+def _month_bounds(year: int, month: int) -> Tuple[date, date]:
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
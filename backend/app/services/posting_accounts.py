@@ -0,0 +1,149 @@
+"""
+Сметки по подразбиране за осчетоводяване.
+
+The accounts documents are posted to are resolved once per organization:
+from the default accounts in OrganizationSettings, falling back to an
+account of the chart with a conventional code for the roles settings do
+not cover. The result is kept in an in-process cache. Every commit that
+adds, changes or deletes an Account or OrganizationSettings row bumps the
+organization's version, which drops its entry; entries also expire after
+POSTING_ACCOUNTS_CACHE_SECONDS, for changes made by other processes.
+"""
+import threading
+import time
+import uuid
+from dataclasses import dataclass, fields
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as OrmSession
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.models.account import Account
+from app.models.organization_settings import OrganizationSettings
+
+# Role -> OrganizationSettings column
+SETTINGS_ACCOUNTS = {
+    "clients": "default_clients_account_id",
+    "suppliers": "default_suppliers_account_id",
+    "vat_purchases": "default_vat_purchases_account_id",
+    "vat_sales": "default_vat_sales_account_id",
+    "revenue": "default_revenue_account_id",
+    "cash": "default_cash_account_id",
+    "bank": "default_bank_account_id",
+}
+
+# Role -> account code of the national chart of accounts, used when settings
+# do not name an account
+FALLBACK_CODES = {
+    "clients": "411",
+    "suppliers": "401",
+    "cash": "501",
+    "revenue": "702",
+    "expense": "602",
+    "opening_balance_equity": "101",
+}
+
+
+class MissingPostingAccount(ValueError):
+    def __init__(self, role: str):
+        super().__init__(f"No default {role.replace('_', ' ')} account is configured for the organization")
+        self.role = role
+
+
+@dataclass(frozen=True)
+class PostingAccounts:
+    clients: Optional[uuid.UUID] = None
+    suppliers: Optional[uuid.UUID] = None
+    vat_purchases: Optional[uuid.UUID] = None
+    vat_sales: Optional[uuid.UUID] = None
+    revenue: Optional[uuid.UUID] = None
+    cash: Optional[uuid.UUID] = None
+    bank: Optional[uuid.UUID] = None
+    expense: Optional[uuid.UUID] = None
+    opening_balance_equity: Optional[uuid.UUID] = None
+
+    def require(self, role: str) -> uuid.UUID:
+        account_id = getattr(self, role)
+        if account_id is None:
+            raise MissingPostingAccount(role)
+        return account_id
+
+
+class PostingAccountsCache:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._versions: Dict[uuid.UUID, int] = {}
+        self._entries: Dict[uuid.UUID, Tuple[int, float, PostingAccounts]] = {}
+
+    def get(self, session: Session, organization_id: uuid.UUID) -> PostingAccounts:
+        now = time.monotonic()
+        with self._lock:
+            version = self._versions.get(organization_id, 0)
+            entry = self._entries.get(organization_id)
+        if entry is not None and entry[0] == version and now - entry[1] < settings.POSTING_ACCOUNTS_CACHE_SECONDS:
+            return entry[2]
+
+        accounts = load_posting_accounts(session, organization_id)
+        with self._lock:
+            # Not stored if a change was committed while loading
+            if self._versions.get(organization_id, 0) == version:
+                self._entries[organization_id] = (version, now, accounts)
+        return accounts
+
+    def invalidate(self, organization_id: uuid.UUID) -> None:
+        with self._lock:
+            self._versions[organization_id] = self._versions.get(organization_id, 0) + 1
+            self._entries.pop(organization_id, None)
+
+
+cache = PostingAccountsCache()
+
+
+def posting_accounts(session: Session, organization_id: uuid.UUID) -> PostingAccounts:
+    """The organization's posting accounts, from the cache when current."""
+    return cache.get(session, organization_id)
+
+
+def load_posting_accounts(session: Session, organization_id: uuid.UUID) -> PostingAccounts:
+    values: Dict[str, Optional[uuid.UUID]] = {}
+    organization_settings = session.exec(
+        select(OrganizationSettings).where(OrganizationSettings.organization_id == organization_id)
+    ).first()
+    if organization_settings is not None:
+        values = {role: getattr(organization_settings, column) for role, column in SETTINGS_ACCOUNTS.items()}
+
+    missing = {role: code for role, code in FALLBACK_CODES.items() if values.get(role) is None}
+    if missing:
+        by_code = dict(
+            session.exec(
+                select(Account.code, Account.id).where(
+                    Account.organization_id == organization_id,
+                    Account.code.in_(set(missing.values())),
+                )
+            ).all()
+        )
+        for role, code in missing.items():
+            values[role] = by_code.get(code)
+    return PostingAccounts(**{f.name: values.get(f.name) for f in fields(PostingAccounts)})
+
+
+# Invalidation: organizations whose accounts or settings a session flushed,
+# bumped when the transaction commits.
+
+_CACHED_MODELS = (Account, OrganizationSettings)
+
+
+@event.listens_for(OrmSession, "after_flush")
+def _collect_changes(session: OrmSession, flush_context) -> None:
+    changed: Set[uuid.UUID] = session.info.setdefault("posting_accounts_changed", set())
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, _CACHED_MODELS) and instance.organization_id is not None:
+            changed.add(instance.organization_id)
+
+
+@event.listens_for(OrmSession, "after_commit")
+def _invalidate_changes(session: OrmSession) -> None:
+    for organization_id in session.info.pop("posting_accounts_changed", ()):
+        cache.invalidate(organization_id)
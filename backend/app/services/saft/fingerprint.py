@@ -0,0 +1,197 @@
+import hashlib
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from enum import Enum
+from typing import Any, Iterable, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import Date, Text, cast, literal_column, tuple_
+from sqlmodel import Session, func, select
+
+from app.models.account import Account
+from app.models.account_period_balance import AccountPeriodBalance
+from app.models.asset import Asset
+from app.models.asset_transaction import AssetTransaction
+from app.models.contraagent import Contraagent
+from app.models.entry_line import EntryLine
+from app.models.item import Item
+from app.models.journal_entry import JournalEntry
+from app.models.organization import Organization
+from app.models.payment import Payment
+from app.models.period_close import PeriodAccountBalance, PeriodClose
+from app.models.product import Product
+from app.models.purchase import Purchase
+from app.models.purchase_item import PurchaseItem
+from app.models.sale import Sale
+from app.models.sale_item import SaleItem
+
+
+class Scope(str, Enum):
+    """Which of the organization's rows of a table a fragment reads."""
+
+    ALL = "all"
+    # Dated in the export's month, or in its year for annual exports
+    MONTH = "month"
+    YEAR = "year"
+    # Monthly rows of the export's year up to its month (the opening figures)
+    YEAR_TO_MONTH = "year_to_month"
+
+
+@dataclass(frozen=True)
+class Source:
+    """A table a fragment is built from, restricted to the rows it reads."""
+
+    model: Any
+    scope: Scope = Scope.ALL
+
+
+# Rows without an organization_id or a date of their own are scoped through
+# their parent.
+PARENT_MODELS: dict[Any, Any] = {
+    EntryLine: JournalEntry,
+    SaleItem: Sale,
+    PurchaseItem: Purchase,
+}
+
+# Column a dated table is restricted to a period by. Tables with
+# period_year/period_month columns need no entry.
+DATE_COLUMNS: dict[Any, Any] = {
+    JournalEntry: JournalEntry.__table__.c.entry_date,
+    Sale: Sale.__table__.c.date_sale,
+    Purchase: Purchase.__table__.c.date_purchase,
+    Payment: Payment.__table__.c.date_payment,
+    AssetTransaction: AssetTransaction.__table__.c.transaction_date,
+}
+
+# Columns left out of the content hash: they change without changing what
+# a SAF-T file shows. Account.balance moves with every posting.
+VOLATILE_COLUMNS: dict[Any, set[str]] = {
+    Account: {"balance"},
+}
+
+
+# Everything a SAF-T file of each report type is built from, see SAFT.SECTIONS
+REPORT_SOURCES: dict[str, Tuple[Source, ...]] = {
+    "monthly": (
+        Source(Account),
+        Source(AccountPeriodBalance, Scope.YEAR_TO_MONTH),
+        Source(PeriodAccountBalance, Scope.MONTH),
+        Source(PeriodClose, Scope.MONTH),
+        Source(Contraagent),
+        Source(Product),
+        Source(Item),
+        Source(JournalEntry, Scope.MONTH),
+        Source(EntryLine, Scope.MONTH),
+        Source(Sale, Scope.MONTH),
+        Source(SaleItem, Scope.MONTH),
+        Source(Purchase, Scope.MONTH),
+        Source(PurchaseItem, Scope.MONTH),
+        Source(Payment, Scope.MONTH),
+    ),
+    "annual": (Source(Asset), Source(AssetTransaction, Scope.YEAR)),
+    "on_demand": (Source(Product),),
+}
+
+
+class DataFingerprint:
+    """
+    Change detection for an organization's data.
+
+    A source fingerprint is its row count plus an order-independent content
+    hash: the sum of a 64-bit hash of every row's text, over the rows of the
+    source's scope only. Any insert, delete or change of a column (amounts,
+    ids, accounts) in the scope changes it, including bulk updates that do
+    not touch the timestamps; rows of other periods do not.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        organization_id: UUID,
+        year: Optional[int] = None,
+        month: Optional[int] = None,
+    ):
+        self.session = session
+        self.organization_id = organization_id
+        self.year = year
+        self.month = month
+
+    def source(self, source: Source) -> str:
+        """Return the fingerprint of the organization's rows in one source."""
+        model = source.model
+        content_hash = func.coalesce(func.sum(_row_hash(model)), 0)
+        statement = select(func.count(), content_hash).select_from(model)
+
+        scoped = PARENT_MODELS.get(model, model)
+        if scoped is not model:
+            statement = statement.join(scoped)
+        statement = statement.where(
+            scoped.__table__.c.organization_id == self.organization_id,
+            *self._period(scoped, source.scope),
+        )
+        count, content = self.session.exec(statement).one()
+        return f"{model.__table__.name}:{source.scope.value}:{count}:{content}"
+
+    def sources(self, sources: Iterable[Source]) -> list[str]:
+        return [self.source(source) for source in sources]
+
+    def organization(self) -> str:
+        """Return the fingerprint of the organization record itself (SAF-T header)."""
+        content = self.session.exec(
+            select(_row_hash(Organization)).where(Organization.id == self.organization_id)
+        ).first()
+        return f"organization:{content}"
+
+    @staticmethod
+    def combine(*parts: Optional[Any]) -> str:
+        """Hash fingerprint parts (and any extra parameters) into one hex digest."""
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(str(part).encode("utf-8"))
+            digest.update(b"\x1f")
+        return digest.hexdigest()
+
+    def _period(self, model: Any, scope: Scope) -> Tuple[Any, ...]:
+        if scope == Scope.ALL:
+            return ()
+        if self.year is None:
+            raise ValueError(f"A {scope.value} fingerprint needs a year")
+        month = self.month if scope != Scope.YEAR else None
+
+        columns = model.__table__.c
+        if "period_year" in columns:
+            conditions = [columns.period_year == self.year]
+            if month is not None:
+                if scope == Scope.YEAR_TO_MONTH:
+                    conditions.append(columns.period_month <= month)
+                else:
+                    conditions.append(columns.period_month == month)
+            return tuple(conditions)
+
+        column = DATE_COLUMNS[model]
+        if month is None:
+            start, end = date(self.year, 1, 1), date(self.year + 1, 1, 1)
+        elif scope == Scope.YEAR_TO_MONTH:
+            start, end = date(self.year, 1, 1), _next_month(self.year, month)
+        else:
+            start, end = date(self.year, month, 1), _next_month(self.year, month)
+        if not isinstance(column.type, Date):
+            # Timestamp columns are compared with UTC bounds
+            start = datetime(start.year, start.month, start.day, tzinfo=timezone.utc)
+            end = datetime(end.year, end.month, end.day, tzinfo=timezone.utc)
+        return column >= start, column < end
+
+
+def _next_month(year: int, month: int) -> date:
+    return date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+
+
+def _row_hash(model: Any):
+    """64-bit hash of a row's text representation (PostgreSQL)."""
+    table = model.__table__
+    volatile = VOLATILE_COLUMNS.get(model)
+    if volatile:
+        row = tuple_(*(column for column in table.c if column.name not in volatile))
+    else:
+        row = literal_column(table.name)
+    return func.hashtextextended(cast(row, Text), 0)
@@ -0,0 +1,86 @@
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional, Sequence
+from uuid import UUID
+
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.services.saft.fingerprint import DataFingerprint, Source
+
+
+class SAFTFragmentCache:
+    """
+    Stores rendered SAF-T fragments (Customers, Products, SalesInvoices, ...)
+    per organization and period.
+
+    A fragment is keyed by the fingerprints of the sources it is built
+    from, taken in the export's own snapshot: the tables it reads, each
+    restricted to the rows of the fragment's period. When none of those
+    rows changed since the last export the stored XML is replayed instead
+    of querying and rendering them again. Only the latest version of each
+    fragment is kept.
+    """
+
+    READ_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        session: Session,
+        organization_id: UUID,
+        period: str,
+        year: Optional[int] = None,
+        month: Optional[int] = None,
+        root: Optional[Path] = None,
+    ):
+        self.organization_id = organization_id
+        self.period = period
+        self.root = root or Path(settings.UPLOAD_DIR) / "saft" / "fragments" / str(organization_id)
+        self._fingerprint = DataFingerprint(session, organization_id, year, month)
+        self._sources: Dict[Source, str] = {}
+
+    def fragment(self, name: str, sources: Sequence[Source], render: Callable[[], Iterator[str]]) -> Iterator[str]:
+        """Yield a cached fragment, rendering and storing it on a miss."""
+        key = DataFingerprint.combine(
+            self.organization_id, self.period, name, *(self._source(source) for source in sources)
+        )
+        path = self.root / f"{self.period}_{name}_{key}.xml"
+        if path.is_file():
+            yield from self._read(path)
+            return
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.root, prefix=f".{name}_", suffix=".part")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as output:
+                for chunk in render():
+                    output.write(chunk)
+                    yield chunk
+            for stale in self.root.glob(f"{self.period}_{name}_*.xml"):
+                stale.unlink(missing_ok=True)
+            os.replace(tmp_name, path)
+        finally:
+            Path(tmp_name).unlink(missing_ok=True)
+
+    def _source(self, source: Source) -> str:
+        if source not in self._sources:
+            self._sources[source] = self._fingerprint.source(source)
+        return self._sources[source]
+
+    def _read(self, path: Path) -> Iterator[str]:
+        with open(path, encoding="utf-8") as f:
+            while block := f.read(self.READ_SIZE):
+                yield block
+
+
+def cached(
+    cache: Optional[SAFTFragmentCache],
+    name: str,
+    sources: Sequence[Source],
+    render: Callable[[], Iterator[str]],
+) -> Iterator[str]:
+    """Wrap a fragment renderer with the cache, if one is configured."""
+    if cache is None:
+        return render()
+    return cache.fragment(name, sources, render)
@@ -2,66 +2,146 @@
 import html
 from datetime import date, timedelta
 from decimal import Decimal
-from typing import IO, Any, List, Optional, Tuple
+from typing import IO, Any, Iterator, Optional, Sequence, Set, Tuple
+from uuid import UUID
 
-from sqlalchemy.orm import selectinload
-from sqlmodel import Session, select
+from sqlalchemy import Numeric, cast, inspect, tuple_
+from sqlalchemy.orm import aliased, selectinload
+from sqlmodel import Session, func, select
 
+from app.models.account import Account
 from app.models.entry_line import EntryLine
 from app.models.journal_entry import JournalEntry
 from app.models.organization import Organization
+from app.services.saft.fingerprint import Scope, Source
+from app.services.saft.fragment_cache import SAFTFragmentCache, cached
 
 
 class SAFTGeneralLedgerEntries:
-    def __init__(self, organization: Organization, year: int, month: Optional[int] = None):
+    # Journal entries fetched per round trip; at most one chunk of ORM
+    # objects is alive at any time.
+    CHUNK_SIZE = 500
+
+    def __init__(
+        self,
+        session: Session,
+        organization: Organization,
+        year: int,
+        month: Optional[int] = None,
+        chunk_size: int = CHUNK_SIZE,
+        cache: Optional[SAFTFragmentCache] = None,
+    ):
+        self.session = session
         self.organization = organization
         self.year = year
         self.month = month
+        self.chunk_size = chunk_size
+        self.cache = cache
 
     def generate(self, output: IO[Any], **kwargs: Any):
-        entries = self._get_journal_entries()
-        total_debit, total_credit = self._calculate_totals(entries)
-        number_of_entries = len(entries)
+        for chunk in self.iter_generate(**kwargs):
+            output.write(chunk)
+
+    def iter_generate(self, **kwargs: Any) -> Iterator[str]:
+        """Yield the GeneralLedgerEntries section one journal entry at a time."""
+        return cached(
+            self.cache,
+            "GeneralLedgerEntries",
+            (Source(JournalEntry, Scope.MONTH), Source(EntryLine, Scope.MONTH), Source(Account)),
+            self._iter_section,
+        )
 
-        entries_xml = "\n".join([self._build_journal_entry(entry) for entry in entries])
-        journal_placeholder = self._build_journal_placeholder() if not entries else entries_xml
+    def _iter_section(self) -> Iterator[str]:
+        number_of_entries, total_debit, total_credit = self._get_totals()
 
-        content = f"""
+        yield f"""
       <nsSAFT:GeneralLedgerEntries>
         <nsSAFT:NumberOfEntries>{number_of_entries}</nsSAFT:NumberOfEntries>
         <nsSAFT:TotalDebit>{self._format_decimal(total_debit)}</nsSAFT:TotalDebit>
-        <nsSAFT:TotalCredit>{self._format_decimal(total_credit)}</nsSAFT:TotalCredit>
-    {journal_placeholder}
+        <nsSAFT:TotalCredit>{self._format_decimal(total_credit)}</nsSAFT:TotalCredit>"""
+        if not number_of_entries:
+            yield self._build_journal_placeholder()
+        for entry in self._iter_journal_entries():
+            yield self._build_journal_entry(entry)
+        yield """
       </nsSAFT:GeneralLedgerEntries>
         """
-        output.write(content)
 
-    def _get_journal_entries(self) -> List[Any]:
-        with Session(self.organization.engine) as session:
-            start_date = date(self.year, self.month, 1)
-            end_date = date(self.year, self.month, 1).replace(day=28) + timedelta(days=4)
-            end_date = end_date - timedelta(days=end_date.day)
+    def _period(self) -> Tuple[date, date]:
+        start_date = date(self.year, self.month, 1)
+        end_date = date(self.year, self.month, 1).replace(day=28) + timedelta(days=4)
+        end_date = end_date - timedelta(days=end_date.day)
+        return start_date, end_date
+
+    def _posted_entries(self) -> Tuple[Any, ...]:
+        """
+        Conditions selecting the period's posted journal entries: those with
+        lines. An entry header without lines is not part of the ledger.
+        """
+        start_date, end_date = self._period()
+        line = aliased(EntryLine)
+        has_lines = select(line.id).where(line.journal_entry_id == JournalEntry.id).exists()
+        return (
+            JournalEntry.organization_id == self.organization.id,
+            JournalEntry.entry_date >= start_date,
+            JournalEntry.entry_date <= end_date,
+            has_lines,
+        )
+
+    def _get_totals(self) -> Tuple[int, Decimal, Decimal]:
+        """NumberOfEntries, TotalDebit and TotalCredit computed in SQL."""
+        statement = (
+            select(
+                func.count(func.distinct(JournalEntry.id)),
+                cast(func.coalesce(func.sum(EntryLine.debit), 0), Numeric(18, 2)),
+                cast(func.coalesce(func.sum(EntryLine.credit), 0), Numeric(18, 2)),
+            )
+            .select_from(JournalEntry)
+            .join(EntryLine, EntryLine.journal_entry_id == JournalEntry.id)
+            .where(*self._posted_entries())
+        )
+        number_of_entries, total_debit, total_credit = self.session.exec(statement).one()
+        return number_of_entries, total_debit, total_credit
+
+    def _iter_journal_entries(self) -> Iterator[JournalEntry]:
+        """
+        Yield the period's journal entries ordered by (entry_date, id).
 
+        Entries are fetched with keyset pagination, chunk_size at a time,
+        with their lines and the lines' accounts loaded eagerly. The
+        entries and lines a chunk loaded are expunged after it; instances
+        that were already in the session, and the accounts, stay.
+        """
+        last_key: Optional[Tuple[date, UUID]] = None
+        while True:
             statement = (
                 select(JournalEntry)
                 .options(selectinload(JournalEntry.lines).selectinload(EntryLine.account))
-                .where(JournalEntry.organization_id == self.organization.id)
-                .where(JournalEntry.is_posted == True)
-                .where(JournalEntry.date >= start_date)
-                .where(JournalEntry.date <= end_date)
-                .order_by(JournalEntry.date, JournalEntry.id, EntryLine.id)
+                .where(*self._posted_entries())
+                .order_by(JournalEntry.entry_date, JournalEntry.id)
+                .limit(self.chunk_size)
             )
-            entries = session.exec(statement).all()
-            return entries
+            if last_key is not None:
+                statement = statement.where(
+                    tuple_(JournalEntry.entry_date, JournalEntry.id) > last_key
+                )
+            present = set(self.session.identity_map.keys())
+            entries = self.session.exec(statement).all()
+            if not entries:
+                return
+
+            yield from entries
+            last_key = (entries[-1].entry_date, entries[-1].id)
+            self._expunge_chunk(entries, present)
+            if len(entries) < self.chunk_size:
+                return
 
-    def _calculate_totals(self, entries: List[Any]) -> Tuple[Decimal, Decimal]:
-        total_debit = Decimal(0)
-        total_credit = Decimal(0)
+    def _expunge_chunk(self, entries: Sequence[JournalEntry], present: Set[Any]) -> None:
         for entry in entries:
-            for line in entry.lines:
-                total_debit += Decimal(line.debit)
-                total_credit += Decimal(line.credit)
-        return total_debit, total_credit
+            for instance in (entry, *entry.lines):
+                key = inspect(instance).identity_key
+                if key not in present and instance in self.session:
+                    self.session.expunge(instance)
 
     def _build_journal_placeholder(self) -> str:
         today = date.today().isoformat()
@@ -111,89 +191,60 @@ class SAFTGeneralLedgerEntries:
             </nsSAFT:Journal>
         """
 
-    def _build_journal_entry(self, entry: Any) -> str:
-        lines_xml = "\n".join([self._build_line(line) for line in entry.lines])
+    def _build_journal_entry(self, entry: JournalEntry) -> str:
+        lines = sorted(entry.lines, key=lambda line: line.id)
+        lines_xml = "\n".join([self._build_line(entry, line) for line in lines])
         return f"""
           <nsSAFT:Journal>
-            <nsSAFT:JournalID>{entry.journal_type or "GJ"}</nsSAFT:JournalID>
-            <nsSAFT:Description>{self._escape_xml(entry.journal_description or "Главен журнал")}</nsSAFT:Description>
-            <nsSAFT:Type>{entry.journal_type or "GJ"}</nsSAFT:Type>
+            <nsSAFT:JournalID>GJ</nsSAFT:JournalID>
+            <nsSAFT:Description>Главен журнал</nsSAFT:Description>
+            <nsSAFT:Type>GJ</nsSAFT:Type>
             <nsSAFT:Transaction>
               <nsSAFT:TransactionID>{entry.id}</nsSAFT:TransactionID>
-              <nsSAFT:Period>{entry.period or entry.date.month}</nsSAFT:Period>
-              <nsSAFT:PeriodYear>{entry.period_year or entry.date.year}</nsSAFT:PeriodYear>
-              <nsSAFT:TransactionDate>{self._format_date(entry.date)}</nsSAFT:TransactionDate>
-              <nsSAFT:SourceID>{entry.created_by or "system"}</nsSAFT:SourceID>
-              <nsSAFT:TransactionType>{entry.transaction_type or "N"}</nsSAFT:TransactionType>
+              <nsSAFT:Period>{entry.entry_date.month}</nsSAFT:Period>
+              <nsSAFT:PeriodYear>{entry.entry_date.year}</nsSAFT:PeriodYear>
+              <nsSAFT:TransactionDate>{self._format_date(entry.entry_date)}</nsSAFT:TransactionDate>
+              <nsSAFT:SourceID>{entry.created_by_id}</nsSAFT:SourceID>
+              <nsSAFT:TransactionType>N</nsSAFT:TransactionType>
               <nsSAFT:Description>{self._escape_xml(entry.description or "")}</nsSAFT:Description>
-              <nsSAFT:SystemEntryDate>{self._format_date(entry.inserted_at)}</nsSAFT:SystemEntryDate>
-              <nsSAFT:GLPostingDate>{self._format_date(entry.posted_at or entry.date)}</nsSAFT:GLPostingDate>
+              <nsSAFT:SystemEntryDate>{self._format_date(entry.date_created.date())}</nsSAFT:SystemEntryDate>
+              <nsSAFT:GLPostingDate>{self._format_date(entry.entry_date)}</nsSAFT:GLPostingDate>
     {lines_xml}
             </nsSAFT:Transaction>
           </nsSAFT:Journal>
         """
 
-    def _build_line(self, line: Any) -> str:
-        is_debit = (line.debit or Decimal(0)) > 0
+    def _build_line(self, entry: JournalEntry, line: EntryLine) -> str:
+        debit = Decimal(str(line.debit or 0))
+        credit = Decimal(str(line.credit or 0))
+        if debit > 0:
+            amount_xml = self._build_amount("DebitAmount", entry, debit)
+        else:
+            amount_xml = self._build_amount("CreditAmount", entry, credit)
         return f"""
               <nsSAFT:TransactionLine>
                 <nsSAFT:RecordID>{line.id}</nsSAFT:RecordID>
-                <nsSAFT:AccountID>{line.account_code}</nsSAFT:AccountID>
-                <nsSAFT:SourceDocumentID>{line.source_document_id or ""}</nsSAFT:SourceDocumentID>
-    {self._build_customer_supplier_id(line)}
+                <nsSAFT:AccountID>{self._escape_xml(line.account.code)}</nsSAFT:AccountID>
+                <nsSAFT:SourceDocumentID>{self._escape_xml(entry.reference or "")}</nsSAFT:SourceDocumentID>
                 <nsSAFT:Description>{self._escape_xml(line.description or "")}</nsSAFT:Description>
-    {self._build_debit_amount(line) if is_debit else self._build_credit_amount(line)}
-    {self._build_tax_information(line)}
+    {amount_xml}
               </nsSAFT:TransactionLine>
         """
 
-    def _build_customer_supplier_id(self, line: Any) -> str:
-        if line.customer_id:
-            return f"            <nsSAFT:CustomerID>{line.customer_id}</nsSAFT:CustomerID>"
-        if line.supplier_id:
-            return f"            <nsSAFT:SupplierID>{line.supplier_id}</nsSAFT:SupplierID>"
-        return ""
-
-    def _build_debit_amount(self, line: Any) -> str:
-        amount = line.debit or Decimal(0)
-        return f"""
-                <nsSAFT:DebitAmount>
-                  <nsSAFT:Amount>{self._format_decimal(amount)}</nsSAFT:Amount>
-                  <nsSAFT:CurrencyCode>{line.currency or "BGN"}</nsSAFT:CurrencyCode>
-                  <nsSAFT:CurrencyAmount>{self._format_decimal(line.currency_amount or amount)}</nsSAFT:CurrencyAmount>
-                  <nsSAFT:ExchangeRate>{self._format_decimal(line.exchange_rate or Decimal(1))}</nsSAFT:ExchangeRate>
-                </nsSAFT:DebitAmount>
-        """
-
-    def _build_credit_amount(self, line: Any) -> str:
-        amount = line.credit or Decimal(0)
+    def _build_amount(self, element: str, entry: JournalEntry, amount: Decimal) -> str:
+        """Amount in BGN, with the entry's currency amount at its exchange rate."""
+        currency_code = entry.currency_code or "BGN"
+        exchange_rate = Decimal(str(entry.exchange_rate or 1))
+        currency_amount = amount if currency_code == "BGN" else amount / exchange_rate
         return f"""
-                <nsSAFT:CreditAmount>
+                <nsSAFT:{element}>
                   <nsSAFT:Amount>{self._format_decimal(amount)}</nsSAFT:Amount>
-                  <nsSAFT:CurrencyCode>{line.currency or "BGN"}</nsSAFT:CurrencyCode>
-                  <nsSAFT:CurrencyAmount>{self._format_decimal(line.currency_amount or amount)}</nsSAFT:CurrencyAmount>
-                  <nsSAFT:ExchangeRate>{self._format_decimal(line.exchange_rate or Decimal(1))}</nsSAFT:ExchangeRate>
-                </nsSAFT:CreditAmount>
+                  <nsSAFT:CurrencyCode>{currency_code}</nsSAFT:CurrencyCode>
+                  <nsSAFT:CurrencyAmount>{self._format_decimal(currency_amount)}</nsSAFT:CurrencyAmount>
+                  <nsSAFT:ExchangeRate>{self._format_decimal(exchange_rate)}</nsSAFT:ExchangeRate>
+                </nsSAFT:{element}>
         """
 
-    def _build_tax_information(self, line: Any) -> str:
-        if line.vat_amount and line.vat_amount > 0:
-            return f"""
-                <nsSAFT:TaxInformation>
-                  <nsSAFT:TaxType>VAT</nsSAFT:TaxType>
-                  <nsSAFT:TaxCode>{line.vat_rate or "20"}</nsSAFT:TaxCode>
-                  <nsSAFT:TaxPercentage>{self._format_decimal(line.vat_rate or Decimal(20))}</nsSAFT:TaxPercentage>
-                  <nsSAFT:TaxBase>{self._format_decimal(line.tax_base or line.debit or line.credit)}</nsSAFT:TaxBase>
-                  <nsSAFT:TaxAmount>
-                    <nsSAFT:Amount>{self._format_decimal(line.vat_amount)}</nsSAFT:Amount>
-                    <nsSAFT:CurrencyCode>{line.currency or "BGN"}</nsSAFT:CurrencyCode>
-                    <nsSAFT:CurrencyAmount>{self._format_decimal(line.vat_amount)}</nsSAFT:CurrencyAmount>
-                    <nsSAFT:ExchangeRate>{self._format_decimal(line.exchange_rate or Decimal(1))}</nsSAFT:ExchangeRate>
-                  </nsSAFT:TaxAmount>
-                </nsSAFT:TaxInformation>
-            """
-        return ""
-
     def _escape_xml(self, text: Optional[str]) -> str:
         if not text:
             return ""
@@ -1,7 +1,7 @@
 
 import html
 from datetime import date
-from typing import IO, Any, Optional, Tuple
+from typing import IO, Any, Iterator, Optional, Tuple
 
 from app.models.organization import Organization
 from app.services.saft import constants
@@ -14,6 +14,10 @@ class SAFTHeader:
         self.month = month
 
     def generate(self, output: IO[Any], report_type: str, **kwargs: Any):
+        for chunk in self.iter_generate(report_type, **kwargs):
+            output.write(chunk)
+
+    def iter_generate(self, report_type: str, **kwargs: Any) -> Iterator[str]:
         if report_type == "monthly":
             header_comment = "M"
             selection_criteria = self._build_monthly_selection_criteria()
@@ -26,8 +30,7 @@ class SAFTHeader:
         else:
             raise ValueError("Invalid report type")
 
-        header = self._build_header(selection_criteria, header_comment)
-        output.write(header)
+        yield self._build_header(selection_criteria, header_comment)
 
     def _build_monthly_selection_criteria(self) -> str:
         return f"""
@@ -0,0 +1,259 @@
+import gzip
+import logging
+import os
+from dataclasses import asdict
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional, Set
+from uuid import UUID
+
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models.organization import Organization
+from app.models.saft_export_job import (
+    SaftExportJob,
+    SaftExportJobBase,
+    SaftExportJobCreate,
+    SaftExportJobStatus,
+)
+from app.services.saft.fingerprint import REPORT_SOURCES, DataFingerprint
+from app.services.saft.validation import SAFTValidator
+from app.services.saft_service import SAFT
+from app.utils import utcnow
+
+logger = logging.getLogger(__name__)
+
+
+class SAFTJobService:
+    """
+    Runs SAF-T generation in a background worker pool.
+
+    Each job writes a gzip-compressed XML file under
+    UPLOAD_DIR/saft/<organization_id>/ and records its progress on the
+    saft_export_job row, so clients can poll and download by job id.
+    Enqueueing a report that is already pending or running returns that
+    job. When a job runs, it first fingerprints its parameters and the
+    source data; if a completed job has the same fingerprint, its artifact
+    is reused instead of generating the file again.
+
+    A pending or running job that is unknown to this process's worker pool
+    and was created before it started (its worker was restarted), or whose
+    progress has not been saved for SAFT_JOB_TIMEOUT_SECONDS, is failed.
+    """
+
+    # Persist progress after this many written chunks.
+    PROGRESS_INTERVAL = 500
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._started_at = utcnow()
+        # Jobs submitted to this process's pool and not finished yet
+        self._active: Set[UUID] = set()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="saft-job"
+            )
+        return self._executor
+
+    def fingerprint(self, session: Session, organization_id: UUID, job_in: SaftExportJobBase) -> str:
+        """Fingerprint of the job parameters and the current source data."""
+        data = DataFingerprint(session, organization_id, job_in.period_year, job_in.period_month)
+        return DataFingerprint.combine(
+            organization_id,
+            job_in.report_type,
+            job_in.period_year,
+            job_in.period_month,
+            job_in.start_date,
+            job_in.end_date,
+            job_in.validate_xsd,
+            data.organization(),
+            *data.sources(REPORT_SOURCES[job_in.report_type]),
+        )
+
+    def enqueue(
+        self,
+        session: Session,
+        organization_id: UUID,
+        created_by_id: UUID,
+        job_in: SaftExportJobCreate,
+    ) -> SaftExportJob:
+        """Create and schedule a job, or return an equivalent existing one."""
+        if job_in.report_type not in SAFT.SECTIONS:
+            raise ValueError("Invalid report type")
+        if job_in.report_type == "monthly" and not job_in.period_month:
+            raise ValueError("Month is required for monthly reports")
+        if job_in.report_type == "on_demand" and not (job_in.start_date and job_in.end_date):
+            raise ValueError("Start and end date are required for on-demand reports")
+        if job_in.validate_xsd:
+            SAFTValidator()  # fails fast when no XSD is configured
+
+        in_flight = session.exec(
+            select(SaftExportJob)
+            .where(SaftExportJob.organization_id == organization_id)
+            .where(SaftExportJob.report_type == job_in.report_type)
+            .where(SaftExportJob.period_year == job_in.period_year)
+            .where(SaftExportJob.period_month == job_in.period_month)
+            .where(SaftExportJob.start_date == job_in.start_date)
+            .where(SaftExportJob.end_date == job_in.end_date)
+            .where(SaftExportJob.validate_xsd == job_in.validate_xsd)
+            .where(SaftExportJob.status.in_([SaftExportJobStatus.PENDING, SaftExportJobStatus.RUNNING]))
+            .order_by(SaftExportJob.date_created.desc())
+        ).all()
+        for existing in in_flight:
+            if not self.is_stale(existing):
+                return existing
+            existing.status = SaftExportJobStatus.FAILED
+            existing.error_message = "Interrupted: the job's worker stopped"
+            existing.date_finished = utcnow()
+            self._save(session, existing)
+
+        job = SaftExportJob.model_validate(
+            job_in,
+            update={
+                "organization_id": organization_id,
+                "created_by_id": created_by_id,
+                "sections_total": len(SAFT.SECTIONS[job_in.report_type]),
+            },
+        )
+        session.add(job)
+        session.commit()
+        session.refresh(job)
+
+        self._active.add(job.id)
+        self.executor.submit(self.run, job.id)
+        return job
+
+    def is_stale(self, job: SaftExportJob) -> bool:
+        """Whether a pending or running job can no longer finish."""
+        if job.id not in self._active and job.date_created < self._started_at:
+            return True
+        timeout = timedelta(seconds=settings.SAFT_JOB_TIMEOUT_SECONDS)
+        return job.date_updated < utcnow() - timeout
+
+    def get_job(self, session: Session, organization_id: UUID, job_id: UUID) -> Optional[SaftExportJob]:
+        job = session.get(SaftExportJob, job_id)
+        if not job or job.organization_id != organization_id:
+            return None
+        return job
+
+    def run(self, job_id: UUID) -> None:
+        """Generate the artifact for a job. Executed in the worker pool."""
+        try:
+            self._run(job_id)
+        finally:
+            self._active.discard(job_id)
+
+    def _run(self, job_id: UUID) -> None:
+        with Session(engine) as session:
+            job = session.get(SaftExportJob, job_id)
+            if not job or job.status != SaftExportJobStatus.PENDING:
+                return
+            organization = session.get(Organization, job.organization_id)
+
+            job.status = SaftExportJobStatus.RUNNING
+            job.date_started = utcnow()
+            self._save(session, job)
+
+            try:
+                job.fingerprint = self.fingerprint(session, job.organization_id, job)
+            except Exception as e:
+                logger.exception("SAF-T job %s failed", job_id)
+                job.status = SaftExportJobStatus.FAILED
+                job.error_message = str(e)
+                job.date_finished = utcnow()
+                self._save(session, job)
+                return
+            previous = self._completed_job(session, job)
+            if previous:
+                # Same report over unchanged data: reuse the artifact
+                job.artifact_path = previous.artifact_path
+                job.artifact_size = previous.artifact_size
+                job.rows_written = previous.rows_written
+                job.sections_done = previous.sections_done
+                job.is_valid = previous.is_valid
+                job.validation_errors = previous.validation_errors
+                job.status = SaftExportJobStatus.COMPLETED
+                job.date_finished = utcnow()
+                self._save(session, job)
+                return
+            self._save(session, job)
+
+            path = self.artifact_path(job)
+            tmp_path = path.with_name(path.name + ".part")
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                saft = SAFT(organization, job.period_year, job.period_month)
+                with gzip.open(tmp_path, "wt", encoding="utf-8") as output:
+                    output.write(SAFT.AUDIT_FILE_OPEN)
+                    for _, chunks in saft.iter_sections(job.report_type, **self._report_kwargs(job)):
+                        for chunk in chunks:
+                            output.write(chunk)
+                            job.rows_written += 1
+                            if job.rows_written % self.PROGRESS_INTERVAL == 0:
+                                self._save(session, job)
+                        job.sections_done += 1
+                        self._save(session, job)
+                    output.write(SAFT.AUDIT_FILE_CLOSE)
+
+                if job.validate_xsd:
+                    report = SAFTValidator().validate_file(tmp_path)
+                    job.is_valid = report.is_valid
+                    job.validation_errors = [asdict(error) for error in report.errors]
+                os.replace(tmp_path, path)
+
+                job.artifact_path = str(path)
+                job.artifact_size = path.stat().st_size
+                job.status = SaftExportJobStatus.COMPLETED
+            except Exception as e:
+                logger.exception("SAF-T job %s failed", job_id)
+                tmp_path.unlink(missing_ok=True)
+                job.status = SaftExportJobStatus.FAILED
+                job.error_message = str(e)
+
+            job.date_finished = utcnow()
+            self._save(session, job)
+
+    def _completed_job(self, session: Session, job: SaftExportJob) -> Optional[SaftExportJob]:
+        """A completed job with the same fingerprint whose artifact still exists."""
+        previous = session.exec(
+            select(SaftExportJob)
+            .where(SaftExportJob.organization_id == job.organization_id)
+            .where(SaftExportJob.fingerprint == job.fingerprint)
+            .where(SaftExportJob.status == SaftExportJobStatus.COMPLETED)
+            .where(SaftExportJob.id != job.id)
+            .order_by(SaftExportJob.date_created.desc())
+        ).first()
+        if previous and self.artifact_exists(previous):
+            return previous
+        return None
+
+    def artifact_path(self, job: SaftExportJob) -> Path:
+        return Path(settings.UPLOAD_DIR) / "saft" / str(job.organization_id) / f"{job.id}.xml.gz"
+
+    def artifact_exists(self, job: SaftExportJob) -> bool:
+        return bool(job.artifact_path) and Path(job.artifact_path).is_file()
+
+    def download_filename(self, job: SaftExportJob) -> str:
+        period = f"{job.period_year}" if not job.period_month else f"{job.period_year}_{job.period_month:02d}"
+        return f"saft_{job.report_type}_{period}.xml.gz"
+
+    def _report_kwargs(self, job: SaftExportJob) -> Dict[str, Any]:
+        if job.report_type == "on_demand":
+            return {"start_date": job.start_date, "end_date": job.end_date}
+        return {}
+
+    def _save(self, session: Session, job: SaftExportJob) -> None:
+        job.date_updated = utcnow()
+        session.add(job)
+        session.commit()
+
+
+# Singleton instance
+saft_job_service = SAFTJobService(max_workers=settings.SAFT_JOB_WORKERS)
@@ -1,75 +1,103 @@
 
 
 import html
-from datetime import date, timedelta
+from datetime import date
 from decimal import Decimal
-from typing import IO, Any, List, Optional, Tuple
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
 from uuid import UUID
 
-from sqlalchemy.orm import selectinload
-from sqlmodel import Session, func, select
+from sqlmodel import Session, select
 
 from app.models.account import Account
+from app.models.account_period_balance import AccountPeriodBalance
 from app.models.asset import Asset
 from app.models.contraagent import Contraagent # Changed from Customer
-from app.models.entry_line import EntryLine
-from app.models.journal_entry import JournalEntry
 from app.models.organization import Organization
+from app.models.period_close import PeriodAccountBalance, PeriodClose
 from app.models.product import Product # Changed from Item
+from app.services.balance_service import AccountTurnover, BalanceService
+from app.services.period_close import PeriodCloseService
+from app.services.saft.fingerprint import Scope, Source
+from app.services.saft.fragment_cache import SAFTFragmentCache, cached
 # Removed from app.models.supplier import Supplier
 
 
 class SAFTMasterFiles:
-    def __init__(self, organization: Organization, year: int, month: Optional[int] = None):
+    def __init__(
+        self,
+        session: Session,
+        organization: Organization,
+        year: int,
+        month: Optional[int] = None,
+        cache: Optional[SAFTFragmentCache] = None,
+    ):
+        self.session = session
         self.organization = organization
         self.year = year
         self.month = month
+        self.cache = cache
 
     def generate(self, output: IO[Any], report_type: str, **kwargs: Any):
+        for chunk in self.iter_generate(report_type, **kwargs):
+            output.write(chunk)
+
+    def iter_generate(self, report_type: str, **kwargs: Any) -> Iterator[str]:
+        """Yield the master files section chunk by chunk, one entity at a time."""
         if report_type == "monthly":
-            content = self._build_monthly()
+            yield from self._iter_monthly()
         elif report_type == "annual":
-            content = self._build_annual()
+            yield from self._iter_annual()
         elif report_type == "on_demand":
-            content = self._build_on_demand(**kwargs)
+            yield from self._iter_on_demand(**kwargs)
         else:
             raise ValueError("Invalid report type")
 
-        output.write(content)
-
-    def _build_monthly(self) -> str:
-        return f"""
-      <nsSAFT:MasterFilesMonthly>
-    {self._build_general_ledger_accounts()}
-    {self._build_customers()}
-    {self._build_suppliers()}
-    {self._build_tax_table()}
-    {self._build_uom_table()}
-    {self._build_products()}
+    def _iter_monthly(self) -> Iterator[str]:
+        yield """
+      <nsSAFT:MasterFilesMonthly>"""
+        yield from cached(
+            self.cache,
+            "GeneralLedgerAccounts",
+            (
+                Source(Account),
+                Source(AccountPeriodBalance, Scope.YEAR_TO_MONTH),
+                Source(PeriodAccountBalance, Scope.MONTH),
+                Source(PeriodClose, Scope.MONTH),
+            ),
+            self._iter_general_ledger_accounts,
+        )
+        yield from cached(self.cache, "Customers", (Source(Contraagent),), self._iter_customers)
+        yield from cached(self.cache, "Suppliers", (Source(Contraagent),), self._iter_suppliers)
+        yield self._build_tax_table()
+        yield self._build_uom_table()
+        yield from cached(self.cache, "Products", (Source(Product),), self._iter_products)
+        yield """
       </nsSAFT:MasterFilesMonthly>
         """
 
-    def _build_annual(self) -> str:
-        return f"""
-      <nsSAFT:MasterFilesAnnual>
-    {self._build_assets()}
+    def _iter_annual(self) -> Iterator[str]:
+        yield """
+      <nsSAFT:MasterFilesAnnual>"""
+        yield from cached(self.cache, "Assets", (Source(Asset),), self._iter_assets)
+        yield """
       </nsSAFT:MasterFilesAnnual>
         """
 
-    def _build_on_demand(self, **kwargs: Any) -> str:
-        return f"""
-      <nsSAFT:MasterFilesOnDemand>
-    {self._build_products()}
-    {self._build_physical_stock(**kwargs)}
+    def _iter_on_demand(self, **kwargs: Any) -> Iterator[str]:
+        yield """
+      <nsSAFT:MasterFilesOnDemand>"""
+        yield from cached(self.cache, "Products", (Source(Product),), self._iter_products)
+        yield self._build_physical_stock(**kwargs)
+        yield """
       </nsSAFT:MasterFilesOnDemand>
         """
 
-    def _build_general_ledger_accounts(self) -> str:
-        accounts = self._get_accounts_with_balances()
-        accounts_xml = "\n".join([self._build_account(account) for account in accounts])
-        return f"""
-      <nsSAFT:GeneralLedgerAccounts>
-  {accounts_xml}
+    def _iter_general_ledger_accounts(self) -> Iterator[str]:
+        yield """
+      <nsSAFT:GeneralLedgerAccounts>"""
+        for account in self._get_accounts_with_balances():
+            yield self._build_account(account)
+        yield """
       </nsSAFT:GeneralLedgerAccounts>
         """
 
@@ -119,12 +147,12 @@ class SAFTMasterFiles:
           </nsSAFT:Account>
         """
 
-    def _build_customers(self) -> str:
-        contraagents = self._get_contraagents(is_customer=True)
-        contraagents_xml = "\n".join([self._build_contraagent_customer(ca) for ca in contraagents])
-        return f"""
-      <nsSAFT:Customers>
-  {contraagents_xml}
+    def _iter_customers(self) -> Iterator[str]:
+        yield """
+      <nsSAFT:Customers>"""
+        for contraagent in self._get_contraagents(is_customer=True):
+            yield self._build_contraagent_customer(contraagent)
+        yield """
       </nsSAFT:Customers>
         """
 
@@ -143,12 +171,12 @@ class SAFTMasterFiles:
           </nsSAFT:Customer>
         """
 
-    def _build_suppliers(self) -> str:
-        contraagents = self._get_contraagents(is_supplier=True)
-        contraagents_xml = "\n".join([self._build_contraagent_supplier(ca) for ca in contraagents])
-        return f"""
-      <nsSAFT:Suppliers>
-  {contraagents_xml}
+    def _iter_suppliers(self) -> Iterator[str]:
+        yield """
+      <nsSAFT:Suppliers>"""
+        for contraagent in self._get_contraagents(is_supplier=True):
+            yield self._build_contraagent_supplier(contraagent)
+        yield """
       </nsSAFT:Suppliers>
         """
 
@@ -270,12 +298,12 @@ class SAFTMasterFiles:
     </nsSAFT:UOMTable>
         """
 
-    def _build_products(self) -> str:
-        products = self._get_products()
-        products_xml = "\n".join([self._build_product(product) for product in products])
-        return f"""
-      <nsSAFT:Products>
-  {products_xml}
+    def _iter_products(self) -> Iterator[str]:
+        yield """
+      <nsSAFT:Products>"""
+        for product in self._get_products():
+            yield self._build_product(product)
+        yield """
       </nsSAFT:Products>
         """
 
@@ -322,14 +350,15 @@ class SAFTMasterFiles:
           </nsSAFT:PhysicalStockEntry>
         """
 
-    def _build_assets(self) -> str:
+    def _iter_assets(self) -> Iterator[str]:
         assets = self._get_assets()
         if not assets:
-            return ""
-        assets_xml = "\n".join([self._build_asset(asset) for asset in assets])
-        return f"""
-        <nsSAFT:Assets>
-    {assets_xml}
+            return
+        yield """
+        <nsSAFT:Assets>"""
+        for asset in assets:
+            yield self._build_asset(asset)
+        yield """
         </nsSAFT:Assets>
         """
 
@@ -425,88 +454,64 @@ class SAFTMasterFiles:
 
     def _get_contraagents(self, is_customer: bool = False, is_supplier: bool = False) -> List[Contraagent]:
         """Retrieve contraagents filtered by customer/supplier status."""
-        with Session(self.organization.engine) as session:
-            statement = select(Contraagent).where(Contraagent.organization_id == self.organization.id)
-            if is_customer:
-                statement = statement.where(Contraagent.is_customer == True)
-            if is_supplier:
-                statement = statement.where(Contraagent.is_supplier == True)
-            return session.exec(statement).all()
+        statement = select(Contraagent).where(Contraagent.organization_id == self.organization.id)
+        if is_customer:
+            statement = statement.where(Contraagent.is_customer == True)
+        if is_supplier:
+            statement = statement.where(Contraagent.is_supplier == True)
+        return self.session.exec(statement).all()
 
     def _get_products(self) -> List[Product]:
         """Retrieve products for the organization."""
-        with Session(self.organization.engine) as session:
-            return session.exec(select(Product).where(Product.organization_id == self.organization.id)).all()
+        return self.session.exec(select(Product).where(Product.organization_id == self.organization.id)).all()
 
     def _get_accounts_with_balances(self) -> List[Any]:
         """Retrieve accounts for the organization with calculated balances."""
-        with Session(self.organization.engine) as session:
-            accounts = session.exec(select(Account).where(Account.organization_id == self.organization.id)).all()
-
-            start_date_period = date(self.year, self.month, 1)
-            end_date_period = (start_date_period.replace(day=28) + timedelta(days=4))
-            end_date_period -= timedelta(days=end_date_period.day)
-
-            start_date_year = date(self.year, 1, 1)
-
-            accounts_with_balances = []
-            for account in accounts:
-                # Calculate transactions before the period (for opening balance)
-                stmt_before = (
-                    select(func.sum(EntryLine.debit), func.sum(EntryLine.credit))
-                    .join(JournalEntry)
-                    .where(EntryLine.account_id == account.id)
-                    .where(JournalEntry.entry_date >= start_date_year)
-                    .where(JournalEntry.entry_date < start_date_period)
-                )
-                sum_debit_before, sum_credit_before = session.exec(stmt_before).first()
-                sum_debit_before = Decimal(str(sum_debit_before or 0.0))
-                sum_credit_before = Decimal(str(sum_credit_before or 0.0))
-
-                opening_balance = Decimal(str(account.opening_balance)) + sum_debit_before - sum_credit_before
-
-                # Calculate transactions within the period
-                stmt_period = (
-                    select(func.sum(EntryLine.debit), func.sum(EntryLine.credit))
-                    .join(JournalEntry)
-                    .where(EntryLine.account_id == account.id)
-                    .where(JournalEntry.entry_date >= start_date_period)
-                    .where(JournalEntry.entry_date <= end_date_period)
-                )
-                sum_debit_period, sum_credit_period = session.exec(stmt_period).first()
-                sum_debit_period = Decimal(str(sum_debit_period or 0.0))
-                sum_credit_period = Decimal(str(sum_credit_period or 0.0))
-
-                closing_balance = opening_balance + sum_debit_period - sum_credit_period
-
-                accounts_with_balances.append({
-                    "account": account,
-                    "opening_balance": opening_balance,
-                    "closing_balance": closing_balance
-                })
-
-            return accounts_with_balances
+        accounts = self.session.exec(select(Account).where(Account.organization_id == self.organization.id)).all()
+
+        bases = {}
+        if self.month and PeriodCloseService(self.session, self.organization.id).is_closed(self.year, self.month):
+            # Closed month: the figures frozen at the close
+            turnovers, bases = self._closed_turnovers()
+        else:
+            # Opening balance from the start of the year, from the monthly turnovers
+            turnovers = BalanceService(self.session, self.organization.id).get_month_turnovers(
+                self.year, self.month, self.month
+            )
 
+        accounts_with_balances = []
+        for account in accounts:
+            turnover = turnovers.get(account.id) or AccountTurnover(account_id=account.id)
+            base = bases.get(account.id, Decimal(str(account.opening_balance)))
+            accounts_with_balances.append({
+                "account": account,
+                "opening_balance": turnover.opening_balance(base),
+                "closing_balance": turnover.closing_balance(base),
+            })
+
+        return accounts_with_balances
+
+    def _closed_turnovers(self) -> Tuple[Dict[UUID, AccountTurnover], Dict[UUID, Decimal]]:
+        """Turnovers and opening_balance bases of the accounts from period_account_balance."""
+        snapshots = self.session.exec(
+            select(PeriodAccountBalance).where(
+                PeriodAccountBalance.organization_id == self.organization.id,
+                PeriodAccountBalance.period_year == self.year,
+                PeriodAccountBalance.period_month == self.month,
+            )
+        )
+        turnovers, bases = {}, {}
+        for snapshot in snapshots:
+            turnovers[snapshot.account_id] = AccountTurnover(
+                account_id=snapshot.account_id,
+                debit_before=snapshot.year_debit_before,
+                credit_before=snapshot.year_credit_before,
+                debit_period=snapshot.debit,
+                credit_period=snapshot.credit,
+            )
+            bases[snapshot.account_id] = snapshot.account_opening_balance
+        return turnovers, bases
 
     def _get_assets(self) -> List[Asset]:
         """Retrieve assets for the organization."""
-        with Session(self.organization.engine) as session:
-            return session.exec(select(Asset).where(Asset.organization_id == self.organization.id)).all()
-
-    def _get_journal_entries(self) -> List[JournalEntry]:
-        """Retrieve journal entries for the organization filtered by year/month."""
-        with Session(self.organization.engine) as session:
-            statement = select(JournalEntry).where(
-                JournalEntry.organization_id == self.organization.id,
-                func.extract("year", JournalEntry.date) == self.year
-            )
-            if self.month:
-                statement = statement.where(func.extract("month", JournalEntry.date) == self.month)
-            return session.exec(statement).all()
-
-    def _get_entry_lines_for_journal_entry(self, journal_entry_id: UUID) -> List[EntryLine]:
-        """Retrieve entry lines for a specific journal entry."""
-        with Session(self.organization.engine) as session:
-            return session.exec(
-                select(EntryLine).where(EntryLine.journal_entry_id == journal_entry_id)
-            ).all()
+        return self.session.exec(select(Asset).where(Asset.organization_id == self.organization.id)).all()
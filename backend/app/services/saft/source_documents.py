@@ -1,178 +1,218 @@
 import html
-from datetime import date, timedelta
+from datetime import date, datetime, timezone
 from decimal import Decimal
-from typing import IO, Any, List, Optional, Tuple
+from typing import IO, Any, Iterator, List, Optional, Tuple
 from uuid import UUID
 
 from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
 
 from app.models.asset_transaction import AssetTransaction
+from app.models.contraagent import Contraagent
+from app.models.item import Item
 from app.models.organization import Organization
 from app.models.payment import Payment
 from app.models.purchase import Purchase
 from app.models.purchase_item import PurchaseItem
 from app.models.sale import Sale
+from app.models.sale_item import SaleItem
 # TODO: StockMovement model doesn't exist yet
 # from app.models.stock_movement import StockMovement
+from app.services.saft.fingerprint import Scope, Source
+from app.services.saft.fragment_cache import SAFTFragmentCache, cached
 from app.services.saft.nomenclature import AssetMovementType, StockMovementType
 
 
 class SAFTSourceDocuments:
-    def __init__(self, organization: Organization, year: int, month: Optional[int] = None):
+    def __init__(
+        self,
+        session: Session,
+        organization: Organization,
+        year: int,
+        month: Optional[int] = None,
+        cache: Optional[SAFTFragmentCache] = None,
+    ):
+        self.session = session
         self.organization = organization
         self.year = year
         self.month = month
+        self.cache = cache
 
     def generate(self, output: IO[Any], report_type: str, **kwargs: Any):
+        for chunk in self.iter_generate(report_type, **kwargs):
+            output.write(chunk)
+
+    def iter_generate(self, report_type: str, **kwargs: Any) -> Iterator[str]:
+        """Yield the source documents section one document at a time."""
         if report_type == "monthly":
-            content = self._build_monthly()
+            yield from self._iter_monthly()
         elif report_type == "annual":
-            content = self._build_annual()
+            yield from self._iter_annual()
         elif report_type == "on_demand":
-            content = self._build_on_demand(**kwargs)
+            yield from self._iter_on_demand(**kwargs)
         else:
             raise ValueError("Invalid report type")
 
-        output.write(content)
-
-    def _build_monthly(self) -> str:
-        return f"""
-      <nsSAFT:SourceDocumentsMonthly>
-    {self._build_sales_invoices()}
-    {self._build_payments()}
-    {self._build_purchase_invoices()}
+    def _iter_monthly(self) -> Iterator[str]:
+        yield """
+      <nsSAFT:SourceDocumentsMonthly>"""
+        yield from cached(
+            self.cache,
+            "SalesInvoices",
+            (Source(Sale, Scope.MONTH), Source(SaleItem, Scope.MONTH), Source(Contraagent), Source(Item)),
+            self._iter_sales_invoices,
+        )
+        yield from cached(self.cache, "Payments", (Source(Payment, Scope.MONTH),), self._iter_payments)
+        yield from cached(
+            self.cache,
+            "PurchaseInvoices",
+            (Source(Purchase, Scope.MONTH), Source(PurchaseItem, Scope.MONTH), Source(Contraagent)),
+            self._iter_purchase_invoices,
+        )
+        yield """
       </nsSAFT:SourceDocumentsMonthly>
         """
 
-    def _build_annual(self) -> str:
-        return f"""
-      <nsSAFT:SourceDocumentsAnnual>
-    {self._build_asset_transactions()}
+    def _iter_annual(self) -> Iterator[str]:
+        yield """
+      <nsSAFT:SourceDocumentsAnnual>"""
+        yield from cached(self.cache, "AssetTransactions", (Source(AssetTransaction, Scope.YEAR),), self._iter_asset_transactions)
+        yield """
       </nsSAFT:SourceDocumentsAnnual>
         """
 
-    def _build_on_demand(self, **kwargs: Any) -> str:
-        return f"""
-      <nsSAFT:SourceDocumentsOnDemand>
-    {self._build_movement_of_goods(**kwargs)}
+    def _iter_on_demand(self, **kwargs: Any) -> Iterator[str]:
+        yield """
+      <nsSAFT:SourceDocumentsOnDemand>"""
+        yield from self._iter_movement_of_goods(**kwargs)
+        yield """
       </nsSAFT:SourceDocumentsOnDemand>
         """
 
-    def _build_sales_invoices(self) -> str:
+    def _iter_sales_invoices(self) -> Iterator[str]:
         invoices = self._get_sales_invoices()
         total_debit, total_credit = self._calculate_invoice_totals(invoices)
-        invoices_xml = "\n".join([self._build_sales_invoice(invoice) for invoice in invoices])
-        if not invoices:
-            invoices_xml = self._build_placeholder_sales_invoice()
-        return f"""
+        yield f"""
       <nsSAFT:SalesInvoices>
         <nsSAFT:NumberOfEntries>{len(invoices)}</nsSAFT:NumberOfEntries>
         <nsSAFT:TotalDebit>{self._format_decimal(total_debit)}</nsSAFT:TotalDebit>
-        <nsSAFT:TotalCredit>{self._format_decimal(total_credit)}</nsSAFT:TotalCredit>
-  {invoices_xml}
+        <nsSAFT:TotalCredit>{self._format_decimal(total_credit)}</nsSAFT:TotalCredit>"""
+        if not invoices:
+            yield self._build_placeholder_sales_invoice()
+        for invoice in invoices:
+            yield self._build_sales_invoice(invoice)
+        yield """
       </nsSAFT:SalesInvoices>
         """
 
     def _build_placeholder_sales_invoice(self) -> str:
         return ""
 
-    def _build_sales_invoice(self, invoice: Any) -> str:
-        lines_xml = "\n".join([self._build_invoice_line(line, i) for i, line in enumerate(invoice.lines, 1)])
+    def _build_sales_invoice(self, invoice: Sale) -> str:
+        # TODO: The Sale model has no number, VAT or currency fields.
+        # Using placeholders for missing fields.
+        invoice_date = invoice.date_sale.date()
+        lines_xml = "\n".join(
+            [self._build_invoice_line(line, i, invoice_date) for i, line in enumerate(invoice.sale_items, 1)]
+        )
         return f"""
           <nsSAFT:Invoice>
-            <nsSAFT:InvoiceNo>{invoice.number}</nsSAFT:InvoiceNo>
+            <nsSAFT:InvoiceNo>{invoice.id}</nsSAFT:InvoiceNo>
             <nsSAFT:CustomerInfo>
-              <nsSAFT:CustomerID>{invoice.customer_id or ""}</nsSAFT:CustomerID>
-              <nsSAFT:Name>{self._escape_xml(invoice.customer.name or "")}</nsSAFT:Name>
+              <nsSAFT:CustomerID>{invoice.contraagent_id or ""}</nsSAFT:CustomerID>
+              <nsSAFT:Name>{self._escape_xml(invoice.contraagent.name or "")}</nsSAFT:Name>
     {self._build_invoice_customer_address(invoice)}
             </nsSAFT:CustomerInfo>
             <nsSAFT:AccountID>411</nsSAFT:AccountID>
-            <nsSAFT:Period>{invoice.date.month}</nsSAFT:Period>
-            <nsSAFT:PeriodYear>{invoice.date.year}</nsSAFT:PeriodYear>
-            <nsSAFT:InvoiceDate>{self._format_date(invoice.date)}</nsSAFT:InvoiceDate>
-            <nsSAFT:InvoiceType>{invoice.invoice_type or "01"}</nsSAFT:InvoiceType>
+            <nsSAFT:Period>{invoice_date.month}</nsSAFT:Period>
+            <nsSAFT:PeriodYear>{invoice_date.year}</nsSAFT:PeriodYear>
+            <nsSAFT:InvoiceDate>{self._format_date(invoice_date)}</nsSAFT:InvoiceDate>
+            <nsSAFT:InvoiceType>01</nsSAFT:InvoiceType>
             <nsSAFT:SelfBillingIndicator>N</nsSAFT:SelfBillingIndicator>
             <nsSAFT:SourceID>{invoice.created_by_id or "system"}</nsSAFT:SourceID>
-            <nsSAFT:GLPostingDate>{self._format_date(invoice.date_created or invoice.date)}</nsSAFT:GLPostingDate>
-            <nsSAFT:TransactionID>{invoice.journal_entry_id or ""}</nsSAFT:TransactionID>
+            <nsSAFT:GLPostingDate>{self._format_date(invoice.date_created or invoice_date)}</nsSAFT:GLPostingDate>
+            <nsSAFT:TransactionID></nsSAFT:TransactionID>
     {lines_xml}
             <nsSAFT:InvoiceDocumentTotals>
               <nsSAFT:TaxInformationTotals>
                 <nsSAFT:TaxType>VAT</nsSAFT:TaxType>
-                <nsSAFT:TaxCode>{invoice.vat_rate or "20"}</nsSAFT:TaxCode>
-                <nsSAFT:TaxPercentage>{self._format_decimal(invoice.vat_rate or Decimal(20))}</nsSAFT:TaxPercentage>
-                <nsSAFT:TaxBase>{self._format_decimal(invoice.subtotal)}</nsSAFT:TaxBase>
+                <nsSAFT:TaxCode>20</nsSAFT:TaxCode>
+                <nsSAFT:TaxPercentage>20.00</nsSAFT:TaxPercentage>
+                <nsSAFT:TaxBase>{self._format_decimal(Decimal(invoice.amount))}</nsSAFT:TaxBase>
                 <nsSAFT:TaxAmount>
-                  <nsSAFT:Amount>{self._format_decimal(invoice.vat_amount)}</nsSAFT:Amount>
-                  <nsSAFT:CurrencyCode>{invoice.currency or "BGN"}</nsSAFT:CurrencyCode>
-                  <nsSAFT:CurrencyAmount>{self._format_decimal(invoice.vat_amount)}</nsSAFT:CurrencyAmount>
+                  <nsSAFT:Amount>0.00</nsSAFT:Amount>
+                  <nsSAFT:CurrencyCode>BGN</nsSAFT:CurrencyCode>
+                  <nsSAFT:CurrencyAmount>0.00</nsSAFT:CurrencyAmount>
                   <nsSAFT:ExchangeRate>1.00</nsSAFT:ExchangeRate>
                 </nsSAFT:TaxAmount>
               </nsSAFT:TaxInformationTotals>
-              <nsSAFT:NetTotal>{self._format_decimal(invoice.subtotal)}</nsSAFT:NetTotal>
-              <nsSAFT:GrossTotal>{self._format_decimal(invoice.total)}</nsSAFT:GrossTotal>
+              <nsSAFT:NetTotal>{self._format_decimal(Decimal(invoice.amount))}</nsSAFT:NetTotal>
+              <nsSAFT:GrossTotal>{self._format_decimal(Decimal(invoice.amount))}</nsSAFT:GrossTotal>
             </nsSAFT:InvoiceDocumentTotals>
           </nsSAFT:Invoice>
-        ""
+        """
 
-    def _build_invoice_customer_address(self, invoice: Any) -> str:
+    def _build_invoice_customer_address(self, invoice: Sale) -> str:
+        customer = invoice.contraagent
         return f"""
               <nsSAFT:BillingAddress>
-                <nsSAFT:StreetName>{self._escape_xml(invoice.customer.address or "")}</nsSAFT:StreetName>
-                <nsSAFT:City>{self._escape_xml(invoice.customer.city or "")}</nsSAFT:City>
-                <nsSAFT:PostalCode>{invoice.customer.postal_code or ""}</nsSAFT:PostalCode>
-                <nsSAFT:Country>{invoice.customer.country or "BG"}</nsSAFT:Country>
+                <nsSAFT:StreetName>{self._escape_xml(customer.street_name or "")}</nsSAFT:StreetName>
+                <nsSAFT:City>{self._escape_xml(customer.city or "")}</nsSAFT:City>
+                <nsSAFT:PostalCode>{customer.postal_code or ""}</nsSAFT:PostalCode>
+                <nsSAFT:Country>{customer.country or "BG"}</nsSAFT:Country>
               </nsSAFT:BillingAddress>
         """
 
-    def _build_invoice_line(self, line: Any, index: int) -> str:
+    def _build_invoice_line(self, line: SaleItem, index: int, tax_point_date: date) -> str:
+        amount = Decimal(line.price) * Decimal(line.quantity)
+        item = line.item
         return f"""
             <nsSAFT:InvoiceLine>
               <nsSAFT:LineNumber>{index}</nsSAFT:LineNumber>
-              <nsSAFT:AccountID>{line.account_code or "411"}</nsSAFT:AccountID>
-              <nsSAFT:ProductCode>{line.product.code or ""}</nsSAFT:ProductCode>
-              <nsSAFT:ProductDescription>{self._escape_xml(line.description or line.product.name or "")}</nsSAFT:ProductDescription>
-              <nsSAFT:Quantity>{self._format_decimal(line.quantity)}</nsSAFT:Quantity>
-              <nsSAFT:InvoiceUOM>{line.unit or "PCE"}</nsSAFT:InvoiceUOM>
-              <nsSAFT:UnitPrice>{self._format_decimal(line.unit_price)}</nsSAFT:UnitPrice>
-              <nsSAFT:TaxPointDate>{self._format_date(line.date or date.today())}</nsSAFT:TaxPointDate>
-              <nsSAFT:Description>{self._escape_xml(line.description or "")}</nsSAFT:Description>
+              <nsSAFT:AccountID>702</nsSAFT:AccountID>
+              <nsSAFT:ProductCode>{self._escape_xml(item.sku or item.internal_code or "")}</nsSAFT:ProductCode>
+              <nsSAFT:ProductDescription>{self._escape_xml(item.name)}</nsSAFT:ProductDescription>
+              <nsSAFT:Quantity>{self._format_decimal(Decimal(line.quantity))}</nsSAFT:Quantity>
+              <nsSAFT:InvoiceUOM>{self._escape_xml(item.unit or "PCE")}</nsSAFT:InvoiceUOM>
+              <nsSAFT:UnitPrice>{self._format_decimal(Decimal(line.price))}</nsSAFT:UnitPrice>
+              <nsSAFT:TaxPointDate>{self._format_date(tax_point_date)}</nsSAFT:TaxPointDate>
+              <nsSAFT:Description>{self._escape_xml(item.description or "")}</nsSAFT:Description>
               <nsSAFT:InvoiceLineAmount>
-                <nsSAFT:Amount>{self._format_decimal(line.amount)}</nsSAFT:Amount>
-                <nsSAFT:CurrencyCode>{line.currency or "BGN"}</nsSAFT:CurrencyCode>
-                <nsSAFT:CurrencyAmount>{self._format_decimal(line.amount)}</nsSAFT:CurrencyAmount>
+                <nsSAFT:Amount>{self._format_decimal(amount)}</nsSAFT:Amount>
+                <nsSAFT:CurrencyCode>BGN</nsSAFT:CurrencyCode>
+                <nsSAFT:CurrencyAmount>{self._format_decimal(amount)}</nsSAFT:CurrencyAmount>
                 <nsSAFT:ExchangeRate>1.00</nsSAFT:ExchangeRate>
               </nsSAFT:InvoiceLineAmount>
               <nsSAFT:DebitCreditIndicator>C</nsSAFT:DebitCreditIndicator>
               <nsSAFT:TaxInformation>
                 <nsSAFT:TaxType>VAT</nsSAFT:TaxType>
-                <nsSAFT:TaxCode>{line.vat_rate or "20"}</nsSAFT:TaxCode>
-                <nsSAFT:TaxPercentage>{self._format_decimal(line.vat_rate or Decimal(20))}</nsSAFT:TaxPercentage>
-                <nsSAFT:TaxBase>{self._format_decimal(line.amount)}</nsSAFT:TaxBase>
+                <nsSAFT:TaxCode>20</nsSAFT:TaxCode>
+                <nsSAFT:TaxPercentage>20.00</nsSAFT:TaxPercentage>
+                <nsSAFT:TaxBase>{self._format_decimal(amount)}</nsSAFT:TaxBase>
                 <nsSAFT:TaxAmount>
-                  <nsSAFT:Amount>{self._format_decimal(line.vat_amount or Decimal(0))}</nsSAFT:Amount>
-                  <nsSAFT:CurrencyCode>{line.currency or "BGN"}</nsSAFT:CurrencyCode>
-                  <nsSAFT:CurrencyAmount>{self._format_decimal(line.vat_amount or Decimal(0))}</nsSAFT:CurrencyAmount>
+                  <nsSAFT:Amount>0.00</nsSAFT:Amount>
+                  <nsSAFT:CurrencyCode>BGN</nsSAFT:CurrencyCode>
+                  <nsSAFT:CurrencyAmount>0.00</nsSAFT:CurrencyAmount>
                   <nsSAFT:ExchangeRate>1.00</nsSAFT:ExchangeRate>
                 </nsSAFT:TaxAmount>
               </nsSAFT:TaxInformation>
             </nsSAFT:InvoiceLine>
-        ""
+        """
 
-    def _build_purchase_invoices(self) -> str:
+    def _iter_purchase_invoices(self) -> Iterator[str]:
         invoices = self._get_purchase_invoices()
-        total_debit = sum(Decimal(i.amount) for i in invoices)
-        total_credit = sum(Decimal(i.amount) for i in invoices)
-        invoices_xml = "\n".join([self._build_purchase_invoice(invoice) for invoice in invoices])
-        if not invoices:
-            invoices_xml = self._build_placeholder_purchase_invoice()
-        return f"""
+        total_debit = sum((Decimal(i.amount) for i in invoices), Decimal(0))
+        total_credit = sum((Decimal(i.amount) for i in invoices), Decimal(0))
+        yield f"""
       <nsSAFT:PurchaseInvoices>
         <nsSAFT:NumberOfEntries>{len(invoices)}</nsSAFT:NumberOfEntries>
         <nsSAFT:TotalDebit>{self._format_decimal(total_debit)}</nsSAFT:TotalDebit>
-        <nsSAFT:TotalCredit>{self._format_decimal(total_credit)}</nsSAFT:TotalCredit>
-  {invoices_xml}
+        <nsSAFT:TotalCredit>{self._format_decimal(total_credit)}</nsSAFT:TotalCredit>"""
+        if not invoices:
+            yield self._build_placeholder_purchase_invoice()
+        for invoice in invoices:
+            yield self._build_purchase_invoice(invoice)
+        yield """
       </nsSAFT:PurchaseInvoices>
         """
 
@@ -219,7 +259,7 @@ class SAFTSourceDocuments:
               <nsSAFT:GrossTotal>{self._format_decimal(Decimal(invoice.amount))}</nsSAFT:GrossTotal>
             </nsSAFT:InvoiceDocumentTotals>
           </nsSAFT:Invoice>
-        ""
+        """
 
     def _build_invoice_supplier_address(self, invoice: Purchase) -> str:
         supplier = invoice.contraagent
@@ -265,21 +305,21 @@ class SAFTSourceDocuments:
                 </nsSAFT:TaxAmount>
               </nsSAFT:TaxInformation>
             </nsSAFT:InvoiceLine>
-        ""
+        """
 
-    def _build_payments(self) -> str:
+    def _iter_payments(self) -> Iterator[str]:
         payments = self._get_payments()
-        total_amount = sum(Decimal(p.amount) for p in payments)
-        payments_xml = "\n".join([self._build_payment(payment) for payment in payments])
-        if not payments:
-            payments_xml = self._build_placeholder_payment()
-
-        return f"""
+        total_amount = sum((Decimal(p.amount) for p in payments), Decimal(0))
+        yield f"""
       <nsSAFT:Payments>
         <nsSAFT:NumberOfEntries>{len(payments)}</nsSAFT:NumberOfEntries>
         <nsSAFT:TotalDebit>{self._format_decimal(total_amount)}</nsSAFT:TotalDebit>
-        <nsSAFT:TotalCredit>{self._format_decimal(total_amount)}</nsSAFT:TotalCredit>
-  {payments_xml}
+        <nsSAFT:TotalCredit>{self._format_decimal(total_amount)}</nsSAFT:TotalCredit>"""
+        if not payments:
+            yield self._build_placeholder_payment()
+        for payment in payments:
+            yield self._build_payment(payment)
+        yield """
       </nsSAFT:Payments>
         """
 
@@ -313,18 +353,19 @@ class SAFTSourceDocuments:
         </nsSAFT:Payment>
         """
 
-    def _build_movement_of_goods(self, **kwargs: Any) -> str:
+    def _iter_movement_of_goods(self, **kwargs: Any) -> Iterator[str]:
         movements = self._get_stock_movements(**kwargs)
         if not movements:
-            return ""
+            return
 
-        movements_xml = "\n".join([self._build_stock_movement(movement) for movement in movements])
-        return f"""
+        yield f"""
         <nsSAFT:MovementOfGoods>
           <nsSAFT:NumberOfMovementLines>{len(movements)}</nsSAFT:NumberOfMovementLines>
           <nsSAFT:TotalQuantityIssued>{self._calculate_quantity_issued(movements)}</nsSAFT:TotalQuantityIssued>
-          <nsSAFT:TotalQuantityReceived>{self._calculate_quantity_received(movements)}</nsSAFT:TotalQuantityReceived>
-    {movements_xml}
+          <nsSAFT:TotalQuantityReceived>{self._calculate_quantity_received(movements)}</nsSAFT:TotalQuantityReceived>"""
+        for movement in movements:
+            yield self._build_stock_movement(movement)
+        yield """
         </nsSAFT:MovementOfGoods>
         """
 
@@ -343,16 +384,17 @@ class SAFTSourceDocuments:
     def _calculate_quantity_received(self, movements: List[Any]) -> str:
         return "0.00"
 
-    def _build_asset_transactions(self) -> str:
+    def _iter_asset_transactions(self) -> Iterator[str]:
         transactions = self._get_asset_transactions()
         if not transactions:
-            return ""
+            return
 
-        transactions_xml = "\n".join([self._build_asset_transaction(t) for t in transactions])
-        return f"""
+        yield f"""
         <nsSAFT:AssetTransactions>
-          <nsSAFT:NumberOfAssetTransactions>{len(transactions)}</nsSAFT:NumberOfAssetTransactions>
-    {transactions_xml}
+          <nsSAFT:NumberOfAssetTransactions>{len(transactions)}</nsSAFT:NumberOfAssetTransactions>"""
+        for transaction in transactions:
+            yield self._build_asset_transaction(transaction)
+        yield """
         </nsSAFT:AssetTransactions>
         """
 
@@ -375,7 +417,7 @@ class SAFTSourceDocuments:
               </nsSAFT:AssetTransactionValuation>
             </nsSAFT:AssetTransactionValuations>
           </nsSAFT:AssetTransaction>
-        ""
+        """
 
     def _build_asset_supplier_customer(self, transaction: Any) -> str:
         if not (transaction.supplier_name or transaction.customer_name):
@@ -391,16 +433,11 @@ class SAFTSourceDocuments:
                 <nsSAFT:Country>{transaction.country or "BG"}</nsSAFT:Country>
               </nsSAFT:PostalAddress>
             </nsSAFT:AssetSupplierCustomer>
-        ""
+        """
 
-    def _calculate_invoice_totals(self, invoices: List[Any]) -> Tuple[Decimal, Decimal]:
-        total_debit = Decimal(0)
-        total_credit = Decimal(0)
-        for invoice in invoices:
-            total = invoice.total or Decimal(0)
-            total_debit += total
-            total_credit += total
-        return total_debit, total_credit
+    def _calculate_invoice_totals(self, invoices: List[Sale]) -> Tuple[Decimal, Decimal]:
+        total = sum((Decimal(invoice.amount) for invoice in invoices), Decimal(0))
+        return total, total
 
     def _escape_xml(self, text: Optional[str]) -> str:
         if not text:
@@ -417,81 +454,76 @@ class SAFTSourceDocuments:
             return date.today().isoformat()
         return value.isoformat()
 
+    def _month_range(self) -> Tuple[datetime, datetime]:
+        """The month as [start, end) in UTC, for the timezone-aware document dates."""
+        start = datetime(self.year, self.month, 1, tzinfo=timezone.utc)
+        if self.month == 12:
+            return start, datetime(self.year + 1, 1, 1, tzinfo=timezone.utc)
+        return start, datetime(self.year, self.month + 1, 1, tzinfo=timezone.utc)
+
     def _get_sales_invoices(self) -> List[Any]:
-        with Session(self.organization.engine) as session:
-            start_date = date(self.year, self.month, 1)
-            end_date = date(self.year, self.month, 1).replace(day=28) + timedelta(days=4)
-            end_date = end_date - timedelta(days=end_date.day)
-
-            statement = (
-                select(Sale)
-                .options(selectinload(Sale.lines), selectinload(Sale.customer))
-                .where(Sale.organization_id == self.organization.id)
-                .where(Sale.date >= start_date)
-                .where(Sale.date <= end_date)
-                .order_by(Sale.date, Sale.id)
+        start, end = self._month_range()
+        statement = (
+            select(Sale)
+            .options(
+                selectinload(Sale.sale_items).selectinload(SaleItem.item),
+                selectinload(Sale.contraagent),
             )
-            sales = session.exec(statement).all()
-            return sales
+            .where(Sale.organization_id == self.organization.id)
+            .where(Sale.date_sale >= start)
+            .where(Sale.date_sale < end)
+            .order_by(Sale.date_sale, Sale.id)
+        )
+        sales = self.session.exec(statement).all()
+        return sales
 
     def _get_purchase_invoices(self) -> List[Any]:
-        with Session(self.organization.engine) as session:
-            start_date = date(self.year, self.month, 1)
-            end_date = date(self.year, self.month, 1).replace(day=28) + timedelta(days=4)
-            end_date = end_date - timedelta(days=end_date.day)
-
-            statement = (
-                select(Purchase)
-                .options(selectinload(Purchase.purchase_items), selectinload(Purchase.contraagent))
-                .where(Purchase.organization_id == self.organization.id)
-                .where(Purchase.date_purchase >= start_date)
-                .where(Purchase.date_purchase <= end_date)
-                .order_by(Purchase.date_purchase, Purchase.id)
-            )
-            purchases = session.exec(statement).all()
-            return purchases
+        start, end = self._month_range()
+        statement = (
+            select(Purchase)
+            .options(selectinload(Purchase.purchase_items), selectinload(Purchase.contraagent))
+            .where(Purchase.organization_id == self.organization.id)
+            .where(Purchase.date_purchase >= start)
+            .where(Purchase.date_purchase < end)
+            .order_by(Purchase.date_purchase, Purchase.id)
+        )
+        purchases = self.session.exec(statement).all()
+        return purchases
 
     def _get_payments(self) -> List[Any]:
-        with Session(self.organization.engine) as session:
-            start_date = date(self.year, self.month, 1)
-            end_date = date(self.year, self.month, 1).replace(day=28) + timedelta(days=4)
-            end_date = end_date - timedelta(days=end_date.day)
-
-            statement = (
-                select(Payment)
-                .where(Payment.organization_id == self.organization.id)
-                .where(Payment.date_payment >= start_date)
-                .where(Payment.date_payment <= end_date)
-                .order_by(Payment.date_payment, Payment.id)
-            )
-            payments = session.exec(statement).all()
-            return payments
+        start, end = self._month_range()
+        statement = (
+            select(Payment)
+            .where(Payment.organization_id == self.organization.id)
+            .where(Payment.date_payment >= start)
+            .where(Payment.date_payment < end)
+            .order_by(Payment.date_payment, Payment.id)
+        )
+        payments = self.session.exec(statement).all()
+        return payments
 
     def _get_stock_movements(self, start_date: date, end_date: date) -> List[Any]:
         # TODO: StockMovement model doesn't exist yet - return empty list
         return []
-        # with Session(self.organization.engine) as session:
-        #     statement = (
-        #         select(StockMovement)
-        #         .where(StockMovement.organization_id == self.organization.id)
-        #         .where(StockMovement.date >= start_date)
-        #         .where(StockMovement.date <= end_date)
-        #         .order_by(StockMovement.date, StockMovement.id)
-        #     )
-        #     movements = session.exec(statement).all()
-        #     return movements
+        # statement = (
+        #     select(StockMovement)
+        #     .where(StockMovement.organization_id == self.organization.id)
+        #     .where(StockMovement.date >= start_date)
+        #     .where(StockMovement.date <= end_date)
+        #     .order_by(StockMovement.date, StockMovement.id)
+        # )
+        # return self.session.exec(statement).all()
 
     def _get_asset_transactions(self) -> List[Any]:
-        with Session(self.organization.engine) as session:
-            start_date = date(self.year, 1, 1)
-            end_date = date(self.year, 12, 31)
-
-            statement = (
-                select(AssetTransaction)
-                .where(AssetTransaction.organization_id == self.organization.id)
-                .where(AssetTransaction.transaction_date >= start_date)
-                .where(AssetTransaction.transaction_date <= end_date)
-                .order_by(AssetTransaction.transaction_date, AssetTransaction.id)
-            )
-            transactions = session.exec(statement).all()
-            return transactions
\ No newline at end of file
+        start_date = date(self.year, 1, 1)
+        end_date = date(self.year, 12, 31)
+
+        statement = (
+            select(AssetTransaction)
+            .where(AssetTransaction.organization_id == self.organization.id)
+            .where(AssetTransaction.transaction_date >= start_date)
+            .where(AssetTransaction.transaction_date <= end_date)
+            .order_by(AssetTransaction.transaction_date, AssetTransaction.id)
+        )
+        transactions = self.session.exec(statement).all()
+        return transactions
\ No newline at end of file
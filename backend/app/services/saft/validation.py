@@ -0,0 +1,130 @@
+import gzip
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import IO, List, Optional, Tuple
+from xml.parsers import expat
+
+import xmlschema
+from lxml import etree
+
+from app.core.config import settings
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+@dataclass
+class SchemaError:
+    line: Optional[int]
+    path: Optional[str]
+    message: str
+
+
+@dataclass
+class ValidationReport:
+    errors: List[SchemaError] = field(default_factory=list)
+    # More errors were found than were collected.
+    truncated: bool = False
+
+    @property
+    def is_valid(self) -> bool:
+        return not self.errors
+
+
+@lru_cache(maxsize=4)
+def _lxml_schema(xsd_path: str) -> etree.XMLSchema:
+    return etree.XMLSchema(etree.parse(xsd_path))
+
+
+@lru_cache(maxsize=4)
+def _xmlschema_schema(xsd_path: str) -> xmlschema.XMLSchema:
+    return xmlschema.XMLSchema(xsd_path)
+
+
+class SAFTValidator:
+    """
+    Validates generated SAF-T files against the NRA XSD with bounded memory.
+
+    Validation runs in two passes over the stored file:
+    1. expat checks well-formedness and libxml2 streaming validation checks
+       the schema; both are fast and keep only the current element in
+       memory;
+    2. only for schema-invalid files, a lazy xmlschema pass collects the
+       first max_errors errors with line numbers and stops there.
+
+    libxml2 runs in recover mode because the NRA file template declares
+    xmlns:doc with a value that is not a valid URI; well-formedness is
+    left to expat, which does not check namespace URIs.
+    """
+
+    MAX_ERRORS = 50
+    READ_SIZE = 64 * 1024
+
+    def __init__(self, xsd_path: Optional[str] = None, max_errors: int = MAX_ERRORS):
+        self.xsd_path = xsd_path or settings.SAFT_XSD_PATH
+        if not self.xsd_path:
+            raise ValueError("SAF-T XSD schema is not configured (SAFT_XSD_PATH)")
+        self.max_errors = max_errors
+
+    def validate_file(self, path: Path | str) -> ValidationReport:
+        """Validate a plain or gzip-compressed XML file."""
+        syntax_error, schema_valid = self._check(path)
+        if syntax_error is not None:
+            return ValidationReport(errors=[syntax_error])
+        if schema_valid:
+            return ValidationReport()
+        return self._collect_errors(path)
+
+    def _open(self, path: Path | str) -> IO[bytes]:
+        with open(path, "rb") as f:
+            compressed = f.read(2) == GZIP_MAGIC
+        if compressed:
+            return gzip.open(path, "rb")
+        return open(path, "rb")
+
+    def _check(self, path: Path | str) -> Tuple[Optional[SchemaError], bool]:
+        """Return the first syntax error, if any, and whether the schema validated."""
+        syntax = expat.ParserCreate()
+        schema = etree.XMLPullParser(
+            events=("end",), schema=_lxml_schema(self.xsd_path), recover=True, huge_tree=True
+        )
+        schema_valid = True
+        try:
+            with self._open(path) as f:
+                while block := f.read(self.READ_SIZE):
+                    syntax.Parse(block, False)
+                    if schema_valid:
+                        schema_valid = self._feed(schema, block)
+                syntax.Parse(b"", True)
+            if schema_valid:
+                schema.close()
+        except expat.ExpatError as e:
+            return SchemaError(line=e.lineno, path=None, message=expat.errors.messages[e.code]), False
+        except etree.XMLSyntaxError:
+            schema_valid = False
+        return None, schema_valid
+
+    def _feed(self, parser: etree.XMLPullParser, block: bytes) -> bool:
+        try:
+            parser.feed(block)
+        except etree.XMLSyntaxError:
+            return False
+        # Keep memory flat: drop every element once it has been validated.
+        for _, element in parser.read_events():
+            element.clear(keep_tail=True)
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+        return True
+
+    def _collect_errors(self, path: Path | str) -> ValidationReport:
+        report = ValidationReport()
+        with self._open(path) as f:
+            resource = xmlschema.XMLResource(f, lazy=True, iterparse=partial(etree.iterparse, recover=True))
+            for error in _xmlschema_schema(self.xsd_path).iter_errors(resource):
+                if len(report.errors) == self.max_errors:
+                    report.truncated = True
+                    break
+                report.errors.append(
+                    SchemaError(line=error.sourceline, path=error.path, message=error.reason or error.message)
+                )
+        return report
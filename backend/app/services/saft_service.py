@@ -1,8 +1,15 @@
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import date
-from typing import IO, Any, Dict, Optional
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlmodel import Session
 
 from app.core.config import settings
+from app.core.db import export_snapshot, snapshot_session
 from app.models.organization import Organization
+from app.services.saft.fragment_cache import SAFTFragmentCache
 from app.services.saft.header import SAFTHeader
 from app.services.saft.master_files import SAFTMasterFiles
 from app.services.saft.general_ledger_entries import SAFTGeneralLedgerEntries
@@ -15,33 +22,153 @@ class SAFT:
     Main class for generating SAF-T files.
     """
 
-    def __init__(self, organization: Organization, year: int, month: Optional[int] = None):
+    # Top-level sections per report type, in schema order.
+    SECTIONS = {
+        "monthly": ("Header", "MasterFiles", "GeneralLedgerEntries", "SourceDocuments"),
+        "annual": ("Header", "MasterFiles", "SourceDocuments"),
+        "on_demand": ("Header", "MasterFiles", "SourceDocuments"),
+    }
+
+    AUDIT_FILE_OPEN = f'<nsSAFT:AuditFile xmlns:doc="urn:schemas-OECD:schema-extensions:documentation xml:lang=en" xmlns:nsSAFT="{constants.NAMESPACE}" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">'
+    AUDIT_FILE_CLOSE = '</nsSAFT:AuditFile>'
+
+    # Sections rendered in parallel are buffered in memory up to this size,
+    # then spill to a temporary file.
+    SPILL_MAX_MEMORY = 8 * 1024 * 1024
+    SPILL_READ_SIZE = 64 * 1024
+
+    def __init__(
+        self,
+        organization: Organization,
+        year: int,
+        month: Optional[int] = None,
+        session: Optional[Session] = None,
+        use_cache: Optional[bool] = None,
+    ):
         self.organization = organization
         self.year = year
         self.month = month
         self.settings = settings
+        # When no session is given, each export opens its own read-only
+        # snapshot on the reporting engine.
+        self.session = session
+        # Reuse stored fragments of sections whose source data is unchanged.
+        self.use_cache = settings.SAFT_FRAGMENT_CACHE if use_cache is None else use_cache
 
     def generate(self, report_type: str, output: IO[Any], **kwargs):
         """
         Generate a SAF-T file of the specified type.
         """
+        for chunk in self.iter_generate(report_type, **kwargs):
+            output.write(chunk)
+
+    def iter_generate(self, report_type: str, **kwargs) -> Iterator[str]:
+        """
+        Yield a SAF-T file of the specified type as a sequence of XML chunks.
+
+        Sections are rendered entity by entity (account, journal entry,
+        invoice, payment), so the whole document never has to be held in
+        memory. Suitable for feeding a StreamingResponse directly.
+        """
+        if report_type not in ["annual", "monthly", "on_demand"]:
+            raise ValueError("Invalid report type")
+
+        yield self.AUDIT_FILE_OPEN
+        for _, chunks in self.iter_sections(report_type, **kwargs):
+            yield from chunks
+        yield self.AUDIT_FILE_CLOSE
+
+    def iter_generate_parallel(self, report_type: str, max_workers: Optional[int] = None, **kwargs) -> Iterator[str]:
+        """
+        Like iter_generate, but render all sections concurrently.
+
+        Each section is rendered by a worker thread on its own connection
+        into a spill buffer. Workers import the snapshot of the leading
+        transaction, so the file is as consistent as a serial export. The
+        buffers are streamed out in schema order; total time follows the
+        slowest section instead of the sum of all sections.
+        """
         if report_type not in ["annual", "monthly", "on_demand"]:
             raise ValueError("Invalid report type")
 
-        output.write(f'<nsSAFT:AuditFile xmlns:doc="urn:schemas-OECD:schema-extensions:documentation xml:lang=en" xmlns:nsSAFT="{constants.NAMESPACE}" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">')
+        sections = self.SECTIONS[report_type]
+        with self.snapshot() as session:
+            snapshot_id = export_snapshot(session)
+            bind = session.get_bind()
+            engine = getattr(bind, "engine", bind)
+
+            executor = ThreadPoolExecutor(
+                max_workers=max_workers or min(len(sections), settings.SAFT_RENDER_WORKERS),
+                thread_name_prefix="saft-section",
+            )
+            futures: List[Future] = [
+                executor.submit(self._spill_section, engine, snapshot_id, name, report_type, **kwargs)
+                for name in sections
+            ]
+            try:
+                yield self.AUDIT_FILE_OPEN
+                for future in futures:
+                    with future.result() as spill:
+                        spill.seek(0)
+                        while block := spill.read(self.SPILL_READ_SIZE):
+                            yield block
+                yield self.AUDIT_FILE_CLOSE
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+                for future in futures:
+                    if future.done() and not future.cancelled() and future.exception() is None:
+                        future.result().close()
 
-        header_generator = SAFTHeader(self.organization, self.year, self.month)
-        header_generator.generate(output, report_type=report_type, **kwargs)
+    def iter_sections(self, report_type: str, **kwargs) -> Iterator[Tuple[str, Iterator[str]]]:
+        """
+        Yield (section name, chunk iterator) pairs in schema order.
 
-        master_files_generator = SAFTMasterFiles(self.organization, self.year, self.month)
-        master_files_generator.generate(output, report_type=report_type, **kwargs)
+        All sections read from one database snapshot, held open until the
+        generator is exhausted or closed. The chunk iterators are lazy; each
+        must be consumed before the next pair is requested.
+        """
+        with self.snapshot() as session:
+            for name in self.SECTIONS[report_type]:
+                yield name, self._render_section(session, name, report_type, **kwargs)
 
-        if report_type == "monthly":
-            gl_entries_generator = SAFTGeneralLedgerEntries(self.organization, self.year, self.month)
-            gl_entries_generator.generate(output, **kwargs)
+    @contextmanager
+    def snapshot(self) -> Iterator[Session]:
+        if self.session is not None:
+            yield self.session
+            return
+        with snapshot_session() as session:
+            yield session
 
-        source_documents_generator = SAFTSourceDocuments(self.organization, self.year, self.month)
-        source_documents_generator.generate(output, report_type=report_type, **kwargs)
+    def _spill_section(self, engine: Any, snapshot_id: Optional[str], name: str, report_type: str, **kwargs) -> IO[str]:
+        spill = tempfile.SpooledTemporaryFile(max_size=self.SPILL_MAX_MEMORY, mode="w+", encoding="utf-8")
+        try:
+            with snapshot_session(engine, snapshot_id=snapshot_id) as session:
+                for chunk in self._render_section(session, name, report_type, **kwargs):
+                    spill.write(chunk)
+        except BaseException:
+            spill.close()
+            raise
+        return spill
 
-        output.write('</nsSAFT:AuditFile>')
+    def _period_key(self, report_type: str, start_date: Optional[date] = None, end_date: Optional[date] = None, **kwargs) -> str:
+        if report_type == "on_demand":
+            return f"{report_type}-{start_date}-{end_date}"
+        if self.month:
+            return f"{report_type}-{self.year}-{self.month:02d}"
+        return f"{report_type}-{self.year}"
 
+    def _render_section(self, session: Session, name: str, report_type: str, **kwargs) -> Iterator[str]:
+        cache = None
+        if self.use_cache:
+            cache = SAFTFragmentCache(
+                session, self.organization.id, self._period_key(report_type, **kwargs), self.year, self.month
+            )
+        if name == "Header":
+            return SAFTHeader(self.organization, self.year, self.month).iter_generate(report_type=report_type, **kwargs)
+        if name == "MasterFiles":
+            return SAFTMasterFiles(session, self.organization, self.year, self.month, cache=cache).iter_generate(report_type=report_type, **kwargs)
+        if name == "GeneralLedgerEntries":
+            return SAFTGeneralLedgerEntries(session, self.organization, self.year, self.month, cache=cache).iter_generate(**kwargs)
+        if name == "SourceDocuments":
+            return SAFTSourceDocuments(session, self.organization, self.year, self.month, cache=cache).iter_generate(report_type=report_type, **kwargs)
+        raise ValueError(f"Unknown SAF-T section: {name}")
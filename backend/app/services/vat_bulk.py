@@ -0,0 +1,146 @@
+"""
+Bulk VAT export for accounting firms: PRODAGBI, POKUPKI and DEKLAR of many
+organizations for one period in a single ZIP.
+
+Organizations are rendered by a bounded thread pool, each from its own
+snapshot so its three files agree. Finished files are spooled to temporary
+files and streamed into the archive in request order, one folder per
+organization. A failing organization does not stop the others; the outcome
+of every organization is listed in REPORT.TXT at the end of the archive.
+"""
+import logging
+import re
+import tempfile
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import IO, Deque, Iterator, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.db import snapshot_session
+from app.models.organization import Organization
+from app.services.compression import iter_zip_members
+from app.services.vat_service import VatService, iter_encoded
+
+logger = logging.getLogger(__name__)
+
+# File name and VatService generator of each file in an organization's folder
+PACKAGE_FILES = (
+    ("PRODAGBI.TXT", "iter_sales_register"),
+    ("POKUPKI.TXT", "iter_purchase_register"),
+    ("DEKLAR.TXT", "iter_vat_declaration"),
+)
+
+REPORT_FILE = "REPORT.TXT"
+
+
+@dataclass
+class VatPackage:
+    """The rendered files of one organization, or the error that stopped it."""
+
+    organization: Organization
+    folder: str
+    files: List[Tuple[str, IO[bytes]]] = field(default_factory=list)
+    error: Optional[str] = None
+
+    def close(self) -> None:
+        for _, spool in self.files:
+            spool.close()
+
+
+class VatBulkExport:
+    # Files up to this size stay in memory while they wait to be zipped.
+    SPOOL_SIZE = 1024 * 1024
+
+    def __init__(
+        self,
+        organizations: Sequence[Organization],
+        year: int,
+        month: int,
+        max_workers: int = settings.VAT_BULK_WORKERS,
+    ):
+        self.organizations = organizations
+        self.year = year
+        self.month = month
+        self.max_workers = max_workers
+        self._folders = _unique_folders(organizations)
+
+    def iter_zip(self) -> Iterator[bytes]:
+        return iter_zip_members(self._members())
+
+    def _members(self) -> Iterator[Tuple[str, Iterator[bytes]]]:
+        packages: List[VatPackage] = []
+        organizations = iter(zip(self.organizations, self._folders))
+        pending: Deque[Future] = deque()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="vat-bulk")
+        try:
+            # At most two organizations per worker are rendered ahead of the
+            # one being zipped, which bounds the spooled files.
+            for organization, folder in organizations:
+                pending.append(executor.submit(self._render, organization, folder))
+                if len(pending) >= 2 * self.max_workers:
+                    break
+            while pending:
+                package = pending.popleft().result()
+                for organization, folder in organizations:
+                    pending.append(executor.submit(self._render, organization, folder))
+                    break
+                packages.append(package)
+                try:
+                    for name, spool in package.files:
+                        yield f"{package.folder}/{name}", _iter_file(spool)
+                finally:
+                    package.close()
+        finally:
+            # Download aborted: drop queued organizations, close what was rendered
+            executor.shutdown(wait=True, cancel_futures=True)
+            for future in pending:
+                if not future.cancelled():
+                    future.result().close()
+        yield REPORT_FILE, iter_encoded(self._report(packages), "utf-8")
+
+    def _render(self, organization: Organization, folder: str) -> VatPackage:
+        package = VatPackage(organization, folder)
+        try:
+            with snapshot_session() as session:
+                service = VatService(organization, self.year, self.month, session=session)
+                for name, method in PACKAGE_FILES:
+                    spool = tempfile.SpooledTemporaryFile(max_size=self.SPOOL_SIZE)
+                    package.files.append((name, spool))
+                    for block in iter_encoded(getattr(service, method)()):
+                        spool.write(block)
+                    spool.seek(0)
+        except Exception as e:
+            logger.exception("Bulk VAT export failed for organization %s", organization.id)
+            package.close()
+            package.files = []
+            package.error = f"{type(e).__name__}: {e}"
+        return package
+
+    def _report(self, packages: List[VatPackage]) -> Iterator[str]:
+        failed = sum(1 for package in packages if package.error)
+        yield f"Period: {self.year}{self.month:02d}\n"
+        yield f"Organizations: {len(packages)}, exported: {len(packages) - failed}, failed: {failed}\n\n"
+        for package in packages:
+            status = f"FAILED\t{package.error}" if package.error else "OK"
+            yield f"{package.folder}\t{package.organization.name}\t{status}\n"
+
+
+def _iter_file(spool: IO[bytes]) -> Iterator[bytes]:
+    while block := spool.read(64 * 1024):
+        yield block
+
+
+def _unique_folders(organizations: Sequence[Organization]) -> List[str]:
+    """Folder per organization: its VAT number or EIK, else its id."""
+    folders = []
+    seen = set()
+    for organization in organizations:
+        folder = re.sub(
+            r"[^\w.-]+", "_", organization.vat_number or organization.registration_number or ""
+        ).strip("._")
+        if not folder or folder in seen:
+            folder = f"{folder}_{organization.id}" if folder else str(organization.id)
+        seen.add(folder)
+        folders.append(folder)
+    return folders
@@ -0,0 +1,221 @@
+"""
+Range partitioning of the VAT registers by period.
+
+Both registers can be declared PARTITION BY RANGE (period_year, period_month)
+with one partition per year and a default partition for years without one.
+Every register query filters on a single period, so it is pruned to one
+partition, and a closed year can be detached into a plain table to be
+archived or dropped without touching the live registers.
+
+Partitioning is optional: the migration partition_vat_registers converts
+the tables when VAT_REGISTER_PARTITIONING is set, and this module does the
+same on demand:
+
+    python -m app.services.vat_partitions partition
+    python -m app.services.vat_partitions create --year 2027
+    python -m app.services.vat_partitions detach --year 2019
+"""
+import argparse
+import logging
+from datetime import date
+from typing import Iterable, List, Optional
+
+from sqlalchemy import Connection, text
+
+from app.models.vat_purchase_register import VatPurchaseRegister
+from app.models.vat_sales_register import VatSalesRegister
+
+logger = logging.getLogger(__name__)
+
+REGISTER_TABLES = [VatSalesRegister.__tablename__, VatPurchaseRegister.__tablename__]
+
+
+class VatRegisterPartitions:
+    """Partition management of one register table, on a connection in a transaction."""
+
+    def __init__(self, connection: Connection, name: str):
+        self.connection = connection
+        self.name = name
+
+    def is_partitioned(self) -> bool:
+        return bool(self.connection.scalar(
+            text("SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass(:name)"),
+            {"name": self.name},
+        ))
+
+    def years(self) -> List[int]:
+        """Years that have their own partition."""
+        return sorted(self.connection.scalars(
+            text(
+                "SELECT substring(child.relname FROM '_(\\d{4})$')::int FROM pg_inherits"
+                " JOIN pg_class child ON child.oid = pg_inherits.inhrelid"
+                " WHERE pg_inherits.inhparent = to_regclass(:name)"
+                " AND child.relname ~ '_\\d{4}$'"
+            ),
+            {"name": self.name},
+        ))
+
+    def partition(self, years: Iterable[int] = ()) -> None:
+        """
+        Convert the plain table into a partitioned one with the same columns,
+        secondary indexes and foreign keys, with a partition for every year
+        that has rows and for the given years. Locks the table for the copy.
+        """
+        if self.is_partitioned():
+            return
+        old = f"{self.name}_unpartitioned"
+        definitions = self._definitions()
+        primary_key = self._rename(old)
+        self._execute(
+            f"CREATE TABLE {self.name} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+            " PARTITION BY RANGE (period_year, period_month)"
+        )
+        # The primary key of a partitioned table must contain the partition key
+        self._execute(
+            f"ALTER TABLE {self.name} ADD CONSTRAINT {primary_key} PRIMARY KEY (id, period_year, period_month)"
+        )
+
+        existing = self.connection.scalars(text(f"SELECT DISTINCT period_year FROM {old}"))
+        for year in sorted(set(existing) | set(years)):
+            self._execute(
+                f"CREATE TABLE {self.partition_name(year)} PARTITION OF {self.name}"
+                f" FOR VALUES FROM ({year}, 1) TO ({year + 1}, 1)"
+            )
+        self._execute(f"CREATE TABLE {self.name}_default PARTITION OF {self.name} DEFAULT")
+
+        self._execute(f"INSERT INTO {self.name} SELECT * FROM {old}")
+        self._execute(f"DROP TABLE {old}")
+        self._restore(definitions)
+        logger.info("Partitioned %s by period", self.name)
+
+    def unpartition(self) -> None:
+        """Convert the partitioned table back into a plain table, keeping the attached rows."""
+        if not self.is_partitioned():
+            return
+        old = f"{self.name}_partitioned"
+        definitions = self._definitions()
+        primary_key = self._rename(old)
+        self._execute(f"CREATE TABLE {self.name} (LIKE {old} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        self._execute(f"ALTER TABLE {self.name} ADD CONSTRAINT {primary_key} PRIMARY KEY (id)")
+        self._execute(f"INSERT INTO {self.name} SELECT * FROM {old}")
+        self._execute(f"DROP TABLE {old}")
+        self._restore(definitions)
+        logger.info("Removed the partitioning of %s", self.name)
+
+    def create_year(self, year: int) -> bool:
+        """
+        Add the partition of a year, moving its rows out of the default
+        partition. Returns False if the partition already exists.
+        """
+        if year in self.years():
+            return False
+        partition = self.partition_name(year)
+        self._execute(f"CREATE TABLE {partition} (LIKE {self.name} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        self._execute(
+            f"WITH moved AS (DELETE FROM {self.name}_default WHERE period_year = {year:d} RETURNING *)"
+            f" INSERT INTO {partition} SELECT * FROM moved"
+        )
+        self._execute(
+            f"ALTER TABLE {self.name} ATTACH PARTITION {partition}"
+            f" FOR VALUES FROM ({year:d}, 1) TO ({year + 1:d}, 1)"
+        )
+        return True
+
+    def detach_year(self, year: int) -> Optional[str]:
+        """
+        Detach the partition of a closed year. Its rows stay in a plain table
+        of the returned name, which can be dumped and dropped; they no longer
+        appear in the register. Returns None if the year has no partition.
+        """
+        if year not in self.years():
+            return None
+        partition = self.partition_name(year)
+        self._execute(f"ALTER TABLE {self.name} DETACH PARTITION {partition}")
+        return partition
+
+    def partition_name(self, year: int) -> str:
+        return f"{self.name}_{year:d}"
+
+    def _rename(self, name: str) -> str:
+        """Move the table out of the way, freeing its primary key name. Returns that name."""
+        primary_key = self.connection.scalar(
+            text("SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:name) AND contype = 'p'"),
+            {"name": self.name},
+        )
+        self._execute(f"ALTER TABLE {self.name} RENAME CONSTRAINT {primary_key} TO {name}_pkey")
+        self._execute(f"ALTER TABLE {self.name} RENAME TO {name}")
+        return primary_key
+
+    def _definitions(self) -> List[str]:
+        """
+        DDL of the table's secondary indexes and foreign keys under their
+        current names, to be replayed on the table that replaces it.
+        """
+        indexes = self.connection.scalars(
+            text(
+                "SELECT pg_get_indexdef(indexrelid) FROM pg_index"
+                " WHERE indrelid = to_regclass(:name) AND NOT indisprimary"
+            ),
+            {"name": self.name},
+        )
+        foreign_keys = self.connection.execute(
+            text(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint"
+                " WHERE conrelid = to_regclass(:name) AND contype = 'f'"
+            ),
+            {"name": self.name},
+        )
+        # Indexes of a partitioned table read ON ONLY, which would skip the partitions
+        return [index.replace(" ON ONLY ", " ON ", 1) for index in indexes] + [
+            f"ALTER TABLE {self.name} ADD CONSTRAINT {name} {definition}" for name, definition in foreign_keys
+        ]
+
+    def _restore(self, definitions: List[str]) -> None:
+        for definition in definitions:
+            self._execute(definition)
+
+    def _execute(self, statement: str) -> None:
+        self.connection.execute(text(statement))
+
+
+def partition_registers(connection: Connection, years: Iterable[int] = ()) -> None:
+    years = set(years) | {date.today().year, date.today().year + 1}
+    for table in REGISTER_TABLES:
+        VatRegisterPartitions(connection, table).partition(years)
+
+
+def unpartition_registers(connection: Connection) -> None:
+    for table in REGISTER_TABLES:
+        VatRegisterPartitions(connection, table).unpartition()
+
+
+def main() -> None:
+    from app.core.db import engine
+
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Manage the period partitions of the VAT registers")
+    parser.add_argument("command", choices=["partition", "create", "detach"])
+    parser.add_argument("--year", type=int)
+    args = parser.parse_args()
+    if args.command != "partition" and args.year is None:
+        parser.error("--year is required")
+
+    with engine.begin() as connection:
+        if args.command == "partition":
+            partition_registers(connection)
+            return
+        for table in REGISTER_TABLES:
+            partitions = VatRegisterPartitions(connection, table)
+            if not partitions.is_partitioned():
+                parser.error(f"{table} is not partitioned")
+            if args.command == "create":
+                if partitions.create_year(args.year):
+                    logger.info("Created %s", partitions.partition_name(args.year))
+            elif partitions.detach_year(args.year):
+                logger.info("Detached %s", partitions.partition_name(args.year))
+            else:
+                logger.info("%s has no partition for %s", table, args.year)
+
+
+if __name__ == "__main__":
+    main()
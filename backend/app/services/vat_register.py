@@ -0,0 +1,272 @@
+"""
+Поддръжка на дневниците по ДДС (продажби и покупки).
+
+Each posted document owns exactly one register row, keyed by invoice_id or
+purchase_id (together with the period, so the key also holds on a
+partitioned register, see app.services.vat_partitions) and upserted in the same transaction that changes the
+document, so the month-end VAT export only reads the registers.
+rebuild_period() regenerates all document rows of one period with a
+DELETE and an INSERT ... SELECT per register, e.g. after a migration or
+an import that bypassed the application. Document rows reuse the id of
+their document as primary key.
+"""
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import Integer, String, case, cast, delete, extract, func, literal
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from app.models.contraagent import Contraagent
+from app.models.invoice import Invoice, InvoiceStatus, VatDocumentType
+from app.models.invoice_line import InvoiceLine
+from app.models.purchase import Purchase
+from app.models.vat_purchase_register import VatPurchaseRegister
+from app.models.vat_sales_register import VatSalesRegister
+from app.utils import utcnow
+
+# Invoices in these statuses are entered in the sales register.
+POSTED_INVOICE_STATUSES = (
+    InvoiceStatus.ISSUED,
+    InvoiceStatus.PAID,
+    InvoiceStatus.PARTIALLY_PAID,
+    InvoiceStatus.OVERDUE,
+)
+
+# Purchase records carry a single net amount; VAT is charged at the standard rate.
+PURCHASE_VAT_RATE = Decimal("20")
+PURCHASE_DOCUMENT_TYPE = VatDocumentType.INVOICE.value
+
+CENT = Decimal("0.01")
+
+# Columns of the unique indexes ux_vat_sales_register_invoice and
+# ux_vat_purchase_registers_purchase, the conflict targets of the upserts
+SALES_DOCUMENT_KEY = ["invoice_id", "period_year", "period_month"]
+PURCHASES_DOCUMENT_KEY = ["purchase_id", "period_year", "period_month"]
+
+
+class VatRegisterService:
+    def __init__(self, session: Session):
+        self.session = session
+
+    # Sales register
+
+    def sync_invoice(self, invoice: Invoice) -> None:
+        """
+        Bring the invoice's sales register row in line with the invoice.
+
+        Posted invoices are upserted, drafts and cancelled invoices are
+        removed. Credit notes are entered with negative amounts. Does not
+        commit.
+        """
+        if invoice.status not in POSTED_INVOICE_STATUSES:
+            self.session.execute(delete(VatSalesRegister).where(VatSalesRegister.invoice_id == invoice.id))
+            return
+
+        values = self._invoice_values(invoice)
+        # A changed tax event date moves the row to another period
+        self.session.execute(
+            delete(VatSalesRegister).where(
+                VatSalesRegister.invoice_id == invoice.id,
+                ~_in_period(VatSalesRegister, values),
+            )
+        )
+        statement = insert(VatSalesRegister).values(id=invoice.id, date_created=values["date_updated"], **values)
+        self.session.execute(
+            statement.on_conflict_do_update(index_elements=SALES_DOCUMENT_KEY, set_=values)
+        )
+
+    def _invoice_values(self, invoice: Invoice) -> Dict[str, Any]:
+        event_date = invoice.tax_event_date or invoice.issue_date
+        sign = -1 if invoice.vat_document_type == VatDocumentType.CREDIT_NOTE else 1
+        vat_rate = max((line.tax_rate for line in invoice.invoice_lines), default=Decimal(0))
+        return {
+            "organization_id": invoice.organization_id,
+            "invoice_id": invoice.id,
+            "period_year": event_date.year,
+            "period_month": event_date.month,
+            "document_date": invoice.issue_date,
+            "tax_event_date": event_date,
+            "document_type": getattr(invoice.vat_document_type, "value", invoice.vat_document_type),
+            "document_number": invoice.invoice_no,
+            "recipient_name": invoice.billing_name,
+            "recipient_vat_number": invoice.billing_vat_number,
+            "recipient_country": _country(invoice.billing_vat_number),
+            "recipient_eik": invoice.billing_company_id,
+            "taxable_base": sign * _money(invoice.subtotal),
+            "vat_rate": vat_rate,
+            "vat_amount": sign * _money(invoice.tax_amount),
+            "total_amount": sign * _money(invoice.total_amount),
+            "date_updated": utcnow(),
+        }
+
+    # Purchase register
+
+    def sync_purchase(self, purchase: Purchase) -> None:
+        """Upsert the purchase register row of a booked purchase. Does not commit."""
+        contraagent = purchase.contraagent or self.session.get(Contraagent, purchase.contraagent_id)
+        taxable_base = _money(purchase.amount)
+        event_date = _date(purchase.date_purchase)
+        values = {
+            "organization_id": purchase.organization_id,
+            "purchase_id": purchase.id,
+            "period_year": event_date.year,
+            "period_month": event_date.month,
+            "document_type": PURCHASE_DOCUMENT_TYPE,
+            "document_number": purchase.id.hex[:20],
+            "document_date": event_date,
+            "supplier_vat_number": (contraagent.vat_number or "")[:15] or None,
+            "supplier_name": contraagent.name[:70],
+            "taxable_base": taxable_base,
+            "vat_amount": (taxable_base * PURCHASE_VAT_RATE / 100).quantize(CENT),
+        }
+        self.session.execute(
+            delete(VatPurchaseRegister).where(
+                VatPurchaseRegister.purchase_id == purchase.id,
+                ~_in_period(VatPurchaseRegister, values),
+            )
+        )
+        statement = insert(VatPurchaseRegister).values(id=purchase.id, **values)
+        self.session.execute(
+            statement.on_conflict_do_update(index_elements=PURCHASES_DOCUMENT_KEY, set_=values)
+        )
+
+    # Set-based rebuild
+
+    def rebuild_period(self, organization_id: UUID, year: int, month: int) -> Tuple[int, int]:
+        """
+        Regenerate the document rows of both registers for one period.
+
+        Rows entered by hand (without invoice_id/purchase_id) are kept.
+        Returns the number of sales and purchase rows written. Does not commit.
+        """
+        start = date(year, month, 1)
+        end = date(year + month // 12, month % 12 + 1, 1)
+
+        self.session.execute(
+            delete(VatSalesRegister).where(
+                VatSalesRegister.organization_id == organization_id,
+                VatSalesRegister.period_year == year,
+                VatSalesRegister.period_month == month,
+                VatSalesRegister.invoice_id.is_not(None),
+            )
+        )
+        # rowcount of an INSERT ... SELECT is otherwise lost with the closed cursor
+        sales = self.session.execute(
+            self._insert_sales(organization_id, start, end), execution_options={"preserve_rowcount": True}
+        )
+
+        self.session.execute(
+            delete(VatPurchaseRegister).where(
+                VatPurchaseRegister.organization_id == organization_id,
+                VatPurchaseRegister.period_year == year,
+                VatPurchaseRegister.period_month == month,
+                VatPurchaseRegister.purchase_id.is_not(None),
+            )
+        )
+        purchases = self.session.execute(
+            self._insert_purchases(
+                organization_id,
+                # date_purchase is timezone-aware
+                datetime(start.year, start.month, 1, tzinfo=timezone.utc),
+                datetime(end.year, end.month, 1, tzinfo=timezone.utc),
+            ),
+            execution_options={"preserve_rowcount": True},
+        )
+        return sales.rowcount, purchases.rowcount
+
+    def _insert_sales(self, organization_id: UUID, start: date, end: date) -> Any:
+        event_date = func.coalesce(Invoice.tax_event_date, Invoice.issue_date)
+        sign = case((Invoice.vat_document_type == VatDocumentType.CREDIT_NOTE.value, -1), else_=1)
+        vat_rate = (
+            select(func.coalesce(func.max(InvoiceLine.tax_rate), 0))
+            .where(InvoiceLine.invoice_id == Invoice.id)
+            .scalar_subquery()
+        )
+        vat_number = Invoice.billing_vat_number
+        now = utcnow()
+        columns = {
+            "id": Invoice.id,
+            "organization_id": Invoice.organization_id,
+            "invoice_id": Invoice.id,
+            "period_year": cast(extract("year", event_date), Integer),
+            "period_month": cast(extract("month", event_date), Integer),
+            "document_date": Invoice.issue_date,
+            "tax_event_date": event_date,
+            "document_type": Invoice.vat_document_type,
+            "document_number": Invoice.invoice_no,
+            "recipient_name": Invoice.billing_name,
+            "recipient_vat_number": vat_number,
+            "recipient_country": case(
+                (func.substr(vat_number, 1, 2).op("~")("^[A-Za-z]{2}$"), func.upper(func.substr(vat_number, 1, 2))),
+                else_="BG",
+            ),
+            "recipient_eik": Invoice.billing_company_id,
+            "taxable_base": sign * Invoice.subtotal,
+            "vat_rate": vat_rate,
+            "vat_amount": sign * Invoice.tax_amount,
+            "total_amount": sign * Invoice.total_amount,
+            "is_triangular_operation": literal(False),
+            "is_art_21_service": literal(False),
+            "date_created": literal(now),
+            "date_updated": literal(now),
+        }
+        source = select(*columns.values()).where(
+            Invoice.organization_id == organization_id,
+            Invoice.status.in_(POSTED_INVOICE_STATUSES),
+            event_date >= start,
+            event_date < end,
+        )
+        # Rows upserted by a concurrent sync_invoice() are already current
+        return insert(VatSalesRegister).from_select(list(columns), source).on_conflict_do_nothing(
+            index_elements=SALES_DOCUMENT_KEY
+        )
+
+    def _insert_purchases(self, organization_id: UUID, start: datetime, end: datetime) -> Any:
+        purchase_date = func.date(Purchase.date_purchase)
+        taxable_base = func.round(cast(Purchase.amount, VatPurchaseRegister.taxable_base.type), 2)
+        columns = {
+            "id": Purchase.id,
+            "organization_id": Purchase.organization_id,
+            "purchase_id": Purchase.id,
+            "period_year": cast(extract("year", purchase_date), Integer),
+            "period_month": cast(extract("month", purchase_date), Integer),
+            "document_type": literal(PURCHASE_DOCUMENT_TYPE),
+            "document_number": func.substr(func.replace(cast(Purchase.id, String), "-", ""), 1, 20),
+            "document_date": purchase_date,
+            "supplier_vat_number": func.nullif(func.substr(func.coalesce(Contraagent.vat_number, ""), 1, 15), ""),
+            "supplier_name": func.substr(Contraagent.name, 1, 70),
+            "taxable_base": taxable_base,
+            "vat_amount": func.round(taxable_base * PURCHASE_VAT_RATE / 100, 2),
+        }
+        source = (
+            select(*columns.values())
+            .join(Contraagent, Contraagent.id == Purchase.contraagent_id)
+            .where(
+                Purchase.organization_id == organization_id,
+                Purchase.date_purchase >= start,
+                Purchase.date_purchase < end,
+            )
+        )
+        return insert(VatPurchaseRegister).from_select(list(columns), source).on_conflict_do_nothing(
+            index_elements=PURCHASES_DOCUMENT_KEY
+        )
+
+
+def _in_period(model: Any, values: Dict[str, Any]) -> Any:
+    return (model.period_year == values["period_year"]) & (model.period_month == values["period_month"])
+
+
+def _money(value: Any) -> Decimal:
+    return Decimal(str(value or 0)).quantize(CENT)
+
+
+def _date(value: datetime | date) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _country(vat_number: Optional[str]) -> str:
+    prefix = (vat_number or "")[:2]
+    return prefix.upper() if len(prefix) == 2 and prefix.isalpha() else "BG"
@@ -0,0 +1,62 @@
+from datetime import date
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models import OrganizationRole
+from app.services.account_balance import AccountBalanceService
+from app.tests.conftest import (
+    authentication_token_from_email,
+    create_organization_membership,
+    create_test_organization,
+)
+from app.tests.utils.ledger import create_random_account, post_entry
+from app.tests.utils.user import create_random_user
+
+
+def test_update_opening_balance_shifts_the_balance(client: TestClient, db: Session) -> None:
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.MANAGER)
+    cash = create_random_account(db, user, organization, "501", opening_balance=100)
+    revenue = create_random_account(db, user, organization, "702")
+    post_entry(db, user, organization, date(2025, 3, 1), [(cash, "40.00", 0), (revenue, 0, "40.00")])
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+
+    response = client.put(
+        f"{settings.API_V1_STR}/accounts/{cash.id}",
+        headers=user_token_headers,
+        # A client cannot set the balance itself
+        json={"opening_balance": 250, "balance": 0},
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert (content["opening_balance"], content["balance"]) == (250, 290)
+    assert AccountBalanceService(db, organization.id).verify() == []
+
+    response = client.put(
+        f"{settings.API_V1_STR}/accounts/{cash.id}",
+        headers=user_token_headers,
+        json={"name": "Каса"},
+    )
+    assert response.status_code == 200
+    assert (response.json()["name"], response.json()["balance"]) == ("Каса", 290)
+
+
+def test_update_account_requires_manager(client: TestClient, db: Session) -> None:
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.MEMBER)
+    cash = create_random_account(db, user, organization, "501")
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    response = client.put(
+        f"{settings.API_V1_STR}/accounts/{cash.id}",
+        headers=user_token_headers,
+        json={"opening_balance": 5},
+    )
+    assert response.status_code == 403
@@ -0,0 +1,51 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models import Contraagent, OrganizationRole
+from app.tests.conftest import (
+    authentication_token_from_email,
+    create_organization_membership,
+    create_test_organization,
+)
+from app.tests.utils.ledger import create_random_account
+from app.tests.utils.user import create_random_user
+
+
+def test_read_contraagents_pages_by_name(client: TestClient, db: Session) -> None:
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.MEMBER)
+    account = create_random_account(db, user, organization, "411")
+    names = ["Бета ООД", "Алфа ЕООД", "Гама АД"]
+    db.add_all(
+        Contraagent(
+            name=name,
+            organization_id=organization.id,
+            created_by_id=user.id,
+            accounting_account_id=account.id,
+        )
+        for name in names
+    )
+    db.commit()
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+
+    response = client.get(f"{settings.API_V1_STR}/contraagents/?limit=2", headers=user_token_headers)
+    assert response.status_code == 200
+    first = response.json()
+    assert first["count"] == 3
+    assert [row["name"] for row in first["data"]] == ["Алфа ЕООД", "Бета ООД"]
+    assert {row["accounting_account_name"] for row in first["data"]} == {account.name}
+
+    response = client.get(
+        f"{settings.API_V1_STR}/contraagents/",
+        params={"limit": 2, "after": first["next_cursor"], "count": "none"},
+        headers=user_token_headers,
+    )
+    assert response.status_code == 200
+    second = response.json()
+    assert [row["name"] for row in second["data"]] == ["Гама АД"]
+    assert second["count"] is None
+    assert second["next_cursor"] is None
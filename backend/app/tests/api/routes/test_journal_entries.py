@@ -0,0 +1,100 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models import OrganizationRole
+from app.services.account_balance import AccountBalanceService
+from app.services.account_period_balance import AccountPeriodBalanceService
+from app.tests.conftest import (
+    authentication_token_from_email,
+    create_organization_membership,
+    create_test_organization,
+)
+from app.tests.utils.ledger import create_random_account
+from app.tests.utils.user import create_random_user
+
+
+def test_import_journal_entries_requires_known_format(client: TestClient, db: Session) -> None:
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.MANAGER)
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    response = client.post(
+        f"{settings.API_V1_STR}/journal-entries/import",
+        headers=user_token_headers,
+        files={"file": ("entries.txt", b"entry_ref,entry_date\n", "text/plain")},
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Pass format=csv or format=jsonl"
+
+
+def test_import_journal_entries_requires_manager(client: TestClient, db: Session) -> None:
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.MEMBER)
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    response = client.post(
+        f"{settings.API_V1_STR}/journal-entries/import",
+        headers=user_token_headers,
+        files={"file": ("entries.csv", b"entry_ref,entry_date\n", "text/csv")},
+    )
+    assert response.status_code == 403
+
+
+def test_import_journal_entries_csv(client: TestClient, db: Session) -> None:
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.MANAGER)
+    create_random_account(db, user, organization, "501")
+    create_random_account(db, user, organization, "702")
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    csv = (
+        "entry_ref,entry_date,account_code,debit,credit\n"
+        "1,2025-03-04,501,10.00,\n"
+        "1,2025-03-04,702,,10.00\n"
+    )
+    response = client.post(
+        f"{settings.API_V1_STR}/journal-entries/import",
+        headers=user_token_headers,
+        files={"file": ("entries.csv", csv.encode(), "text/csv")},
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert (content["entries_imported"], content["lines_imported"], content["entries_rejected"]) == (1, 2, 0)
+
+
+def test_create_journal_entry_posts_to_the_turnovers(client: TestClient, db: Session) -> None:
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.MANAGER)
+    cash = create_random_account(db, user, organization, "501")
+    revenue = create_random_account(db, user, organization, "702")
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    entry = {
+        "entry_date": "2025-03-04",
+        "description": "Ръчна статия",
+        "lines": [
+            {"account_id": str(cash.id), "debit": 12.5},
+            {"account_id": str(revenue.id), "credit": 12.5},
+        ],
+    }
+    response = client.post(f"{settings.API_V1_STR}/journal-entries/", headers=user_token_headers, json=entry)
+    assert response.status_code == 200
+    assert response.json()["entry_date"] == "2025-03-04"
+    assert AccountPeriodBalanceService(db, organization.id).verify() == []
+    assert AccountBalanceService(db, organization.id).verify() == []
+    db.refresh(cash)
+    assert cash.balance == 12.5
+
+    entry["lines"][1]["credit"] = 10
+    response = client.post(f"{settings.API_V1_STR}/journal-entries/", headers=user_token_headers, json=entry)
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Entry does not balance")
@@ -0,0 +1,86 @@
+from datetime import date
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models import OrganizationRole
+from app.tests.conftest import (
+    authentication_token_from_email,
+    create_organization_membership,
+    create_test_organization,
+)
+from app.tests.utils.ledger import create_random_account, post_entry
+from app.tests.utils.user import create_random_user
+
+
+def test_read_trial_balance(client: TestClient, db: Session) -> None:
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.MEMBER)
+    cash = create_random_account(db, user, organization, "501", opening_balance=100)
+    revenue = create_random_account(db, user, organization, "702")
+    post_entry(db, user, organization, date(2025, 2, 10), [(cash, "40.00", 0), (revenue, 0, "40.00")])
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    response = client.get(
+        f"{settings.API_V1_STR}/ledger/trial-balance?year=2025&first_month=1&last_month=3",
+        headers=user_token_headers,
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["period_year"] == 2025
+    assert [row["code"] for row in content["data"]] == ["501", "702"]
+    totals = content["totals"]
+    assert totals["turnover_debit"] == totals["turnover_credit"] == "40.00"
+    assert totals["opening_debit"] == "100.00"
+    assert totals["closing_debit"] == "140.00"
+
+
+def test_read_trial_balance_rejects_reversed_months(client: TestClient, db: Session) -> None:
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.MEMBER)
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    response = client.get(
+        f"{settings.API_V1_STR}/ledger/trial-balance?year=2025&first_month=6&last_month=3",
+        headers=user_token_headers,
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "first_month must not be after last_month"
+
+
+def test_read_account_card_pages(client: TestClient, db: Session) -> None:
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.MEMBER)
+    cash = create_random_account(db, user, organization, "501", opening_balance=10)
+    revenue = create_random_account(db, user, organization, "702")
+    for day, amount in [(1, "5.00"), (1, "7.00"), (2, "1.50"), (3, "3.00"), (3, "2.00")]:
+        post_entry(db, user, organization, date(2025, 4, day), [(cash, amount, 0), (revenue, 0, amount)])
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    url = f"{settings.API_V1_STR}/ledger/accounts/{cash.id}/card"
+
+    whole = client.get(url, headers=user_token_headers).json()
+    assert whole["next_cursor"] is None
+    assert whole["data"][-1]["balance"] == "28.50"
+
+    lines, after = [], None
+    while True:
+        params = {"limit": 2, **({"after": after} if after else {})}
+        page = client.get(url, headers=user_token_headers, params=params).json()
+        if lines:
+            assert page["opening_balance"] == lines[-1]["balance"]
+        lines += page["data"]
+        after = page["next_cursor"]
+        if after is None:
+            break
+    assert lines == whole["data"]
+
+    response = client.get(url, headers=user_token_headers, params={"after": "not-a-cursor"})
+    assert response.status_code == 400
@@ -0,0 +1,92 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models import OrganizationRole
+from app.tests.conftest import (
+    authentication_token_from_email,
+    create_organization_membership,
+    create_test_organization,
+)
+from app.tests.utils.ledger import create_random_account
+from app.tests.utils.user import create_random_user
+
+
+def test_read_closed_periods(client: TestClient, db: Session) -> None:
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.MEMBER)
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    response = client.get(f"{settings.API_V1_STR}/periods/", headers=user_token_headers)
+    assert response.status_code == 200
+    content = response.json()
+    assert content["count"] == len(content["data"])
+
+
+def test_read_open_period_is_not_found(client: TestClient, db: Session) -> None:
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.MEMBER)
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    response = client.get(f"{settings.API_V1_STR}/periods/1999/1", headers=user_token_headers)
+    assert response.status_code == 404
+
+
+def test_close_period_requires_admin(client: TestClient, db: Session) -> None:
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.MANAGER)
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    response = client.post(f"{settings.API_V1_STR}/periods/2025/3/close", headers=user_token_headers)
+    assert response.status_code == 403
+
+
+def test_closed_period_rejects_postings_until_reopened(client: TestClient, db: Session) -> None:
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.ADMIN)
+    create_random_account(db, user, organization, "501")
+    create_random_account(db, user, organization, "702")
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    csv = (
+        "entry_ref,entry_date,account_code,debit,credit\n"
+        "1,2025-03-04,501,10.00,\n"
+        "1,2025-03-04,702,,10.00\n"
+    )
+
+    def post_entry() -> dict:
+        response = client.post(
+            f"{settings.API_V1_STR}/journal-entries/import",
+            headers=user_token_headers,
+            files={"file": ("entries.csv", csv.encode(), "text/csv")},
+        )
+        assert response.status_code == 200
+        return response.json()
+
+    response = client.post(f"{settings.API_V1_STR}/periods/2025/3/close", headers=user_token_headers)
+    assert response.status_code == 200
+    assert (response.json()["period_year"], response.json()["period_month"]) == (2025, 3)
+    response = client.post(f"{settings.API_V1_STR}/periods/2025/3/close", headers=user_token_headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Period 2025-03 is already closed"
+
+    rejected = post_entry()
+    assert (rejected["entries_imported"], rejected["entries_rejected"]) == (0, 1)
+    assert rejected["rejects"][0]["error"] == "The period of the entry date is closed"
+
+    response = client.post(f"{settings.API_V1_STR}/periods/2025/3/reopen", headers=user_token_headers)
+    assert response.status_code == 200
+    assert response.json()["message"] == "Period 2025-03 reopened"
+    response = client.get(f"{settings.API_V1_STR}/periods/2025/3", headers=user_token_headers)
+    assert response.status_code == 404
+
+    imported = post_entry()
+    assert (imported["entries_imported"], imported["lines_imported"], imported["entries_rejected"]) == (1, 2, 0)
@@ -1,14 +1,46 @@
 
+import gzip
+import io
+import time
+import uuid
+import zipfile
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from xml.etree import ElementTree
+
+import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session
 
+from app.api.routes import saft as saft_routes
 from app.core.config import settings
-from app.tests.conftest import authentication_token_from_email
-from app.tests.utils.user import create_random_user
+from app.core.db import ExportLimiter
+from app.services.saft import jobs as saft_jobs
+from app.models import Contraagent, Item, OrganizationRole, Payment, Purchase, Sale, SaleItem
+from app.models.saft_export_job import SaftExportJob, SaftExportJobStatus
+from app.services.nra_layout import DEKLAR, VIES_HEADER, VIES_LINE, iter_parse
+from app.tests.conftest import (
+    create_organization_membership,
+    create_test_organization,
+)
+from app.tests.utils.ledger import create_random_account, post_entry
+from app.tests.utils.store import create_random_store
+from app.tests.utils.user import authentication_token_from_email, create_random_user
+from app.tests.utils.vat import delete_vat_registers, purchase_register_row, sales_register_row
+
+NS = "{mf:nra:dgti:dxxxx:declaration:v1}"
+
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch) -> None:
+    """Keep cached fragments and job files out of the working tree."""
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
 
 
 def test_generate_saft_monthly(client: TestClient, db: Session) -> None:
     user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.ADMIN)
     user_token_headers = authentication_token_from_email(
         client=client, email=user.email, db=db
     )
@@ -20,3 +52,444 @@ def test_generate_saft_monthly(client: TestClient, db: Session) -> None:
     assert response.headers["content-type"] == "application/xml"
     assert "attachment; filename=saft_monthly.xml" in response.headers["content-disposition"]
     assert response.text.startswith("<nsSAFT:AuditFile")
+    root = ElementTree.fromstring(response.text)
+    assert [child.tag.removeprefix(NS) for child in root] == [
+        "Header",
+        "MasterFilesMonthly",
+        "GeneralLedgerEntries",
+        "SourceDocumentsMonthly",
+    ]
+    assert root.find(f"{NS}Header/{NS}Company/{NS}Name").text == organization.name
+    assert root.find(f"{NS}GeneralLedgerEntries/{NS}NumberOfEntries").text == "0"
+
+
+def test_generate_saft_monthly_source_documents(client: TestClient, db: Session) -> None:
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.ADMIN)
+    store = create_random_store(db, user, organization)
+    bank = create_random_account(db, user, organization, "503")
+    customer = Contraagent(
+        name="Клиент & Син ООД",
+        city="София",
+        organization_id=organization.id,
+        created_by_id=user.id,
+    )
+    item = Item(name="Кафе", unit="kg", sku="K-1", organization_id=organization.id, created_by_id=user.id)
+    db.add_all([customer, item])
+    db.flush()
+    sale = Sale(
+        date_sale=datetime(2025, 1, 20, 10, tzinfo=timezone.utc),
+        amount=25.5,
+        organization_id=organization.id,
+        created_by_id=user.id,
+        contraagent_id=customer.id,
+        store_id=store.id,
+    )
+    db.add(sale)
+    db.flush()
+    db.add(SaleItem(quantity=3, price=8.5, sale_id=sale.id, item_id=item.id))
+    db.add(
+        Purchase(
+            date_purchase=datetime(2025, 1, 21, 10, tzinfo=timezone.utc),
+            amount=12.0,
+            organization_id=organization.id,
+            created_by_id=user.id,
+            contraagent_id=customer.id,
+            store_id=store.id,
+        )
+    )
+    db.add(
+        Payment(
+            date_payment=datetime(2025, 1, 22, 10, tzinfo=timezone.utc),
+            amount=25.5,
+            method="BANK",
+            organization_id=organization.id,
+            created_by_id=user.id,
+            account_id=bank.id,
+        )
+    )
+    db.commit()
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+
+    response = client.get(
+        f"{settings.API_V1_STR}/saft/?report_type=monthly&year=2025&month=1",
+        headers=user_token_headers,
+    )
+    assert response.status_code == 200
+    documents = ElementTree.fromstring(response.text).find(f"{NS}SourceDocumentsMonthly")
+    sales = documents.find(f"{NS}SalesInvoices")
+    assert sales.find(f"{NS}NumberOfEntries").text == "1"
+    assert sales.find(f"{NS}TotalDebit").text == "25.50"
+    (invoice,) = sales.findall(f"{NS}Invoice")
+    assert invoice.find(f"{NS}InvoiceNo").text == str(sale.id)
+    assert invoice.find(f"{NS}CustomerInfo/{NS}Name").text == "Клиент & Син ООД"
+    assert invoice.find(f"{NS}CustomerInfo/{NS}BillingAddress/{NS}City").text == "София"
+    assert invoice.find(f"{NS}InvoiceDate").text == "2025-01-20"
+    assert invoice.find(f"{NS}InvoiceDocumentTotals/{NS}GrossTotal").text == "25.50"
+    (line,) = invoice.findall(f"{NS}InvoiceLine")
+    assert line.find(f"{NS}ProductCode").text == "K-1"
+    assert line.find(f"{NS}ProductDescription").text == "Кафе"
+    assert line.find(f"{NS}InvoiceUOM").text == "kg"
+    assert line.find(f"{NS}InvoiceLineAmount/{NS}Amount").text == "25.50"
+    assert documents.find(f"{NS}PurchaseInvoices/{NS}NumberOfEntries").text == "1"
+    assert documents.find(f"{NS}Payments/{NS}NumberOfEntries").text == "1"
+
+
+def test_generate_saft_monthly_zip(client: TestClient, db: Session) -> None:
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.ADMIN)
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    response = client.get(
+        f"{settings.API_V1_STR}/saft/?report_type=monthly&year=2025&month=1&compression=zip",
+        headers=user_token_headers,
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    assert "attachment; filename=saft_monthly.zip" in response.headers["content-disposition"]
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert archive.namelist() == ["saft_monthly.xml"]
+    root = ElementTree.fromstring(archive.read("saft_monthly.xml"))
+    assert root.find(f"{NS}Header/{NS}Company/{NS}Name").text == organization.name
+
+    # gzip is a transfer encoding: the client receives the plain XML
+    response = client.get(
+        f"{settings.API_V1_STR}/saft/?report_type=monthly&year=2025&month=1&compression=gzip",
+        headers=user_token_headers,
+    )
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert "attachment; filename=saft_monthly.xml" in response.headers["content-disposition"]
+    assert ElementTree.fromstring(response.content).find(f"{NS}Header/{NS}Company/{NS}Name").text == organization.name
+
+
+def test_generate_saft_parallel_matches_serial(client: TestClient, db: Session) -> None:
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.ADMIN)
+    cash = create_random_account(db, user, organization, "501")
+    revenue = create_random_account(db, user, organization, "702")
+    post_entry(db, user, organization, date(2025, 1, 15), [(cash, 30, 0), (revenue, 0, 30)])
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    url = f"{settings.API_V1_STR}/saft/?report_type=monthly&year=2025&month=1"
+    serial = client.get(url, headers=user_token_headers)
+    parallel = client.get(f"{url}&parallel=true", headers=user_token_headers)
+    assert serial.status_code == parallel.status_code == 200
+    assert parallel.text == serial.text
+    root = ElementTree.fromstring(parallel.text)
+    assert root.find(f"{NS}GeneralLedgerEntries/{NS}NumberOfEntries").text == "1"
+
+
+def test_generate_saft_validate_rejects_invalid_file(
+    client: TestClient, db: Session, tmp_path, monkeypatch
+) -> None:
+    # A schema the generated file cannot satisfy
+    xsd_path = tmp_path / "saft.xsd"
+    xsd_path.write_text(
+        '<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" '
+        'targetNamespace="mf:nra:dgti:dxxxx:declaration:v1" elementFormDefault="qualified">'
+        '<xs:element name="AuditFile"><xs:complexType><xs:sequence>'
+        '<xs:element name="Header" type="xs:string"/>'
+        "</xs:sequence></xs:complexType></xs:element></xs:schema>",
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(settings, "SAFT_XSD_PATH", str(xsd_path))
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.ADMIN)
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    response = client.get(
+        f"{settings.API_V1_STR}/saft/?report_type=monthly&year=2025&month=1&validate=true",
+        headers=user_token_headers,
+    )
+    assert response.status_code == 422
+    detail = response.json()["detail"]
+    assert detail["message"] == "SAF-T file failed XSD validation"
+    assert detail["errors"][0]["line"] is not None
+
+
+def test_generate_saft_refused_when_exports_are_busy(
+    client: TestClient, db: Session, monkeypatch
+) -> None:
+    monkeypatch.setattr(saft_routes, "reporting_exports", ExportLimiter(0))
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.ADMIN)
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    response = client.get(
+        f"{settings.API_V1_STR}/saft/?report_type=monthly&year=2025&month=1&parallel=true",
+        headers=user_token_headers,
+    )
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "30"
+
+
+@pytest.mark.parametrize(
+    "path", ["sales-register", "purchase-register", "declaration", "vies"]
+)
+def test_vat_download_refused_when_exports_are_busy(
+    client: TestClient, db: Session, monkeypatch, path: str
+) -> None:
+    monkeypatch.setattr(saft_routes, "reporting_exports", ExportLimiter(0))
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.ADMIN)
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    response = client.get(
+        f"{settings.API_V1_STR}/saft/vat/{path}?year=2025&month=1",
+        headers=user_token_headers,
+    )
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "30"
+
+
+def test_vat_download_releases_its_export_slot(
+    client: TestClient, db: Session, monkeypatch
+) -> None:
+    monkeypatch.setattr(saft_routes, "reporting_exports", ExportLimiter(1))
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.ADMIN)
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    for _ in range(2):
+        response = client.get(
+            f"{settings.API_V1_STR}/saft/vat/sales-register?year=2025&month=1",
+            headers=user_token_headers,
+        )
+        assert response.status_code == 200
+    assert saft_routes.reporting_exports.acquire()
+
+
+def test_create_saft_job_monthly_requires_month(client: TestClient, db: Session) -> None:
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.ADMIN)
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    response = client.post(
+        f"{settings.API_V1_STR}/saft/jobs",
+        headers=user_token_headers,
+        json={"report_type": "monthly", "period_year": 2025},
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Month is required for monthly reports"
+
+
+def _wait_for_job(client: TestClient, headers: dict[str, str], job: dict) -> dict:
+    deadline = time.monotonic() + 30
+    while job["status"] in ("pending", "running") and time.monotonic() < deadline:
+        time.sleep(0.1)
+        job = client.get(f"{settings.API_V1_STR}/saft/jobs/{job['id']}", headers=headers).json()
+    return job
+
+
+def test_saft_job_generates_and_deduplicates(client: TestClient, db: Session, monkeypatch) -> None:
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.ADMIN)
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    job_in = {"report_type": "monthly", "period_year": 2025, "period_month": 1}
+    response = client.post(f"{settings.API_V1_STR}/saft/jobs", headers=user_token_headers, json=job_in)
+    assert response.status_code == 200
+    job = response.json()
+    assert job["organization_id"] == str(organization.id)
+    assert job["sections_total"] == 4
+
+    job = _wait_for_job(client, user_token_headers, job)
+    assert job["status"] == "completed", job["error_message"]
+    assert job["sections_done"] == 4
+
+    response = client.get(f"{settings.API_V1_STR}/saft/jobs/{job['id']}/download", headers=user_token_headers)
+    assert response.status_code == 200
+    assert "saft_monthly_2025_01.xml.gz" in response.headers["content-disposition"]
+    root = ElementTree.fromstring(gzip.decompress(response.content))
+    assert root.find(f"{NS}Header/{NS}Company/{NS}Name").text == organization.name
+
+    artifact = response.content
+
+    # Same report over unchanged data: the finished artifact is reused
+    def _no_generation(*args, **kwargs):
+        raise AssertionError("the artifact should have been reused")
+
+    monkeypatch.setattr(saft_jobs.SAFT, "iter_sections", _no_generation)
+    response = client.post(f"{settings.API_V1_STR}/saft/jobs", headers=user_token_headers, json=job_in)
+    second = _wait_for_job(client, user_token_headers, response.json())
+    assert second["id"] != job["id"]
+    assert second["status"] == "completed", second["error_message"]
+    assert second["rows_written"] == job["rows_written"]
+    response = client.get(f"{settings.API_V1_STR}/saft/jobs/{second['id']}/download", headers=user_token_headers)
+    assert response.content == artifact
+
+
+def test_saft_job_replaces_a_job_left_by_a_restarted_worker(client: TestClient, db: Session) -> None:
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.ADMIN)
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    # Created before this process's worker pool, which does not know it
+    orphan = SaftExportJob(
+        report_type="monthly",
+        period_year=2025,
+        period_month=2,
+        organization_id=organization.id,
+        created_by_id=user.id,
+        status=SaftExportJobStatus.RUNNING,
+        date_created=datetime(2025, 1, 1, tzinfo=timezone.utc),
+    )
+    db.add(orphan)
+    db.commit()
+
+    job_in = {"report_type": "monthly", "period_year": 2025, "period_month": 2}
+    response = client.post(f"{settings.API_V1_STR}/saft/jobs", headers=user_token_headers, json=job_in)
+    job = _wait_for_job(client, user_token_headers, response.json())
+    assert job["id"] != str(orphan.id)
+    assert job["status"] == "completed", job["error_message"]
+    db.refresh(orphan)
+    assert orphan.status == SaftExportJobStatus.FAILED
+
+
+def test_generate_vat_declaration_round_trip(client: TestClient, db: Session) -> None:
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    organization.vat_number = "BG111222333"
+    organization.legal_representative_name = "Иван Петров"
+    db.add(organization)
+    create_organization_membership(db, user, organization, OrganizationRole.ADMIN)
+    db.add_all([
+        sales_register_row(organization, date(2025, 1, 10), "1", "100.00"),
+        sales_register_row(organization, date(2025, 1, 20), "2", "50.50", vat_rate="9"),
+        # Another period
+        sales_register_row(organization, date(2025, 2, 1), "3", "999.00"),
+        purchase_register_row(organization, date(2025, 1, 15), "P1", "30.00", "6.00"),
+    ])
+    db.commit()
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    try:
+        response = client.get(
+            f"{settings.API_V1_STR}/saft/vat/declaration?year=2025&month=1",
+            headers=user_token_headers,
+        )
+    finally:
+        delete_vat_registers(db, organization)
+    assert response.status_code == 200
+    assert "attachment; filename=DEKLAR_2025_01.txt" in response.headers["content-disposition"]
+    record = DEKLAR.parse(response.content.decode("cp1251"))
+    assert record["vat_number"] == "BG111222333"
+    assert record["name"] == organization.name
+    assert record["period"] == "202501"
+    assert record["submitter"] == "Иван Петров"
+    assert record["sales_count"] == 2
+    assert record["purchases_count"] == 1
+    assert record["sales_taxable_base"] == Decimal("150.50")
+    assert record["sales_vat_amount"] == Decimal("24.54")
+    assert record["purchases_taxable_base"] == Decimal("30.00")
+    assert record["purchases_vat_amount"] == Decimal("6.00")
+    assert DEKLAR.format_dict(record) == response.content.decode("cp1251")
+
+
+def test_generate_vies_declaration_without_eu_supplies(client: TestClient, db: Session) -> None:
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    organization.vat_number = "BG111222333"
+    db.add(organization)
+    create_organization_membership(db, user, organization, OrganizationRole.ADMIN)
+    # Domestic supplies are not declared
+    db.add(sales_register_row(organization, date(2025, 1, 10), "1", "100.00"))
+    db.commit()
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    try:
+        response = client.get(
+            f"{settings.API_V1_STR}/saft/vat/vies?year=2025&month=1",
+            headers=user_token_headers,
+        )
+    finally:
+        delete_vat_registers(db, organization)
+    assert response.status_code == 200
+    assert "attachment; filename=VIES_2025_01.txt" in response.headers["content-disposition"]
+    records = list(iter_parse(response.content.decode("cp1251").splitlines(), VIES_HEADER, VIES_LINE))
+    assert len(records) == 1
+    layout, header = records[0]
+    assert layout is VIES_HEADER
+    assert header["vat_number"] == "BG111222333"
+    assert header["name"] == organization.name
+    assert header["period"] == "202501"
+    assert header["line_count"] == 0
+
+
+def test_vat_bulk_export_requires_membership(client: TestClient, db: Session) -> None:
+    user = create_random_user(db=db)
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    organization_id = str(uuid.uuid4())
+    response = client.post(
+        f"{settings.API_V1_STR}/saft/vat/bulk",
+        headers=user_token_headers,
+        json={"organization_ids": [organization_id], "period_year": 2025, "period_month": 1},
+    )
+    assert response.status_code == 403
+    assert organization_id in response.json()["detail"]
+
+
+def test_vat_bulk_export_refused_when_exports_are_busy(
+    client: TestClient, db: Session, monkeypatch
+) -> None:
+    monkeypatch.setattr(saft_routes, "reporting_exports", ExportLimiter(0))
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.ADMIN)
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    response = client.post(
+        f"{settings.API_V1_STR}/saft/vat/bulk",
+        headers=user_token_headers,
+        json={"organization_ids": [str(organization.id)], "period_year": 2025, "period_month": 1},
+    )
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "30"
+
+
+def test_vat_bulk_export_releases_its_export_slot(
+    client: TestClient, db: Session, monkeypatch
+) -> None:
+    monkeypatch.setattr(saft_routes, "reporting_exports", ExportLimiter(1))
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.ADMIN)
+    user_token_headers = authentication_token_from_email(
+        client=client, email=user.email, db=db
+    )
+    response = client.post(
+        f"{settings.API_V1_STR}/saft/vat/bulk",
+        headers=user_token_headers,
+        json={"organization_ids": [str(organization.id)], "period_year": 2025, "period_month": 1},
+    )
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert "REPORT.TXT" in archive.namelist()
+    assert saft_routes.reporting_exports.acquire()
@@ -0,0 +1,32 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models import OrganizationRole
+from app.tests.conftest import (
+    create_organization_membership,
+    create_test_organization,
+)
+from app.tests.utils.user import authentication_token_from_email, create_random_user
+
+
+def test_read_stock_levels_keyset_page(client: TestClient, db: Session) -> None:
+    user = create_random_user(db=db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization, OrganizationRole.ADMIN)
+    user_token_headers = authentication_token_from_email(client=client, email=user.email, db=db)
+
+    response = client.get(
+        f"{settings.API_V1_STR}/stock_levels/?limit=10&count=none",
+        headers=user_token_headers,
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["count"] is None
+    assert content["next_cursor"] is None
+
+    response = client.get(
+        f"{settings.API_V1_STR}/stock_levels/?after=not-a-cursor",
+        headers=user_token_headers,
+    )
+    assert response.status_code == 400
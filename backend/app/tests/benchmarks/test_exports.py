@@ -0,0 +1,36 @@
+from collections.abc import Generator
+
+import pytest
+from sqlmodel import Session, delete, select
+
+from app.benchmarks.exports import CASES, run_case
+from app.benchmarks.tenant import SyntheticTenant, TenantSpec
+from app.models import Organization, Product, Sale, User
+from app.tests.utils.vat import delete_vat_registers
+
+TINY = TenantSpec(
+    accounts=5, contraagents=3, products=3,
+    sales=6, purchases=4, payments=4, entry_lines=24, seed=9_001,
+)
+
+
+@pytest.fixture(scope="module")
+def tenant(db: Session) -> Generator[Organization, None, None]:
+    organization = SyntheticTenant(db, TINY).get_or_create()
+    yield organization
+    # Register rows and products do not cascade with their organization
+    delete_vat_registers(db, organization)
+    db.exec(delete(Product).where(Product.organization_id == organization.id))
+    db.exec(delete(Organization).where(Organization.id == organization.id))
+    db.exec(delete(User).where(User.id == SyntheticTenant(db, TINY).user_id))
+    db.commit()
+
+
+@pytest.mark.parametrize("case", list(CASES))
+def test_benchmark_case_runs(db: Session, tenant: Organization, case: str) -> None:
+    # A month with documents, so every section renders some rows
+    sale = db.exec(select(Sale).where(Sale.organization_id == tenant.id).order_by(Sale.date_sale)).first()
+    result = run_case(case, tenant.id, TINY.year, sale.date_sale.month)
+    assert result.error is None
+    assert result.output_bytes is not None
+    assert result.queries > 0
@@ -0,0 +1,19 @@
+from app.core.config import Settings
+
+
+def test_reporting_pool_size_covers_render_workers() -> None:
+    config = Settings(
+        SAFT_JOB_WORKERS=2, SAFT_RENDER_WORKERS=4, VAT_BULK_WORKERS=4, REPORTING_MAX_EXPORTS=2
+    )
+    assert config.REPORTING_POOL_SIZE == 2 + 2 * (1 + 4)
+
+
+def test_reporting_pool_size_covers_bulk_vat_workers() -> None:
+    config = Settings(
+        SAFT_JOB_WORKERS=2, SAFT_RENDER_WORKERS=4, VAT_BULK_WORKERS=8, REPORTING_MAX_EXPORTS=3
+    )
+    assert config.REPORTING_POOL_SIZE == 2 + 3 * 8
+
+
+def test_reporting_pool_size_is_kept_when_set() -> None:
+    assert Settings(REPORTING_POOL_SIZE=7, VAT_BULK_WORKERS=20).REPORTING_POOL_SIZE == 7
@@ -0,0 +1,34 @@
+import gc
+
+from app.core.db import ExportLimiter
+
+
+def test_export_limiter_refuses_when_full() -> None:
+    limiter = ExportLimiter(2)
+    assert limiter.acquire()
+    assert limiter.acquire()
+    assert not limiter.acquire()
+
+    assert list(limiter.release_after(iter(["a", "b"]))) == ["a", "b"]
+    assert limiter.acquire()
+    assert not limiter.acquire()
+
+
+def test_export_limiter_releases_closed_and_dropped_streams() -> None:
+    limiter = ExportLimiter(1)
+
+    assert limiter.acquire()
+    stream = limiter.release_after(iter(["a", "b"]))
+    assert next(stream) == "a"
+    stream.close()
+    assert limiter.acquire()
+
+    # Dropped before the response started iterating it
+    stream = limiter.release_after(iter(["a"]))
+    del stream
+    gc.collect()
+    assert limiter.acquire()
+
+
+def test_export_limiter_without_slots() -> None:
+    assert not ExportLimiter(0).acquire()
@@ -0,0 +1,82 @@
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+from sqlmodel import Session, select
+
+from app.core.pagination import (
+    CountMode,
+    InvalidCursor,
+    PageParams,
+    SortKey,
+    decode_cursor,
+    encode_cursor,
+    paginate,
+)
+from app.models import Contraagent
+from app.tests.conftest import create_test_organization
+from app.tests.utils.user import create_random_user
+
+
+def test_cursor_round_trip() -> None:
+    values = [
+        None,
+        datetime(2025, 3, 1, 8, 30, tzinfo=timezone.utc),
+        date(2025, 3, 1),
+        Decimal("12.30"),
+        12.345,
+        7,
+        "Клиент",
+        uuid.uuid4(),
+    ]
+    assert decode_cursor(encode_cursor(*values)) == values
+
+
+def test_decode_rejects_a_malformed_cursor() -> None:
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not a cursor")
+
+
+@pytest.mark.parametrize("descending", [False, True])
+def test_nullable_key_pages_through_nulls_last(db: Session, descending: bool) -> None:
+    user = create_random_user(db)
+    organization = create_test_organization(db)
+    vat_numbers = ["BG1", None, "BG3", "BG1", None, "BG2", None]
+    db.add_all(
+        Contraagent(
+            name=f"Контрагент {i}",
+            vat_number=vat_number,
+            organization_id=organization.id,
+            created_by_id=user.id,
+        )
+        for i, vat_number in enumerate(vat_numbers)
+    )
+    db.commit()
+    statement = select(Contraagent).where(Contraagent.organization_id == organization.id)
+    key = SortKey(Contraagent.vat_number, Contraagent.id, descending=descending)
+    assert key.has_nulls
+
+    pages = []
+    params = PageParams(limit=2, count=CountMode.NONE)
+    while True:
+        page = paginate(db, statement, key, params)
+        pages.append(page.items)
+        if page.next_cursor is None:
+            break
+        params = PageParams(limit=2, after=page.next_cursor, count=CountMode.NONE)
+
+    rows = [row for items in pages for row in items]
+    assert [len(items) for items in pages] == [2, 2, 2, 1]
+    present = sorted(
+        (row for row in rows if row.vat_number is not None),
+        key=lambda row: (row.vat_number, row.id),
+        reverse=descending,
+    )
+    missing = sorted((row for row in rows if row.vat_number is None), key=lambda row: row.id, reverse=descending)
+    assert [row.id for row in rows] == [row.id for row in present + missing]
+
+
+def test_non_null_key_keeps_its_plain_order() -> None:
+    assert not SortKey(Contraagent.name, Contraagent.id).has_nulls
+    assert SortKey(Contraagent.name, Contraagent.id, nullable=True).has_nulls
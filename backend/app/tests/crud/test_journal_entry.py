@@ -0,0 +1,64 @@
+from datetime import date
+
+import pytest
+from sqlmodel import Session, select
+
+from app.crud.journal_entry import journal_entry
+from app.models import EntryLine, JournalEntryUpdate
+from app.models.account_period_balance import AccountPeriodBalance
+from app.services.account_balance import AccountBalanceService
+from app.services.account_period_balance import AccountPeriodBalanceService
+from app.services.period_close import ClosedPeriodError, PeriodCloseService
+from app.tests.conftest import create_test_organization
+from app.tests.utils.ledger import create_random_account, post_entry
+from app.tests.utils.user import create_random_user
+
+
+def _months(db: Session, organization) -> list[tuple[int, int]]:
+    return list(db.exec(
+        select(AccountPeriodBalance.period_year, AccountPeriodBalance.period_month)
+        .where(AccountPeriodBalance.organization_id == organization.id)
+        .distinct()
+        .order_by(AccountPeriodBalance.period_year, AccountPeriodBalance.period_month)
+    ).all())
+
+
+def _consistent(db: Session, organization) -> bool:
+    return (
+        AccountPeriodBalanceService(db, organization.id).verify() == []
+        and AccountBalanceService(db, organization.id).verify() == []
+    )
+
+
+def test_update_and_remove_keep_the_turnovers(db: Session) -> None:
+    user = create_random_user(db)
+    organization = create_test_organization(db)
+    cash = create_random_account(db, user, organization, "501")
+    revenue = create_random_account(db, user, organization, "702")
+    entry = post_entry(db, user, organization, date(2025, 1, 10), [(cash, 10, 0), (revenue, 0, 10)])
+    assert _months(db, organization) == [(2025, 1)]
+
+    journal_entry.update(db, db_obj=entry, obj_in=JournalEntryUpdate(entry_date=date(2025, 2, 3)))
+    assert _months(db, organization) == [(2025, 2)]
+    assert _consistent(db, organization)
+
+    journal_entry.remove(db, id=entry.id)
+    assert _months(db, organization) == []
+    assert db.exec(select(EntryLine).where(EntryLine.journal_entry_id == entry.id)).first() is None
+    assert _consistent(db, organization)
+
+
+def test_entries_of_a_closed_month_cannot_be_changed(db: Session) -> None:
+    user = create_random_user(db)
+    organization = create_test_organization(db)
+    cash = create_random_account(db, user, organization, "501")
+    revenue = create_random_account(db, user, organization, "702")
+    entry = post_entry(db, user, organization, date(2025, 1, 10), [(cash, 10, 0), (revenue, 0, 10)])
+    PeriodCloseService(db, organization.id).close(2025, 1, user.id)
+    db.commit()
+
+    with pytest.raises(ClosedPeriodError):
+        journal_entry.update(db, db_obj=entry, obj_in={"entry_date": date(2025, 2, 3)})
+    with pytest.raises(ClosedPeriodError):
+        journal_entry.remove(db, id=entry.id)
+    assert _months(db, organization) == [(2025, 1)]
@@ -0,0 +1,64 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlmodel import Session, update
+
+from app.models import Account
+from app.services.account_balance import AccountBalanceService
+from app.tests.conftest import create_organization_membership, create_test_organization
+from app.tests.utils.ledger import create_random_account, post_entry
+from app.tests.utils.user import create_random_user
+
+
+def _balances(db: Session, *accounts: Account) -> list[Decimal]:
+    for account in accounts:
+        db.refresh(account)
+    return [Decimal(str(account.balance)) for account in accounts]
+
+
+def test_posting_and_unposting_apply_exact_deltas(db: Session) -> None:
+    user = create_random_user(db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization)
+    cash = create_random_account(db, user, organization, "501", opening_balance=100)
+    revenue = create_random_account(db, user, organization, "702")
+    service = AccountBalanceService(db, organization.id)
+
+    # Cents that are inexact as binary floats
+    entries = [
+        post_entry(db, user, organization, date(2025, 3, 1), [(cash, amount, 0), (revenue, 0, amount)])
+        for amount in ("0.10", "0.20", "0.70")
+    ]
+    assert _balances(db, cash, revenue) == [Decimal("101"), Decimal("-1")]
+    assert service.verify() == []
+
+    service.unpost_entries([entries[1].id])
+    db.commit()
+    assert _balances(db, cash, revenue) == [Decimal("100.8"), Decimal("-0.8")]
+
+    # Nothing to apply
+    service.post_entries([])
+    service.unpost_entries([])
+    db.commit()
+    assert _balances(db, cash, revenue) == [Decimal("100.8"), Decimal("-0.8")]
+
+
+def test_verify_reports_and_rebuild_repairs_balances(db: Session) -> None:
+    user = create_random_user(db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization)
+    cash = create_random_account(db, user, organization, "501", opening_balance=10)
+    revenue = create_random_account(db, user, organization, "702")
+    post_entry(db, user, organization, date(2025, 3, 1), [(cash, "2.50", 0), (revenue, 0, "2.50")])
+    service = AccountBalanceService(db, organization.id)
+
+    db.exec(update(Account).where(Account.id == cash.id).values(balance=99))
+    db.commit()
+    (mismatch,) = service.verify()
+    assert (mismatch.account_id, mismatch.code) == (cash.id, "501")
+    assert (mismatch.stored_balance, mismatch.ledger_balance) == (Decimal("99.00"), Decimal("12.50"))
+
+    assert service.rebuild() == 2
+    db.commit()
+    assert service.verify() == []
+    assert _balances(db, cash, revenue) == [Decimal("12.5"), Decimal("-2.5")]
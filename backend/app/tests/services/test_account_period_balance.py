@@ -0,0 +1,90 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlmodel import Session, delete, select, update
+
+from app.models import AccountPeriodBalance, EntryLine, JournalEntry
+from app.services.account_period_balance import AccountPeriodBalanceService
+from app.tests.conftest import create_organization_membership, create_test_organization
+from app.tests.utils.ledger import create_random_account, post_entry
+from app.tests.utils.user import create_random_user
+
+
+def _turnovers(db: Session, organization) -> dict:
+    rows = db.exec(
+        select(AccountPeriodBalance).where(AccountPeriodBalance.organization_id == organization.id)
+    ).all()
+    return {
+        (row.account_id, row.period_year, row.period_month): (row.debit, row.credit, row.line_count)
+        for row in rows
+    }
+
+
+def _remove(db: Session, organization, *entries: JournalEntry) -> None:
+    ids = [entry.id for entry in entries]
+    AccountPeriodBalanceService(db, organization.id).unpost_entries(ids)
+    db.exec(delete(EntryLine).where(EntryLine.journal_entry_id.in_(ids)))
+    db.exec(delete(JournalEntry).where(JournalEntry.id.in_(ids)))
+    db.commit()
+
+
+def test_post_and_unpost_round_trip(db: Session) -> None:
+    user = create_random_user(db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization)
+    cash = create_random_account(db, user, organization, "501")
+    revenue = create_random_account(db, user, organization, "702")
+    service = AccountPeriodBalanceService(db, organization.id)
+
+    first = post_entry(db, user, organization, date(2025, 3, 5), [(cash, "100.00", 0), (revenue, 0, "100.00")])
+    second = post_entry(db, user, organization, date(2025, 3, 20), [(cash, "20.50", 0), (revenue, 0, "20.50")])
+    april = post_entry(db, user, organization, date(2025, 4, 1), [(cash, "7.00", 0), (revenue, 0, "7.00")])
+
+    assert _turnovers(db, organization) == {
+        (cash.id, 2025, 3): (Decimal("120.50"), Decimal("0.00"), 2),
+        (revenue.id, 2025, 3): (Decimal("0.00"), Decimal("120.50"), 2),
+        (cash.id, 2025, 4): (Decimal("7.00"), Decimal("0.00"), 1),
+        (revenue.id, 2025, 4): (Decimal("0.00"), Decimal("7.00"), 1),
+    }
+    assert service.verify() == []
+
+    _remove(db, organization, second)
+    db.expire_all()
+    assert _turnovers(db, organization)[(cash.id, 2025, 3)] == (Decimal("100.00"), Decimal("0.00"), 1)
+    assert service.verify() == []
+
+    # The last lines of a month remove its rows
+    _remove(db, organization, first, april)
+    db.expire_all()
+    assert _turnovers(db, organization) == {}
+    assert service.verify() == []
+
+
+def test_verify_reports_and_rebuild_repairs_drift(db: Session) -> None:
+    user = create_random_user(db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization)
+    cash = create_random_account(db, user, organization, "501")
+    revenue = create_random_account(db, user, organization, "702")
+    post_entry(db, user, organization, date(2024, 12, 31), [(cash, "10.00", 0), (revenue, 0, "10.00")])
+    post_entry(db, user, organization, date(2025, 1, 2), [(cash, "30.00", 0), (revenue, 0, "30.00")])
+    service = AccountPeriodBalanceService(db, organization.id)
+    expected = _turnovers(db, organization)
+
+    db.exec(
+        update(AccountPeriodBalance)
+        .where(AccountPeriodBalance.account_id == cash.id, AccountPeriodBalance.period_year == 2025)
+        .values(debit=Decimal("31.00"))
+    )
+    db.commit()
+
+    (discrepancy,) = service.verify()
+    assert (discrepancy.account_id, discrepancy.period_year, discrepancy.period_month) == (cash.id, 2025, 1)
+    assert (discrepancy.stored_debit, discrepancy.ledger_debit) == (Decimal("31.00"), Decimal("30.00"))
+    assert service.verify(2024) == []
+
+    assert service.rebuild(2025) == 2
+    db.commit()
+    db.expire_all()
+    assert service.verify() == []
+    assert _turnovers(db, organization) == expected
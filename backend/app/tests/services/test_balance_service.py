@@ -0,0 +1,64 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlmodel import Session, func, select
+
+from app.models import EntryLine, JournalEntry
+from app.services.balance_service import AccountTurnover, BalanceService
+from app.tests.conftest import create_organization_membership, create_test_organization
+from app.tests.utils.ledger import create_random_account, post_entry
+from app.tests.utils.user import create_random_user
+
+
+def _account_turnover(db: Session, account_id, period_start: date, period_end: date) -> AccountTurnover:
+    """The per-account sums get_turnovers() replaced, two queries per account."""
+
+    def _sums(*conditions):
+        debit, credit = db.exec(
+            select(func.coalesce(func.sum(EntryLine.debit), 0), func.coalesce(func.sum(EntryLine.credit), 0))
+            .join(JournalEntry, JournalEntry.id == EntryLine.journal_entry_id)
+            .where(EntryLine.account_id == account_id, *conditions)
+        ).one()
+        return Decimal(str(debit)).quantize(Decimal("0.01")), Decimal(str(credit)).quantize(Decimal("0.01"))
+
+    debit_before, credit_before = _sums(JournalEntry.entry_date < period_start)
+    debit_period, credit_period = _sums(
+        JournalEntry.entry_date >= period_start, JournalEntry.entry_date <= period_end
+    )
+    return AccountTurnover(account_id, debit_before, credit_before, debit_period, credit_period)
+
+
+def test_get_turnovers_matches_per_account_sums(db: Session) -> None:
+    user = create_random_user(db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization)
+    cash = create_random_account(db, user, organization, "501", opening_balance=100)
+    revenue = create_random_account(db, user, organization, "702")
+    clients = create_random_account(db, user, organization, "411")
+    idle = create_random_account(db, user, organization, "601")
+
+    post_entry(db, user, organization, date(2024, 12, 15), [(cash, "10.10", 0), (revenue, 0, "10.10")])
+    post_entry(db, user, organization, date(2025, 1, 1), [(clients, "240.00", 0), (revenue, 0, "240.00")])
+    post_entry(db, user, organization, date(2025, 1, 31), [(cash, "99.99", 0), (clients, 0, "99.99")])
+    post_entry(db, user, organization, date(2025, 2, 1), [(cash, "5.00", 0), (revenue, 0, "5.00")])
+
+    period_start, period_end = date(2025, 1, 1), date(2025, 1, 31)
+    turnovers = BalanceService(db, organization.id).get_turnovers(period_start, period_end)
+
+    assert set(turnovers) == {cash.id, revenue.id, clients.id}
+    for account in (cash, revenue, clients):
+        assert turnovers[account.id] == _account_turnover(db, account.id, period_start, period_end)
+    assert idle.id not in turnovers
+    assert turnovers[cash.id].opening_balance(Decimal(100)) == Decimal("110.10")
+    assert turnovers[cash.id].closing_balance(Decimal(100)) == Decimal("210.09")
+    assert turnovers[revenue.id].closing_balance() == Decimal("-250.10")
+
+    # opening_from limits the opening turnover to the year
+    year_turnovers = BalanceService(db, organization.id).get_turnovers(
+        period_start, period_end, opening_from=date(2025, 1, 1)
+    )
+    assert year_turnovers[cash.id].debit_before == Decimal("0.00")
+    assert year_turnovers[cash.id].debit_period == Decimal("99.99")
+
+    # The monthly turnovers agree with entry_line
+    assert BalanceService(db, organization.id).get_month_turnovers(2025, 1, 1) == year_turnovers
@@ -0,0 +1,92 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlmodel import Session, func, select
+
+from app.models import AccountPeriodBalance, EntryLine, JournalEntry
+from app.services.journal import BATCH_REJECTED, JournalService, Posting, PostingLine
+from app.services.period_close import PeriodCloseService
+from app.tests.conftest import create_organization_membership, create_test_organization
+from app.tests.utils.ledger import create_random_account
+from app.tests.utils.user import create_random_user
+
+
+@pytest.fixture()
+def ledger(db: Session):
+    user = create_random_user(db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization)
+    cash = create_random_account(db, user, organization, "501")
+    revenue = create_random_account(db, user, organization, "702")
+    return JournalService(db, user, organization), cash, revenue
+
+
+def _posting(source: str, entry_date: date, cash, revenue, debit: str, credit: str | None = None) -> Posting:
+    return Posting(
+        source=source,
+        entry_date=entry_date,
+        description=source,
+        lines=[
+            PostingLine(cash.id, debit=Decimal(debit)),
+            PostingLine(revenue.id, credit=Decimal(credit or debit)),
+        ],
+    )
+
+
+def _written(db: Session, service: JournalService) -> tuple[int, int, int]:
+    organization_id = service.current_organization.id
+    return tuple(
+        db.exec(select(func.count()).select_from(model).where(model.organization_id == organization_id)).one()
+        for model in (JournalEntry, EntryLine, AccountPeriodBalance)
+    )
+
+
+def test_post_batch_writes_every_document(db: Session, ledger) -> None:
+    service, cash, revenue = ledger
+    postings = [
+        _posting("Payment:1", date(2025, 3, 1), cash, revenue, "10.00"),
+        _posting("Sale:2", date(2025, 3, 15), cash, revenue, "20.00"),
+        _posting("Purchase:3", date(2025, 4, 2), cash, revenue, "30.00"),
+    ]
+
+    results = service.post_batch(postings)
+
+    assert [result.source for result in results] == ["Payment:1", "Sale:2", "Purchase:3"]
+    assert all(result.ok for result in results)
+    entries = {entry.id: entry for entry in db.exec(select(JournalEntry).where(
+        JournalEntry.id.in_([result.journal_entry_id for result in results])
+    ))}
+    assert [entries[result.journal_entry_id].reference for result in results] == ["Payment:1", "Sale:2", "Purchase:3"]
+    assert _written(db, service) == (3, 6, 4)
+    db.refresh(cash)
+    assert Decimal(str(cash.balance)) == Decimal("60.00")
+
+
+def test_post_batch_with_an_unbalanced_posting_writes_nothing(db: Session, ledger) -> None:
+    service, cash, revenue = ledger
+
+    results = service.post_batch([
+        _posting("Sale:1", date(2025, 3, 1), cash, revenue, "10.00"),
+        _posting("Sale:2", date(2025, 3, 2), cash, revenue, "10.00", "9.99"),
+    ])
+
+    assert not any(result.ok for result in results)
+    assert results[0].error == BATCH_REJECTED
+    assert results[1].error == "Entry does not balance: debit 10.00, credit 9.99"
+    assert all(result.journal_entry_id is None for result in results)
+    assert _written(db, service) == (0, 0, 0)
+
+
+def test_post_batch_into_a_closed_month_writes_nothing(db: Session, ledger) -> None:
+    service, cash, revenue = ledger
+    PeriodCloseService(db, service.current_organization.id).close(2025, 1, service.current_user.id)
+    db.commit()
+
+    results = service.post_batch([
+        _posting("Sale:1", date(2025, 1, 31), cash, revenue, "10.00"),
+        _posting("Sale:2", date(2025, 2, 1), cash, revenue, "10.00"),
+    ])
+
+    assert [result.error for result in results] == ["Period 2025-01 is closed", BATCH_REJECTED]
+    assert _written(db, service) == (0, 0, 0)
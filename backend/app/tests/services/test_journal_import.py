@@ -0,0 +1,120 @@
+import io
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlmodel import Session, select
+
+from app.models import Account, EntryLine, JournalEntry
+from app.services.account_period_balance import AccountPeriodBalanceService
+from app.services.journal_import import JournalImportService
+from app.services.period_close import PeriodCloseService
+from app.tests.conftest import create_organization_membership, create_test_organization
+from app.tests.utils.ledger import create_random_account
+from app.tests.utils.user import create_random_user
+
+HEADER = "entry_ref,entry_date,description,reference,currency_code,account_code,debit,credit,line_description\n"
+
+
+@pytest.fixture()
+def ledger(db: Session):
+    user = create_random_user(db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization)
+    create_random_account(db, user, organization, "501")
+    create_random_account(db, user, organization, "702")
+    return user, organization
+
+
+def _import(db: Session, ledger, text: str, file_format: str = "csv"):
+    user, organization = ledger
+    result = JournalImportService(db, organization.id, user.id).import_file(io.StringIO(text), file_format)
+    db.commit()
+    return result
+
+
+def _entries(db: Session, organization) -> list[JournalEntry]:
+    return list(db.exec(select(JournalEntry).where(JournalEntry.organization_id == organization.id)))
+
+
+def test_import_valid_entry(db: Session, ledger) -> None:
+    _, organization = ledger
+    result = _import(
+        db,
+        ledger,
+        HEADER
+        + "A1,2025-03-04,Продажба,INV-1,BGN,501,120.00,,Каса\n"
+        + "A1,2025-03-04,Продажба,INV-1,BGN,702,,120.00,Приход\n",
+    )
+
+    assert (result.entries_imported, result.lines_imported) == (1, 2)
+    assert (result.entries_rejected, result.lines_rejected, result.rejects) == (0, 0, [])
+    (entry,) = _entries(db, organization)
+    assert (entry.entry_date, entry.reference, entry.description) == (date(2025, 3, 4), "INV-1", "Продажба")
+    lines = db.exec(select(EntryLine).where(EntryLine.journal_entry_id == entry.id)).all()
+    assert sorted((line.debit, line.credit) for line in lines) == [
+        (Decimal("0.00"), Decimal("120.00")),
+        (Decimal("120.00"), Decimal("0.00")),
+    ]
+    # Posted to the monthly turnovers as well
+    assert AccountPeriodBalanceService(db, organization.id).verify() == []
+    cash = db.exec(select(Account).where(Account.organization_id == organization.id, Account.code == "501")).one()
+    db.refresh(cash)
+    assert Decimal(str(cash.balance)) == Decimal("120.00")
+
+
+def test_import_rejects_unbalanced_entry(db: Session, ledger) -> None:
+    _, organization = ledger
+    result = _import(
+        db,
+        ledger,
+        '{"entry_ref": "B1", "entry_date": "2025-03-05", "lines": ['
+        '{"account_code": "501", "debit": "10.00"}, {"account_code": "702", "credit": "9.99"}]}\n'
+        '{"entry_ref": "B2", "entry_date": "2025-03-05", "lines": ['
+        '{"account_code": "501", "debit": "5.00"}, {"account_code": "702", "credit": "5.00"}]}\n',
+        "jsonl",
+    )
+
+    assert (result.entries_imported, result.entries_rejected, result.lines_rejected) == (1, 1, 2)
+    assert {(reject.entry_ref, reject.error) for reject in result.rejects} == {("B1", "Entry does not balance")}
+    assert len(_entries(db, organization)) == 1
+
+
+def test_import_rejects_unknown_account_with_its_whole_entry(db: Session, ledger) -> None:
+    _, organization = ledger
+    result = _import(
+        db,
+        ledger,
+        HEADER
+        + "C1,2025-03-06,,,BGN,501,50.00,,\n"
+        + "C1,2025-03-06,,,BGN,999,,50.00,\n",
+    )
+
+    assert (result.entries_imported, result.lines_imported) == (0, 0)
+    assert [(reject.line, reject.error) for reject in result.rejects] == [
+        (2, "Another line of the entry was rejected"),
+        (3, "Unknown account 999"),
+    ]
+    assert _entries(db, organization) == []
+
+
+def test_import_rejects_entries_of_a_closed_period(db: Session, ledger) -> None:
+    user, organization = ledger
+    PeriodCloseService(db, organization.id).close(2025, 1, user.id)
+    db.commit()
+
+    result = _import(
+        db,
+        ledger,
+        HEADER
+        + "D1,2025-01-31,,,BGN,501,1.00,,\n"
+        + "D1,2025-01-31,,,BGN,702,,1.00,\n"
+        + "D2,2025-02-01,,,BGN,501,1.00,,\n"
+        + "D2,2025-02-01,,,BGN,702,,1.00,\n",
+    )
+
+    assert (result.entries_imported, result.entries_rejected) == (1, 1)
+    assert {(reject.entry_ref, reject.error) for reject in result.rejects} == {
+        ("D1", "The period of the entry date is closed")
+    }
+    assert [entry.entry_date for entry in _entries(db, organization)] == [date(2025, 2, 1)]
@@ -0,0 +1,64 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlmodel import Session
+
+from app.services.ledger_reports import LedgerReportService, decode_cursor
+from app.services.period_close import PeriodCloseService
+from app.tests.conftest import create_organization_membership, create_test_organization
+from app.tests.utils.ledger import create_random_account, post_entry
+from app.tests.utils.user import create_random_user
+
+
+def test_account_card_cursor_carries_no_balance(db: Session) -> None:
+    user = create_random_user(db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization)
+    cash = create_random_account(db, user, organization, "501", opening_balance=100)
+    revenue = create_random_account(db, user, organization, "702")
+    post_entry(db, user, organization, date(2025, 1, 31), [(cash, "1.00", 0), (revenue, 0, "1.00")])
+    for amount in ("10.00", "20.00", "30.00"):
+        post_entry(db, user, organization, date(2025, 2, 14), [(cash, amount, 0), (revenue, 0, amount)])
+    service = LedgerReportService(db, organization.id)
+
+    first = service.account_card(cash, date_from=date(2025, 2, 1), limit=2)
+    assert first.opening_balance == Decimal("101.00")
+    # Only the position: a client cannot start the next page from a balance of its choice
+    assert len(decode_cursor(first.next_cursor)) == 2
+
+    # The cursor falls between lines of the same day
+    second = service.account_card(cash, date_from=date(2025, 2, 1), after=first.next_cursor, limit=2)
+    assert second.opening_balance == first.data[-1].balance
+    # Same-day lines run in id order
+    balance = first.opening_balance
+    for line in first.data + second.data:
+        balance += line.debit - line.credit
+        assert line.balance == balance
+    assert balance == Decimal("161.00")
+    assert second.next_cursor is None
+
+
+def test_closed_trial_balance_keeps_accounts_opened_after_the_close(db: Session) -> None:
+    user = create_random_user(db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization)
+    cash = create_random_account(db, user, organization, "501", opening_balance=100)
+    revenue = create_random_account(db, user, organization, "702")
+    post_entry(db, user, organization, date(2025, 1, 10), [(cash, "40.00", 0), (revenue, 0, "40.00")])
+    PeriodCloseService(db, organization.id).close(2025, 1, user.id)
+    db.commit()
+    equity = create_random_account(db, user, organization, "101", opening_balance=-100)
+
+    service = LedgerReportService(db, organization.id)
+    closed = service.trial_balance(2025, 1, 1)
+    rows = {row.code: row for row in closed.data}
+    assert set(rows) == {"101", "501", "702"}
+    assert rows["101"].opening_credit == Decimal("100.00")
+    assert rows["501"].closing_debit == Decimal("140.00")
+    assert closed.totals.opening_debit == closed.totals.opening_credit == Decimal("100.00")
+
+    # Same figures as from the live turnovers
+    PeriodCloseService(db, organization.id).reopen(2025, 1)
+    db.commit()
+    assert service.trial_balance(2025, 1, 1) == closed
+    assert equity.id in {row.account_id for row in closed.data}
@@ -0,0 +1,129 @@
+import importlib.util
+from collections.abc import Generator
+from datetime import date
+from pathlib import Path
+
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy import Connection, delete, insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.models import EntryLine, JournalEntry
+from app.services.account_period_balance import AccountPeriodBalanceService
+from app.services.period_close import PeriodCloseService
+from app.tests.conftest import create_test_organization
+from app.tests.utils.ledger import create_random_account
+from app.tests.utils.user import create_random_user
+
+MIGRATION = Path(__file__).parents[2] / "alembic" / "versions" / "add_period_close.py"
+
+
+def _migration():
+    spec = importlib.util.spec_from_file_location("add_period_close", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture()
+def connection() -> Generator[Connection, None, None]:
+    """The migration's triggers on the test schema, rolled back afterwards."""
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        with Operations.context(MigrationContext.configure(connection)):
+            _migration().create_write_protection()
+        yield connection
+        transaction.rollback()
+
+
+@pytest.fixture()
+def ledger(db: Session):
+    """
+    A committed organization and accounts detached from the shared session,
+    whose open transaction would otherwise block the trigger DDL.
+    """
+    user = create_random_user(db)
+    organization = create_test_organization(db)
+    cash = create_random_account(db, user, organization, "501")
+    revenue = create_random_account(db, user, organization, "702")
+    for instance in (user, organization, cash, revenue):
+        db.refresh(instance)
+        db.expunge(instance)
+    db.commit()
+    return user, organization, cash, revenue
+
+
+def _entry(user, organization, entry_date: date) -> JournalEntry:
+    return JournalEntry(
+        entry_date=entry_date,
+        organization_id=organization.id,
+        created_by_id=user.id,
+    )
+
+
+def _line(user, entry: JournalEntry, account, debit: int = 0, credit: int = 0) -> EntryLine:
+    return EntryLine(
+        debit=debit,
+        credit=credit,
+        organization_id=entry.organization_id,
+        created_by_id=user.id,
+        journal_entry_id=entry.id,
+        account_id=account.id,
+    )
+
+
+def _insert(connection: Connection, *rows) -> None:
+    connection.execute(insert(type(rows[0]).__table__), [row.model_dump() for row in rows])
+
+
+def _rejected(connection: Connection, statement, *parameters) -> str:
+    savepoint = connection.begin_nested()
+    with pytest.raises(IntegrityError) as error:
+        connection.execute(statement, *parameters)
+    savepoint.rollback()
+    return str(error.value.orig).splitlines()[0]
+
+
+def test_closed_month_rejects_statements_touching_it(ledger, connection: Connection) -> None:
+    user, organization, cash, revenue = ledger
+    january = _entry(user, organization, date(2025, 1, 20))
+    _insert(connection, january)
+    _insert(connection, _line(user, january, cash, debit=5), _line(user, january, revenue, credit=5))
+
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    AccountPeriodBalanceService(session, organization.id).rebuild(2025)
+    PeriodCloseService(session, organization.id).close(2025, 1, user.id)
+    session.commit()
+
+    # One statement over several months is rejected for the closed one
+    february = _entry(user, organization, date(2025, 2, 3))
+    back_dated = _entry(user, organization, date(2025, 1, 31))
+    error = _rejected(
+        connection,
+        insert(JournalEntry.__table__),
+        [february.model_dump(), back_dated.model_dump()],
+    )
+    assert error == "Period 2025-01 is closed"
+
+    _insert(connection, february)
+    _insert(connection, _line(user, february, cash, debit=7), _line(user, february, revenue, credit=7))
+    entries = JournalEntry.__table__
+    lines = EntryLine.__table__
+    assert _rejected(
+        connection, update(entries).where(entries.c.id == february.id).values(entry_date=date(2025, 1, 2))
+    ) == "Period 2025-01 is closed"
+    assert _rejected(
+        connection, update(lines).where(lines.c.journal_entry_id == january.id).values(description="x")
+    ) == "Period 2025-01 is closed"
+    assert _rejected(connection, delete(entries).where(entries.c.id == january.id)) == "Period 2025-01 is closed"
+    assert _rejected(
+        connection, insert(lines), [_line(user, january, cash, debit=1).model_dump()]
+    ) == "Period 2025-01 is closed"
+
+    PeriodCloseService(session, organization.id).reopen(2025, 1)
+    session.commit()
+    _insert(connection, back_dated)
+    connection.execute(delete(entries).where(entries.c.id == january.id))
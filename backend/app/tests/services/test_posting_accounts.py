@@ -0,0 +1,71 @@
+import pytest
+from sqlmodel import Session, delete
+
+from app.models import OrganizationSettings
+from app.services.posting_accounts import MissingPostingAccount, cache, posting_accounts
+from app.tests.conftest import create_organization_membership, create_test_organization
+from app.tests.utils.ledger import create_random_account
+from app.tests.utils.user import create_random_user
+
+
+@pytest.fixture()
+def ledger(db: Session):
+    user = create_random_user(db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization)
+    yield user, organization
+    # Settings reference the organization and its accounts without cascading
+    db.exec(delete(OrganizationSettings).where(OrganizationSettings.organization_id == organization.id))
+    db.commit()
+
+
+def test_fallback_to_the_national_chart_codes(db: Session, ledger) -> None:
+    user, organization = ledger
+    accounts = {
+        code: create_random_account(db, user, organization, code)
+        for code in ("411", "401", "501", "702", "602", "101")
+    }
+
+    resolved = posting_accounts(db, organization.id)
+
+    assert resolved.clients == accounts["411"].id
+    assert resolved.suppliers == accounts["401"].id
+    assert resolved.cash == accounts["501"].id
+    assert resolved.revenue == accounts["702"].id
+    assert resolved.expense == accounts["602"].id
+    assert resolved.opening_balance_equity == accounts["101"].id
+    with pytest.raises(MissingPostingAccount, match="No default bank account"):
+        resolved.require("bank")
+
+
+def test_organization_settings_commit_invalidates_the_cache(db: Session, ledger) -> None:
+    user, organization = ledger
+    cash = create_random_account(db, user, organization, "501")
+    till = create_random_account(db, user, organization, "5011")
+    assert posting_accounts(db, organization.id).cash == cash.id
+
+    organization_settings = OrganizationSettings(organization_id=organization.id, default_cash_account_id=till.id)
+    db.add(organization_settings)
+    db.flush()
+    # Not before the commit
+    assert cache.get(db, organization.id).cash == cash.id
+    db.commit()
+    assert posting_accounts(db, organization.id).cash == till.id
+
+    organization_settings.default_cash_account_id = None
+    db.add(organization_settings)
+    db.commit()
+    assert posting_accounts(db, organization.id).cash == cash.id
+
+
+def test_rolled_back_settings_keep_the_cache(db: Session, ledger) -> None:
+    user, organization = ledger
+    cash = create_random_account(db, user, organization, "501")
+    till = create_random_account(db, user, organization, "5011")
+    assert posting_accounts(db, organization.id).cash == cash.id
+
+    db.add(OrganizationSettings(organization_id=organization.id, default_cash_account_id=till.id))
+    db.flush()
+    db.rollback()
+
+    assert posting_accounts(db, organization.id).cash == cash.id
@@ -0,0 +1,123 @@
+from datetime import date
+
+from sqlalchemy import update
+from sqlmodel import Session
+
+from app.models import Account, EntryLine
+from app.services.saft.fingerprint import DataFingerprint, Scope, Source
+from app.services.saft.fragment_cache import SAFTFragmentCache
+from app.services.saft.master_files import SAFTMasterFiles
+from app.tests.conftest import create_organization_membership, create_test_organization
+from app.tests.utils.ledger import create_random_account, post_entry
+from app.tests.utils.user import create_random_user
+
+
+class _Renderer:
+    """Counts how often the wrapped fragment is actually rendered."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        yield self.text
+
+
+def _fragment(db: Session, organization, tmp_path, renderer: _Renderer) -> str:
+    cache = SAFTFragmentCache(db, organization.id, "monthly-2025-01", 2025, 1, root=tmp_path)
+    return "".join(cache.fragment("Ledger", (Source(EntryLine, Scope.MONTH),), renderer))
+
+
+def test_fragment_cache_hits_until_the_data_changes(db: Session, tmp_path) -> None:
+    user = create_random_user(db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization)
+    cash = create_random_account(db, user, organization, "501")
+    revenue = create_random_account(db, user, organization, "702")
+    entry = post_entry(db, user, organization, date(2025, 1, 10), [(cash, 10, 0), (revenue, 0, 10)])
+
+    renderer = _Renderer("<first/>")
+    assert _fragment(db, organization, tmp_path, renderer) == "<first/>"
+    assert _fragment(db, organization, tmp_path, renderer) == "<first/>"
+    assert renderer.calls == 1
+    assert len(list(tmp_path.glob("*.xml"))) == 1
+
+    # Amounts changed in place, no timestamps touched
+    db.execute(
+        update(EntryLine)
+        .where(EntryLine.journal_entry_id == entry.id)
+        .values(debit=EntryLine.debit * 2, credit=EntryLine.credit * 2)
+    )
+    db.commit()
+    renderer.text = "<second/>"
+    assert _fragment(db, organization, tmp_path, renderer) == "<second/>"
+    assert renderer.calls == 2
+    # Only the latest version is kept
+    assert len(list(tmp_path.glob("*.xml"))) == 1
+
+
+def test_fingerprint_sees_moved_lines_and_turnovers(db: Session) -> None:
+    user = create_random_user(db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization)
+    cash = create_random_account(db, user, organization, "501")
+    bank = create_random_account(db, user, organization, "503")
+    revenue = create_random_account(db, user, organization, "702")
+    entry = post_entry(db, user, organization, date(2025, 1, 10), [(cash, 10, 0), (revenue, 0, 10)])
+    fingerprint = DataFingerprint(db, organization.id, 2025, 1)
+    lines = Source(EntryLine, Scope.MONTH)
+    before = fingerprint.source(lines)
+
+    # Same count, same sums: the line moves to another account
+    db.execute(
+        update(EntryLine)
+        .where(EntryLine.journal_entry_id == entry.id, EntryLine.account_id == cash.id)
+        .values(account_id=bank.id)
+    )
+    db.commit()
+    assert fingerprint.source(lines) != before
+
+
+def test_fingerprint_ignores_other_periods_and_account_balances(db: Session) -> None:
+    user = create_random_user(db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization)
+    cash = create_random_account(db, user, organization, "501")
+    revenue = create_random_account(db, user, organization, "702")
+    post_entry(db, user, organization, date(2025, 1, 10), [(cash, 10, 0), (revenue, 0, 10)])
+    fingerprint = DataFingerprint(db, organization.id, 2025, 1)
+    sources = [Source(EntryLine, Scope.MONTH), Source(Account)]
+    before = fingerprint.sources(sources)
+    december = DataFingerprint(db, organization.id, 2025, 12)
+    december_before = december.source(sources[0])
+
+    # A later posting moves Account.balance but nothing dated in January
+    post_entry(db, user, organization, date(2025, 12, 5), [(cash, 7, 0), (revenue, 0, 7)])
+    db.refresh(cash)
+    assert cash.balance != 10
+    assert fingerprint.sources(sources) == before
+    assert december.source(sources[0]) != december_before
+
+
+def test_general_ledger_accounts_follow_the_monthly_turnovers(db: Session, tmp_path) -> None:
+    user = create_random_user(db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization)
+    cash = create_random_account(db, user, organization, "501")
+    revenue = create_random_account(db, user, organization, "702")
+
+    def _render() -> str:
+        cache = SAFTFragmentCache(db, organization.id, "monthly-2025-01", 2025, 1, root=tmp_path)
+        master_files = SAFTMasterFiles(db, organization, 2025, 1, cache=cache)
+        return "".join(master_files.iter_generate(report_type="monthly"))
+
+    empty = _render()
+    assert "10.00" not in empty
+    assert _render() == empty
+    post_entry(db, user, organization, date(2025, 1, 10), [(cash, 10, 0), (revenue, 0, 10)])
+    january = _render()
+    assert "10.00" in january
+    # Turnovers of a later month are not part of January's figures
+    post_entry(db, user, organization, date(2025, 3, 2), [(cash, 4, 0), (revenue, 0, 4)])
+    assert _render() == january
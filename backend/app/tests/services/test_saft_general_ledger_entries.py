@@ -0,0 +1,92 @@
+from datetime import date
+from xml.etree import ElementTree
+
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.models import JournalEntry
+from app.services.saft.general_ledger_entries import SAFTGeneralLedgerEntries
+from app.tests.conftest import create_organization_membership, create_test_organization
+from app.tests.utils.ledger import create_random_account, post_entry
+from app.tests.utils.user import create_random_user
+
+NS = "{mf:nra:dgti:dxxxx:declaration:v1}"
+
+
+def _render(organization, year: int, month: int, chunk_size: int) -> ElementTree.Element:
+    with Session(engine) as session:
+        section = "".join(
+            SAFTGeneralLedgerEntries(session, organization, year, month, chunk_size=chunk_size).iter_generate()
+        )
+    return _parse(section)
+
+
+def _parse(section: str) -> ElementTree.Element:
+    document = f'<nsSAFT:AuditFile xmlns:nsSAFT="{NS[1:-1]}">{section}</nsSAFT:AuditFile>'
+    return ElementTree.fromstring(document).find(f"{NS}GeneralLedgerEntries")
+
+
+def test_general_ledger_entries_render_posted_month(db: Session) -> None:
+    user = create_random_user(db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization)
+    cash = create_random_account(db, user, organization, "501")
+    revenue = create_random_account(db, user, organization, "702")
+
+    first = post_entry(db, user, organization, date(2025, 3, 3), [(cash, "120.50", 0), (revenue, 0, "120.50")])
+    second = post_entry(db, user, organization, date(2025, 3, 31), [(cash, "0.10", 0), (revenue, 0, "0.10")])
+    post_entry(db, user, organization, date(2025, 4, 1), [(cash, "7.00", 0), (revenue, 0, "7.00")])
+    # An entry header without lines is not posted
+    db.add(JournalEntry(entry_date=date(2025, 3, 10), organization_id=organization.id, created_by_id=user.id))
+    db.commit()
+
+    # chunk_size=1 crosses a chunk boundary
+    section = _render(organization, 2025, 3, chunk_size=1)
+
+    assert section.find(f"{NS}NumberOfEntries").text == "2"
+    assert section.find(f"{NS}TotalDebit").text == "120.60"
+    assert section.find(f"{NS}TotalCredit").text == "120.60"
+    transactions = section.findall(f"{NS}Journal/{NS}Transaction")
+    assert [t.find(f"{NS}TransactionID").text for t in transactions] == [str(first.id), str(second.id)]
+
+    transaction = transactions[0]
+    assert transaction.find(f"{NS}Period").text == "3"
+    assert transaction.find(f"{NS}PeriodYear").text == "2025"
+    assert transaction.find(f"{NS}TransactionDate").text == "2025-03-03"
+    assert transaction.find(f"{NS}SourceID").text == str(user.id)
+    assert transaction.find(f"{NS}SystemEntryDate").text == first.date_created.date().isoformat()
+    lines = {
+        line.find(f"{NS}AccountID").text: line for line in transaction.findall(f"{NS}TransactionLine")
+    }
+    assert set(lines) == {"501", "702"}
+    assert lines["501"].find(f"{NS}SourceDocumentID").text == first.reference
+    assert lines["501"].find(f"{NS}DebitAmount/{NS}Amount").text == "120.50"
+    assert lines["501"].find(f"{NS}DebitAmount/{NS}CurrencyCode").text == "BGN"
+    assert lines["702"].find(f"{NS}CreditAmount/{NS}Amount").text == "120.50"
+    assert lines["702"].find(f"{NS}DebitAmount") is None
+
+
+def test_general_ledger_entries_empty_month_placeholder(db: Session) -> None:
+    organization = create_test_organization(db)
+
+    section = _render(organization, 2025, 3, chunk_size=500)
+
+    assert section.find(f"{NS}NumberOfEntries").text == "0"
+    assert section.find(f"{NS}Journal/{NS}Transaction/{NS}TransactionID").text == "0"
+
+
+def test_general_ledger_entries_leave_the_session_alone(db: Session) -> None:
+    user = create_random_user(db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization)
+    cash = create_random_account(db, user, organization, "501")
+    revenue = create_random_account(db, user, organization, "702")
+    held = post_entry(db, user, organization, date(2025, 3, 3), [(cash, 5, 0), (revenue, 0, 5)])
+    post_entry(db, user, organization, date(2025, 3, 4), [(cash, 6, 0), (revenue, 0, 6)])
+    post_entry(db, user, organization, date(2025, 3, 5), [(cash, 7, 0), (revenue, 0, 7)])
+
+    section = _parse("".join(SAFTGeneralLedgerEntries(db, organization, 2025, 3, chunk_size=1).iter_generate()))
+
+    assert section.find(f"{NS}NumberOfEntries").text == "3"
+    # What the caller had loaded stays attached
+    assert held in db and user in db and organization in db and cash in db
@@ -0,0 +1,73 @@
+from datetime import date
+from xml.etree import ElementTree
+
+import pytest
+from sqlmodel import Session, func, select
+
+from app.core.db import engine, export_snapshot, snapshot_session
+from app.models import JournalEntry
+from app.services.saft_service import SAFT
+from app.tests.conftest import create_organization_membership, create_test_organization
+from app.tests.utils.ledger import create_random_account, post_entry
+from app.tests.utils.user import create_random_user
+
+NS = "{mf:nra:dgti:dxxxx:declaration:v1}"
+
+
+def _count_entries(session: Session, organization_id) -> int:
+    return session.exec(
+        select(func.count()).select_from(JournalEntry).where(JournalEntry.organization_id == organization_id)
+    ).one()
+
+
+def test_snapshot_session_ignores_later_commits(db: Session) -> None:
+    user = create_random_user(db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization)
+    cash = create_random_account(db, user, organization, "501")
+    revenue = create_random_account(db, user, organization, "702")
+    post_entry(db, user, organization, date(2025, 3, 3), [(cash, 10, 0), (revenue, 0, 10)])
+
+    with snapshot_session(engine) as snapshot:
+        assert _count_entries(snapshot, organization.id) == 1
+        snapshot_id = export_snapshot(snapshot)
+
+        post_entry(db, user, organization, date(2025, 3, 4), [(cash, 5, 0), (revenue, 0, 5)])
+
+        assert _count_entries(snapshot, organization.id) == 1
+        # A second connection reads the exported snapshot, not the latest data
+        with snapshot_session(engine, snapshot_id=snapshot_id) as worker:
+            assert _count_entries(worker, organization.id) == 1
+
+    with snapshot_session(engine) as snapshot:
+        assert _count_entries(snapshot, organization.id) == 2
+
+
+def test_snapshot_session_rejects_invalid_snapshot_id() -> None:
+    with pytest.raises(ValueError):
+        with snapshot_session(engine, snapshot_id="1'; DROP TABLE account; --"):
+            pass
+
+
+def test_saft_totals_and_entries_agree_while_posting(db: Session) -> None:
+    user = create_random_user(db)
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization)
+    cash = create_random_account(db, user, organization, "501")
+    revenue = create_random_account(db, user, organization, "702")
+    post_entry(db, user, organization, date(2025, 3, 3), [(cash, 10, 0), (revenue, 0, 10)])
+
+    chunks = SAFT(organization, 2025, 3, use_cache=False).iter_generate("monthly")
+    rendered = []
+    for chunk in chunks:
+        rendered.append(chunk)
+        if "<nsSAFT:GeneralLedgerEntries>" in chunk:
+            break
+    # Posted after the totals were read, before the entries are rendered
+    post_entry(db, user, organization, date(2025, 3, 4), [(cash, 5, 0), (revenue, 0, 5)])
+    rendered.extend(chunks)
+
+    section = ElementTree.fromstring("".join(rendered)).find(f"{NS}GeneralLedgerEntries")
+    assert section.find(f"{NS}NumberOfEntries").text == "1"
+    assert section.find(f"{NS}TotalDebit").text == "10.00"
+    assert len(section.findall(f"{NS}Journal/{NS}Transaction")) == 1
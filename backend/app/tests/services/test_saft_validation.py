@@ -0,0 +1,89 @@
+import gzip
+from pathlib import Path
+
+import pytest
+
+from app.services.saft.validation import SAFTValidator
+
+NAMESPACE = "mf:nra:dgti:dxxxx:declaration:v1"
+
+XSD = f"""<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema"
+           targetNamespace="{NAMESPACE}" elementFormDefault="qualified">
+  <xs:element name="AuditFile">
+    <xs:complexType>
+      <xs:sequence>
+        <xs:element name="Entry" maxOccurs="unbounded">
+          <xs:complexType>
+            <xs:sequence>
+              <xs:element name="Amount" type="xs:decimal"/>
+            </xs:sequence>
+          </xs:complexType>
+        </xs:element>
+      </xs:sequence>
+    </xs:complexType>
+  </xs:element>
+</xs:schema>
+"""
+
+# The NRA template's xmlns:doc value, which is not a valid URI
+OPEN = (
+    '<nsSAFT:AuditFile xmlns:doc="urn:schemas-OECD:schema-extensions:documentation xml:lang=en" '
+    f'xmlns:nsSAFT="{NAMESPACE}">\n'
+)
+CLOSE = "</nsSAFT:AuditFile>\n"
+
+
+def _entries(*amounts: str) -> str:
+    return "".join(f"  <nsSAFT:Entry><nsSAFT:Amount>{amount}</nsSAFT:Amount></nsSAFT:Entry>\n" for amount in amounts)
+
+
+@pytest.fixture()
+def xsd_path(tmp_path: Path) -> str:
+    path = tmp_path / "saft.xsd"
+    path.write_text(XSD, encoding="utf-8")
+    return str(path)
+
+
+def test_valid_file_plain_and_gzip(tmp_path: Path, xsd_path: str) -> None:
+    document = OPEN + _entries(*["1.00"] * 5000) + CLOSE
+    plain = tmp_path / "saft.xml"
+    plain.write_text(document, encoding="utf-8")
+    compressed = tmp_path / "saft.xml.gz"
+    compressed.write_bytes(gzip.compress(document.encode("utf-8")))
+
+    validator = SAFTValidator(xsd_path)
+    for path in (plain, compressed):
+        report = validator.validate_file(path)
+        assert report.is_valid
+        assert report.errors == []
+
+
+def test_schema_errors_have_line_numbers_and_are_capped(tmp_path: Path, xsd_path: str) -> None:
+    path = tmp_path / "saft.xml"
+    path.write_text(OPEN + _entries("1.00", "abc", "2.00", "x", "y") + CLOSE, encoding="utf-8")
+
+    report = SAFTValidator(xsd_path, max_errors=2).validate_file(path)
+
+    assert not report.is_valid
+    assert report.truncated
+    assert [error.line for error in report.errors] == [3, 5]
+    assert all("Amount" in error.path for error in report.errors)
+
+
+def test_malformed_file_reports_syntax_error(tmp_path: Path, xsd_path: str) -> None:
+    path = tmp_path / "saft.xml"
+    path.write_text(OPEN + _entries("1.00") + "  <nsSAFT:Entry>\n", encoding="utf-8")
+
+    report = SAFTValidator(xsd_path).validate_file(path)
+
+    assert not report.is_valid
+    assert len(report.errors) == 1
+    assert report.errors[0].path is None
+    assert report.errors[0].line is not None
+
+
+def test_validator_requires_a_schema(monkeypatch) -> None:
+    monkeypatch.setattr("app.services.saft.validation.settings.SAFT_XSD_PATH", None)
+    with pytest.raises(ValueError):
+        SAFTValidator()
@@ -0,0 +1,85 @@
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlmodel import Session, select
+
+from app.models import VatPurchaseRegister, VatReturn, VatSalesRegister
+from app.services.vat_declaration import VatDeclarationEngine, VatTotals
+from app.tests.conftest import create_test_organization
+from app.tests.utils.vat import delete_vat_registers, purchase_register_row, sales_register_row
+
+
+@pytest.fixture()
+def organization(db: Session):
+    organization = create_test_organization(db)
+    yield organization
+    delete_vat_registers(db, organization)
+
+
+def test_declaration_matches_register_rows(db: Session, organization) -> None:
+    db.add_all([
+        sales_register_row(organization, date(2025, 5, 2), "1", "100.00", column_code="01-11"),
+        sales_register_row(organization, date(2025, 5, 9), "2", "250.55", column_code="01-11"),
+        sales_register_row(organization, date(2025, 5, 9), "3", "80.00", vat_rate="9", column_code="01-13"),
+        sales_register_row(organization, date(2025, 5, 20), "4", "40.00", vat_rate="0", column_code="01-19"),
+        sales_register_row(organization, date(2025, 6, 1), "5", "999.00", column_code="01-11"),
+        purchase_register_row(organization, date(2025, 5, 3), "P1", "50.00", "10.00"),
+        purchase_register_row(organization, date(2025, 5, 4), "P2", "20.00", "4.00", document_type="03"),
+        purchase_register_row(organization, date(2025, 5, 5), "P3", "30.00", "6.00"),
+    ])
+    db.commit()
+
+    totals = VatDeclarationEngine(db, organization.id, 2025, 5).compute()
+
+    # What looping over the register rows gives
+    sales = db.exec(
+        select(VatSalesRegister).where(
+            VatSalesRegister.organization_id == organization.id,
+            VatSalesRegister.period_year == 2025,
+            VatSalesRegister.period_month == 5,
+        )
+    ).all()
+    by_column = defaultdict(VatTotals)
+    for row in sales:
+        by_column[row.column_code].add(VatTotals(1, row.taxable_base, row.vat_amount))
+    purchases = db.exec(
+        select(VatPurchaseRegister).where(
+            VatPurchaseRegister.organization_id == organization.id,
+            VatPurchaseRegister.period_year == 2025,
+            VatPurchaseRegister.period_month == 5,
+        )
+    ).all()
+
+    assert totals.sales == VatTotals(
+        len(sales), sum(row.taxable_base for row in sales), sum(row.vat_amount for row in sales)
+    )
+    assert totals.sales == VatTotals(4, Decimal("470.55"), Decimal("77.31"))
+    for column_code, expected in by_column.items():
+        assert totals.sales_column(column_code) == expected
+    assert totals.sales_column("01-11") == VatTotals(2, Decimal("350.55"), Decimal("70.11"))
+    assert len(totals.sales_by_group) == 3
+
+    assert totals.purchases == VatTotals(
+        len(purchases), sum(row.taxable_base for row in purchases), sum(row.vat_amount for row in purchases)
+    )
+    assert totals.purchases_by_document_type["01"] == VatTotals(2, Decimal("80.00"), Decimal("16.00"))
+    assert totals.purchases_by_document_type["03"] == VatTotals(1, Decimal("20.00"), Decimal("4.00"))
+    assert totals.vat_result == Decimal("57.31")
+
+    vat_return = VatDeclarationEngine(db, organization.id, 2025, 5).fill_vat_return(
+        VatReturn(organization_id=organization.id, period_year=2025, period_month=5), totals
+    )
+    assert vat_return.vat_payable == Decimal("57.31")
+    assert vat_return.vat_refundable == Decimal(0)
+    assert vat_return.total_deductible_vat == Decimal("20.00")
+
+
+def test_declaration_of_an_empty_period(db: Session, organization) -> None:
+    totals = VatDeclarationEngine(db, organization.id, 2025, 5).compute()
+
+    assert totals.sales == VatTotals()
+    assert totals.purchases == VatTotals()
+    assert totals.sales_by_group == {}
+    assert totals.vat_result == Decimal(0)
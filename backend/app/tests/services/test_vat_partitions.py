@@ -0,0 +1,135 @@
+from collections.abc import Generator
+from datetime import date
+
+import pytest
+from sqlalchemy import Connection, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.models import VatPurchaseRegister, VatSalesRegister
+from app.services.vat_partitions import (
+    VatRegisterPartitions,
+    partition_registers,
+    unpartition_registers,
+)
+from app.tests.conftest import create_test_organization
+from app.tests.utils.vat import purchase_register_row, sales_register_row
+
+SALES = VatSalesRegister.__tablename__
+PURCHASES = VatPurchaseRegister.__tablename__
+
+
+@pytest.fixture()
+def connection() -> Generator[Connection, None, None]:
+    """DDL is transactional on PostgreSQL: everything is rolled back afterwards."""
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        yield connection
+        transaction.rollback()
+
+
+def _organization(db: Session):
+    """
+    A committed organization detached from the shared session, whose open
+    transaction would otherwise block the DDL on the referencing registers.
+    """
+    organization = create_test_organization(db)
+    db.expunge(organization)
+    db.commit()
+    return organization
+
+
+def _insert(connection: Connection, row) -> None:
+    values = row.model_dump(exclude_none=True)
+    connection.execute(insert(type(row).__table__).values(**values))
+
+
+def _rows(connection: Connection, table: str, organization) -> list[tuple]:
+    return list(connection.execute(
+        text(f"SELECT id, period_year, period_month FROM {table} WHERE organization_id = :id ORDER BY id"),
+        {"id": organization.id},
+    ))
+
+
+def _primary_key(connection: Connection, table: str) -> str:
+    return connection.scalar(
+        text("SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:name) AND contype = 'p'"),
+        {"name": table},
+    )
+
+
+def _partition_of(connection: Connection, table: str, row_id) -> str:
+    return connection.scalar(text(f"SELECT tableoid::regclass::text FROM {table} WHERE id = :id"), {"id": row_id})
+
+
+def test_partition_and_unpartition_keep_rows_indexes_and_keys(db: Session, connection: Connection) -> None:
+    organization = _organization(db)
+    sales = [
+        sales_register_row(organization, date(2019, 12, 31), "1", "10.00"),
+        sales_register_row(organization, date(2025, 5, 2), "2", "20.00"),
+    ]
+    purchase = purchase_register_row(organization, date(2025, 5, 3), "P1", "30.00", "6.00")
+    for row in [*sales, purchase]:
+        _insert(connection, row)
+    before = {table: _rows(connection, table, organization) for table in (SALES, PURCHASES)}
+    indexes = set(connection.scalars(text("SELECT indexname FROM pg_indexes WHERE tablename = :name"), {"name": SALES}))
+    primary_key = _primary_key(connection, SALES)
+
+    partition_registers(connection, [2030])
+
+    for table in (SALES, PURCHASES):
+        partitions = VatRegisterPartitions(connection, table)
+        assert partitions.is_partitioned()
+        assert _rows(connection, table, organization) == before[table]
+        assert {date.today().year, date.today().year + 1, 2030} <= set(partitions.years())
+    assert 2019 in VatRegisterPartitions(connection, SALES).years()
+    assert _partition_of(connection, SALES, sales[0].id) == f"{SALES}_2019"
+    assert _partition_of(connection, SALES, sales[1].id) == f"{SALES}_2025"
+    assert _primary_key(connection, SALES) == primary_key
+    assert indexes <= set(
+        connection.scalars(text("SELECT indexname FROM pg_indexes WHERE tablename = :name"), {"name": SALES})
+    )
+
+    # ON CONFLICT needs the unique document key to exist on the partitioned table
+    connection.execute(
+        insert(VatSalesRegister.__table__)
+        .values(**sales_register_row(organization, date(2025, 5, 9), "3", "25.00").model_dump(exclude_none=True))
+        .on_conflict_do_nothing(index_elements=["invoice_id", "period_year", "period_month"])
+    )
+    assert len(_rows(connection, SALES, organization)) == 3
+    before[SALES] = _rows(connection, SALES, organization)
+    foreign_keys = connection.scalar(
+        text("SELECT count(*) FROM pg_constraint WHERE conrelid = to_regclass(:name) AND contype = 'f'"),
+        {"name": SALES},
+    )
+    assert foreign_keys >= 1
+
+    # Idempotent
+    partition_registers(connection)
+
+    unpartition_registers(connection)
+
+    for table in (SALES, PURCHASES):
+        assert not VatRegisterPartitions(connection, table).is_partitioned()
+        assert _rows(connection, table, organization) == before[table]
+    assert _primary_key(connection, SALES) == primary_key
+
+
+def test_create_and_detach_a_year(db: Session, connection: Connection) -> None:
+    organization = _organization(db)
+    partition_registers(connection)
+    partitions = VatRegisterPartitions(connection, SALES)
+    row = sales_register_row(organization, date(2011, 3, 1), "1", "10.00")
+    _insert(connection, row)
+    assert 2011 not in partitions.years()
+    assert _partition_of(connection, SALES, row.id) == f"{SALES}_default"
+
+    assert partitions.create_year(2011)
+    assert not partitions.create_year(2011)
+    assert _partition_of(connection, SALES, row.id) == f"{SALES}_2011"
+
+    assert partitions.detach_year(2011) == f"{SALES}_2011"
+    assert partitions.detach_year(2011) is None
+    assert _rows(connection, SALES, organization) == []
+    assert connection.scalar(text(f"SELECT count(*) FROM {SALES}_2011")) == 1
@@ -0,0 +1,158 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+from sqlmodel import Session, select
+
+from app.crud.invoice import create_invoice
+from app.models import (
+    Contraagent,
+    InvoiceCreate,
+    InvoiceLineCreate,
+    InvoiceStatus,
+    Purchase,
+    VatPurchaseRegister,
+    VatSalesRegister,
+)
+from app.services.document_workflow_service import _sync_invoice_vat_register
+from app.services.vat_register import VatRegisterService
+from app.tests.conftest import create_organization_membership, create_test_organization
+from app.tests.utils.store import create_random_store
+from app.tests.utils.user import create_random_user
+from app.tests.utils.vat import delete_vat_registers
+
+
+@pytest.fixture()
+def user(db: Session):
+    return create_random_user(db)
+
+
+@pytest.fixture()
+def organization(db: Session, user):
+    organization = create_test_organization(db)
+    create_organization_membership(db, user, organization)
+    yield organization
+    delete_vat_registers(db, organization)
+
+
+@pytest.fixture()
+def contraagent(db: Session, user, organization) -> Contraagent:
+    contraagent = Contraagent(
+        name="Клиент ООД",
+        vat_number="BG123456789",
+        organization_id=organization.id,
+        created_by_id=user.id,
+    )
+    db.add(contraagent)
+    db.commit()
+    return contraagent
+
+
+def _sales_rows(db: Session, invoice_id) -> list[VatSalesRegister]:
+    return list(db.exec(select(VatSalesRegister).where(VatSalesRegister.invoice_id == invoice_id)))
+
+
+def _create_invoice(db: Session, user, organization, contraagent, status: InvoiceStatus):
+    invoice_in = InvoiceCreate(
+        issue_date=date(2025, 3, 28),
+        billing_name=contraagent.name,
+        billing_vat_number=contraagent.vat_number,
+        contact_id=contraagent.id,
+        invoice_no="0000000001",
+        invoice_lines=[
+            InvoiceLineCreate(description="Услуга", quantity=Decimal(2), unit_price=Decimal("50.00")),
+        ],
+    )
+    invoice = create_invoice(session=db, invoice_in=invoice_in, organization=organization, user=user)
+    invoice.status = status
+    db.add(invoice)
+    db.flush()
+    VatRegisterService(db).sync_invoice(invoice)
+    db.commit()
+    return invoice
+
+
+def test_create_invoice_syncs_only_posted_invoices(db: Session, user, organization, contraagent) -> None:
+    invoice = _create_invoice(db, user, organization, contraagent, InvoiceStatus.DRAFT)
+    assert _sales_rows(db, invoice.id) == []
+
+    invoice.status = InvoiceStatus.ISSUED
+    db.add(invoice)
+    db.flush()
+    VatRegisterService(db).sync_invoice(invoice)
+    db.commit()
+    (row,) = _sales_rows(db, invoice.id)
+    assert (row.period_year, row.period_month) == (2025, 3)
+    assert row.taxable_base == Decimal("100.00")
+    assert row.vat_amount == Decimal("20.00")
+    assert row.recipient_country == "BG"
+
+
+def test_sync_invoice_moves_the_row_when_the_tax_event_date_changes(
+    db: Session, user, organization, contraagent
+) -> None:
+    invoice = _create_invoice(db, user, organization, contraagent, InvoiceStatus.ISSUED)
+    (row,) = _sales_rows(db, invoice.id)
+    assert (row.period_year, row.period_month) == (2025, 3)
+
+    invoice.tax_event_date = date(2025, 4, 2)
+    db.add(invoice)
+    db.flush()
+    VatRegisterService(db).sync_invoice(invoice)
+    db.commit()
+
+    db.expire_all()
+    (row,) = _sales_rows(db, invoice.id)
+    assert (row.period_year, row.period_month) == (2025, 4)
+    assert row.tax_event_date == date(2025, 4, 2)
+    assert row.document_date == date(2025, 3, 28)
+
+
+def test_workflow_status_change_syncs_the_register(db: Session, user, organization, contraagent) -> None:
+    invoice = _create_invoice(db, user, organization, contraagent, InvoiceStatus.ISSUED)
+    assert len(_sales_rows(db, invoice.id)) == 1
+
+    # What DocumentWorkflowService.transition_document runs after its UPDATE
+    invoice.status = InvoiceStatus.CANCELLED
+    db.add(invoice)
+    db.flush()
+    _sync_invoice_vat_register(db, invoice.id)
+    db.commit()
+    assert _sales_rows(db, invoice.id) == []
+
+
+def test_rebuild_period_enters_purchases_of_the_month(db: Session, user, organization, contraagent) -> None:
+    store = create_random_store(db, user, organization)
+    purchases = [
+        Purchase(
+            date_purchase=date_purchase,
+            amount=amount,
+            organization_id=organization.id,
+            created_by_id=user.id,
+            contraagent_id=contraagent.id,
+            store_id=store.id,
+        )
+        for date_purchase, amount in (
+            (datetime(2025, 5, 1, 8, tzinfo=timezone.utc), 100.0),
+            (datetime(2025, 5, 31, 12, tzinfo=timezone.utc), 12.345),
+            (datetime(2025, 6, 1, 8, tzinfo=timezone.utc), 50.0),
+        )
+    ]
+    db.add_all(purchases)
+    db.flush()
+    VatRegisterService(db).sync_purchase(purchases[0])
+    db.commit()
+
+    sales, purchase_rows = VatRegisterService(db).rebuild_period(organization.id, 2025, 5)
+    db.commit()
+
+    assert (sales, purchase_rows) == (0, 2)
+    rows = db.exec(
+        select(VatPurchaseRegister)
+        .where(VatPurchaseRegister.organization_id == organization.id)
+        .order_by(VatPurchaseRegister.document_date)
+    ).all()
+    assert [row.purchase_id for row in rows] == [purchases[0].id, purchases[1].id]
+    assert [row.taxable_base for row in rows] == [Decimal("100.00"), Decimal("12.35")]
+    assert [row.vat_amount for row in rows] == [Decimal("20.00"), Decimal("2.47")]
+    assert rows[1].supplier_vat_number == "BG123456789"
@@ -0,0 +1,57 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from sqlmodel import Session
+
+from app.services import vat_service
+from app.services.nra_layout import PRODAGBI
+from app.services.vat_service import VatService, iter_encoded
+from app.tests.conftest import create_test_organization
+from app.tests.utils.vat import delete_vat_registers, sales_register_row
+
+
+def test_iter_encoded_matches_one_shot_encoding(monkeypatch) -> None:
+    monkeypatch.setattr(vat_service, "ENCODE_BLOCK_SIZE", 10)
+    lines = [f"Ред {index} Дневник продажби\r\n" for index in range(20)]
+
+    blocks = list(iter_encoded(lines))
+
+    assert len(blocks) > 1
+    assert b"".join(blocks) == "".join(lines).encode("cp1251")
+    assert all(isinstance(block, bytes) for block in blocks)
+    assert list(iter_encoded([])) == []
+
+
+def test_iter_encoded_rejects_characters_outside_cp1251() -> None:
+    with pytest.raises(UnicodeEncodeError):
+        list(iter_encoded(["€ ok\r\n", "漢字\r\n"]))
+
+
+@pytest.fixture()
+def organization(db: Session):
+    organization = create_test_organization(db)
+    yield organization
+    delete_vat_registers(db, organization)
+
+
+def test_sales_register_streams_rows_in_document_order(db: Session, organization) -> None:
+    db.add_all([
+        sales_register_row(organization, date(2025, 1, 20), "0000000003", "300.00", "Трето ООД"),
+        sales_register_row(organization, date(2025, 1, 5), "0000000001", "100.00", "Първо ЕООД"),
+        sales_register_row(organization, date(2025, 1, 10), "0000000002", "200.50", "Второ АД"),
+        sales_register_row(organization, date(2025, 2, 1), "0000000004", "1.00", "Друг период"),
+    ])
+    db.commit()
+
+    service = VatService(organization, 2025, 1, session=db)
+    service.FETCH_SIZE = 2
+    data = b"".join(iter_encoded(service.iter_sales_register())).decode("cp1251")
+
+    records = [PRODAGBI.parse(line) for line in data.splitlines()]
+    assert [record["row_number"] for record in records] == [1, 2, 3]
+    assert [record["document_number"] for record in records] == ["0000000001", "0000000002", "0000000003"]
+    assert [record["recipient_name"] for record in records] == ["Първо ЕООД", "Второ АД", "Трето ООД"]
+    assert records[1]["document_date"] == date(2025, 1, 10)
+    assert records[1]["taxable_base"] == Decimal("200.50")
+    assert records[1]["vat_amount"] == Decimal("40.10")
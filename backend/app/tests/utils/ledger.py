@@ -0,0 +1,51 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlmodel import Session
+
+from app.models import Account, JournalEntry, Organization, User
+from app.services.journal import JournalService, Posting, PostingLine
+from app.tests.utils.utils import random_lower_string
+
+
+def create_random_account(
+    db: Session,
+    user: User,
+    organization: Organization,
+    code: str | None = None,
+    opening_balance: float = 0,
+) -> Account:
+    account = Account(
+        code=code or random_lower_string()[:8],
+        name=random_lower_string(),
+        opening_balance=opening_balance,
+        balance=opening_balance,
+        organization_id=organization.id,
+        created_by_id=user.id,
+    )
+    db.add(account)
+    db.commit()
+    db.refresh(account)
+    return account
+
+
+def post_entry(
+    db: Session,
+    user: User,
+    organization: Organization,
+    entry_date: date,
+    lines: list[tuple[Account, str | int, str | int]],
+) -> JournalEntry:
+    """Post a journal entry of (account, debit, credit) lines through JournalService."""
+    posting = Posting(
+        source=f"Test:{random_lower_string()}",
+        entry_date=entry_date,
+        description="Test entry",
+        lines=[
+            PostingLine(account.id, debit=Decimal(debit), credit=Decimal(credit))
+            for account, debit, credit in lines
+        ],
+    )
+    result = JournalService(db, user, organization).post_batch([posting])[0]
+    assert result.ok, result.error
+    return db.get(JournalEntry, result.journal_entry_id)
@@ -0,0 +1,68 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlmodel import Session, delete
+
+from app.models import Organization, VatPurchaseRegister, VatSalesRegister
+
+
+def sales_register_row(
+    organization: Organization,
+    document_date: date,
+    document_number: str,
+    taxable_base: str,
+    recipient_name: str = "Клиент ООД",
+    vat_rate: str = "20",
+    **fields,
+) -> VatSalesRegister:
+    base = Decimal(taxable_base)
+    rate = Decimal(vat_rate)
+    vat_amount = (base * rate / 100).quantize(Decimal("0.01"))
+    values = {
+        "organization_id": organization.id,
+        "period_year": document_date.year,
+        "period_month": document_date.month,
+        "document_date": document_date,
+        "tax_event_date": document_date,
+        "document_type": "01",
+        "document_number": document_number,
+        "recipient_name": recipient_name,
+        "recipient_vat_number": "BG123456789",
+        "taxable_base": base,
+        "vat_rate": rate,
+        "vat_amount": vat_amount,
+        "total_amount": base + vat_amount,
+    }
+    values.update(fields)
+    return VatSalesRegister(**values)
+
+
+def purchase_register_row(
+    organization: Organization,
+    document_date: date,
+    document_number: str,
+    taxable_base: str,
+    vat_amount: str,
+    **fields,
+) -> VatPurchaseRegister:
+    values = {
+        "organization_id": organization.id,
+        "period_year": document_date.year,
+        "period_month": document_date.month,
+        "document_date": document_date,
+        "document_type": "01",
+        "document_number": document_number,
+        "supplier_vat_number": "BG987654321",
+        "supplier_name": "Доставчик ЕООД",
+        "taxable_base": Decimal(taxable_base),
+        "vat_amount": Decimal(vat_amount),
+    }
+    values.update(fields)
+    return VatPurchaseRegister(**values)
+
+
+def delete_vat_registers(db: Session, organization: Organization) -> None:
+    """Register rows do not cascade with their organization."""
+    db.exec(delete(VatSalesRegister).where(VatSalesRegister.organization_id == organization.id))
+    db.exec(delete(VatPurchaseRegister).where(VatPurchaseRegister.organization_id == organization.id))
+    db.commit()